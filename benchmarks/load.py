@@ -0,0 +1,663 @@
+"""
+Нагрузочный тест MCP серверов через SSE или streamable HTTP транспорт.
+
+Запускает симулятор upstream (mcp_common.simulator) и MCP Gateway с
+выбранными серверами, открывает N одновременных MCP сессий (/sse +
+/messages/ или /mcp при --transport streamable) и вызывает инструменты
+в реалистичной пропорции. Результат -
+JSON с пропускной способностью, p50/p95/p99 времени вызова, ростом RSS и
+памятью на сессию, пригодный для сравнения между версиями:
+
+    python benchmarks/load.py --servers weather,ip --sessions 50 \\
+        --duration 30 --output baseline.json
+    # ... изменения ...
+    python benchmarks/load.py --servers weather,ip --sessions 50 \\
+        --duration 30 --baseline baseline.json --threshold 0.1
+
+С --baseline код возврата 1, если какая-то метрика ухудшилась больше
+порога. --url направляет нагрузку на уже запущенный шлюз или сервер
+(RSS тогда измеряется только с --pid).
+
+Память на сессию двух транспортов сравнивается запуском с одинаковыми
+параметрами и разным --transport.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamable_http_client
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+CITIES = [
+    "Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань",
+    "Нижний Новгород", "Челябинск", "Самара", "Омск", "Ростов-на-Дону",
+    "Уфа", "Красноярск", "Воронеж", "Пермь", "Волгоград", "London",
+    "Paris", "Berlin", "Tokyo", "New York",
+]
+QUERIES = [
+    "python asyncio", "погода завтра", "mcp protocol", "httpx http2",
+    "starlette sse", "новости технологий", "rust vs go", "docker compose",
+    "prometheus metrics", "uvicorn workers",
+]
+IPS = [f"203.0.113.{i}" for i in range(1, 51)] + ["8.8.8.8", "1.1.1.1"]
+TITLES = ["Python", "Москва", "Linux", "HTTP", "Python (язык программирования)"]
+
+
+@dataclass
+class ToolCall:
+    """Инструмент в смеси нагрузки"""
+    tool: str
+    weight: int
+    arguments: List[Dict[str, Any]] = field(default_factory=lambda: [{}])
+
+
+# Смеси вызовов по серверам шлюза. В аргументах {upstream} заменяется на
+# адрес симулятора
+SCENARIOS: Dict[str, List[ToolCall]] = {
+    "weather": [
+        ToolCall("get_today_weather", 3, [{"city": c} for c in CITIES]),
+        ToolCall("get_weekly_forecast", 1, [{"city": c} for c in CITIES]),
+    ],
+    "search": [
+        ToolCall("search_web", 4, [{"query": q, "max_results": 10}
+                                   for q in QUERIES]),
+        ToolCall("search_news", 2, [{"query": q, "max_results": 10}
+                                    for q in QUERIES]),
+        ToolCall("search_images", 1, [{"query": q, "max_results": 10}
+                                      for q in QUERIES]),
+        ToolCall("search_videos", 1, [{"query": q, "max_results": 10}
+                                      for q in QUERIES]),
+    ],
+    "ip": [
+        ToolCall("ip_address_query", 3, [{"ip": ip} for ip in IPS]),
+        ToolCall("ip_address_query_detailed", 1, [{"ip": ip} for ip in IPS]),
+    ],
+    "ufc": [
+        ToolCall("get_upcoming_fights", 3),
+        ToolCall("get_ufc_rankings", 1),
+        ToolCall("get_title_fights", 1),
+    ],
+    "wikipedia": [
+        ToolCall("search_wikipedia", 3, [{"query": q, "limit": 10}
+                                         for q in QUERIES]),
+        ToolCall("get_wikipedia_summary", 3, [{"title": t} for t in TITLES]),
+        ToolCall("get_wikipedia_content", 1, [{"title": t} for t in TITLES]),
+        ToolCall("get_wikipedia_sections", 1, [{"title": t} for t in TITLES]),
+        ToolCall("get_wikipedia_links", 1, [{"title": t} for t in TITLES]),
+    ],
+    "yandex": [
+        ToolCall("search_web", 1, [{"query": q} for q in QUERIES]),
+    ],
+    "fetch": [
+        ToolCall("fetch_page", 1, [
+            {"url": f"{{upstream}}/pages.example/articles/{i}"}
+            for i in range(20)
+        ]),
+    ],
+    "artifact-registry": [
+        ToolCall("list_registries", 3),
+        ToolCall("get_registry", 1, [
+            {"registry_id": "550e8400-e29b-41d4-a716-446655440000"}
+        ]),
+    ],
+}
+
+# Учетные данные для серверов, которые без них не запускаются. Запросы
+# уходят на симулятор, настоящие ключи не нужны
+SIMULATOR_ENV = {
+    "YANDEX_API_KEY": "simulated",
+    "YANDEX_FOLDER_ID": "simulated",
+    "CLOUD_RU_KEY_ID": "simulated",
+    "CLOUD_RU_SECRET": "simulated",
+    "CLOUD_RU_PROJECT_ID": "simulated",
+}
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга
+
+    Args:
+        values: Значения (в любом порядке)
+        q: Доля от 0 до 1
+
+    Returns:
+        Значение перцентиля (0, если значений нет)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(q * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """Сводка времени вызовов в миллисекундах"""
+    if not latencies:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    return {
+        "p50": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean": round(sum(latencies) / len(latencies) * 1000, 2),
+        "max": round(max(latencies) * 1000, 2),
+    }
+
+
+@dataclass
+class Sample:
+    """Один вызов инструмента"""
+    server: str
+    tool: str
+    latency: float
+    ok: bool
+
+
+def summarize(samples: Sequence[Sample], duration: float) -> Dict[str, Any]:
+    """
+    Сводка вызовов по серверам и инструментам
+
+    Args:
+        samples: Вызовы, завершившиеся в окне измерения
+        duration: Длительность окна измерения, секунды
+
+    Returns:
+        {"total": {...}, "servers": {server: {..., "tools": {...}}}}
+    """
+    def block(items: Sequence[Sample]) -> Dict[str, Any]:
+        errors = sum(1 for s in items if not s.ok)
+        return {
+            "calls": len(items),
+            "errors": errors,
+            "error_rate": round(errors / len(items), 4) if items else 0.0,
+            "throughput_rps": round(len(items) / duration, 2)
+            if duration > 0 else 0.0,
+            "latency_ms": latency_summary([s.latency for s in items]),
+        }
+
+    servers: Dict[str, Any] = {}
+    for server in sorted({s.server for s in samples}):
+        items = [s for s in samples if s.server == server]
+        servers[server] = block(items)
+        servers[server]["tools"] = {
+            tool: block([s for s in items if s.tool == tool])
+            for tool in sorted({s.tool for s in items})
+        }
+    return {"total": block(samples), "servers": servers}
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1
+) -> List[str]:
+    """
+    Сравнивает результат с базовым
+
+    Ухудшением считается рост p50/p95/p99 или памяти на сессию и падение
+    пропускной способности больше чем на threshold (доля).
+
+    Returns:
+        Описания ухудшений (пустой список - регрессий нет)
+    """
+    regressions = []
+
+    def check(name: str, old: Optional[float], new: Optional[float],
+              higher_is_better: bool = False) -> None:
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        if higher_is_better:
+            change = -change
+        if change > threshold:
+            regressions.append(
+                f"{name}: {old} → {new} ({change:+.0%} хуже)"
+            )
+
+    blocks = {"total": (baseline.get("total"), current.get("total"))}
+    for server, block in current.get("servers", {}).items():
+        blocks[server] = (baseline.get("servers", {}).get(server), block)
+
+    for name, (old, new) in blocks.items():
+        if not old or not new:
+            continue
+        check(f"{name} throughput_rps", old["throughput_rps"],
+              new["throughput_rps"], higher_is_better=True)
+        for key in ("p50", "p95", "p99"):
+            check(f"{name} {key}_ms", old["latency_ms"][key],
+                  new["latency_ms"][key])
+
+    check("per_session_kb",
+          baseline.get("memory", {}).get("per_session_kb"),
+          current.get("memory", {}).get("per_session_kb"))
+    return regressions
+
+
+def read_rss(pid: Optional[int]) -> Optional[int]:
+    """RSS процесса в байтах из /proc (None вне Linux или без pid)"""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(url: str, process: subprocess.Popen,
+                      timeout: float = 60.0) -> httpx.Response:
+    """Ждет, пока процесс начнет отвечать на url"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f"Процесс завершился с кодом {process.returncode}: {url}"
+                )
+            try:
+                return await client.get(url, timeout=1.0)
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Не дождались запуска: {url}")
+
+
+class Stand:
+    """Симулятор upstream и MCP Gateway в отдельных процессах"""
+
+    def __init__(self, servers: Sequence[str], args: argparse.Namespace):
+        self.servers = list(servers)
+        self.args = args
+        self.processes: List[subprocess.Popen] = []
+        self.upstream_url = ""
+        self.url = ""
+        self.pid: Optional[int] = None
+        self._cache_dir = tempfile.TemporaryDirectory(prefix="mcp-load-")
+
+    async def __aenter__(self) -> "Stand":
+        simulator_port = _free_port()
+        self.upstream_url = f"http://127.0.0.1:{simulator_port}"
+        simulator = self._spawn([
+            "-m", "mcp_common.simulator",
+            "--port", str(simulator_port),
+            "--latency", str(self.args.latency),
+            "--jitter", str(self.args.jitter),
+            "--error-rate", str(self.args.error_rate),
+            "--seed", str(self.args.seed),
+        ], os.environ.copy())
+        await _wait_ready(f"{self.upstream_url}/_simulator/stats", simulator)
+
+        gateway_port = _free_port()
+        self.url = f"http://127.0.0.1:{gateway_port}"
+        env = {**SIMULATOR_ENV, **os.environ}
+        env.update({
+            "MCP_GATEWAY_PORT": str(gateway_port),
+            "MCP_GATEWAY_SERVERS": ",".join(self.servers),
+            "MCP_UPSTREAM_BASE_URL": self.upstream_url,
+            # Квоты настоящих провайдеров к симулятору не относятся
+            "MCP_RATELIMIT_ENABLED": "false",
+            "MCP_WORKERS": "1",
+            "MCP_CACHE_DIR": self._cache_dir.name,
+        })
+        if self.args.no_cache:
+            env["MCP_CACHE_ENABLED"] = "false"
+        gateway = self._spawn(["server.py"], env)
+        response = await _wait_ready(f"{self.url}/", gateway)
+        missing = set(self.servers) - set(response.json())
+        if missing:
+            raise RuntimeError(
+                f"Серверы не загружены шлюзом: {', '.join(sorted(missing))}"
+            )
+        self.pid = gateway.pid
+        return self
+
+    def _spawn(self, argv: List[str], env: Dict[str, str]) -> subprocess.Popen:
+        process = subprocess.Popen(
+            [sys.executable, *argv],
+            cwd=ROOT_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=None if self.args.verbose else subprocess.DEVNULL,
+        )
+        self.processes.append(process)
+        return process
+
+    async def __aexit__(self, *exc_info) -> None:
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._cache_dir.cleanup()
+
+
+class LoadRun:
+    """Нагрузка: N сессий, вызывающих инструменты до истечения времени"""
+
+    def __init__(
+        self,
+        url: str,
+        servers: Sequence[str],
+        sessions: int,
+        duration: float,
+        warmup: float,
+        upstream_url: str = "",
+        seed: int = 0,
+        pid: Optional[int] = None,
+        single_server: bool = False,
+        transport: str = "sse",
+    ):
+        """
+        Args:
+            url: Адрес шлюза (или сервера при single_server)
+            servers: Серверы шлюза, сессии распределяются по ним по кругу
+            sessions: Число одновременных сессий
+            duration: Длительность измерения, секунды
+            warmup: Прогрев перед измерением, секунды
+            upstream_url: Адрес симулятора для аргументов с {upstream}
+            seed: Зерно выбора инструментов и аргументов
+            pid: Процесс сервера для измерения RSS
+            single_server: url - отдельный сервер, а не шлюз
+            transport: sse или streamable (POST /mcp без сессии на сервере)
+        """
+        self.url = url.rstrip("/")
+        self.servers = list(servers)
+        self.sessions = sessions
+        self.duration = duration
+        self.warmup = warmup
+        self.upstream_url = upstream_url
+        self.seed = seed
+        self.pid = pid
+        self.single_server = single_server
+        self.transport = transport
+        self.samples: List[Sample] = []
+        self.failed_sessions = 0
+        self._ready = 0
+        self._all_ready = asyncio.Event()
+        self._start = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._measure_from = 0.0
+        self._measure_to = 0.0
+
+    def _endpoint_url(self, server: str) -> str:
+        endpoint = "mcp" if self.transport == "streamable" else "sse"
+        if self.single_server:
+            return f"{self.url}/{endpoint}"
+        return f"{self.url}/{server}/{endpoint}"
+
+    def _connect(self, server: str):
+        """Клиент транспорта: контекст с потоками для ClientSession"""
+        if self.transport == "streamable":
+            return streamable_http_client(self._endpoint_url(server))
+        return sse_client(self._endpoint_url(server))
+
+    def _arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value.replace("{upstream}", self.upstream_url)
+            if isinstance(value, str) else value
+            for key, value in arguments.items()
+        }
+
+    def _check_all_ready(self) -> None:
+        if self._ready + self.failed_sessions >= self.sessions:
+            self._all_ready.set()
+
+    async def _session(self, number: int) -> None:
+        """Одна MCP сессия: подключение, ожидание старта, вызовы"""
+        server = self.servers[number % len(self.servers)]
+        mix = SCENARIOS[server]
+        rng = random.Random(self.seed * 100003 + number)
+        loop = asyncio.get_running_loop()
+        opened = False
+        try:
+            async with self._connect(server) as streams:
+                async with ClientSession(*streams[:2]) as session:
+                    await session.initialize()
+                    opened = True
+                    self._ready += 1
+                    self._check_all_ready()
+                    await self._start.wait()
+                    while not self._stop.is_set():
+                        call = rng.choices(
+                            mix, weights=[c.weight for c in mix]
+                        )[0]
+                        arguments = self._arguments(rng.choice(call.arguments))
+                        started = loop.time()
+                        try:
+                            result = await session.call_tool(
+                                call.tool, arguments,
+                                read_timeout_seconds=timedelta(seconds=60),
+                            )
+                            ok = not result.isError
+                        except Exception:
+                            ok = False
+                        finished = loop.time()
+                        if self._measure_from <= finished <= self._measure_to:
+                            self.samples.append(Sample(
+                                server, call.tool, finished - started, ok
+                            ))
+        except Exception as e:
+            if not opened:
+                self.failed_sessions += 1
+                self._check_all_ready()
+                print(f"⚠️ Сессия {number} ({server}) не открыта: {e}")
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Выполняет нагрузку
+
+        Returns:
+            Результат: конфигурация, сводка вызовов и памяти
+        """
+        loop = asyncio.get_running_loop()
+        rss_idle = read_rss(self.pid)
+
+        tasks = [
+            asyncio.create_task(self._session(i))
+            for i in range(self.sessions)
+        ]
+        await self._all_ready.wait()
+        rss_sessions = read_rss(self.pid)
+        print(f"🔗 Открыто сессий: {self._ready} из {self.sessions}")
+
+        now = loop.time()
+        self._measure_from = now + self.warmup
+        self._measure_to = self._measure_from + self.duration
+        self._start.set()
+
+        rss_peak = rss_sessions
+        rss_measured = None
+        while loop.time() < self._measure_to:
+            await asyncio.sleep(0.5)
+            rss = read_rss(self.pid)
+            if rss is not None:
+                rss_peak = max(rss_peak or 0, rss)
+                if rss_measured is None and loop.time() >= self._measure_from:
+                    rss_measured = rss
+        rss_end = read_rss(self.pid)
+        self._stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        result = summarize(self.samples, self.duration)
+        result["memory"] = self._memory(
+            rss_idle, rss_sessions, rss_measured, rss_end, rss_peak
+        )
+        result["sessions"] = {
+            "requested": self.sessions,
+            "opened": self._ready,
+            "failed": self.failed_sessions,
+        }
+        return result
+
+    def _memory(self, idle, sessions, measured, end, peak) -> Dict[str, Any]:
+        """Сводка памяти процесса сервера"""
+        mb = 1024 * 1024
+
+        def to_mb(value):
+            return round(value / mb, 2) if value is not None else None
+
+        memory = {
+            "rss_idle_mb": to_mb(idle),
+            "rss_sessions_mb": to_mb(sessions),
+            "rss_end_mb": to_mb(end),
+            "rss_peak_mb": to_mb(peak),
+            "rss_growth_mb": None,
+            "per_session_kb": None,
+        }
+        if measured is not None and end is not None:
+            # Рост за время измерения (после прогрева): утечки и
+            # разрастание кешей
+            memory["rss_growth_mb"] = to_mb(end - measured)
+        if idle is not None and sessions is not None and self._ready:
+            memory["per_session_kb"] = round(
+                (sessions - idle) / self._ready / 1024, 1
+            )
+        return memory
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    """Краткий отчет в консоль"""
+    total = result["total"]
+    print(f"📊 Вызовов: {total['calls']}, ошибок: {total['errors']}, "
+          f"{total['throughput_rps']} вызовов/с")
+    for server, block in result["servers"].items():
+        latency = block["latency_ms"]
+        print(f"   • {server}: {block['throughput_rps']} вызовов/с, "
+              f"p50 {latency['p50']} мс, p95 {latency['p95']} мс, "
+              f"p99 {latency['p99']} мс, ошибок {block['errors']}")
+    memory = result["memory"]
+    if memory["rss_idle_mb"] is not None:
+        print(f"🧠 RSS: {memory['rss_idle_mb']} → {memory['rss_end_mb']} МБ "
+              f"(пик {memory['rss_peak_mb']} МБ, рост за измерение "
+              f"{memory['rss_growth_mb']} МБ, "
+              f"{memory['per_session_kb']} КБ на сессию)")
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    servers = [s.strip() for s in args.servers.split(",") if s.strip()]
+    unknown = [s for s in servers if s not in SCENARIOS]
+    if unknown:
+        print(f"❌ Нет сценария для серверов: {', '.join(unknown)}")
+        return 2
+
+    config = {
+        "servers": servers,
+        "sessions": args.sessions,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+        "cache": not args.no_cache,
+        "transport": args.transport,
+    }
+
+    async def run(url, upstream_url, pid, single_server=False):
+        return await LoadRun(
+            url, servers, args.sessions, args.duration, args.warmup,
+            upstream_url=upstream_url, seed=args.seed, pid=pid,
+            single_server=single_server, transport=args.transport,
+        ).run()
+
+    print(f"🚀 Нагрузка: {args.sessions} сессий ({args.transport}), "
+          f"{args.duration} с, серверы: {', '.join(servers)}")
+    if args.url:
+        if args.single_server and len(servers) != 1:
+            print("❌ --single-server требует ровно один сервер")
+            return 2
+        result = await run(args.url, args.upstream_url, args.pid,
+                           args.single_server)
+    else:
+        async with Stand(servers, args) as stand:
+            result = await run(stand.url, stand.upstream_url, stand.pid)
+
+    result = {"config": config, **result}
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результат: {args.output}")
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, result, args.threshold)
+        if regressions:
+            print(f"❌ Ухудшения больше {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   • {line}")
+            return 1
+        print("✅ Ухудшений относительно базового результата нет")
+    return 0
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Нагрузочный тест MCP серверов через SSE или streamable HTTP"
+    )
+    parser.add_argument("--servers", default="weather",
+                        help="серверы через запятую: "
+                             + ", ".join(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=20,
+                        help="число одновременных MCP сессий")
+    parser.add_argument("--transport", choices=("sse", "streamable"),
+                        default="sse", help="транспорт MCP клиентов")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="длительность измерения, секунды")
+    parser.add_argument("--warmup", type=float, default=5.0,
+                        help="прогрев перед измерением, секунды")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="задержка ответов симулятора, секунды")
+    parser.add_argument("--jitter", type=float, default=0.02,
+                        help="средний хвост задержки симулятора, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="доля ошибок симулятора")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="отключить кеш инструментов (MCP_CACHE_ENABLED)")
+    parser.add_argument("--output", help="файл для JSON результата")
+    parser.add_argument("--baseline", help="JSON базового результата")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="допустимое ухудшение (доля)")
+    parser.add_argument("--url", help="уже запущенный шлюз или сервер")
+    parser.add_argument("--single-server", action="store_true",
+                        help="--url - отдельный сервер, а не шлюз")
+    parser.add_argument("--upstream-url", default="",
+                        help="адрес симулятора при --url")
+    parser.add_argument("--pid", type=int,
+                        help="процесс сервера при --url (для RSS)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="показывать stderr шлюза и симулятора")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main_async(parse_args())))
@@ -0,0 +1,193 @@
+"""
+Микробенчмарки CPU-нагруженных парсеров и форматтеров серверов
+"""
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.micro import corpora
+from mcp_common.runtime import JsonCodec
+
+
+sizes = pytest.mark.parametrize("size", corpora.SIZES)
+
+
+class BenchFetch:
+    """mcp-fetch: извлечение текста из HTML"""
+
+    @sizes
+    @pytest.mark.benchmark(group="fetch.extract_text_content")
+    def bench_extract_text_content(self, benchmark, fetch_server, size):
+        html = corpora.html_page(size)
+
+        text = benchmark(fetch_server.extract_text_content, html)
+
+        assert text.startswith("ЗАГОЛОВОК: Тестовая страница")
+        assert "track(" not in text
+
+    @sizes
+    @pytest.mark.benchmark(group="fetch.clean_text")
+    def bench_clean_text(self, benchmark, fetch_server, size):
+        text = corpora.raw_text(size)
+
+        cleaned = benchmark(fetch_server.clean_text, text)
+
+        assert "\n\n" not in cleaned
+
+
+class BenchWikipedia:
+    """mcp-wikipedia: очистка wikitext"""
+
+    @sizes
+    @pytest.mark.benchmark(group="wikipedia._clean_wikitext")
+    def bench_clean_wikitext(self, benchmark, wikipedia_searcher, size):
+        wikitext = corpora.wikitext(size)
+
+        text = benchmark(wikipedia_searcher._clean_wikitext, wikitext)
+
+        assert "{{" not in text and "<ref" not in text
+
+
+class BenchYandex:
+    """mcp-yandex-search: разбор XML ответа"""
+
+    @sizes
+    @pytest.mark.benchmark(group="yandex.parse_search_response")
+    def bench_parse_search_response(self, benchmark, yandex_server, size):
+        xml = corpora.yandex_xml(size)
+        parser = yandex_server.YandexSearchParser
+
+        results = benchmark(parser.parse_search_response, xml)
+
+        assert len(results) == corpora.ELEMENTS["yandex"][size]
+
+
+class BenchSearch:
+    """mcp-search: форматирование выдачи"""
+
+    @sizes
+    @pytest.mark.benchmark(group="search.format_search_results_improved")
+    def bench_format_search_results(self, benchmark, search_server, size):
+        results = corpora.search_results(size)
+
+        text = benchmark(
+            search_server.format_search_results_improved,
+            results, "python", "news",
+        )
+
+        assert f"Найдено результатов: {len(results)}" in text
+
+
+class BenchUFC:
+    """mcp-ufc: разбор страницы турниров UFC Stats"""
+
+    @sizes
+    @pytest.mark.benchmark(group="ufc.scrape_ufc_events")
+    def bench_scrape_ufc_events(self, benchmark, ufc_server, size):
+        html = corpora.ufcstats_html(size)
+        service = ufc_server.UFCDataService()
+
+        async def make_request(url, params=None):
+            return html
+
+        # Измеряется только разбор: запрос подменен готовой страницей
+        service.make_request = make_request
+        loop = asyncio.new_event_loop()
+        try:
+            data = benchmark(
+                lambda: loop.run_until_complete(service.scrape_ufc_events())
+            )
+        finally:
+            loop.close()
+
+        assert len(data["events"]) == min(10, corpora.ELEMENTS["ufcstats"][size])
+
+
+class BenchIP:
+    """mcp-ip: форматирование информации об IP"""
+
+    @sizes
+    @pytest.mark.benchmark(group="ip.format_ip_info")
+    def bench_format_ip_info(self, benchmark, ip_server, size):
+        info = corpora.ip_info(size)
+
+        text = benchmark(ip_server.format_ip_info, info)
+
+        assert "203.0.113.10" in text
+
+
+class BenchWeather:
+    """mcp-weather: разрешение названия города и почасовой прогноз"""
+
+    @sizes
+    @pytest.mark.benchmark(group="weather.city_index.resolve")
+    def bench_resolve_typo(self, benchmark, weather_server, size):
+        from city_index import CityIndex
+        from gazetteer import Place
+
+        cities = corpora.city_names(size)
+        index = CityIndex(
+            (Place(name, 0.0, 0.0, "", population), ())
+            for name, population in cities
+        )
+        name = max(cities, key=lambda city: len(city[0]))[0]
+        # Пропущенная буква в середине названия
+        typo = name[:len(name) // 2] + name[len(name) // 2 + 1:]
+
+        match = benchmark(index.resolve, typo)
+
+        assert match is not None and not match.exact
+
+    @sizes
+    @pytest.mark.benchmark(group="weather.hourly.aggregate")
+    def bench_hourly_aggregate(self, benchmark, weather_server, size):
+        from hourly import GoodWeather, aggregate, good_weather_windows, parse_hourly
+
+        data = json.loads(corpora.forecast_json(size))
+        # Без ветра и осадков: окна есть в каждом светлом интервале
+        criteria = GoodWeather(
+            min_temperature=-5, max_wind_speed=30, max_weather_code=71
+        )
+        data["hourly"]["precipitation"] = [0] * len(data["hourly"]["time"])
+
+        def summarize():
+            forecast = parse_hourly(data)
+            return (
+                aggregate(forecast, "part"),
+                good_weather_windows(forecast, criteria),
+            )
+
+        periods, windows = benchmark(summarize)
+
+        assert len(periods) == corpora.ELEMENTS["forecast"][size] // 6
+        assert len(windows) == corpora.ELEMENTS["forecast"][size] // 24
+
+
+codecs = pytest.mark.parametrize("fast", [False, True], ids=["json", "orjson"])
+
+
+class BenchRuntime:
+    """mcp_common.runtime: JSON кодек стандартного и быстрого профиля"""
+
+    @codecs
+    @sizes
+    @pytest.mark.benchmark(group="runtime.loads")
+    def bench_loads(self, benchmark, size, fast):
+        codec = JsonCodec(fast=fast)
+        body = corpora.forecast_json(size).encode()
+
+        data = benchmark(codec.loads, body)
+
+        assert len(data["hourly"]["time"]) == corpora.ELEMENTS["forecast"][size]
+
+    @codecs
+    @sizes
+    @pytest.mark.benchmark(group="runtime.dumps")
+    def bench_dumps(self, benchmark, size, fast):
+        codec = JsonCodec(fast=fast)
+        results = corpora.search_results(size)
+
+        text = benchmark(codec.dumps, results)
+
+        assert codec.loads(text) == results
@@ -0,0 +1,44 @@
+"""
+Фикстуры микробенчмарков: модули серверов загружаются так же, как в
+MCP Gateway, под уникальными именами
+"""
+import pytest
+
+from server import load_server
+
+
+@pytest.fixture(scope="session")
+def fetch_server():
+    return load_server("mcp-fetch")
+
+
+@pytest.fixture(scope="session")
+def search_server():
+    return load_server("mcp-search")
+
+
+@pytest.fixture(scope="session")
+def ip_server():
+    return load_server("mcp-ip")
+
+
+@pytest.fixture(scope="session")
+def ufc_server():
+    return load_server("mcp-ufc")
+
+
+@pytest.fixture(scope="session")
+def weather_server():
+    return load_server("mcp-weather")
+
+
+@pytest.fixture(scope="session")
+def yandex_server():
+    return load_server("mcp-yandex-search")
+
+
+@pytest.fixture(scope="session")
+def wikipedia_searcher():
+    load_server("mcp-wikipedia")
+    from api.wikipedia_client import WikipediaSearcher
+    return WikipediaSearcher()
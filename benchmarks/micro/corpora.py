@@ -0,0 +1,215 @@
+"""
+Корпуса для микробенчмарков парсеров и форматтеров.
+
+Каждый корпус генерируется детерминированно в трех размерах: small -
+типичный ответ, medium - крупный, huge - худший случай, на котором
+видна асимптотика. Структура повторяет ответы настоящих провайдеров
+(см. записи симулятора в mcp_common/recordings).
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+
+SIZES = ("small", "medium", "huge")
+
+# Число повторяющихся элементов корпуса по размерам
+ELEMENTS: Dict[str, Dict[str, int]] = {
+    "html": {"small": 10, "medium": 300, "huge": 5000},
+    "text": {"small": 20, "medium": 1000, "huge": 20000},
+    "wikitext": {"small": 5, "medium": 100, "huge": 1000},
+    "yandex": {"small": 10, "medium": 50, "huge": 1000},
+    "search": {"small": 10, "medium": 50, "huge": 1000},
+    "ufcstats": {"small": 10, "medium": 200, "huge": 3000},
+    "ip": {"small": 1, "medium": 10, "huge": 1000},
+    # Часы почасового прогноза: сутки, неделя, 16 дней
+    "forecast": {"small": 24, "medium": 168, "huge": 384},
+    # Названия городов в индексе mcp-weather
+    "cities": {"small": 1000, "medium": 10000, "huge": 100000},
+}
+
+WORDS = (
+    "python асинхронный сервер протокол запрос ответ кеш соединение "
+    "погода поиск статья турнир адрес данные клиент пул время задержка"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def html_page(size: str) -> str:
+    """HTML страница со скриптами, стилями, навигацией и статьей"""
+    rng = random.Random(1)
+    count = ELEMENTS["html"][size]
+    paragraphs = "".join(
+        f"<p>{_sentence(rng)} <a href=\"/link/{i}\">{rng.choice(WORDS)}</a> "
+        f"<b>{_sentence(rng, 4)}</b>.</p>\n"
+        + (f"<script>track({i});</script>\n" if i % 10 == 0 else "")
+        for i in range(count)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Тестовая страница</title>"
+        "<meta charset=\"utf-8\"><link rel=\"stylesheet\" href=\"/s.css\">"
+        "<style>body { font-family: sans-serif; }</style></head><body>"
+        "<header><nav><a href=\"/\">Главная</a></nav></header>"
+        f"<div class=\"sidebar\">{_sentence(rng)}</div>"
+        f"<article><h1>Заголовок</h1>\n{paragraphs}</article>"
+        "<footer>Подвал</footer></body></html>"
+    )
+
+
+def raw_text(size: str) -> str:
+    """Текст с лишними пробелами и пустыми строками (вход clean_text)"""
+    rng = random.Random(2)
+    lines = []
+    for _ in range(ELEMENTS["text"][size]):
+        lines.append("   " + "  \t ".join(_sentence(rng, 6).split()) + "   ")
+        lines.extend([""] * rng.randint(0, 3))
+    return "\n".join(lines)
+
+
+def wikitext(size: str) -> str:
+    """Wikitext с шаблонами (в том числе вложенными), ссылками и сносками"""
+    rng = random.Random(3)
+    sections = []
+    for i in range(ELEMENTS["wikitext"][size]):
+        sections.append(
+            f"== Раздел {i} ==\n"
+            f"{{{{Основная статья|Статья {i}}}}}\n"
+            f"'''{rng.choice(WORDS)}''' — [[{rng.choice(WORDS)}]] и "
+            f"[[Статья {i}|{rng.choice(WORDS)}]] {_sentence(rng)}."
+            f"<ref name=\"r{i}\">{{{{cite web|url=http://example.com/{i}"
+            f"|title={_sentence(rng, 3)}}}}}</ref>\n"
+            f"{{{{Карточка|имя={rng.choice(WORDS)}|"
+            f"описание={{{{lang-en|{rng.choice(WORDS)}}}}}}}}}\n"
+            f"* ''{_sentence(rng, 5)}'' [http://example.com/{i} ссылка]\n"
+            f"[[File:Image{i}.png|thumb|{_sentence(rng, 3)}]]\n"
+        )
+    return "\n".join(sections) + "\n[[Category:Тест]]"
+
+
+def yandex_xml(size: str) -> str:
+    """XML ответ Yandex Search API (rawData после base64)"""
+    rng = random.Random(4)
+    docs = "".join(
+        f"<group><doc id=\"{i}\"><url>https://example.com/{i}</url>"
+        f"<domain>example.com</domain>"
+        f"<title>{rng.choice(WORDS)} <hlword>{rng.choice(WORDS)}</hlword> "
+        f"{_sentence(rng, 4)}</title>"
+        f"<passages><passage>{_sentence(rng)} <hlword>python</hlword> "
+        f"{_sentence(rng)}</passage><passage>{_sentence(rng)}</passage>"
+        f"</passages><properties><extended-text>{_sentence(rng, 20)}"
+        f"</extended-text></properties>"
+        f"<saved-copy-url>https://yandexwebcache.net/{i}</saved-copy-url>"
+        f"</doc></group>"
+        for i in range(ELEMENTS["yandex"][size])
+    )
+    return (
+        "<?xml version=\"1.0\" encoding=\"utf-8\"?><yandexsearch version=\"1.0\">"
+        "<response><found priority=\"all\">100500</found><results><grouping>"
+        f"{docs}</grouping></results></response></yandexsearch>"
+    )
+
+
+def search_results(size: str) -> List[Dict]:
+    """Результаты DuckDuckGo после разбора (вход форматтера mcp-search)"""
+    rng = random.Random(5)
+    return [
+        {
+            "title": _sentence(rng, 8),
+            "url": f"https://example.com/{i}",
+            "snippet": _sentence(rng, 40),
+            "date": "2026-10-17T09:00:00+00:00",
+            "source": "Example News",
+            "type": "news",
+        }
+        for i in range(ELEMENTS["search"][size])
+    ]
+
+
+def ufcstats_html(size: str) -> str:
+    """Страница прошедших турниров UFC Stats"""
+    rng = random.Random(6)
+    rows = "".join(
+        "<tr class=\"b-statistics__table-row\">"
+        "<td class=\"b-statistics__table-col\">"
+        "<i class=\"b-statistics__table-content\">"
+        f"<a href=\"http://ufcstats.com/event-details/{i:016x}\" "
+        f"class=\"b-link b-link_style_black\">UFC Fight Night: "
+        f"{rng.choice(WORDS)} vs. {rng.choice(WORDS)}</a>"
+        f"<span class=\"b-statistics__date\">October {i % 28 + 1}, 2026"
+        "</span></i></td>"
+        "<td class=\"b-statistics__table-col "
+        "b-statistics__table-col_style_big-top-padding\">"
+        "Las Vegas, Nevada, USA</td></tr>"
+        for i in range(ELEMENTS["ufcstats"][size])
+    )
+    return (
+        "<html><head><title>UFC Stats</title></head><body>"
+        "<table class=\"b-statistics__table-events\"><tbody>"
+        f"{rows}</tbody></table></body></html>"
+    )
+
+
+def ip_info(size: str) -> Dict:
+    """
+    Информация об IP после разбора ответа провайдера
+
+    small - минимальный ответ, medium - полный, huge - полный с длинными
+    значениями (например, ответ с ошибкой провайдера или длинным org)
+    """
+    repeat = ELEMENTS["ip"][size]
+    info = {"ip": "203.0.113.10", "source": "ip-api.com",
+            "country": "Germany", "country_code": "DE"}
+    if size == "small":
+        return info
+    info.update({
+        "region": "Hesse", "region_code": "HE", "city": "Frankfurt am Main",
+        "zip": "60313", "latitude": 50.1109, "longitude": 8.6821,
+        "timezone": "Europe/Berlin",
+        "isp": "Example Hosting GmbH " * repeat,
+        "org": "Example Hosting " * repeat,
+        "as": "AS64500 Example Hosting GmbH " * repeat,
+        "mobile": False, "proxy": True, "hosting": True,
+    })
+    return info
+
+
+def forecast_json(size: str) -> str:
+    """Ответ Open-Meteo с почасовым прогнозом (тело ответа upstream)"""
+    rng = random.Random(8)
+    hours = ELEMENTS["forecast"][size]
+    start = datetime(2026, 10, 17)
+    return json.dumps({
+        "latitude": 55.75, "longitude": 37.625, "timezone": "GMT",
+        "hourly_units": {"time": "iso8601", "temperature_2m": "°C"},
+        "hourly": {
+            "time": [
+                (start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M")
+                for i in range(hours)
+            ],
+            "temperature_2m": [round(rng.uniform(-5, 15), 1) for _ in range(hours)],
+            "precipitation": [round(rng.uniform(0, 2), 1) for _ in range(hours)],
+            "wind_speed_10m": [round(rng.uniform(0, 30), 1) for _ in range(hours)],
+            "weather_code": [rng.choice((0, 1, 3, 61, 71)) for _ in range(hours)],
+            "is_day": [int(7 <= i % 24 < 19) for i in range(hours)],
+        },
+    })
+
+
+SYLLABLES = (
+    "mo ska va no vo si bir sk ka zan ek ate rin burg sa ma ra om to "
+    "ro stov krasno yar vla di len grad pe ter lon don par ber lin"
+).split()
+
+
+def city_names(size: str) -> List[Tuple[str, int]]:
+    """Названия городов из слогов и их население (вход индекса городов)"""
+    rng = random.Random(9)
+    return [
+        ("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))),
+         rng.randint(1000, 10_000_000))
+        for _ in range(ELEMENTS["cities"][size])
+    ]
@@ -5,15 +5,25 @@ import os
 import json
 from dataclasses import dataclass
 
-import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
-from mcp.server.sse import SseServerTransport
+
+from mcp_common.http_client import (
+    close_http_client,
+    get_http_client,
+)
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import instrument_tools, metrics_endpoint, track_sse_session
+from mcp_common.profiling import profiling_routes
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.tracing import span, traced
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
 
 
 @dataclass
@@ -33,8 +43,13 @@ class CloudRuClient:
         self.config = config
         self._token: Optional[str] = None
         self._token_expires_at: Optional[datetime] = None
-        self._client = httpx.AsyncClient(timeout=30.0)
     
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        """HTTP клиент из общего пула соединений процесса"""
+        return get_http_client()
+    
+    @traced("artifact_registry.token")
     async def _get_auth_token(self) -> str:
         """Получение токена авторизации"""
         try:
@@ -92,12 +107,13 @@ class CloudRuClient:
         url = f"{self.config.ar_base_url}{endpoint}"
         
         try:
-            response = await self._client.request(
-                method=method,
-                url=url,
-                headers=headers,
-                **kwargs
-            )
+            with span("artifact_registry.request", method=method, endpoint=endpoint):
+                response = await self._client.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    **kwargs
+                )
             
             if response.status_code == 401:
                 # Токен истек, получаем новый
@@ -179,12 +195,14 @@ class CloudRuClient:
         )
     
     async def close(self):
-        """Закрытие HTTP клиента"""
-        await self._client.aclose()
+        """Закрытие HTTP клиента (общего пула соединений)"""
+        await close_http_client()
 
 
 # Создаем экземпляр MCP сервера
 mcp = FastMCP("artifact-registry")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
 
 # Получаем конфигурацию из переменных окружения
 def get_config() -> CloudRuConfig:
@@ -423,22 +441,29 @@ async def get_registry_operations(registry_id: str) -> Dict[str, Any]:
     return await client.get_registry_operations(registry_id)
 
 # Настройка SSE транспорта
-sse = SseServerTransport("/messages/")
+sse = WorkerSseServerTransport("/messages/")
 
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
 
+
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений"""
     _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
-        )
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 # Создание Starlette приложения
@@ -446,8 +471,12 @@ app = Starlette(
     debug=True,
     routes=[
         Route("/sse", endpoint=handle_sse),
-        Mount("/messages/", app=sse.handle_post_message),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ],
+    lifespan=server_lifespan,
 )
 
 
@@ -461,7 +490,7 @@ if __name__ == "__main__":
     try:
         config = get_config()
         print(f"✅ Конфигурация загружена для проекта: {config.project_id}")
-        uvicorn.run(app, host="0.0.0.0", port=8004)
+        run_server(app, host="0.0.0.0", port=8004)
     except ValueError as e:
         print(f"❌ Ошибка конфигурации: {e}")
         exit(1)
\ No newline at end of file
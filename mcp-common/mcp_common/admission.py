@@ -0,0 +1,338 @@
+"""
+Контроль нагрузки: ограничение SSE сессий и одновременных вызовов
+инструментов с очередью и сроком ожидания.
+
+Без ограничений шквал агентов открывает сколько угодно SSE сессий и
+запускает сколько угодно вызовов: память пода растет до OOM, а одна
+сессия с сотней параллельных вызовов занимает весь event loop. Лимиты
+действуют на процесс (в многопроцессном режиме - на воркер):
+
+- MCP_MAX_SESSIONS - открытые SSE сессии. Лишнее подключение сразу
+  получает HTTP 503 с Retry-After;
+- MCP_MAX_INFLIGHT - выполняющиеся вызовы инструментов всех серверов;
+- MCP_MAX_SESSION_INFLIGHT - выполняющиеся вызовы одной сессии;
+- MCP_MAX_QUEUE - вызовы, ожидающие свободного места. При полной
+  очереди вызов сразу отклоняется;
+- MCP_QUEUE_TIMEOUT - срок ожидания в очереди, секунды.
+
+Вызов сверх лимитов ждет в очереди. Очередь обслуживается по порядку,
+но вызов сессии, исчерпавшей свой лимит, не задерживает вызовы других
+сессий. Отклоненный вызов завершается ошибкой MCP (JSON-RPC) с кодом
+SERVER_OVERLOADED, а не результатом инструмента с isError. Значение
+лимита 0 - без ограничения.
+
+    mcp = FastMCP("weather")
+    instrument_tools(mcp)
+    limit_tool_calls(mcp)
+
+    @limit_sessions(mcp.name)
+    async def handle_sse(request: Request):
+        ...
+"""
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolRequest, ErrorData
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from mcp_common.metrics import (
+    ADMISSION_INFLIGHT,
+    ADMISSION_QUEUE,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT,
+)
+from mcp_common.sessions import session_key
+
+
+# Код ошибки перегрузки: диапазон -32000..-32099 отведен JSON-RPC под
+# ошибки реализации сервера
+SERVER_OVERLOADED = -32003
+
+# Через сколько секунд клиенту стоит повторить отклоненный запрос
+SESSION_RETRY_AFTER = 5
+CALL_RETRY_AFTER = 1
+
+
+@dataclass
+class AdmissionSettings:
+    """Настройки контроля нагрузки (0 - без ограничения)"""
+    max_sessions: int = 1000
+    max_inflight: int = 64
+    max_session_inflight: int = 4
+    max_queue: int = 256
+    queue_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionSettings":
+        """Собирает настройки из переменных окружения"""
+        defaults = cls()
+
+        def read(name: str, default, cast):
+            value = os.getenv(name)
+            if not value:
+                return default
+            result = cast(value)
+            if result < 0:
+                raise ValueError(f"{name} должно быть >= 0, получено: {value}")
+            return result
+
+        return cls(
+            max_sessions=read("MCP_MAX_SESSIONS", defaults.max_sessions, int),
+            max_inflight=read("MCP_MAX_INFLIGHT", defaults.max_inflight, int),
+            max_session_inflight=read(
+                "MCP_MAX_SESSION_INFLIGHT", defaults.max_session_inflight, int
+            ),
+            max_queue=read("MCP_MAX_QUEUE", defaults.max_queue, int),
+            queue_timeout=read(
+                "MCP_QUEUE_TIMEOUT", defaults.queue_timeout, float
+            ),
+        )
+
+
+def overloaded(message: str, retry_after: float) -> McpError:
+    """Ошибка MCP о перегрузке сервера"""
+    return McpError(ErrorData(
+        code=SERVER_OVERLOADED,
+        message=message,
+        data={"retry_after": retry_after},
+    ))
+
+
+class AdmissionController:
+    """Счетчики сессий и вызовов процесса с очередью ожидающих вызовов"""
+
+    def __init__(self, settings: AdmissionSettings):
+        self.settings = settings
+        self.sessions = 0
+        self.inflight = 0
+        # Сессия -> число ее выполняющихся вызовов
+        self._session_inflight: Dict[Optional[str], int] = {}
+        # Ожидающие вызовы по порядку поступления
+        self._queue: Deque[Tuple[Optional[str], asyncio.Future]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def waiting(self) -> int:
+        """Число вызовов в очереди"""
+        return len(self._queue)
+
+    def open_session(self) -> bool:
+        """
+        Занимает место под SSE сессию
+
+        Returns:
+            False, если открыто максимальное число сессий
+        """
+        limit = self.settings.max_sessions
+        if limit and self.sessions >= limit:
+            return False
+        self.sessions += 1
+        return True
+
+    def close_session(self) -> None:
+        """Освобождает место SSE сессии"""
+        self.sessions -= 1
+
+    async def acquire(self, session: Optional[str], server: str = "") -> None:
+        """
+        Ждет места для вызова инструмента
+
+        Args:
+            session: Ключ MCP сессии (None - учитывается только общий лимит)
+            server: Имя сервера для метрик
+
+        Raises:
+            McpError: Очередь заполнена или срок ожидания истек
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Очередь привязана к event loop (новый loop - например, в тестах)
+            self._queue.clear()
+            self._loop = loop
+
+        if not self._queue and self._fits(session):
+            self._take(session)
+            return
+
+        if self.settings.max_queue and self.waiting >= self.settings.max_queue:
+            ADMISSION_REJECTED.labels(server, "queue").inc()
+            raise overloaded(
+                f"Сервер перегружен: в очереди {self.waiting} вызовов",
+                CALL_RETRY_AFTER,
+            )
+
+        future = loop.create_future()
+        entry = (session, future)
+        self._queue.append(entry)
+        ADMISSION_QUEUE.set(self.waiting)
+        self._dispatch()
+
+        started = time.monotonic()
+        timer = None
+        if self.settings.queue_timeout:
+            timer = loop.call_later(
+                self.settings.queue_timeout, self._expire, entry
+            )
+        try:
+            await future
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTED.labels(server, "timeout").inc()
+            raise overloaded(
+                f"Сервер перегружен: вызов ждал в очереди больше "
+                f"{self.settings.queue_timeout:g} с",
+                CALL_RETRY_AFTER,
+            ) from None
+        except asyncio.CancelledError:
+            if (future.done() and not future.cancelled()
+                    and future.exception() is None):
+                # Место выдано, но вызов отменен - возвращаем его
+                self.release(session)
+            else:
+                self._remove(entry)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            ADMISSION_WAIT.observe(time.monotonic() - started)
+
+    def release(self, session: Optional[str]) -> None:
+        """Освобождает место завершившегося вызова"""
+        self.inflight -= 1
+        count = self._session_inflight[session] - 1
+        if count:
+            self._session_inflight[session] = count
+        else:
+            del self._session_inflight[session]
+        ADMISSION_INFLIGHT.set(self.inflight)
+        self._dispatch()
+
+    def _fits(self, session: Optional[str]) -> bool:
+        """Есть ли место для вызова сессии"""
+        settings = self.settings
+        if settings.max_inflight and self.inflight >= settings.max_inflight:
+            return False
+        return not (
+            settings.max_session_inflight
+            and session is not None
+            and self._session_inflight.get(session, 0)
+            >= settings.max_session_inflight
+        )
+
+    def _take(self, session: Optional[str]) -> None:
+        self.inflight += 1
+        self._session_inflight[session] = \
+            self._session_inflight.get(session, 0) + 1
+        ADMISSION_INFLIGHT.set(self.inflight)
+
+    def _dispatch(self) -> None:
+        """Выдает места ожидающим вызовам по порядку поступления"""
+        for entry in list(self._queue):
+            session, future = entry
+            if future.done():
+                self._queue.remove(entry)
+            elif self._fits(session):
+                self._queue.remove(entry)
+                self._take(session)
+                future.set_result(None)
+            elif self.settings.max_inflight and \
+                    self.inflight >= self.settings.max_inflight:
+                break
+        ADMISSION_QUEUE.set(self.waiting)
+
+    def _expire(self, entry: Tuple[Optional[str], asyncio.Future]) -> None:
+        """Срок ожидания вызова истек"""
+        future = entry[1]
+        if not future.done():
+            self._remove(entry)
+            future.set_exception(asyncio.TimeoutError())
+
+    def _remove(self, entry: Tuple[Optional[str], asyncio.Future]) -> None:
+        try:
+            self._queue.remove(entry)
+        except ValueError:
+            pass
+        ADMISSION_QUEUE.set(self.waiting)
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """Контроль нагрузки текущего процесса"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(AdmissionSettings.from_env())
+    return _controller
+
+
+def reset_admission() -> None:
+    """Сбрасывает счетчики и перечитывает настройки"""
+    global _controller
+    _controller = None
+
+
+def limit_tool_calls(mcp: FastMCP) -> None:
+    """
+    Включает контроль нагрузки для вызовов инструментов FastMCP сервера
+
+    Оборачивает обработчик запросов tools/call низкоуровневого сервера:
+    ошибка перегрузки уходит клиенту ошибкой JSON-RPC, а не результатом
+    инструмента. Действует для всех транспортов сервера.
+
+    Args:
+        mcp: Экземпляр FastMCP
+    """
+    handlers = mcp._mcp_server.request_handlers
+    handler = handlers[CallToolRequest]
+    server = mcp.name
+
+    async def admitted_handler(request: CallToolRequest):
+        admission = get_admission()
+        session = session_key(mcp.get_context())
+        await admission.acquire(session, server)
+        try:
+            return await handler(request)
+        finally:
+            admission.release(session)
+
+    handlers[CallToolRequest] = admitted_handler
+
+
+def limit_sessions(server: str) -> Callable:
+    """
+    Декоратор обработчика SSE: ограничивает число открытых сессий
+
+    Подключение сверх MCP_MAX_SESSIONS получает HTTP 503 с Retry-After до
+    открытия SSE потока: MCP сессии еще нет, поэтому ошибка - HTTP.
+
+    Args:
+        server: Имя сервера для метрик
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(request: Request) -> Response:
+            admission = get_admission()
+            if not admission.open_session():
+                ADMISSION_REJECTED.labels(server, "sessions").inc()
+                return PlainTextResponse(
+                    f"Сервер перегружен: открыто {admission.sessions} "
+                    f"SSE сессий",
+                    status_code=503,
+                    headers={"Retry-After": str(SESSION_RETRY_AFTER)},
+                )
+            try:
+                return await endpoint(request)
+            finally:
+                admission.close_session()
+
+        return wrapper
+
+    return decorator
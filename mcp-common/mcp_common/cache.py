@@ -0,0 +1,566 @@
+"""
+Двухуровневый кеш ответов MCP инструментов.
+
+Первый уровень - ограниченный LRU в памяти процесса, второй - SQLite файл
+на диске, который переживает перезапуск сервера и общий для всех воркеров.
+Время жизни и нормализация ключа задаются для каждого инструмента:
+
+    cache = TieredCache("weather")
+
+    @mcp.tool()
+    @cache.cached(ttl=600)
+    async def get_today_weather(city: str) -> str:
+        ...
+
+Для медленно меняющихся данных включается режим stale-while-revalidate:
+в течение stale секунд после истечения ttl устаревший ответ возвращается
+сразу (с пометкой в выводе), а обновляется в фоне:
+
+    @mcp.tool()
+    @cache.cached(ttl=600, stale=3600)
+    async def get_today_weather(city: str) -> str:
+        ...
+
+Одновременные промахи по одному ключу объединяются в один вызов
+инструмента. Исключения не кешируются. Статистика попаданий экспортируется в /metrics.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from mcp_common.metrics import (
+    CACHE_BYTES,
+    CACHE_ENTRIES,
+    CACHE_EVICTIONS,
+    record_cache_lookup,
+)
+from mcp_common.runtime import dumps, loads
+from mcp_common.settings import env_bool, env_int
+from mcp_common.singleflight import SingleFlight
+from mcp_common.tracing import span
+
+
+@dataclass
+class CacheSettings:
+    """Настройки кеша инструментов"""
+    enabled: bool = True
+    memory_entries: int = 1024
+    memory_bytes: int = 64 * 1024 * 1024
+    disk_enabled: bool = True
+    disk_bytes: int = 256 * 1024 * 1024
+    directory: str = os.path.join("~", ".cache", "mcp-servers")
+    stale_enabled: bool = True
+
+    @classmethod
+    def from_env(cls) -> "CacheSettings":
+        """Собирает настройки из переменных окружения MCP_CACHE_*"""
+        defaults = cls()
+        return cls(
+            enabled=env_bool("MCP_CACHE_ENABLED", defaults.enabled),
+            memory_entries=env_int(
+                "MCP_CACHE_MEMORY_ENTRIES", defaults.memory_entries
+            ),
+            memory_bytes=env_int(
+                "MCP_CACHE_MEMORY_BYTES", defaults.memory_bytes
+            ),
+            disk_enabled=env_bool("MCP_CACHE_DISK", defaults.disk_enabled),
+            disk_bytes=env_int("MCP_CACHE_DISK_BYTES", defaults.disk_bytes),
+            directory=os.getenv("MCP_CACHE_DIR") or defaults.directory,
+            stale_enabled=env_bool("MCP_CACHE_STALE", defaults.stale_enabled),
+        )
+
+
+def _normalize(value: Any) -> Any:
+    """Строки без лишних пробелов и без учета регистра"""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def default_key(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ключ по умолчанию: "  Москва " и "москва" - один и тот же запрос
+
+    Args:
+        arguments: Аргументы вызова (со значениями по умолчанию)
+
+    Returns:
+        Нормализованные аргументы
+    """
+    return {name: _normalize(value) for name, value in arguments.items()}
+
+
+def exact_key(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Ключ без нормализации (например, для URL и заголовков статей)"""
+    return arguments
+
+
+def _format_age(seconds: float) -> str:
+    """Возраст данных для человека: "5 мин", "3 ч" """
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{max(minutes, 1)} мин"
+    hours = minutes // 60
+    if hours < 48:
+        return f"{hours} ч"
+    return f"{hours // 24} дн"
+
+
+def mark_stale(result: Any, age: float) -> Any:
+    """
+    Пометка устаревшего ответа по умолчанию
+
+    К тексту добавляется строка о возрасте данных, к словарю - поля
+    stale и age_seconds. Остальные значения возвращаются как есть.
+
+    Args:
+        result: Ответ из кеша
+        age: Сколько секунд назад ответ был получен
+
+    Returns:
+        Помеченный ответ
+    """
+    if isinstance(result, str):
+        return (
+            f"{result}\n\n⏳ Данные из кеша (получены {_format_age(age)} "
+            f"назад), обновление выполняется в фоне"
+        )
+    if isinstance(result, dict):
+        return {**result, "stale": True, "age_seconds": round(age)}
+    return result
+
+
+class LRUCache:
+    """
+    Кеш в памяти с вытеснением давно неиспользованных записей
+
+    Ограничен и числом записей, и суммарным размером значений.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        # ключ -> (значение, истекает, размер)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Возвращает (значение, истекает) или None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, size = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value, expires_at
+
+    def set(self, key: str, value: Any, expires_at: float, size: int) -> None:
+        """Сохраняет значение и вытесняет старые записи сверх лимитов"""
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self.size += size
+        while (
+            len(self._entries) > self.max_entries
+            or self.size > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self.size -= size
+
+
+class SQLiteCache:
+    """
+    Кеш в SQLite файле
+
+    Соединение открывается при первом обращении (и заново после форка),
+    запросы выполняются в отдельном потоке, чтобы не блокировать event
+    loop. Режим WAL позволяет воркерам работать с одним файлом.
+    """
+
+    # Как часто (в записях) проверять размер файла
+    EVICTION_INTERVAL = 64
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        # Последние известные размеры (обновляются при проверке размера)
+        self.entries = 0
+        self.size = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, check_same_thread=False, timeout=5.0
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed_at"
+                " ON cache (accessed_at)"
+            )
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[1] <= now:
+                connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            else:
+                connection.execute(
+                    "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                    (now, key),
+                )
+            connection.commit()
+            return row if row[1] > now else None
+
+    def _set(self, key: str, value: str, expires_at: float, size: int) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache"
+                " (key, value, expires_at, size, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, expires_at, size, time.time()),
+            )
+            self._writes += 1
+            if self._writes >= self.EVICTION_INTERVAL:
+                self._writes = 0
+                self._evict(connection)
+            connection.commit()
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Удаляет истекшие записи и самые старые сверх лимита размера"""
+        connection.execute(
+            "DELETE FROM cache WHERE expires_at <= ?", (time.time(),)
+        )
+        self.entries, total = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        self.size = total
+        if total <= self.max_bytes:
+            return
+        # Освобождаем с запасом, чтобы не вытеснять на каждой записи
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        keys = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM cache ORDER BY accessed_at"
+        ):
+            if freed >= excess:
+                break
+            keys.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM cache WHERE key = ?", keys)
+        self.evictions += len(keys)
+        self.entries -= len(keys)
+        self.size -= freed
+
+    def _stats(self) -> Tuple[int, int]:
+        with self._lock:
+            self.entries, self.size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+            return self.entries, self.size
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Возвращает (сериализованное значение, истекает) или None"""
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, expires_at: float, size: int) -> None:
+        """Сохраняет сериализованное значение"""
+        await asyncio.to_thread(self._set, key, value, expires_at, size)
+
+    async def stats(self) -> Tuple[int, int]:
+        """Число записей и их суммарный размер"""
+        return await asyncio.to_thread(self._stats)
+
+
+class TieredCache:
+    """
+    Кеш инструментов одного сервера: LRU в памяти поверх SQLite на диске
+    """
+
+    def __init__(self, name: str, settings: Optional[CacheSettings] = None):
+        self.name = name
+        self._settings = settings
+        self._memory: Optional[LRUCache] = None
+        self._disk: Optional[SQLiteCache] = None
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.stale_hits = 0
+        self._flight = SingleFlight(name)
+        # Фоновые обновления устаревших записей (держим ссылки на задачи)
+        self._refreshes: Set[asyncio.Task] = set()
+
+    @property
+    def settings(self) -> CacheSettings:
+        # Настройки читаются при первом обращении, а не при импорте сервера
+        if self._settings is None:
+            self._settings = CacheSettings.from_env()
+        return self._settings
+
+    @property
+    def memory(self) -> LRUCache:
+        if self._memory is None:
+            self._memory = LRUCache(
+                self.settings.memory_entries, self.settings.memory_bytes
+            )
+        return self._memory
+
+    @property
+    def disk(self) -> Optional[SQLiteCache]:
+        if self._disk is None and self.settings.disk_enabled:
+            directory = os.path.expanduser(self.settings.directory)
+            self._disk = SQLiteCache(
+                os.path.join(directory, f"{self.name}.sqlite"),
+                self.settings.disk_bytes,
+            )
+        return self._disk
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Ищет значение сначала в памяти, затем на диске
+
+        Returns:
+            (найдено, значение)
+        """
+        entry = await self.get_entry(key)
+        if entry is None:
+            return False, None
+        return True, entry[0]
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Ищет значение вместе со временем истечения записи
+
+        Returns:
+            (значение, истекает) или None
+        """
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.hits["memory"] += 1
+            return entry
+
+        if self.disk is not None:
+            row = await self.disk.get(key)
+            if row is not None:
+                serialized, expires_at = row
+                value = loads(serialized)
+                # Поднимаем запись в память на оставшееся время жизни
+                self.memory.set(
+                    key, value, expires_at, len(serialized.encode())
+                )
+                self.hits["disk"] += 1
+                return value, expires_at
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Сохраняет JSON-сериализуемое значение на ttl секунд"""
+        try:
+            serialized = dumps(value)
+        except (TypeError, ValueError):
+            return
+        size = len(serialized.encode())
+        expires_at = time.time() + ttl
+
+        evicted = self.memory.evictions
+        self.memory.set(key, value, expires_at, size)
+        self._observe("memory", self.memory, evicted, len(self.memory))
+
+        if self.disk is not None:
+            evicted = self.disk.evictions
+            await self.disk.set(key, serialized, expires_at, size)
+            self._observe("disk", self.disk, evicted, self.disk.entries)
+
+    def _observe(
+        self,
+        tier: str,
+        storage,
+        evicted_before: int,
+        entries: int
+    ) -> None:
+        """Обновляет метрики размера и вытеснений уровня кеша"""
+        CACHE_ENTRIES.labels(self.name, tier).set(entries)
+        CACHE_BYTES.labels(self.name, tier).set(storage.size)
+        if storage.evictions > evicted_before:
+            CACHE_EVICTIONS.labels(self.name, tier).inc(
+                storage.evictions - evicted_before
+            )
+
+    async def stats(self) -> Dict[str, Any]:
+        """Статистика кеша для мониторинга"""
+        lookups = sum(self.hits.values()) + self.misses
+        stats = {
+            "name": self.name,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": sum(self.hits.values()) / lookups if lookups else 0.0,
+            "memory": {
+                "entries": len(self.memory),
+                "bytes": self.memory.size,
+                "evictions": self.memory.evictions,
+            },
+        }
+        if self.disk is not None:
+            entries, size = await self.disk.stats()
+            stats["disk"] = {
+                "entries": entries,
+                "bytes": size,
+                "evictions": self.disk.evictions,
+            }
+        return stats
+
+    def cached(
+        self,
+        ttl: float,
+        key: Callable[[Dict[str, Any]], Any] = default_key,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        stale: float = 0,
+        mark: Callable[[Any, float], Any] = mark_stale,
+    ) -> Callable:
+        """
+        Декоратор кеширования асинхронного инструмента
+
+        Ставится под @mcp.tool(): сигнатура и docstring инструмента
+        сохраняются.
+
+        Args:
+            ttl: Сколько секунд ответ считается свежим. Переопределяется
+                переменной окружения MCP_CACHE_TTL_<ИМЯ_ИНСТРУМЕНТА>,
+                0 отключает кеш
+            key: Нормализация аргументов в ключ кеша
+            cache_if: Проверка результата перед сохранением (например,
+                чтобы не кешировать сообщения об ошибках)
+            stale: Сколько секунд после ttl возвращать устаревший ответ,
+                обновляя его в фоне (stale-while-revalidate).
+                Переопределяется MCP_CACHE_STALE_<ИМЯ_ИНСТРУМЕНТА>
+            mark: Пометка устаревшего ответа: (ответ, возраст) -> ответ
+        """
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+            tool = func.__name__
+            label = f"{self.name}.{tool}"
+            env_ttl = f"MCP_CACHE_TTL_{tool.upper()}"
+            env_stale = f"MCP_CACHE_STALE_{tool.upper()}"
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                tool_ttl = float(os.getenv(env_ttl) or ttl)
+                if not self.settings.enabled or tool_ttl <= 0:
+                    return await func(*args, **kwargs)
+                tool_stale = 0.0
+                if self.settings.stale_enabled:
+                    tool_stale = float(os.getenv(env_stale) or stale)
+
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                cache_key = _make_key(tool, key(dict(bound.arguments)))
+                load_args = (cache_key, tool_ttl, tool_stale, args, kwargs)
+
+                with span(f"cache {label}") as lookup:
+                    entry = await self.get_entry(cache_key)
+                    result = "miss"
+                    if entry is not None:
+                        value, expires_at = entry
+                        # Запись хранится ttl + stale секунд, свежая - первые ttl
+                        fresh_until = expires_at - tool_stale
+                        now = time.time()
+                        result = "hit" if fresh_until > now else "stale"
+                    lookup.set_attribute("mcp.cache.result", result)
+
+                if result == "hit":
+                    record_cache_lookup(label, True)
+                    return value
+                if result == "stale":
+                    record_cache_lookup(label, True, stale=True)
+                    self.stale_hits += 1
+                    self._revalidate(cache_key, load, load_args)
+                    return mark(value, now - (fresh_until - tool_ttl))
+
+                record_cache_lookup(label, False)
+                # Одновременные промахи по одному ключу (например, сразу
+                # после истечения записи) выполняют один вызов
+                return await self._flight.do(cache_key, load, *load_args)
+
+            async def load(cache_key, tool_ttl, tool_stale, args, kwargs):
+                value = await func(*args, **kwargs)
+                if cache_if is None or cache_if(value):
+                    await self.set(cache_key, value, tool_ttl + tool_stale)
+                return value
+
+            return wrapper
+
+        return decorator
+
+    def _revalidate(self, key: str, load: Callable, load_args: tuple) -> None:
+        """Обновляет устаревшую запись в фоне (не более одного обновления)"""
+        if key in self._flight:
+            return
+        task = asyncio.ensure_future(self._flight.do(key, load, *load_args))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshed)
+
+    def _refreshed(self, task: asyncio.Task) -> None:
+        """Завершение фонового обновления: ошибка не мешает отдавать кеш"""
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(
+                f"⚠️ Не удалось обновить кеш {self.name}: {task.exception()}"
+            )
+
+
+def _make_key(tool: str, arguments: Any) -> str:
+    """Ключ записи: имя инструмента + хеш нормализованных аргументов"""
+    payload = json.dumps(
+        arguments, sort_keys=True, ensure_ascii=False, default=str
+    )
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return f"{tool}:{digest}"
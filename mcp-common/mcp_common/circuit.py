@@ -0,0 +1,347 @@
+"""
+Предохранители (circuit breaker) и адаптивные таймауты для upstream.
+
+Для каждого хоста ведется окно времен ответа и счетчик ошибок подряд:
+
+- таймаут запроса подстраивается под наблюдаемый p99 (p99 * множитель
+  в пределах [min, max]), но не больше таймаута, переданного в запрос;
+- после нескольких ошибок подряд (исключение, 5xx или превышение
+  адаптивного таймаута) предохранитель открывается, и запросы к хосту
+  сразу завершаются CircuitOpenError, не занимая соединения и воркер;
+- через reset секунд пропускается один пробный запрос: успех закрывает
+  предохранитель, ошибка снова открывает.
+
+Запросы через общий HTTP клиент защищены автоматически. Вызовы библиотек
+со своим HTTP клиентом оборачиваются вручную:
+
+    with guard_upstream("duckduckgo"):
+        results = ddgs.text(query)
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Iterator, Optional
+
+import httpx
+
+from mcp_common.metrics import (
+    CIRCUIT_REJECTED,
+    CIRCUIT_STATE,
+    UPSTREAM_TIMEOUT,
+    upstream_name,
+)
+from mcp_common.settings import env_bool, env_float, env_int
+
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Предохранитель upstream открыт: запрос не отправлялся"""
+
+
+@dataclass
+class CircuitSettings:
+    """Настройки предохранителей и адаптивных таймаутов"""
+    enabled: bool = True
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    adaptive_timeout: bool = True
+    timeout_multiplier: float = 3.0
+    min_timeout: float = 1.0
+    max_timeout: float = 30.0
+    min_samples: int = 20
+    window: int = 200
+
+    @classmethod
+    def from_env(cls) -> "CircuitSettings":
+        """Собирает настройки из переменных окружения MCP_CIRCUIT_*"""
+        defaults = cls()
+        return cls(
+            enabled=env_bool("MCP_CIRCUIT_ENABLED", defaults.enabled),
+            failure_threshold=env_int(
+                "MCP_CIRCUIT_FAILURES", defaults.failure_threshold
+            ),
+            reset_timeout=env_float(
+                "MCP_CIRCUIT_RESET", defaults.reset_timeout
+            ),
+            adaptive_timeout=env_bool(
+                "MCP_CIRCUIT_ADAPTIVE_TIMEOUT", defaults.adaptive_timeout
+            ),
+            timeout_multiplier=env_float(
+                "MCP_CIRCUIT_TIMEOUT_MULTIPLIER", defaults.timeout_multiplier
+            ),
+            min_timeout=env_float(
+                "MCP_CIRCUIT_MIN_TIMEOUT", defaults.min_timeout
+            ),
+            max_timeout=env_float(
+                "MCP_CIRCUIT_MAX_TIMEOUT", defaults.max_timeout
+            ),
+            min_samples=env_int(
+                "MCP_CIRCUIT_MIN_SAMPLES", defaults.min_samples
+            ),
+            window=env_int("MCP_CIRCUIT_WINDOW", defaults.window),
+        )
+
+
+class CircuitBreaker:
+    """Предохранитель и окно времен ответа одного upstream"""
+
+    # Как часто (в успешных запросах) пересчитывать p99
+    RECALC_INTERVAL = 10
+
+    def __init__(self, name: str, settings: CircuitSettings):
+        """
+        Args:
+            name: Хост или имя upstream
+            settings: Настройки предохранителя
+        """
+        self.name = name
+        self.settings = settings
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._latencies: Deque[float] = deque(maxlen=settings.window)
+        self._samples = 0
+        self._timeout: Optional[float] = None
+        self._probing = False
+        # Метрики только для известных upstream и имен из guard_upstream,
+        # чтобы неизвестные хосты не раздували число временных рядов
+        label = upstream_name(name)
+        if label == "other":
+            label = None if "." in name else name
+        self._label = label
+
+    @property
+    def samples(self) -> int:
+        """Число ответов в окне времен ответа"""
+        return len(self._latencies)
+
+    def allow(self) -> bool:
+        """
+        Можно ли отправить запрос сейчас
+
+        В открытом состоянии после reset_timeout пропускает один пробный
+        запрос.
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.settings.reset_timeout:
+                self._reject()
+                return False
+            self._set_state(HALF_OPEN)
+        if self._probing:
+            self._reject()
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self, duration: float) -> None:
+        """Успешный ответ за duration секунд"""
+        self._probing = False
+        self.failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+        self._latencies.append(duration)
+        self._samples += 1
+        if self._samples % self.RECALC_INTERVAL == 0:
+            self._recalculate_timeout()
+
+    def abort(self) -> None:
+        """Запрос отменен до ответа: результат пробы неизвестен"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Ошибка, 5xx или превышение таймаута"""
+        self._probing = False
+        self.failures += 1
+        if (
+            self.state == HALF_OPEN
+            or self.failures >= self.settings.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def timeout(self, default: Optional[float]) -> Optional[float]:
+        """
+        Таймаут следующего запроса
+
+        Args:
+            default: Таймаут, переданный в запрос (верхняя граница)
+
+        Returns:
+            Адаптивный таймаут или default, пока данных недостаточно
+        """
+        if self._timeout is None:
+            return default
+        if default is None:
+            return self._timeout
+        return min(default, self._timeout)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Перцентиль времени ответа по окну (q от 0 до 1)"""
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        index = max(math.ceil(q * len(latencies)) - 1, 0)
+        return latencies[index]
+
+    def _recalculate_timeout(self) -> None:
+        if (
+            not self.settings.adaptive_timeout
+            or len(self._latencies) < self.settings.min_samples
+        ):
+            return
+        timeout = self.percentile(0.99) * self.settings.timeout_multiplier
+        self._timeout = min(
+            max(timeout, self.settings.min_timeout), self.settings.max_timeout
+        )
+        if self._label is not None:
+            UPSTREAM_TIMEOUT.labels(self._label).set(self._timeout)
+
+    def _set_state(self, state: str) -> None:
+        if state == OPEN and self.state != OPEN:
+            print(
+                f"⚠️ Предохранитель {self.name} открыт: "
+                f"{self.failures} ошибок подряд"
+            )
+        self.state = state
+        if self._label is not None:
+            CIRCUIT_STATE.labels(self._label).set(_STATE_VALUES[state])
+
+    def _reject(self) -> None:
+        if self._label is not None:
+            CIRCUIT_REJECTED.labels(self._label).inc()
+
+
+# Через общий клиент mcp-fetch ходит на произвольные хосты: храним
+# предохранители последних MAX_BREAKERS хостов, давно не встречавшиеся
+# вытесняются
+MAX_BREAKERS = 1024
+
+_settings: Optional[CircuitSettings] = None
+_breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Предохранитель upstream (создается при первом обращении)
+
+    Args:
+        name: Хост или имя upstream
+
+    Returns:
+        CircuitBreaker процесса
+    """
+    global _settings
+    breaker = _breakers.get(name)
+    if breaker is None:
+        if _settings is None:
+            _settings = CircuitSettings.from_env()
+        breaker = CircuitBreaker(name, _settings)
+        _breakers[name] = breaker
+        if len(_breakers) > MAX_BREAKERS:
+            _breakers.popitem(last=False)
+    else:
+        _breakers.move_to_end(name)
+    return breaker
+
+
+def reset_breakers() -> None:
+    """Сбрасывает все предохранители и перечитывает настройки"""
+    global _settings
+    _settings = None
+    _breakers.clear()
+
+
+@contextmanager
+def guard_upstream(name: str) -> Iterator[None]:
+    """
+    Защищает вызов upstream, который идет не через общий HTTP клиент
+
+    Raises:
+        CircuitOpenError: Предохранитель открыт
+    """
+    breaker = get_breaker(name)
+    if not breaker.settings.enabled:
+        yield
+        return
+    if not breaker.allow():
+        raise CircuitOpenError(f"Сервис {name} временно недоступен")
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.abort()
+        raise
+    breaker.record_success(time.perf_counter() - started)
+
+
+class CircuitBreakerTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx с предохранителем и адаптивным таймаутом по хосту
+
+    Таймаут ограничивает время до получения заголовков ответа.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request
+    ) -> httpx.Response:
+        breaker = get_breaker(request.url.host)
+        if not breaker.settings.enabled:
+            return await self._transport.handle_async_request(request)
+        if not breaker.allow():
+            raise CircuitOpenError(
+                f"Сервис {request.url.host} временно недоступен "
+                f"(после {breaker.failures} ошибок подряд)",
+                request=request,
+            )
+
+        default = request.extensions.get("timeout", {}).get("read")
+        timeout = breaker.timeout(default)
+        started = time.perf_counter()
+        try:
+            if timeout is not None and timeout != default:
+                response = await asyncio.wait_for(
+                    self._transport.handle_async_request(request), timeout
+                )
+            else:
+                response = await self._transport.handle_async_request(request)
+        except asyncio.CancelledError:
+            breaker.abort()
+            raise
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise httpx.ReadTimeout(
+                f"Нет ответа от {request.url.host} за {timeout:.1f} с "
+                f"(адаптивный таймаут)",
+                request=request,
+            )
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.perf_counter() - started)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
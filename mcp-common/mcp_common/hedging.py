@@ -0,0 +1,146 @@
+"""
+Hedged-запросы к резервным провайдерам.
+
+Вместо последовательного перебора провайдеров (следующий - только после
+ошибки или таймаута предыдущего) вызов запускает первого провайдера и,
+если тот не ответил за свой бюджет задержки, параллельно запускает
+следующего. Возвращается первый подходящий ответ, остальные попытки
+отменяются. Ошибка провайдера запускает следующего сразу.
+
+Бюджет задержки по умолчанию - p95 времени ответа хоста из предохранителя
+(mcp_common.circuit): дополнительный запрос уходит примерно в 5% вызовов,
+поэтому нагрузка на провайдеров почти не растет, а хвост задержек
+обрезается.
+
+    result = await hedged(
+        "ip-info",
+        [fetch_ip_api, fetch_ipapi_co, fetch_ipwhois],
+        delays=[hedge_delay("ip-api.com"), hedge_delay("ipapi.co")],
+    )
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from mcp_common.circuit import OPEN, get_breaker
+from mcp_common.metrics import HEDGE_WINS, HEDGED_ATTEMPTS
+
+
+# Бюджет задержки, пока для хоста нет статистики, секунды
+DEFAULT_HEDGE_DELAY = 1.0
+
+# Пока ответов меньше, p95 не считается надежным
+MIN_SAMPLES = 20
+
+
+class HedgeError(Exception):
+    """Ни одна попытка не дала подходящего ответа"""
+
+    def __init__(self, name: str, errors: List[BaseException]):
+        self.name = name
+        self.errors = errors
+        details = "; ".join(str(e) for e in errors) or "нет подходящих ответов"
+        super().__init__(f"{name}: все попытки не удались ({details})")
+
+
+def hedge_delay(
+    host: str,
+    default: float = DEFAULT_HEDGE_DELAY,
+    percentile: float = 0.95,
+) -> float:
+    """
+    Бюджет задержки провайдера: p95 времени его ответов
+
+    Args:
+        host: Хост провайдера
+        default: Бюджет, пока статистики недостаточно
+        percentile: Перцентиль времени ответа
+
+    Returns:
+        Задержка в секундах до запуска следующей попытки
+    """
+    breaker = get_breaker(host)
+    if breaker.state == OPEN:
+        # Провайдер недоступен: его попытка сразу завершится ошибкой
+        return 0.0
+    if breaker.samples < MIN_SAMPLES:
+        return default
+    return breaker.percentile(percentile)
+
+
+def _accept_not_none(result: Any) -> bool:
+    return result is not None
+
+
+async def hedged(
+    name: str,
+    attempts: Sequence[Callable[[], Awaitable[Any]]],
+    delays: Union[float, Sequence[float]] = DEFAULT_HEDGE_DELAY,
+    accept: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    Вызывает попытки с перекрытием и возвращает первый подходящий ответ
+
+    Args:
+        name: Имя вызова для метрик
+        attempts: Попытки в порядке предпочтения (без аргументов)
+        delays: Бюджет задержки каждой попытки (или один на все): сколько
+            ждать ее ответа до запуска следующей
+        accept: Проверка ответа (по умолчанию - не None). Неподходящий
+            ответ считается ошибкой попытки
+
+    Returns:
+        Первый подходящий ответ
+
+    Raises:
+        HedgeError: Ни одна попытка не дала подходящего ответа
+    """
+    if isinstance(delays, (int, float)):
+        delays = [delays] * len(attempts)
+    accept = accept or _accept_not_none
+
+    pending: Dict[asyncio.Future, int] = {}
+    errors: List[BaseException] = []
+    launched = 0
+
+    def launch(reason: Optional[str] = None) -> None:
+        nonlocal launched
+        if reason is not None:
+            HEDGED_ATTEMPTS.labels(name, reason).inc()
+        pending[asyncio.ensure_future(attempts[launched]())] = launched
+        launched += 1
+
+    launch()
+    try:
+        while pending:
+            # Бюджет последней запущенной попытки (у последней его нет)
+            timeout = None
+            if launched < len(attempts):
+                timeout = delays[launched - 1]
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # Попытка не уложилась в бюджет - запускаем следующую
+                # параллельно, не отменяя текущую
+                launch("slow")
+                continue
+
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if accept(result):
+                    if index > 0:
+                        HEDGE_WINS.labels(name).inc()
+                    return result
+
+            if launched < len(attempts):
+                launch("error")
+    finally:
+        for future in pending:
+            future.cancel()
+
+    raise HedgeError(name, errors)
@@ -0,0 +1,249 @@
+"""
+Общий пул HTTP соединений для MCP серверов.
+
+Вместо нового httpx.AsyncClient на каждый вызов инструмента процесс держит
+один долгоживущий клиент: TCP/TLS соединения переиспользуются между
+вызовами, число соединений к одному хосту ограничено, а HTTP/2
+включается автоматически, если установлен пакет h2.
+"""
+import asyncio
+import http.cookiejar
+import importlib.util
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from mcp_common.circuit import CircuitBreakerTransport
+from mcp_common.metrics import UpstreamMetricsTransport
+from mcp_common.ratelimit import RateLimitTransport
+from mcp_common.settings import env_bool, env_float, env_int
+from mcp_common.tracing import TracingTransport
+from mcp_common.upstreams import UpstreamRedirectTransport
+
+
+# HTTP/2 доступен только при установленном пакете h2 (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Сколько хостов помнит HostLimitedTransport (см. circuit.MAX_BREAKERS)
+MAX_HOSTS = 1024
+
+
+@dataclass
+class HttpClientSettings:
+    """Настройки общего пула HTTP соединений"""
+    max_connections: int = 100
+    max_connections_per_host: int = 20
+    max_keepalive_connections: int = 40
+    keepalive_expiry: float = 60.0
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "HttpClientSettings":
+        """Собирает настройки из переменных окружения MCP_HTTP_*"""
+        defaults = cls()
+        return cls(
+            max_connections=env_int(
+                "MCP_HTTP_MAX_CONNECTIONS", defaults.max_connections
+            ),
+            max_connections_per_host=env_int(
+                "MCP_HTTP_MAX_PER_HOST", defaults.max_connections_per_host
+            ),
+            max_keepalive_connections=env_int(
+                "MCP_HTTP_MAX_KEEPALIVE", defaults.max_keepalive_connections
+            ),
+            keepalive_expiry=env_float(
+                "MCP_HTTP_KEEPALIVE_EXPIRY", defaults.keepalive_expiry
+            ),
+            timeout=env_float("MCP_HTTP_TIMEOUT", defaults.timeout),
+            connect_timeout=env_float(
+                "MCP_HTTP_CONNECT_TIMEOUT", defaults.connect_timeout
+            ),
+            http2=env_bool("MCP_HTTP2", True),
+        )
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Поток тела ответа, освобождающий слот хоста при закрытии"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _RejectCookies(http.cookiejar.DefaultCookiePolicy):
+    """Политика, не сохраняющая cookie: клиент общий для всех сессий"""
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт, ограничивающий число одновременных запросов к одному хосту.
+
+    Слот хоста занимается на время всего запроса, включая чтение тела
+    ответа, поэтому один медленный upstream не может занять весь пул.
+    Хранятся семафоры последних max_hosts хостов.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        max_per_host: int,
+        max_hosts: int = MAX_HOSTS
+    ):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._max_hosts = max_hosts
+        self._semaphores: "OrderedDict[str, asyncio.Semaphore]" = \
+            OrderedDict()
+
+    def _semaphore(self, url: httpx.URL) -> asyncio.Semaphore:
+        key = f"{url.scheme}://{url.host}:{url.port or ''}"
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_per_host)
+            self._semaphores[key] = semaphore
+            if len(self._semaphores) > self._max_hosts:
+                # Запросы к вытесненному хосту освободят свой семафор сами
+                self._semaphores.popitem(last=False)
+        else:
+            self._semaphores.move_to_end(key)
+        return semaphore
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request
+    ) -> httpx.Response:
+        semaphore = self._semaphore(request.url)
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        if isinstance(response.stream, httpx.ByteStream):
+            # Тело уже в памяти - соединение свободно
+            semaphore.release()
+        else:
+            response.stream = _ReleasingStream(
+                response.stream, semaphore.release
+            )
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client(
+    settings: Optional[HttpClientSettings] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    verify: bool = True
+) -> httpx.AsyncClient:
+    """
+    Создает HTTP клиент с ограниченным по хостам пулом соединений
+
+    Время и статусы запросов к upstream попадают в метрики /metrics,
+    каждый хост защищен предохранителем с адаптивным таймаутом, частота
+    запросов к провайдерам с квотами ограничена. Запросы к провайдерам
+    можно перенаправить на симулятор (MCP_UPSTREAM_BASE_URL).
+
+    Args:
+        settings: Настройки пула (по умолчанию из переменных окружения)
+        transport: Базовый транспорт (для тестов)
+        verify: Проверять сертификаты TLS (False - только для разработки)
+
+    Returns:
+        Настроенный httpx.AsyncClient
+    """
+    settings = settings or HttpClientSettings.from_env()
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry,
+    )
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            verify=verify,
+            http2=settings.http2 and HTTP2_AVAILABLE,
+            limits=limits,
+        )
+    return httpx.AsyncClient(
+        # Ожидание квоты не занимает слот хоста; предохранитель внутри
+        # лимита хоста, чтобы ожидание слота не попадало в окно времен
+        # ответа upstream. Перенаправление на симулятор - самое
+        # внутреннее, метрики и лимиты считаются по настоящему хосту.
+        # Спан трассировки - самый внешний: в нем видно и ожидание квоты
+        transport=TracingTransport(RateLimitTransport(HostLimitedTransport(
+            CircuitBreakerTransport(UpstreamMetricsTransport(
+                UpstreamRedirectTransport(transport)
+            )),
+            settings.max_connections_per_host,
+        ))),
+        timeout=httpx.Timeout(
+            settings.timeout, connect=settings.connect_timeout
+        ),
+        # Set-Cookie одного upstream не должен попадать в запросы
+        # других сессий и пользователей
+        cookies=http.cookiejar.CookieJar(policy=_RejectCookies()),
+    )
+
+
+# Общий клиент процесса. Соединения httpx привязаны к event loop,
+# поэтому клиент пересоздается, если loop сменился (например, в тестах).
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий HTTP клиент текущего процесса
+
+    Клиент создается при первом обращении и живет до остановки
+    приложения (см. http_client_lifespan). Таймауты и заголовки
+    можно передавать в каждый запрос отдельно.
+
+    Returns:
+        Общий httpx.AsyncClient
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_http_client()
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    """Закрывает общий HTTP клиент и все открытые соединения"""
+    global _client, _client_loop
+    client, loop = _client, _client_loop
+    _client, _client_loop = None, None
+    if client is not None and loop is asyncio.get_running_loop():
+        await client.aclose()
+
+
+@asynccontextmanager
+async def http_client_lifespan(app):
+    """Lifespan для Starlette: закрывает пул соединений при остановке"""
+    try:
+        yield
+    finally:
+        await close_http_client()
@@ -0,0 +1,418 @@
+"""
+Prometheus метрики MCP серверов.
+
+Экспортируются на /metrics каждого Starlette приложения:
+
+- вызовы, ошибки и время выполнения MCP инструментов;
+- время и статусы запросов к внешним API (upstream);
+- число активных SSE сессий;
+- попадания и промахи кешей;
+- объединенные одинаковые запросы (single-flight);
+- состояние предохранителей и адаптивные таймауты upstream;
+- ожидание в очередях ограничителей частоты запросов;
+- дополнительные (hedged) запросы к резервным провайдерам.
+
+В многопроцессном режиме /metrics любого воркера собирает метрики всех
+воркеров (через их unix сокеты) и добавляет к ним метку worker.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Optional
+
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.metrics_core import Metric
+from prometheus_client.parser import text_string_to_metric_families
+from starlette.requests import Request
+from starlette.responses import Response
+
+from mcp_common import workers
+from mcp_common.sessions import current_session, session_key
+from mcp_common.tracing import span
+
+
+# Границы гистограмм в секундах: от быстрых ответов из кеша до медленных
+# страниц, которые парсятся целиком
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# Суффикс хоста -> имя upstream. Хосты не из списка (например, страницы,
+# которые скачивает mcp-fetch) попадают в "other", чтобы не раздувать
+# число временных рядов.
+UPSTREAMS: Dict[str, str] = {
+    "open-meteo.com": "open-meteo",
+    "duckduckgo.com": "duckduckgo",
+    # Текстовый поиск duckduckgo-search выполняется через Bing
+    "bing.com": "bing",
+    "ip-api.com": "ip-api",
+    "ipapi.co": "ipapi",
+    "ipwhois.app": "ipwhois",
+    "ipify.org": "ipify",
+    "icanhazip.com": "icanhazip",
+    "httpbin.org": "httpbin",
+    "espn.com": "espn",
+    "ufcstats.com": "ufcstats",
+    "ufc.com": "ufc",
+    "google.com": "google",
+    "wikipedia.org": "wikipedia",
+    "yandex.net": "yandex",
+    "cloud.ru": "cloud-ru",
+}
+
+TOOL_CALLS = Counter(
+    "mcp_tool_calls_total",
+    "Число вызовов MCP инструментов",
+    ["server", "tool"],
+)
+TOOL_ERRORS = Counter(
+    "mcp_tool_errors_total",
+    "Число вызовов MCP инструментов, завершившихся ошибкой",
+    ["server", "tool", "error"],
+)
+TOOL_DURATION = Histogram(
+    "mcp_tool_duration_seconds",
+    "Время выполнения MCP инструментов",
+    ["server", "tool"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_REQUESTS = Counter(
+    "mcp_upstream_requests_total",
+    "Запросы к внешним API по статусу ответа",
+    ["upstream", "status"],
+)
+UPSTREAM_DURATION = Histogram(
+    "mcp_upstream_request_duration_seconds",
+    "Время запросов к внешним API",
+    ["upstream"],
+    buckets=LATENCY_BUCKETS,
+)
+SSE_SESSIONS = Gauge(
+    "mcp_sse_sessions_active",
+    "Число открытых SSE сессий",
+    ["server"],
+)
+STREAMABLE_REQUESTS = Counter(
+    "mcp_streamable_requests_total",
+    "HTTP запросы к streamable HTTP транспорту (POST /mcp)",
+    ["server", "method"],
+)
+CACHE_REQUESTS = Counter(
+    "mcp_cache_requests_total",
+    "Обращения к кешам: result=hit|stale|miss",
+    ["cache", "result"],
+)
+CACHE_ENTRIES = Gauge(
+    "mcp_cache_entries",
+    "Число записей в кеше по уровням (memory, disk)",
+    ["cache", "tier"],
+)
+CACHE_BYTES = Gauge(
+    "mcp_cache_bytes",
+    "Размер значений в кеше по уровням, байт",
+    ["cache", "tier"],
+)
+CACHE_EVICTIONS = Counter(
+    "mcp_cache_evictions_total",
+    "Записи, вытесненные из кеша по лимиту размера",
+    ["cache", "tier"],
+)
+CIRCUIT_STATE = Gauge(
+    "mcp_circuit_state",
+    "Состояние предохранителя upstream: 0 - закрыт, 1 - пробный запрос, 2 - открыт",
+    ["upstream"],
+)
+CIRCUIT_REJECTED = Counter(
+    "mcp_circuit_rejected_total",
+    "Запросы, отклоненные открытым предохранителем upstream",
+    ["upstream"],
+)
+UPSTREAM_TIMEOUT = Gauge(
+    "mcp_upstream_timeout_seconds",
+    "Текущий адаптивный таймаут запросов к upstream",
+    ["upstream"],
+)
+RATELIMIT_WAIT = Histogram(
+    "mcp_ratelimit_wait_seconds",
+    "Ожидание разрешения ограничителя частоты запросов к upstream",
+    ["upstream"],
+    buckets=LATENCY_BUCKETS,
+)
+RATELIMIT_QUEUE = Gauge(
+    "mcp_ratelimit_queue",
+    "Запросы, ожидающие разрешения ограничителя частоты",
+    ["upstream"],
+)
+RATELIMIT_REJECTED = Counter(
+    "mcp_ratelimit_rejected_total",
+    "Запросы, отклоненные ограничителем: ожидание превысило бы лимит",
+    ["upstream"],
+)
+HEDGED_ATTEMPTS = Counter(
+    "mcp_hedged_attempts_total",
+    "Дополнительные попытки hedged-вызовов: reason=slow (первая медлит) или error",
+    ["call", "reason"],
+)
+HEDGE_WINS = Counter(
+    "mcp_hedge_wins_total",
+    "Hedged-вызовы, ответ на которые дала не первая попытка",
+    ["call"],
+)
+COALESCED_CALLS = Counter(
+    "mcp_coalesced_calls_total",
+    "Вызовы, которые дождались уже выполняющегося одинакового запроса",
+    ["call"],
+)
+ADMISSION_INFLIGHT = Gauge(
+    "mcp_admission_inflight",
+    "Выполняющиеся вызовы инструментов, допущенные контролем нагрузки",
+)
+ADMISSION_QUEUE = Gauge(
+    "mcp_admission_queue",
+    "Вызовы инструментов, ожидающие свободного места",
+)
+ADMISSION_WAIT = Histogram(
+    "mcp_admission_wait_seconds",
+    "Ожидание вызова инструмента в очереди контроля нагрузки",
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "mcp_admission_rejected_total",
+    "Отклоненные при перегрузке: reason=sessions|queue|timeout",
+    ["server", "reason"],
+)
+
+
+def upstream_name(host: str) -> str:
+    """
+    Имя upstream по хосту запроса
+
+    Args:
+        host: Хост (например, "api.open-meteo.com")
+
+    Returns:
+        Имя upstream или "other"
+    """
+    for suffix, name in UPSTREAMS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return name
+    return "other"
+
+
+def observe_upstream(upstream: str, status: str, duration: float) -> None:
+    """Записывает один запрос к upstream"""
+    UPSTREAM_REQUESTS.labels(upstream, status).inc()
+    UPSTREAM_DURATION.labels(upstream).observe(duration)
+
+
+@contextmanager
+def track_upstream(upstream: str) -> Iterator[None]:
+    """
+    Замеряет обращение к upstream, который вызывается не через httpx
+    (например, библиотека duckduckgo-search)
+
+    Args:
+        upstream: Имя upstream
+    """
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        observe_upstream(upstream, status, time.perf_counter() - started)
+
+
+def record_cache_lookup(cache: str, hit: bool, stale: bool = False) -> None:
+    """
+    Записывает обращение к кешу
+
+    Доля попаданий: rate(mcp_cache_requests_total{result="hit"}) /
+    rate(mcp_cache_requests_total)
+
+    Args:
+        cache: Имя кеша
+        hit: True, если значение найдено в кеше
+        stale: True, если найденное значение устарело и обновляется в фоне
+    """
+    result = "stale" if stale else "hit" if hit else "miss"
+    CACHE_REQUESTS.labels(cache, result).inc()
+
+
+@contextmanager
+def track_sse_session(server: str) -> Iterator[None]:
+    """Учитывает SSE сессию, пока она открыта"""
+    gauge = SSE_SESSIONS.labels(server)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+class UpstreamMetricsTransport(httpx.AsyncBaseTransport):
+    """Транспорт httpx, замеряющий время и статус запросов к upstream"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request
+    ) -> httpx.Response:
+        upstream = upstream_name(request.url.host)
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            observe_upstream(upstream, "error", time.perf_counter() - started)
+            raise
+        # Время до получения заголовков ответа
+        observe_upstream(
+            upstream,
+            str(response.status_code),
+            time.perf_counter() - started,
+        )
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _request_headers(context) -> Optional[Mapping[str, str]]:
+    """Заголовки HTTP запроса, доставившего вызов (для контекста трассы)"""
+    try:
+        request = context.request_context.request
+    except (AttributeError, LookupError, ValueError):
+        return None
+    return getattr(request, "headers", None)
+
+
+def instrument_tools(mcp) -> None:
+    """
+    Включает метрики для всех инструментов FastMCP сервера
+
+    Оборачивает менеджер инструментов, поэтому учитываются и инструменты,
+    зарегистрированные после вызова функции. На время вызова выставляет
+    ключ MCP сессии (mcp_common.sessions) и открывает корневой спан
+    трассы вызова (mcp_common.tracing).
+
+    Args:
+        mcp: Экземпляр FastMCP
+    """
+    manager = mcp._tool_manager
+    call_tool = manager.call_tool
+    server = mcp.name
+
+    async def instrumented_call_tool(name: str, arguments: dict, **kwargs):
+        TOOL_CALLS.labels(server, name).inc()
+        started = time.perf_counter()
+        context = kwargs.get("context")
+        session = session_key(context)
+        token = current_session.set(session)
+        try:
+            with span(
+                f"tools/call {name}",
+                kind="server",
+                headers=_request_headers(context),
+                **{
+                    "mcp.method.name": "tools/call",
+                    "mcp.server": server,
+                    "mcp.session.id": session,
+                    "gen_ai.tool.name": name,
+                },
+            ):
+                return await call_tool(name, arguments, **kwargs)
+        except Exception as e:
+            # ToolError оборачивает исходное исключение инструмента
+            error = type(e.__cause__ or e).__name__
+            TOOL_ERRORS.labels(server, name, error).inc()
+            raise
+        finally:
+            current_session.reset(token)
+            TOOL_DURATION.labels(server, name).observe(
+                time.perf_counter() - started
+            )
+
+    manager.call_tool = instrumented_call_tool
+
+
+class _MergedCollector:
+    """Коллектор с метриками, собранными со всех воркеров"""
+
+    def __init__(self, families: List[Metric]):
+        self._families = families
+
+    def collect(self) -> List[Metric]:
+        return self._families
+
+
+def _merge_worker_metrics(texts: Dict[int, str]) -> bytes:
+    """
+    Объединяет метрики воркеров, добавляя к каждой выборке метку worker
+
+    Args:
+        texts: Номер воркера -> метрики в текстовом формате Prometheus
+
+    Returns:
+        Объединенные метрики в текстовом формате
+    """
+    merged: Dict[str, Metric] = {}
+    for worker_id, text in sorted(texts.items()):
+        for family in text_string_to_metric_families(text):
+            target = merged.get(family.name)
+            if target is None:
+                target = Metric(family.name, family.documentation, family.type)
+                target.unit = family.unit
+                merged[family.name] = target
+            for sample in family.samples:
+                target.samples.append(sample._replace(
+                    labels={**sample.labels, "worker": str(worker_id)}
+                ))
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(_MergedCollector(list(merged.values())))
+    return generate_latest(registry)
+
+
+async def _fetch_peer_metrics(worker_id: int, path: str) -> Optional[str]:
+    """Метрики соседнего воркера или None, если он недоступен"""
+    try:
+        response = await workers.peer_client(worker_id).get(
+            path,
+            headers={workers.FORWARDED_HEADER.decode(): "1"},
+            timeout=5.0,
+        )
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return None
+    return response.text
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Обработчик GET /metrics в формате Prometheus"""
+    local = generate_latest(REGISTRY)
+    worker_id = workers.current_worker_id()
+    forwarded = workers.FORWARDED_HEADER.decode() in request.headers
+    if worker_id is None or forwarded:
+        return Response(local, media_type=CONTENT_TYPE_LATEST)
+
+    peers = workers.peer_ids()
+    results = await asyncio.gather(*[
+        _fetch_peer_metrics(peer, request.url.path) for peer in peers
+    ])
+    texts = {worker_id: local.decode()}
+    texts.update({
+        peer: text for peer, text in zip(peers, results) if text is not None
+    })
+    return Response(_merge_worker_metrics(texts), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,351 @@
+"""
+Профилирование работающего сервера по запросу администратора.
+
+Когда сервер в проде внезапно греет CPU или растет по памяти, его можно
+профилировать без передеплоя:
+
+- GET /debug/profile?seconds=10&hz=100 - семплирующий профиль стеков
+  всех потоков процесса (event loop и пулы потоков) за заданное время.
+  Ответ - свернутые стеки ("поток;модуль:функция;... число"), их
+  принимают flamegraph.pl, speedscope и inferno. Простаивающие потоки
+  (event loop в select, потоки пула в ожидании задачи) по умолчанию не
+  учитываются, idle=1 - учитывать;
+- /debug/memory?action=... - снимки tracemalloc:
+  POST start (frames=N - глубина стеков) запускает отслеживание и
+  запоминает базовый снимок, GET snapshot - крупнейшие места выделения
+  памяти, GET diff - рост с базового снимка (снимок становится новым
+  базовым), POST stop - остановка. format=collapsed отдает снимок или рост
+  свернутыми стеками с весом в байтах.
+
+Endpoint доступны только с заголовком Authorization: Bearer
+<MCP_ADMIN_TOKEN>; без заданного MCP_ADMIN_TOKEN профилирование
+выключено. В многопроцессном режиме запрос обслуживает воркер, принявший
+соединение, а worker=N перенаправляет его воркеру N.
+
+    app = Starlette(
+        routes=[
+            Route("/metrics", endpoint=metrics_endpoint),
+            *profiling_routes(),
+            ...
+        ],
+    )
+"""
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+from mcp_common import workers
+
+
+MAX_PROFILE_SECONDS = 120
+MAX_PROFILE_HZ = 1000
+
+# Модули, в которых поток ждет работы: event loop в select, потоки пулов
+# в ожидании задачи или блокировки
+_IDLE_MODULES = ("selectors", "threading", "queue", "concurrent.futures.thread")
+
+# Один профиль стеков на процесс: параллельные семплеры мешают друг другу
+_sampling = threading.Lock()
+
+# Базовый снимок tracemalloc для diff
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+class StackSampler:
+    """Семплирующий профиль стеков всех потоков процесса"""
+
+    def __init__(self, interval: float, idle: bool = False):
+        """
+        Args:
+            interval: Интервал между замерами, секунды
+            idle: Учитывать простаивающие потоки
+        """
+        self.interval = interval
+        self.idle = idle
+        # Свернутый стек -> число замеров
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def run(self, stop: threading.Event) -> None:
+        """Замеряет стеки до установки stop (выполняется в своем потоке)"""
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        """Один замер стеков всех потоков, кроме skip"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            if not self.idle and _module(frame) in _IDLE_MODULES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(f"{_module(frame)}:{frame.f_code.co_qualname}")
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Профиль в формате свернутых стеков для flamegraph"""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+def _module(frame) -> str:
+    return frame.f_globals.get("__name__", "?")
+
+
+def _denied(request: Request) -> Optional[Response]:
+    """Ответ с ошибкой, если запрос не от администратора"""
+    token = os.getenv("MCP_ADMIN_TOKEN")
+    if not token:
+        return PlainTextResponse(
+            "Профилирование выключено: задайте MCP_ADMIN_TOKEN",
+            status_code=403,
+        )
+    header = request.headers.get("authorization", "")
+    scheme, _, value = header.partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        value.encode(), token.encode()
+    ):
+        return PlainTextResponse(
+            "Нужен заголовок Authorization: Bearer <MCP_ADMIN_TOKEN>",
+            status_code=401,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return None
+
+
+async def _forward(request: Request, timeout: float) -> Optional[Response]:
+    """
+    Перенаправляет запрос воркеру из параметра worker
+
+    Returns:
+        Ответ воркера или None, если запрос для текущего процесса
+    """
+    worker = request.query_params.get("worker")
+    current = workers.current_worker_id()
+    forwarded = workers.FORWARDED_HEADER.decode() in request.headers
+    if worker is None or current is None or forwarded or int(worker) == current:
+        return None
+    if int(worker) not in workers.peer_ids():
+        return PlainTextResponse(f"Нет воркера {worker}", status_code=404)
+
+    response = await workers.peer_client(int(worker)).request(
+        request.method,
+        request.url.path,
+        params=request.query_params,
+        headers={
+            "authorization": request.headers["authorization"],
+            workers.FORWARDED_HEADER.decode(): "1",
+        },
+        timeout=timeout,
+    )
+    return Response(
+        response.content,
+        status_code=response.status_code,
+        headers={
+            name: value for name, value in response.headers.items()
+            if name.lower() == "content-type" or name.lower().startswith("x-")
+        },
+    )
+
+
+def _bounded(request: Request, name: str, default: float, limit: float) -> float:
+    value = float(request.query_params.get(name, default))
+    if not 0 < value <= limit:
+        raise ValueError(f"{name} должно быть от 0 до {limit}, получено: {value}")
+    return value
+
+
+async def profile_endpoint(request: Request) -> Response:
+    """Обработчик GET /debug/profile: свернутые стеки за seconds секунд"""
+    denied = _denied(request)
+    if denied is not None:
+        return denied
+    try:
+        seconds = _bounded(request, "seconds", 10, MAX_PROFILE_SECONDS)
+        hz = _bounded(request, "hz", 100, MAX_PROFILE_HZ)
+        forwarded = await _forward(request, timeout=seconds + 30)
+    except ValueError as e:
+        return PlainTextResponse(str(e), status_code=400)
+    if forwarded is not None:
+        return forwarded
+
+    if not _sampling.acquire(blocking=False):
+        return PlainTextResponse(
+            "Профиль уже снимается, повторите позже", status_code=409
+        )
+    try:
+        sampler = StackSampler(
+            1 / hz, idle=request.query_params.get("idle") == "1"
+        )
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=sampler.run, args=(stop,), name="mcp-profiler", daemon=True
+        )
+        print(f"🔥 Профиль стеков: {seconds:g} с, {hz:g} Гц")
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            thread.join()
+    finally:
+        _sampling.release()
+
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Worker": str(workers.current_worker_id() or 0),
+        },
+    )
+
+
+def _memory_stats(snapshot: tracemalloc.Snapshot, top: int) -> List[str]:
+    """Крупнейшие места выделения памяти снимка"""
+    lines = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:.1f} КБ в {stat.count} блоках: "
+                     f"{frame.filename}:{frame.lineno}")
+    return lines
+
+
+def _memory_growth(
+    snapshot: tracemalloc.Snapshot,
+    baseline: tracemalloc.Snapshot,
+    top: int,
+) -> List[str]:
+    """Места выделения памяти с наибольшим ростом"""
+    lines = []
+    for stat in snapshot.compare_to(baseline, "lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size_diff / 1024:+.1f} КБ "
+                     f"({stat.count_diff:+d} блоков), всего "
+                     f"{stat.size / 1024:.1f} КБ: "
+                     f"{frame.filename}:{frame.lineno}")
+    return lines
+
+
+def _memory_collapsed(
+    snapshot: tracemalloc.Snapshot,
+    baseline: Optional[tracemalloc.Snapshot] = None,
+) -> str:
+    """Память (или ее рост) свернутыми стеками с весом в байтах"""
+    if baseline is None:
+        weights = [
+            (stat.traceback, stat.size)
+            for stat in snapshot.statistics("traceback")
+        ]
+    else:
+        weights = [
+            (stat.traceback, stat.size_diff)
+            for stat in snapshot.compare_to(baseline, "traceback")
+            if stat.size_diff > 0
+        ]
+    return "".join(
+        ";".join(
+            f"{frame.filename}:{frame.lineno}" for frame in traceback
+        ) + f" {size}\n"
+        for traceback, size in weights
+    )
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """Снимок без выделений самого tracemalloc и импортов"""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ])
+
+
+async def memory_endpoint(request: Request) -> Response:
+    """Обработчик /debug/memory: снимки и рост памяти tracemalloc"""
+    global _baseline
+    denied = _denied(request)
+    if denied is not None:
+        return denied
+    try:
+        top = int(_bounded(request, "top", 20, 1000))
+        forwarded = await _forward(request, timeout=60)
+    except ValueError as e:
+        return PlainTextResponse(str(e), status_code=400)
+    if forwarded is not None:
+        return forwarded
+
+    action = request.query_params.get("action", "snapshot")
+    if action in ("start", "stop") and request.method != "POST":
+        return PlainTextResponse(
+            f"action={action} выполняется методом POST", status_code=405
+        )
+
+    if action == "start":
+        frames = int(_bounded(request, "frames", 1, 100))
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+        _baseline = _take_snapshot()
+        print(f"🧠 tracemalloc запущен (frames={frames})")
+        return PlainTextResponse(f"🧠 tracemalloc запущен (frames={frames})")
+    if action == "stop":
+        tracemalloc.stop()
+        _baseline = None
+        return PlainTextResponse("🧠 tracemalloc остановлен")
+    if action not in ("snapshot", "diff"):
+        return PlainTextResponse(
+            f"Неизвестное действие: {action}. "
+            f"Доступны start, snapshot, diff, stop",
+            status_code=400,
+        )
+    if not tracemalloc.is_tracing():
+        return PlainTextResponse(
+            "tracemalloc не запущен: POST /debug/memory?action=start",
+            status_code=409,
+        )
+
+    # Снимок всей памяти процесса - секунды на больших кучах
+    snapshot = await asyncio.to_thread(_take_snapshot)
+    collapsed = request.query_params.get("format") == "collapsed"
+    if action == "diff":
+        baseline, _baseline = _baseline, snapshot
+        if baseline is None:
+            # tracemalloc запущен не через start (например, PYTHONTRACEMALLOC)
+            return PlainTextResponse(
+                "🧠 Базовый снимок сохранен, повторите diff позже"
+            )
+        if collapsed:
+            return PlainTextResponse(_memory_collapsed(snapshot, baseline))
+        lines = _memory_growth(snapshot, baseline, top)
+    else:
+        if collapsed:
+            return PlainTextResponse(_memory_collapsed(snapshot))
+        lines = _memory_stats(snapshot, top)
+
+    current, peak = tracemalloc.get_traced_memory()
+    header = (f"🧠 Отслеживается {current / 1024 / 1024:.1f} МБ, "
+              f"пик {peak / 1024 / 1024:.1f} МБ")
+    return PlainTextResponse("\n".join([header, *lines]) + "\n")
+
+
+def profiling_routes() -> List[Route]:
+    """Маршруты профилирования для Starlette приложения сервера"""
+    return [
+        Route("/debug/profile", endpoint=profile_endpoint),
+        Route("/debug/memory", endpoint=memory_endpoint, methods=["GET", "POST"]),
+    ]
@@ -0,0 +1,307 @@
+"""
+Ограничение частоты запросов к upstream (token bucket) со справедливой
+очередью по MCP сессиям.
+
+У провайдеров с квотами (ip-api.com - 45 запросов в минуту на бесплатном
+тарифе, ipapi.co, DuckDuckGo, Yandex Search API, Wikipedia) свой бакет
+токенов на процесс. Если токенов нет, запрос ждет в очереди, а не уходит
+в upstream за ответом 429. Очередь обслуживает сессии по кругу: сессия,
+отправившая сотню запросов, не задерживает единственный запрос соседней.
+
+Ответ 429 от upstream опустошает бакет на время Retry-After. Если ожидание
+превысило бы MCP_RATELIMIT_MAX_WAIT, запрос сразу завершается
+RateLimitError.
+
+Запросы через общий HTTP клиент ограничиваются автоматически, вызовы
+библиотек со своим клиентом - вручную:
+
+    await acquire_upstream("duckduckgo")
+    results = ddgs.text(query)
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+
+from mcp_common.metrics import (
+    RATELIMIT_QUEUE,
+    RATELIMIT_REJECTED,
+    RATELIMIT_WAIT,
+    upstream_name,
+)
+from mcp_common.sessions import current_session
+from mcp_common.settings import env_bool
+
+
+# Лимиты по умолчанию: upstream -> (запросов в секунду, размер бакета).
+# Бакет + rate * 60 не превышает минутную квоту провайдера.
+DEFAULT_LIMITS: Dict[str, Tuple[float, int]] = {
+    "ip-api": (40 / 60, 5),
+    "ipapi": (1.0, 3),
+    "duckduckgo": (1.0, 3),
+    "yandex": (10.0, 10),
+    "wikipedia": (50.0, 20),
+}
+
+# Пауза после 429 без заголовка Retry-After, секунды
+DEFAULT_RETRY_AFTER = 5.0
+
+_PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600}
+
+
+def parse_rate(value: str) -> float:
+    """
+    Разбирает частоту вида "45/min", "10/s", "1000/h" или "2.5"
+
+    Returns:
+        Запросов в секунду (0 - без ограничения)
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*(?:/\s*(\w+))?\s*", value)
+    if match is None or (match.group(2) and match.group(2) not in _PERIODS):
+        raise ValueError(f"Некорректная частота запросов: {value!r}")
+    period = _PERIODS[match.group(2)] if match.group(2) else 1
+    return float(match.group(1)) / period
+
+
+@dataclass
+class RateLimitSettings:
+    """Настройки ограничителей частоты запросов"""
+    enabled: bool = True
+    max_wait: float = 30.0
+    limits: Dict[str, Tuple[float, int]] = field(
+        default_factory=lambda: dict(DEFAULT_LIMITS)
+    )
+
+    @classmethod
+    def from_env(cls) -> "RateLimitSettings":
+        """
+        Собирает настройки из переменных окружения MCP_RATELIMIT_*
+
+        MCP_RATELIMIT_<UPSTREAM>=45/min задает частоту (0 - без
+        ограничения), MCP_RATELIMIT_<UPSTREAM>_BURST - размер бакета.
+        Имя upstream в верхнем регистре, "-" заменяется на "_".
+        """
+        defaults = cls()
+        limits = {}
+        for upstream, (rate, burst) in defaults.limits.items():
+            env = "MCP_RATELIMIT_" + upstream.upper().replace("-", "_")
+            if os.getenv(env):
+                rate = parse_rate(os.getenv(env))
+            if os.getenv(env + "_BURST"):
+                burst = int(os.getenv(env + "_BURST"))
+            if rate > 0:
+                limits[upstream] = (rate, max(burst, 1))
+        max_wait = os.getenv("MCP_RATELIMIT_MAX_WAIT")
+        return cls(
+            enabled=env_bool("MCP_RATELIMIT_ENABLED", defaults.enabled),
+            max_wait=float(max_wait) if max_wait else defaults.max_wait,
+            limits=limits,
+        )
+
+
+class RateLimitError(httpx.TransportError):
+    """Квота upstream исчерпана: ожидание превысило бы допустимое"""
+
+
+class RateLimiter:
+    """Бакет токенов одного upstream с очередью по сессиям"""
+
+    def __init__(self, name: str, rate: float, burst: int, max_wait: float):
+        """
+        Args:
+            name: Имя upstream
+            rate: Запросов в секунду
+            burst: Размер бакета (запросов подряд без ожидания)
+            max_wait: Максимальное ожидание в очереди, секунды
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        # Сессия -> ожидающие запросы; порядок ключей - очередь обхода
+        self._queues: "OrderedDict[Optional[str], Deque[asyncio.Future]]" = \
+            OrderedDict()
+        self._waiting = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def waiting(self) -> int:
+        """Число запросов в очереди"""
+        return self._waiting
+
+    async def acquire(self) -> None:
+        """
+        Ждет разрешения на один запрос
+
+        Raises:
+            RateLimitError: Ожидание превысило бы max_wait
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Очередь привязана к event loop (новый loop - например, в тестах)
+            self._queues.clear()
+            self._waiting = 0
+            self._timer = None
+            self._loop = loop
+
+        self._refill()
+        if self._waiting == 0 and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        wait = (self._waiting + 1 - self.tokens) / self.rate
+        if wait > self.max_wait:
+            RATELIMIT_REJECTED.labels(self.name).inc()
+            raise RateLimitError(
+                f"Превышена квота запросов к {self.name}: "
+                f"ожидание {wait:.0f} с"
+            )
+
+        future = loop.create_future()
+        self._queues.setdefault(current_session.get(), deque()).append(future)
+        self._waiting += 1
+        RATELIMIT_QUEUE.labels(self.name).set(self._waiting)
+        self._schedule()
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Разрешение выдано, но запрос отменен - возвращаем токен
+                self.tokens += 1
+                self._dispatch()
+            raise
+        finally:
+            RATELIMIT_WAIT.labels(self.name).observe(time.monotonic() - started)
+
+    def penalize(self, retry_after: float) -> None:
+        """
+        Upstream ответил 429: новые токены появятся через retry_after секунд
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - retry_after * self.rate
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _schedule(self) -> None:
+        """Планирует выдачу разрешений к моменту появления токена"""
+        if self._timer is not None or not self._waiting:
+            return
+        delay = max((1 - self.tokens) / self.rate, 0.0)
+        self._timer = self._loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Выдает разрешения по кругу: по одному запросу от каждой сессии"""
+        self._refill()
+        while self.tokens >= 1 and self._queues:
+            session, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(session)
+            else:
+                del self._queues[session]
+            self._waiting -= 1
+            if future.done():
+                # Запрос отменен, пока ждал
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        RATELIMIT_QUEUE.labels(self.name).set(self._waiting)
+        self._schedule()
+
+
+_settings: Optional[RateLimitSettings] = None
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_limiter(upstream: str) -> Optional[RateLimiter]:
+    """
+    Ограничитель upstream или None, если для него нет лимита
+
+    Args:
+        upstream: Имя upstream ("ip-api", "duckduckgo", ...)
+    """
+    global _settings
+    if _settings is None:
+        _settings = RateLimitSettings.from_env()
+    if not _settings.enabled or upstream not in _settings.limits:
+        return None
+    limiter = _limiters.get(upstream)
+    if limiter is None:
+        rate, burst = _settings.limits[upstream]
+        limiter = RateLimiter(upstream, rate, burst, _settings.max_wait)
+        _limiters[upstream] = limiter
+    return limiter
+
+
+def reset_limiters() -> None:
+    """Сбрасывает все ограничители и перечитывает настройки"""
+    global _settings
+    _settings = None
+    _limiters.clear()
+
+
+async def acquire_upstream(upstream: str) -> None:
+    """
+    Ждет разрешения на запрос к upstream, который вызывается не через
+    общий HTTP клиент
+
+    Raises:
+        RateLimitError: Квота исчерпана надолго
+    """
+    limiter = get_limiter(upstream)
+    if limiter is not None:
+        await limiter.acquire()
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """Пауза из заголовка Retry-After (только в секундах)"""
+    value = response.headers.get("retry-after", "")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+class RateLimitTransport(httpx.AsyncBaseTransport):
+    """Транспорт httpx, ограничивающий частоту запросов к провайдерам"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request
+    ) -> httpx.Response:
+        limiter = get_limiter(upstream_name(request.url.host))
+        if limiter is None:
+            return await self._transport.handle_async_request(request)
+        try:
+            await limiter.acquire()
+        except RateLimitError as e:
+            raise RateLimitError(str(e), request=request) from None
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 429:
+            limiter.penalize(_retry_after(response))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,150 @@
+"""
+Формат результатов инструментов: текст с эмодзи или структурированный JSON.
+
+Инструмент возвращает словарь с данными, а декоратор @structured
+превращает его в ответ нужного формата:
+
+    @mcp.tool()
+    @structured(format_weekly_forecast)
+    @cache.cached(ttl=3600)
+    async def get_weekly_forecast(city: str) -> Dict:
+        ...
+        return weather_data
+
+Формат задается переменной окружения MCP_RESULT_FORMAT:
+
+- text (по умолчанию) - только текст для человека, как раньше;
+- json - structuredContent MCP и компактный JSON в текстовом блоке для
+  клиентов без поддержки структурированного вывода. Форматирование текста
+  не выполняется;
+- both - structuredContent и текст с эмодзи.
+
+Кеш хранит словари, поэтому один и тот же ответ из кеша отдается в любом
+формате.
+"""
+import functools
+import inspect
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from mcp.types import CallToolResult, TextContent
+
+from mcp_common import runtime
+from mcp_common.cache import mark_stale
+from mcp_common.tracing import span
+
+
+RESULT_FORMATS = ("text", "json", "both")
+
+
+@dataclass
+class ResultSettings:
+    """Настройки формата результатов"""
+    format: str = "text"
+
+    @classmethod
+    def from_env(cls) -> "ResultSettings":
+        """Собирает настройки из переменной окружения MCP_RESULT_FORMAT"""
+        value = (os.getenv("MCP_RESULT_FORMAT") or cls.format).strip().lower()
+        if value not in RESULT_FORMATS:
+            raise ValueError(
+                f"MCP_RESULT_FORMAT должно быть одним из "
+                f"{', '.join(RESULT_FORMATS)}, получено: {value}"
+            )
+        return cls(format=value)
+
+
+_settings: Optional[ResultSettings] = None
+
+
+def get_settings() -> ResultSettings:
+    """Настройки формата результатов текущего процесса"""
+    global _settings
+    if _settings is None:
+        _settings = ResultSettings.from_env()
+    return _settings
+
+
+def reset_results() -> None:
+    """Перечитывает настройки из переменных окружения"""
+    global _settings
+    _settings = None
+
+
+def dumps(data: Any) -> str:
+    """
+    Компактный JSON для текстового блока
+
+    Без пробелов между элементами и без экранирования кириллицы: так
+    меньше и байт, и токенов у модели. Кодек - из профиля
+    производительности (mcp_common.runtime).
+    """
+    return runtime.dumps(data, default=str)
+
+
+def render(
+    data: Any,
+    formatter: Callable[[Dict[str, Any]], str],
+    result_format: Optional[str] = None,
+) -> Any:
+    """
+    Ответ инструмента в заданном формате
+
+    Строки (например, записи кеша прежних версий) возвращаются как есть.
+    К тексту устаревшего ответа из кеша добавляется пометка о возрасте.
+
+    Args:
+        data: Данные инструмента
+        formatter: Форматирование данных в текст
+        result_format: text, json или both (по умолчанию из настроек)
+
+    Returns:
+        Строка для text, иначе CallToolResult со structuredContent
+    """
+    if not isinstance(data, dict):
+        return data
+    result_format = result_format or get_settings().format
+
+    if result_format == "json":
+        return CallToolResult(
+            content=[TextContent(type="text", text=dumps(data))],
+            structuredContent=data,
+        )
+
+    text = formatter(data)
+    if data.get("stale"):
+        text = mark_stale(text, data.get("age_seconds", 0))
+    if result_format == "text":
+        return text
+    return CallToolResult(
+        content=[TextContent(type="text", text=text)],
+        structuredContent=data,
+    )
+
+
+def structured(formatter: Callable[[Dict[str, Any]], str]) -> Callable:
+    """
+    Декоратор инструмента, возвращающего словарь с данными
+
+    Ставится между @mcp.tool() и @cache.cached(...). Аргументы и
+    docstring инструмента сохраняются, а тип результата для FastMCP
+    меняется на CallToolResult: формат выбирается во время вызова, поэтому
+    outputSchema не объявляется.
+
+    Args:
+        formatter: Форматирование данных в текст с эмодзи
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            data = await func(*args, **kwargs)
+            with span("format"):
+                return render(data, formatter)
+
+        wrapper.__signature__ = inspect.signature(func).replace(
+            return_annotation=CallToolResult
+        )
+        return wrapper
+
+    return decorator
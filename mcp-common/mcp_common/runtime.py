@@ -0,0 +1,238 @@
+"""
+Профиль производительности: uvloop, httptools и быстрый JSON.
+
+По умолчанию (MCP_RUNTIME=standard) серверы работают как раньше: uvicorn
+сам выбирает event loop и HTTP парсер, JSON разбирается стандартным
+модулем json. MCP_RUNTIME=fast включает профиль производительности:
+
+- event loop uvloop и HTTP парсер httptools для uvicorn;
+- JSON через orjson: ответы upstream (httpx Response.json(); подменяется
+  внутренний httpx._models.jsonlib, поэтому версия httpx ограничена), тела
+  запросов streamable HTTP транспорта MCP, записи кеша, JSON результаты
+  инструментов и прочие вызовы loads/dumps этого модуля.
+
+Сообщения MCP (JSON-RPC) сериализуются pydantic-core, который уже
+работает на Rust, поэтому их кодек не меняется.
+
+Зависимости профиля - extra fast пакета mcp-common. Если какой-то из
+пакетов не установлен, вместо него используется стандартный вариант (с
+предупреждением при запуске), а ошибки orjson (например, NaN или целые
+длиннее 64 бит) повторяются стандартным json - результат не меняется.
+Даты и dataclass orjson тоже передает в default, как и json.
+
+    from mcp_common.runtime import dumps, loads
+
+    data = loads(response_text)
+"""
+import importlib
+import importlib.util
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Union
+
+
+RUNTIME_MODES = ("standard", "fast")
+
+
+@dataclass
+class RuntimeSettings:
+    """Настройки профиля производительности"""
+    mode: str = "standard"
+
+    @classmethod
+    def from_env(cls) -> "RuntimeSettings":
+        """Собирает настройки из переменной окружения MCP_RUNTIME"""
+        value = (os.getenv("MCP_RUNTIME") or cls.mode).strip().lower()
+        if value not in RUNTIME_MODES:
+            raise ValueError(
+                f"MCP_RUNTIME должно быть одним из "
+                f"{', '.join(RUNTIME_MODES)}, получено: {value}"
+            )
+        return cls(mode=value)
+
+    @property
+    def fast(self) -> bool:
+        return self.mode == "fast"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+class JsonCodec:
+    """JSON кодек: orjson, если он включен и установлен, иначе json"""
+
+    def __init__(self, fast: bool = False):
+        """
+        Args:
+            fast: Использовать orjson (если установлен)
+        """
+        self._orjson = None
+        if fast and _available("orjson"):
+            self._orjson = importlib.import_module("orjson")
+            # Даты и dataclass orjson сериализует сам, а json - через
+            # default: передаем их в default, чтобы результат не зависел
+            # от профиля
+            self._options = (
+                self._orjson.OPT_NON_STR_KEYS
+                | self._orjson.OPT_PASSTHROUGH_DATETIME
+                | self._orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+
+    @property
+    def name(self) -> str:
+        return "orjson" if self._orjson is not None else "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Разбирает JSON из строки или байтов"""
+        if self._orjson is not None:
+            try:
+                return self._orjson.loads(data)
+            except self._orjson.JSONDecodeError:
+                # NaN, Infinity или некорректный JSON: ошибку (или
+                # значение) вернет стандартный модуль
+                pass
+        return json.loads(data)
+
+    def dumps(
+        self,
+        value: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> str:
+        """
+        Компактный JSON без экранирования кириллицы
+
+        Args:
+            value: Значение
+            default: Преобразование несериализуемых объектов
+
+        Raises:
+            TypeError: Значение не сериализуется в JSON
+        """
+        if self._orjson is not None:
+            try:
+                return self._orjson.dumps(
+                    value,
+                    default=default,
+                    option=self._options,
+                ).decode()
+            except TypeError:
+                # Целые длиннее 64 бит и т.п.
+                pass
+        return json.dumps(
+            value, ensure_ascii=False, separators=(",", ":"), default=default
+        )
+
+
+class _JsonModule:
+    """Замена модуля json в библиотеках: loads через кодек профиля"""
+
+    JSONDecodeError = json.JSONDecodeError
+
+    def __init__(self, codec: JsonCodec):
+        self._codec = codec
+
+    def loads(self, data, **kwargs):
+        if kwargs:
+            return json.loads(data, **kwargs)
+        return self._codec.loads(data)
+
+    def __getattr__(self, name: str):
+        return getattr(json, name)
+
+
+_settings: Optional[RuntimeSettings] = None
+_codec: Optional[JsonCodec] = None
+_installed = False
+
+
+def get_settings() -> RuntimeSettings:
+    """Настройки профиля текущего процесса"""
+    global _settings
+    if _settings is None:
+        _settings = RuntimeSettings.from_env()
+    return _settings
+
+
+def get_codec() -> JsonCodec:
+    """JSON кодек текущего процесса"""
+    global _codec
+    if _codec is None:
+        _codec = JsonCodec(fast=get_settings().fast)
+    return _codec
+
+
+def reset_runtime() -> None:
+    """Перечитывает настройки из переменных окружения"""
+    global _settings, _codec
+    _settings = None
+    _codec = None
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Разбирает JSON кодеком текущего профиля"""
+    return get_codec().loads(data)
+
+
+def dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Компактный JSON кодеком текущего профиля"""
+    return get_codec().dumps(value, default)
+
+
+def uvicorn_options() -> Dict[str, str]:
+    """
+    Параметры uvicorn для профиля
+
+    Returns:
+        loop и http для профиля fast (стандартные, если uvloop или
+        httptools не установлены), пусто для standard
+    """
+    if not get_settings().fast:
+        return {}
+    return {
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+    }
+
+
+def install() -> None:
+    """
+    Включает профиль fast в процессе: JSON библиотек через кодек профиля
+
+    Разбор ответов httpx и тел запросов streamable HTTP транспорта MCP
+    переключается на кодек профиля. Для standard ничего не делает.
+    Вызывается run_server до запуска uvicorn.
+    """
+    global _installed
+    if _installed or not get_settings().fast:
+        return
+    _installed = True
+
+    import httpx._models
+    import mcp.server.streamable_http
+
+    codec = get_codec()
+    module = _JsonModule(codec)
+    # jsonlib - внутреннее имя httpx (проверено для версий из pyproject.toml):
+    # если его нет, ответы httpx разбираются стандартным json
+    if hasattr(httpx._models, "jsonlib"):
+        httpx._models.jsonlib = module
+    else:
+        print(f"⚠️ httpx {httpx.__version__}: нет httpx._models.jsonlib, "
+              f"ответы upstream разбираются стандартным json")
+    mcp.server.streamable_http.json = module
+
+    options = uvicorn_options()
+    components = [options["loop"], options["http"], codec.name]
+    print(f"⚡ Профиль производительности: {', '.join(components)}")
+    missing = [
+        package for package, used in (
+            ("uvloop", options["loop"] == "uvloop"),
+            ("httptools", options["http"] == "httptools"),
+            ("orjson", codec.name == "orjson"),
+        ) if not used
+    ]
+    if missing:
+        print(f"⚠️ Не установлены {', '.join(missing)}: используются "
+              f"стандартные замены. Установите mcp-common[fast]")
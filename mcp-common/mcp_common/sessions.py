@@ -0,0 +1,33 @@
+"""
+Контекст MCP сессии, от имени которой выполняется вызов инструмента.
+
+Ключ сессии выставляется в instrument_tools на время вызова и наследуется
+всеми корутинами и задачами, созданными внутри него. По нему, например,
+ограничитель частоты запросов делит квоту upstream поровну между сессиями.
+"""
+from contextvars import ContextVar
+from typing import Any, Optional
+
+
+current_session: ContextVar[Optional[str]] = ContextVar(
+    "mcp_current_session", default=None
+)
+
+
+def session_key(context: Any) -> Optional[str]:
+    """
+    Ключ сессии из контекста FastMCP
+
+    Args:
+        context: mcp.server.fastmcp.Context (или None)
+
+    Returns:
+        Ключ сессии или None вне запроса
+    """
+    if context is None:
+        return None
+    try:
+        session = context.request_context.session
+    except (AttributeError, LookupError, ValueError):
+        return None
+    return f"session-{id(session):x}"
@@ -0,0 +1,32 @@
+"""
+Чтение настроек из переменных окружения.
+
+Общие функции для from_env классов настроек (http_client, cache, circuit,
+ratelimit и т.д.): пустая или незаданная переменная означает значение по
+умолчанию.
+
+    from mcp_common.settings import env_bool, env_int
+
+    enabled = env_bool("MCP_CACHE_ENABLED", True)
+"""
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Читает целое число из переменной окружения"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Читает число с плавающей точкой из переменной окружения"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Читает флаг из переменной окружения (0, false, no, off - выключен)"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
@@ -0,0 +1,332 @@
+"""
+Локальный симулятор upstream сервисов для воспроизводимых нагрузочных
+тестов.
+
+Отвечает записанными ответами Open-Meteo, DuckDuckGo, ip-api/ipapi.co/
+ipwhois, ESPN, UFC Stats, Wikipedia, Yandex Search и Cloud.ru IAM/AR с
+настраиваемой задержкой, разбросом и долей ошибок. Серверы направляются
+на симулятор переменной MCP_UPSTREAM_BASE_URL (см. mcp_common.upstreams):
+
+    python -m mcp_common.simulator --port 8900 --latency 0.05 --jitter 0.02
+    MCP_UPSTREAM_BASE_URL=http://127.0.0.1:8900 uv run python server.py
+
+Запрос к https://<host><path> приходит на симулятор как /<host><path>.
+Записи - JSON строки (файлы *.jsonl):
+
+    {"method": "GET", "host": "*.wikipedia.org", "path": "/w/api.php",
+     "query": {"list": "search"}, "status": 200,
+     "headers": {"content-type": "application/json"}, "json": {...}}
+
+host, path и значения query сравниваются как шаблоны fnmatch, query -
+подмножество параметров запроса. Тело ответа задается полем json, body
+(текст) или body_base64. Побеждает первая подходящая запись: записи из
+--recordings проверяются раньше встроенных. Такие же файлы пишет
+MCP_UPSTREAM_RECORD_DIR.
+
+Задержка ответа - latency плюс экспоненциально распределенный хвост со
+средним jitter; с вероятностью error_rate вместо записи возвращается
+error_status. Настройки отдельных хостов задаются файлом --config:
+
+    {"latency": 0.05, "hosts": {"ip-api.com": {"error_rate": 0.1}}}
+
+GET /_simulator/stats возвращает число ответов по хостам и статусам.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+# Встроенные записи ответов всех провайдеров репозитория
+DEFAULT_RECORDINGS = Path(__file__).parent / "recordings"
+
+DEFAULT_PORT = 8900
+
+
+@dataclass
+class HostProfile:
+    """Поведение симулируемого хоста"""
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+    def delay(self, rng: random.Random) -> float:
+        """Задержка одного ответа, секунды"""
+        if self.jitter <= 0:
+            return self.latency
+        return self.latency + rng.expovariate(1 / self.jitter)
+
+
+@dataclass
+class Recording:
+    """Записанный ответ upstream"""
+    host: str
+    path: str
+    method: str = "GET"
+    query: Dict[str, str] = field(default_factory=dict)
+    status: int = 200
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Recording":
+        """Запись из JSON объекта"""
+        headers = dict(data.get("headers") or {})
+        if "json" in data:
+            body = json.dumps(data["json"], ensure_ascii=False).encode()
+            headers.setdefault("content-type", "application/json")
+        elif "body_base64" in data:
+            body = base64.b64decode(data["body_base64"])
+        else:
+            body = str(data.get("body", "")).encode()
+        return cls(
+            host=data["host"],
+            path=data.get("path", "/") or "/",
+            method=data.get("method", "GET").upper(),
+            query={k: str(v) for k, v in (data.get("query") or {}).items()},
+            status=int(data.get("status", 200)),
+            headers=headers,
+            body=body,
+        )
+
+    def matches(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        params: Mapping[str, str]
+    ) -> bool:
+        """Подходит ли запись к запросу"""
+        if method != self.method:
+            return False
+        if not fnmatchcase(host, self.host) or not fnmatchcase(path, self.path):
+            return False
+        return all(
+            name in params and fnmatchcase(params[name], pattern)
+            for name, pattern in self.query.items()
+        )
+
+
+def load_recordings(path: Path) -> List[Recording]:
+    """
+    Загружает записи из файла *.jsonl или из всех таких файлов каталога
+
+    Args:
+        path: Файл или каталог с записями
+
+    Returns:
+        Записи в порядке файлов и строк
+    """
+    path = Path(path)
+    files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+    recordings = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    recordings.append(Recording.from_dict(json.loads(line)))
+    return recordings
+
+
+class UpstreamSimulator:
+    """Подбор записанного ответа и симуляция задержек и ошибок"""
+
+    def __init__(
+        self,
+        recordings: Sequence[Recording],
+        profile: Optional[HostProfile] = None,
+        hosts: Optional[Dict[str, HostProfile]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            recordings: Записи ответов в порядке приоритета
+            profile: Поведение хостов по умолчанию
+            hosts: Поведение отдельных хостов (шаблон хоста -> профиль)
+            seed: Зерно генератора задержек и ошибок
+        """
+        self.recordings = list(recordings)
+        self.profile = profile or HostProfile()
+        self.hosts = hosts or {}
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+
+    def profile_for(self, host: str) -> HostProfile:
+        """Профиль хоста: первый подходящий шаблон или профиль по умолчанию"""
+        for pattern, profile in self.hosts.items():
+            if fnmatchcase(host, pattern):
+                return profile
+        return self.profile
+
+    def find(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        params: Mapping[str, str]
+    ) -> Optional[Recording]:
+        """Первая запись, подходящая к запросу"""
+        for recording in self.recordings:
+            if recording.matches(method, host, path, params):
+                return recording
+        return None
+
+    async def handle(self, request: Request) -> Response:
+        """Ответ на запрос /<host><path>"""
+        host = request.path_params["host"]
+        path = "/" + request.path_params["path"]
+        profile = self.profile_for(host)
+
+        delay = profile.delay(self.rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            self.stats[(host, profile.error_status)] += 1
+            return JSONResponse(
+                {"error": "simulated upstream error"},
+                status_code=profile.error_status,
+            )
+
+        recording = self.find(
+            request.method, host, path, request.query_params
+        )
+        if recording is None:
+            self.stats[(host, 404)] += 1
+            return JSONResponse(
+                {"error": "no recording", "host": host, "path": path},
+                status_code=404,
+            )
+
+        self.stats[(host, recording.status)] += 1
+        return Response(
+            recording.body,
+            status_code=recording.status,
+            headers=recording.headers,
+        )
+
+    async def stats_endpoint(self, request: Request) -> Response:
+        """Число ответов по хостам и статусам"""
+        hosts: Dict[str, Dict[str, int]] = {}
+        for (host, status), count in sorted(self.stats.items()):
+            hosts.setdefault(host, {})[str(status)] = count
+        return JSONResponse({"hosts": hosts, "total": sum(self.stats.values())})
+
+
+def create_app(simulator: UpstreamSimulator) -> Starlette:
+    """Starlette приложение симулятора"""
+    methods = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD"]
+    return Starlette(routes=[
+        Route("/_simulator/stats", endpoint=simulator.stats_endpoint),
+        Route("/{host}", endpoint=simulator.handle, methods=methods),
+        Route("/{host}/{path:path}", endpoint=simulator.handle, methods=methods),
+    ])
+
+
+def _profile(data: Mapping[str, Any], base: HostProfile) -> HostProfile:
+    """Профиль из JSON объекта поверх базового"""
+    fields = ("latency", "jitter", "error_rate", "error_status")
+    return replace(base, **{k: type(getattr(base, k))(data[k])
+                            for k in fields if k in data})
+
+
+def build_simulator(
+    recordings: Sequence[Path] = (),
+    config: Optional[Path] = None,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: Optional[int] = None,
+) -> UpstreamSimulator:
+    """
+    Собирает симулятор из файлов записей и настроек
+
+    Args:
+        recordings: Дополнительные файлы или каталоги записей (проверяются
+            раньше встроенных)
+        config: JSON файл с профилями хостов
+        latency: Базовая задержка ответа, секунды
+        jitter: Среднее экспоненциального хвоста задержки, секунды
+        error_rate: Доля ответов с ошибкой
+        seed: Зерно генератора
+
+    Returns:
+        Настроенный UpstreamSimulator
+    """
+    loaded: List[Recording] = []
+    for path in recordings:
+        loaded.extend(load_recordings(path))
+    loaded.extend(load_recordings(DEFAULT_RECORDINGS))
+
+    profile = HostProfile(
+        latency=latency, jitter=jitter, error_rate=error_rate
+    )
+    hosts = {}
+    if config is not None:
+        with open(config, encoding="utf-8") as f:
+            settings = json.load(f)
+        profile = _profile(settings, profile)
+        hosts = {
+            pattern: _profile(data, profile)
+            for pattern, data in settings.get("hosts", {}).items()
+        }
+        if seed is None:
+            seed = settings.get("seed")
+    return UpstreamSimulator(loaded, profile, hosts, seed)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Запуск симулятора из командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Симулятор upstream сервисов MCP серверов"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="базовая задержка ответа, секунды")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="средний хвост задержки, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="доля ответов с ошибкой (0..1)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--config", type=Path, default=None,
+                        help="JSON файл с профилями хостов")
+    parser.add_argument("--recordings", type=Path, action="append",
+                        default=[], help="файл или каталог записей")
+    args = parser.parse_args(argv)
+
+    simulator = build_simulator(
+        recordings=args.recordings,
+        config=args.config,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    import uvicorn
+
+    print(f"🧪 Симулятор upstream: {len(simulator.recordings)} записей")
+    print(f"📡 MCP_UPSTREAM_BASE_URL=http://{args.host}:{args.port}")
+    uvicorn.run(
+        create_app(simulator),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
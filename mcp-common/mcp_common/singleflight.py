@@ -0,0 +1,117 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight).
+
+Если несколько сессий одновременно запрашивают одно и то же (например,
+погоду в Москве сразу после истечения записи в кеше), во внешний API уходит
+один запрос, а остальные вызовы ждут его результат:
+
+    @single_flight
+    async def get_weather_data(latitude: float, longitude: float) -> Dict:
+        ...
+
+Результат и исключение получают все ожидающие. Отмена одного из вызовов
+не отменяет общий запрос, пока его ждут другие. Число объединенных вызовов
+экспортируется в /metrics.
+"""
+import asyncio
+import functools
+import inspect
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from mcp_common.metrics import COALESCED_CALLS
+
+
+class SingleFlight:
+    """Группа выполняющихся запросов, индексированных ключом"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Имя группы для метрик
+        """
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        **kwargs
+    ) -> Any:
+        """
+        Выполняет func(*args, **kwargs) или дожидается уже выполняющегося
+        вызова с тем же ключом
+
+        Args:
+            key: Ключ запроса
+            func: Асинхронная функция
+
+        Returns:
+            Результат общего вызова
+        """
+        loop = asyncio.get_running_loop()
+        future = self._calls.get(key)
+        if future is not None and future.get_loop() is loop:
+            COALESCED_CALLS.labels(self.name).inc()
+        else:
+            # Запрос выполняется отдельной задачей: отмена вызвавшей его
+            # корутины не должна прерывать его для остальных
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(functools.partial(self._forget, key))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        """Убирает завершенный запрос из группы"""
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Если все ожидающие были отменены, исключение некому получить
+        if not future.cancelled():
+            future.exception()
+
+
+def _arguments_key(arguments: Dict[str, Any]) -> str:
+    """Ключ по точным значениям аргументов"""
+    return json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def single_flight(
+    func: Optional[Callable] = None,
+    *,
+    key: Callable[[Dict[str, Any]], Hashable] = _arguments_key,
+) -> Callable:
+    """
+    Декоратор, объединяющий одновременные вызовы с одинаковыми аргументами
+
+    Подходит для функций и методов: аргумент self в ключ не входит.
+
+    Args:
+        func: Асинхронная функция
+        key: Преобразование аргументов в ключ запроса
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        group = SingleFlight(func.__qualname__)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop("self", None)
+            return await group.do(key(arguments), func, *args, **kwargs)
+
+        wrapper.flight = group
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,192 @@
+"""
+Профиль холодного старта: время импортов и время до готовности сервера.
+
+    python -m mcp_common.startup mcp-fetch/server.py
+    python -m mcp_common.startup --exit --json startup.json server.py
+
+Скрипт сервера (или шлюза) запускается как обычно, но с самого начала
+импорты проходят через профилировщик: учитываются и starlette, и mcp, и
+uvicorn. Когда приложение запущено (server_lifespan из
+mcp_common.streamable вызывает mark_ready), печатается отчет: время до
+готовности, суммарное время импортов и самые дорогие пакеты и модули.
+С --exit сервер сразу останавливается - так время старта удобно
+отслеживать в CI. Профилировать стоит с MCP_WORKERS=1 (--exit выставляет
+его сам).
+"""
+import argparse
+import builtins
+import json
+import os
+import runpy
+import signal
+import sys
+import threading
+import time
+from importlib.util import resolve_name
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class ImportProfiler:
+    """Время импорта модулей: перехват builtins.__import__"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Модуль -> [время с вложенными импортами, собственное время], с
+        self.modules: Dict[str, List[float]] = {}
+        self._children: List[float] = []
+        self._original = builtins.__import__
+        self._thread = threading.get_ident()
+
+    def install(self) -> None:
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        builtins.__import__ = self._original
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.get_ident() != self._thread:
+            return self._original(name, globals, locals, fromlist, level)
+
+        module = name
+        if level:
+            try:
+                module = resolve_name(
+                    "." * level + name, (globals or {}).get("__package__")
+                )
+            except (ImportError, ValueError):
+                # Ошибку некорректного относительного импорта выдаст сам импорт
+                pass
+        # from package import submodule: загружается подмодуль
+        submodules = [
+            f"{module}.{item}" for item in fromlist or ()
+            if f"{module}.{item}" not in sys.modules
+        ] if module in sys.modules else []
+
+        loaded = len(sys.modules)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            if len(sys.modules) > loaded:
+                module = next(
+                    (sub for sub in submodules if sub in sys.modules), module
+                )
+                record = self.modules.setdefault(module, [0.0, 0.0])
+                record[0] += elapsed
+                record[1] += elapsed - children
+
+    def report(self, top: int = 15) -> Dict[str, Any]:
+        """
+        Сводка импортов
+
+        Args:
+            top: Сколько самых дорогих пакетов и модулей включить
+
+        Returns:
+            Время с начала профилирования, суммарное время импортов,
+            пакеты (по собственному времени модулей) и модули (по времени
+            с вложенными импортами), в миллисекундах
+        """
+        packages: Dict[str, float] = {}
+        for name, (_, own) in self.modules.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + own
+
+        def ms(value: float) -> float:
+            return round(value * 1000, 1)
+
+        return {
+            "elapsed_ms": ms(time.perf_counter() - self.started),
+            "imports_ms": ms(sum(own for _, own in self.modules.values())),
+            "modules": len(self.modules),
+            "top_packages": {
+                name: ms(value) for name, value in
+                sorted(packages.items(), key=lambda item: -item[1])[:top]
+            },
+            "top_modules": {
+                name: ms(total) for name, (total, _) in
+                sorted(self.modules.items(), key=lambda item: -item[1][0])[:top]
+            },
+        }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Отчет о старте в консоль"""
+    print(f"⏱️ Готов к запросам через {report['elapsed_ms']} мс, "
+          f"импорты: {report['imports_ms']} мс ({report['modules']} модулей)")
+    print("📦 Пакеты (собственное время модулей):")
+    for name, value in report["top_packages"].items():
+        print(f"   • {name}: {value} мс")
+    print("🧩 Модули (с вложенными импортами):")
+    for name, value in report["top_modules"].items():
+        print(f"   • {name}: {value} мс")
+
+
+_profiler: Optional[ImportProfiler] = None
+_options: Optional[argparse.Namespace] = None
+
+
+def mark_ready() -> None:
+    """
+    Приложение запущено: печатает отчет профиля старта
+
+    Без профилирования (обычный запуск сервера) ничего не делает. Отчет
+    печатается один раз на процесс.
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return
+    profiler.uninstall()
+    report = profiler.report(_options.top)
+    print_report(report)
+    if _options.json:
+        with open(_options.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Профиль старта: {_options.json}")
+    if _options.exit:
+        # Останавливаем uvicorn так же, как по Ctrl+C
+        os.kill(os.getpid(), signal.SIGINT)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Профиль холодного старта MCP сервера"
+    )
+    parser.add_argument("script", help="server.py сервера или шлюза")
+    parser.add_argument("args", nargs=argparse.REMAINDER,
+                        help="аргументы скрипта")
+    parser.add_argument("--top", type=int, default=15,
+                        help="сколько пакетов и модулей показать")
+    parser.add_argument("--json", help="файл для JSON отчета")
+    parser.add_argument("--exit", action="store_true",
+                        help="остановить сервер после отчета")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    global _profiler, _options
+    _options = parse_args(argv)
+    if _options.exit:
+        os.environ["MCP_WORKERS"] = "1"
+
+    script = Path(_options.script).resolve()
+    sys.argv = [str(script), *_options.args]
+    sys.path.insert(0, str(script.parent))
+
+    _profiler = ImportProfiler()
+    _profiler.install()
+    runpy.run_path(str(script), run_name="__main__")
+
+
+if __name__ == "__main__":
+    # Состояние профиля должно жить в mcp_common.startup, а не в __main__:
+    # mark_ready вызывается из server_lifespan
+    from mcp_common.startup import main
+    main()
@@ -0,0 +1,119 @@
+"""
+Streamable HTTP транспорт MCP без постоянной сессии.
+
+SSE транспорт держит для каждого клиента открытый поток GET /sse и
+отдельный канал POST /messages/: сессия живет в памяти воркера, пока
+клиент подключен, даже если он простаивает. Streamable HTTP транспорт в
+режиме stateless обслуживает каждый POST /mcp как самостоятельный запрос:
+сервер MCP создается на время запроса и ответ возвращается обычным JSON.
+Между запросами у сервера нет состояния, поэтому запрос может обработать
+любой воркер или под за балансировщиком - привязка сессий не нужна.
+
+Транспорт использует тот же FastMCP, что и SSE: инструменты, метрики,
+кеш и ограничения общие.
+
+    streamable = StreamableHttpTransport(mcp)
+
+    app = Starlette(
+        routes=[
+            Route("/sse", endpoint=handle_sse),
+            Route("/mcp", endpoint=streamable),
+            ...
+        ],
+        lifespan=server_lifespan,
+    )
+
+Менеджер запросов MCP работает в группе задач, которая запускается в
+lifespan приложения. Lifespan смонтированных приложений Starlette не
+выполняется, поэтому server_lifespan запускает все транспорты процесса:
+шлюз использует его так же, как отдельный сервер.
+"""
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.responses import PlainTextResponse
+from starlette.types import Receive, Scope, Send
+
+from mcp_common.http_client import http_client_lifespan
+from mcp_common.metrics import STREAMABLE_REQUESTS
+from mcp_common.startup import mark_ready
+
+
+# Транспорты процесса: запускаются в server_lifespan
+_transports: "weakref.WeakSet[StreamableHttpTransport]" = weakref.WeakSet()
+
+
+class StreamableHttpTransport:
+    """ASGI приложение streamable HTTP транспорта для FastMCP сервера"""
+
+    def __init__(self, mcp: FastMCP, json_response: bool = True):
+        """
+        Args:
+            mcp: Сервер, инструменты которого обслуживает транспорт
+            json_response: Отвечать JSON вместо SSE потока на каждый запрос
+        """
+        self.mcp = mcp
+        self.json_response = json_response
+        self._manager: Optional[StreamableHTTPSessionManager] = None
+        _transports.add(self)
+
+    @property
+    def running(self) -> bool:
+        """Запущен ли менеджер запросов"""
+        return self._manager is not None
+
+    @asynccontextmanager
+    async def run(self) -> AsyncIterator[None]:
+        """
+        Запускает менеджер запросов на время контекста
+
+        Менеджер нельзя запустить повторно, поэтому на каждый запуск
+        создается новый. Если транспорт уже запущен (например, и шлюзом,
+        и приложением сервера), повторный запуск ничего не делает.
+        """
+        if self._manager is not None:
+            yield
+            return
+
+        manager = StreamableHTTPSessionManager(
+            app=self.mcp._mcp_server,
+            json_response=self.json_response,
+            stateless=True,
+        )
+        async with manager.run():
+            self._manager = manager
+            try:
+                yield
+            finally:
+                self._manager = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._manager is None:
+            response = PlainTextResponse(
+                "Streamable HTTP транспорт не запущен", status_code=503
+            )
+            await response(scope, receive, send)
+            return
+
+        STREAMABLE_REQUESTS.labels(self.mcp.name, scope["method"]).inc()
+        await self._manager.handle_request(scope, receive, send)
+
+
+@asynccontextmanager
+async def server_lifespan(app) -> AsyncIterator[None]:
+    """
+    Lifespan для Starlette: streamable HTTP транспорты и пул соединений
+
+    Запускает менеджеры запросов всех транспортов процесса, а при
+    остановке закрывает их и общий пул HTTP соединений. При запуске через
+    mcp_common.startup отмечает готовность сервера для профиля старта.
+    """
+    async with AsyncExitStack() as stack:
+        for transport in list(_transports):
+            await stack.enter_async_context(transport.run())
+        async with http_client_lifespan(app):
+            mark_ready()
+            yield
@@ -0,0 +1,300 @@
+"""
+Распределенная трассировка вызовов инструментов (OpenTelemetry).
+
+Метрики показывают, что вызов инструмента занял 2 секунды, трасса -
+куда ушло это время. Каждый вызов инструмента - корневой спан, внутри
+него дочерние спаны:
+
+- tools/call <инструмент> - вызов инструмента (instrument_tools);
+- cache <кеш.инструмент> - поиск в кеше, результат hit/stale/miss;
+- GET/POST <хост> - запрос к upstream через общий HTTP клиент, включая
+  ожидание квоты и слота хоста;
+- format - форматирование результата (@structured);
+- фазы серверов, например weather.geocode и weather.forecast,
+  wikipedia.parse и wikipedia.info, artifact_registry.token и
+  artifact_registry.request, разбор HTML и XML ответов.
+
+Трассировка выключена по умолчанию и включается MCP_TRACING:
+
+- off - спаны не создаются, вызов span() почти ничего не стоит;
+- otlp - экспорт по OTLP/HTTP. Адрес, заголовки и таймаут задаются
+  стандартными OTEL_EXPORTER_OTLP_* переменными;
+- file - спаны JSON строками в MCP_TRACING_FILE для офлайн анализа.
+
+Доля записываемых трасс - MCP_TRACING_SAMPLE (0..1), имя сервиса -
+OTEL_SERVICE_NAME. Контекст трассы принимается из заголовка traceparent
+запроса клиента и передается в запросах к upstream.
+
+Нужен extra tracing пакета mcp-common (OpenTelemetry SDK и OTLP
+экспортер). Без него трассировка отключается с предупреждением.
+
+    with span("weather.geocode", city=city_name):
+        coordinates = await get_city_coordinates(city_name)
+
+    @traced("fetch.extract_text")
+    def extract_text_content(html: str, url: str) -> str:
+        ...
+"""
+import functools
+import inspect
+import os
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Mapping, Optional
+
+import httpx
+
+
+TRACING_MODES = ("off", "otlp", "file")
+
+
+@dataclass
+class TracingSettings:
+    """Настройки трассировки"""
+    mode: str = "off"
+    # {pid} в имени - отдельный файл для каждого воркера
+    file: str = "traces.jsonl"
+    sample: float = 1.0
+    service: str = "mcp"
+
+    @classmethod
+    def from_env(cls) -> "TracingSettings":
+        """Собирает настройки из переменных окружения"""
+        mode = (os.getenv("MCP_TRACING") or cls.mode).strip().lower()
+        if mode not in TRACING_MODES:
+            raise ValueError(
+                f"MCP_TRACING должно быть одним из "
+                f"{', '.join(TRACING_MODES)}, получено: {mode}"
+            )
+        sample = float(os.getenv("MCP_TRACING_SAMPLE") or cls.sample)
+        if not 0 <= sample <= 1:
+            raise ValueError(
+                f"MCP_TRACING_SAMPLE должно быть от 0 до 1, получено: {sample}"
+            )
+        return cls(
+            mode=mode,
+            file=os.getenv("MCP_TRACING_FILE") or cls.file,
+            sample=sample,
+            service=os.getenv("OTEL_SERVICE_NAME") or cls.service,
+        )
+
+
+class _NoopSpan:
+    """Спан выключенной трассировки: атрибуты и события отбрасываются"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Mapping[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Mapping] = None) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+# Один контекст на все вызовы span() при выключенной трассировке
+_NOOP = nullcontext(_NoopSpan())
+
+_settings: Optional[TracingSettings] = None
+# None - трассировка не настроена или выключена
+_tracer = None
+_provider = None
+_configured = False
+
+
+def get_settings() -> TracingSettings:
+    """Настройки трассировки текущего процесса"""
+    global _settings
+    if _settings is None:
+        _settings = TracingSettings.from_env()
+    return _settings
+
+
+def _exporter(settings: TracingSettings):
+    """Экспортер спанов для режима трассировки"""
+    if settings.mode == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        return OTLPSpanExporter()
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    path = settings.file.format(pid=os.getpid())
+    # Строка на спан: файл дописывается и читается построчно
+    out = open(path, "a", encoding="utf-8", buffering=1)
+    return ConsoleSpanExporter(
+        out=out, formatter=lambda s: s.to_json(indent=None) + "\n"
+    )
+
+
+def _configure():
+    """Создает трассировщик при первом спане (или отмечает, что его нет)"""
+    global _tracer, _provider, _configured
+    _configured = True
+    settings = get_settings()
+    if settings.mode == "off":
+        return None
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import (
+            ParentBased,
+            TraceIdRatioBased,
+        )
+        exporter = _exporter(settings)
+    except ImportError as e:
+        print(f"⚠️ Трассировка MCP_TRACING={settings.mode} отключена: "
+              f"не установлен OpenTelemetry SDK ({e.name}). "
+              f"Установите mcp-common[tracing]")
+        return None
+
+    # Собственный провайдер, а не глобальный: его можно пересоздать
+    # (reset_tracing) и он не мешает трассировке приложения
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.service}),
+        sampler=ParentBased(TraceIdRatioBased(settings.sample)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = _provider.get_tracer("mcp_common")
+    print(f"🔭 Трассировка: {settings.mode}, доля трасс {settings.sample:g}")
+    return _tracer
+
+
+def get_tracer():
+    """Трассировщик процесса или None, если трассировка выключена"""
+    if _configured:
+        return _tracer
+    return _configure()
+
+
+def reset_tracing() -> None:
+    """Сбрасывает трассировщик и перечитывает настройки (для тестов)"""
+    global _settings, _tracer, _provider, _configured
+    if _provider is not None:
+        _provider.shutdown()
+    _settings = None
+    _tracer = None
+    _provider = None
+    _configured = False
+
+
+def _span_kind(kind: str):
+    from opentelemetry.trace import SpanKind
+    return getattr(SpanKind, kind.upper())
+
+
+def span(
+    name: str,
+    kind: str = "internal",
+    headers: Optional[Mapping[str, str]] = None,
+    **attributes: Any,
+) -> ContextManager:
+    """
+    Дочерний спан текущей трассы на время блока with
+
+    Исключение из блока записывается в спан и помечает его ошибкой.
+
+    Args:
+        name: Имя спана (например, "weather.geocode")
+        kind: internal, server или client
+        headers: Заголовки входящего запроса с контекстом трассы
+            (traceparent) - для корневого спана
+        **attributes: Атрибуты спана (None пропускаются)
+
+    Returns:
+        Контекстный менеджер, отдающий спан (при выключенной
+        трассировке - заглушку с теми же методами)
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        return _NOOP
+
+    context = None
+    if headers is not None:
+        from opentelemetry.propagate import extract
+        context = extract(headers)
+    return tracer.start_as_current_span(
+        name,
+        context=context,
+        kind=_span_kind(kind),
+        attributes={
+            key: value for key, value in attributes.items()
+            if value is not None
+        },
+    )
+
+
+def traced(name: str) -> Callable:
+    """
+    Декоратор: вызов функции (синхронной или асинхронной) - спан
+
+    Args:
+        name: Имя спана
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def mark_error(current, description: str) -> None:
+    """Помечает спан ошибкой без исключения (например, ответ 5xx)"""
+    if not current.is_recording():
+        return
+    from opentelemetry.trace import Status, StatusCode
+    current.set_status(Status(StatusCode.ERROR, description))
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Транспорт httpx: спан на каждый запрос к upstream"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request
+    ) -> httpx.Response:
+        if get_tracer() is None:
+            return await self._transport.handle_async_request(request)
+
+        # Без строки запроса: в ней бывают ключи API
+        with span(
+            f"{request.method} {request.url.host}",
+            kind="client",
+            **{
+                "http.request.method": request.method,
+                "url.full": str(request.url.copy_with(query=None)),
+                "server.address": request.url.host,
+            },
+        ) as current:
+            from opentelemetry.propagate import inject
+            inject(request.headers)
+            response = await self._transport.handle_async_request(request)
+            current.set_attribute(
+                "http.response.status_code", response.status_code
+            )
+            if response.status_code >= 500:
+                mark_error(current, str(response.status_code))
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
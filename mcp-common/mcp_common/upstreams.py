@@ -0,0 +1,191 @@
+"""
+Адреса upstream сервисов: перенаправление на локальный симулятор и запись
+ответов.
+
+Для воспроизводимых нагрузочных тестов запросы к известным провайдерам
+(Open-Meteo, DuckDuckGo, ip-api, ESPN, Wikipedia, Yandex, Cloud.ru и т.д.)
+можно направить на симулятор (mcp_common.simulator) без изменения кода
+серверов:
+
+    MCP_UPSTREAM_BASE_URL=http://127.0.0.1:8900 uv run python server.py
+
+Запрос https://api.open-meteo.com/v1/forecast?... уходит на
+http://127.0.0.1:8900/api.open-meteo.com/v1/forecast?... Переменная
+MCP_UPSTREAM_<UPSTREAM>_URL перенаправляет один upstream (имя как в
+метриках, "-" заменяется на "_"): MCP_UPSTREAM_OPEN_METEO_URL=...
+
+Метрики, предохранители и лимиты по-прежнему считаются по настоящему
+хосту: перенаправление выполняется самым внутренним транспортом.
+
+MCP_UPSTREAM_RECORD_DIR=./recordings записывает ответы upstream в формате
+записей симулятора (по файлу <host>.jsonl на хост).
+"""
+import base64
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import httpx
+
+from mcp_common.metrics import UPSTREAMS, upstream_name
+
+
+# Сохраняемые при записи заголовки ответа
+RECORDED_HEADERS = ("content-type", "retry-after")
+
+
+@dataclass
+class UpstreamSettings:
+    """Настройки адресов upstream"""
+    base_url: Optional[str] = None
+    overrides: Dict[str, str] = field(default_factory=dict)
+    record_dir: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "UpstreamSettings":
+        """Собирает настройки из переменных окружения MCP_UPSTREAM_*"""
+        overrides = {}
+        for upstream in set(UPSTREAMS.values()):
+            env = "MCP_UPSTREAM_" + upstream.upper().replace("-", "_") + "_URL"
+            if os.getenv(env):
+                overrides[upstream] = os.getenv(env).rstrip("/")
+        base_url = os.getenv("MCP_UPSTREAM_BASE_URL")
+        return cls(
+            base_url=base_url.rstrip("/") if base_url else None,
+            overrides=overrides,
+            record_dir=os.getenv("MCP_UPSTREAM_RECORD_DIR") or None,
+        )
+
+    @property
+    def active(self) -> bool:
+        """Нужно ли что-то делать с запросами"""
+        return bool(self.base_url or self.overrides or self.record_dir)
+
+    def target(self, host: str) -> Optional[str]:
+        """Адрес, на который перенаправляется хост, или None"""
+        upstream = upstream_name(host)
+        if upstream == "other":
+            # Произвольные адреса (mcp-fetch) не перенаправляются
+            return None
+        return self.overrides.get(upstream, self.base_url)
+
+
+_settings: Optional[UpstreamSettings] = None
+
+
+def get_settings() -> UpstreamSettings:
+    """Настройки адресов upstream текущего процесса"""
+    global _settings
+    if _settings is None:
+        _settings = UpstreamSettings.from_env()
+    return _settings
+
+
+def reset_upstreams() -> None:
+    """Перечитывает настройки из переменных окружения"""
+    global _settings
+    _settings = None
+
+
+def rewrite_url(url: Any) -> httpx.URL:
+    """
+    Адрес запроса с учетом перенаправления на симулятор
+
+    Args:
+        url: Исходный адрес (str или httpx.URL)
+
+    Returns:
+        {target}/{host}{path}?{query} для перенаправленных upstream,
+        иначе исходный адрес
+    """
+    url = httpx.URL(str(url))
+    target = get_settings().target(url.host)
+    if target is None:
+        return url
+    return httpx.URL(f"{target}/{url.host}{url.raw_path.decode('ascii')}")
+
+
+def _record_entry(request: httpx.Request, response: httpx.Response) -> Dict:
+    """Запись ответа в формате симулятора"""
+    entry: Dict[str, Any] = {
+        "method": request.method,
+        "host": request.url.host,
+        "path": request.url.path,
+        "query": dict(request.url.params),
+        "status": response.status_code,
+        "headers": {
+            name: response.headers[name]
+            for name in RECORDED_HEADERS if name in response.headers
+        },
+    }
+    content_type = response.headers.get("content-type", "")
+    try:
+        if "json" in content_type:
+            entry["json"] = response.json()
+        else:
+            encoding = response.encoding or "utf-8"
+            entry["body"] = response.content.decode(encoding)
+    except (ValueError, UnicodeDecodeError):
+        entry.pop("json", None)
+        entry["body_base64"] = base64.b64encode(response.content).decode()
+    return entry
+
+
+def record_response(
+    record_dir: str,
+    request: httpx.Request,
+    response: httpx.Response
+) -> None:
+    """
+    Дописывает ответ upstream в файл записей <record_dir>/<host>.jsonl
+
+    Тело ответа должно быть прочитано.
+    """
+    os.makedirs(record_dir, exist_ok=True)
+    path = os.path.join(record_dir, f"{request.url.host}.jsonl")
+    line = json.dumps(_record_entry(request, response), ensure_ascii=False)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+class UpstreamRedirectTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx, перенаправляющий запросы к известным upstream на
+    симулятор и записывающий ответы (см. MCP_UPSTREAM_*)
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request
+    ) -> httpx.Response:
+        settings = get_settings()
+        if not settings.active:
+            return await self._transport.handle_async_request(request)
+
+        original = request
+        url = rewrite_url(request.url)
+        if url != request.url:
+            headers = httpx.Headers(request.headers)
+            headers["Host"] = url.netloc.decode("ascii")
+            request = httpx.Request(
+                request.method,
+                url,
+                headers=headers,
+                stream=request.stream,
+                extensions=request.extensions,
+            )
+
+        response = await self._transport.handle_async_request(request)
+        if (settings.record_dir and url == original.url
+                and upstream_name(url.host) != "other"):
+            # Записываем только ответы настоящих провайдеров
+            await response.aread()
+            record_response(settings.record_dir, original, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
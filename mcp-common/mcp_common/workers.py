@@ -0,0 +1,327 @@
+"""
+Многопроцессный режим запуска MCP серверов.
+
+Супервизор форкает N независимых воркеров (shared-nothing). Каждый воркер
+сам открывает TCP сокет с SO_REUSEPORT на общем порту, и ядро распределяет
+новые соединения между воркерами.
+
+SSE сессия живет в памяти воркера, который принял GET /sse, поэтому
+POST /messages/ должен попасть туда же. Для этого номер воркера кодируется
+в адресе для сообщений (/messages/w3/?session_id=...). Если POST пришел
+на другой воркер, он пересылается владельцу сессии через его unix сокет.
+"""
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional, Union
+
+import httpx
+import uvicorn
+from mcp.server.sse import SseServerTransport
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mcp_common import runtime
+
+
+# Заголовок пересланного запроса: защищает от повторной пересылки
+FORWARDED_HEADER = b"x-mcp-worker-forwarded"
+
+# Номер воркера в конце адреса для сообщений: /messages/w3/
+_WORKER_PATH = re.compile(r"/w(\d+)/?$")
+
+# Заголовки, которые не переносятся при пересылке
+_HOP_HEADERS = {b"host", b"content-length", b"connection", b"transfer-encoding"}
+
+# Воркер, который упал раньше этого срока, считается не запустившимся
+_STARTUP_GRACE = 5.0
+
+# Состояние текущего процесса: задается супервизором перед запуском воркера
+_worker_id: Optional[int] = None
+_worker_count: int = 1
+_socket_dir: Optional[str] = None
+
+# Клиенты для запросов к соседним воркерам через их unix сокеты
+_peers: Dict[int, httpx.AsyncClient] = {}
+
+
+def current_worker_id() -> Optional[int]:
+    """Номер текущего воркера или None в однопроцессном режиме"""
+    return _worker_id
+
+
+def get_worker_count() -> int:
+    """
+    Число воркеров из переменной окружения MCP_WORKERS
+
+    Значение "auto" означает по воркеру на каждое доступное ядро.
+    """
+    value = os.getenv("MCP_WORKERS", "1").strip().lower()
+    if value == "auto":
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"MCP_WORKERS должно быть >= 1, получено: {value}")
+    return workers
+
+
+def worker_socket_path(worker_id: int) -> str:
+    """Путь к unix сокету воркера для пересылки сообщений"""
+    return os.path.join(_socket_dir, f"worker-{worker_id}.sock")
+
+
+def peer_ids() -> List[int]:
+    """Номера остальных воркеров (пусто в однопроцессном режиме)"""
+    if _worker_id is None:
+        return []
+    return [i for i in range(_worker_count) if i != _worker_id]
+
+
+def peer_client(worker_id: int) -> httpx.AsyncClient:
+    """
+    HTTP клиент для запросов к другому воркеру через его unix сокет
+
+    Args:
+        worker_id: Номер воркера
+
+    Returns:
+        httpx.AsyncClient с base_url http://mcp-worker
+    """
+    client = _peers.get(worker_id)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                uds=worker_socket_path(worker_id)
+            ),
+            base_url="http://mcp-worker",
+            timeout=30.0,
+        )
+        _peers[worker_id] = client
+    return client
+
+
+class WorkerSseServerTransport(SseServerTransport):
+    """
+    SSE транспорт, добавляющий номер воркера в адрес для сообщений.
+
+    Адрес вычисляется при каждом подключении, поэтому один и тот же
+    объект транспорта, созданный до форка, в каждом воркере выдает
+    клиентам свой адрес. В однопроцессном режиме адрес не меняется.
+    """
+
+    @property
+    def _endpoint(self) -> str:
+        if _worker_id is None:
+            return self._base_endpoint
+        return f"{self._base_endpoint.rstrip('/')}/w{_worker_id}/"
+
+    @_endpoint.setter
+    def _endpoint(self, value: str) -> None:
+        self._base_endpoint = value
+
+
+class SessionAffinity:
+    """
+    ASGI обертка над обработчиком POST /messages/.
+
+    Сообщение для сессии другого воркера пересылается этому воркеру
+    через unix сокет, ответ возвращается клиенту без изменений.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _owner(self, scope: Scope) -> Optional[int]:
+        """Номер воркера-владельца сессии, если это не текущий воркер"""
+        if _worker_id is None or scope["type"] != "http":
+            return None
+        if any(name == FORWARDED_HEADER for name, _ in scope["headers"]):
+            return None
+        match = _WORKER_PATH.search(scope["path"])
+        if match is None or int(match.group(1)) == _worker_id:
+            return None
+        return int(match.group(1))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        owner = self._owner(scope)
+        if owner is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in _HOP_HEADERS
+        ]
+        headers.append((FORWARDED_HEADER, b"1"))
+        path = scope.get("raw_path") or scope["path"].encode()
+        url = path.decode("latin-1")
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+
+        try:
+            upstream = await peer_client(owner).request(
+                scope["method"], url, headers=headers, content=body
+            )
+        except httpx.TransportError:
+            # Воркер-владелец перезапущен или остановлен - сессии больше нет
+            response = Response("Could not find session", status_code=404)
+        else:
+            response = Response(
+                upstream.content,
+                status_code=upstream.status_code,
+                media_type=upstream.headers.get("content-type"),
+            )
+        await response(scope, receive, send)
+
+
+def _bind_reuseport(host: str, port: int) -> socket.socket:
+    """Открывает TCP сокет с SO_REUSEPORT на общем порту"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def _bind_unix(path: str) -> socket.socket:
+    """Открывает unix сокет воркера для пересланных сообщений"""
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    return sock
+
+
+def _run_worker(
+    worker_id: int,
+    app: ASGIApp,
+    host: str,
+    port: int,
+    uvicorn_kwargs: dict
+) -> None:
+    """Точка входа процесса-воркера"""
+    global _worker_id
+    _worker_id = worker_id
+    # Обработчики супервизора унаследованы при форке - uvicorn повторно
+    # поднимает пойманный сигнал после остановки, процесс должен завершиться
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    sockets = [
+        _bind_reuseport(host, port),
+        _bind_unix(worker_socket_path(worker_id)),
+    ]
+    config = uvicorn.Config(app, **uvicorn_kwargs)
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+def _supervise(
+    app: ASGIApp,
+    host: str,
+    port: int,
+    workers: int,
+    uvicorn_kwargs: dict
+) -> None:
+    """
+    Запускает воркеры и перезапускает упавшие до получения сигнала остановки
+    """
+    global _socket_dir, _worker_count
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("Многопроцессный режим требует поддержки SO_REUSEPORT")
+
+    _socket_dir = tempfile.mkdtemp(prefix="mcp-workers-")
+    _worker_count = workers
+    context = multiprocessing.get_context("fork")
+    processes: Dict[int, multiprocessing.Process] = {}
+    started: Dict[int, float] = {}
+    stopping = False
+
+    def start(worker_id: int) -> None:
+        process = context.Process(
+            target=_run_worker,
+            args=(worker_id, app, host, port, uvicorn_kwargs),
+            name=f"mcp-worker-{worker_id}",
+        )
+        process.start()
+        processes[worker_id] = process
+        started[worker_id] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    previous = {
+        sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        for worker_id in range(workers):
+            start(worker_id)
+        print(f"👷 Запущено воркеров: {workers} (SO_REUSEPORT, порт {port})")
+
+        while not stopping:
+            wait([process.sentinel for process in processes.values()])
+            for worker_id, process in list(processes.items()):
+                if stopping or process.is_alive():
+                    continue
+                if time.monotonic() - started[worker_id] < _STARTUP_GRACE:
+                    print(f"❌ Воркер {worker_id} не запустился (код {process.exitcode})")
+                    stop(None, None)
+                    for other in processes.values():
+                        other.join()
+                    sys.exit(1)
+                print(f"⚠️ Воркер {worker_id} завершился (код {process.exitcode}), перезапуск...")
+                start(worker_id)
+
+        for process in processes.values():
+            process.join()
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        shutil.rmtree(_socket_dir, ignore_errors=True)
+
+
+def run_server(
+    app: Union[ASGIApp, str],
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: Optional[int] = None,
+    **uvicorn_kwargs
+) -> None:
+    """
+    Запускает ASGI приложение в одном или нескольких процессах
+
+    Args:
+        app: Starlette приложение
+        host: Адрес для прослушивания
+        port: Порт
+        workers: Число воркеров (по умолчанию из MCP_WORKERS)
+        **uvicorn_kwargs: Дополнительные параметры uvicorn (log_level и т.п.)
+    """
+    workers = workers if workers is not None else get_worker_count()
+    # Профиль производительности (MCP_RUNTIME=fast): uvloop, httptools,
+    # orjson. Воркеры наследуют его при форке
+    runtime.install()
+    uvicorn_kwargs = {**runtime.uvicorn_options(), **uvicorn_kwargs}
+    if workers == 1:
+        uvicorn.run(app, host=host, port=port, **uvicorn_kwargs)
+        return
+    _supervise(app, host, port, workers, uvicorn_kwargs)
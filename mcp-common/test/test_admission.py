@@ -0,0 +1,222 @@
+"""
+Тесты контроля нагрузки: лимиты сессий и вызовов инструментов
+"""
+import asyncio
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolRequest, CallToolRequestParams
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_common.admission import (
+    SERVER_OVERLOADED,
+    AdmissionController,
+    AdmissionSettings,
+    get_admission,
+    limit_sessions,
+    limit_tool_calls,
+    reset_admission,
+)
+
+
+@pytest.fixture
+def admission_env(monkeypatch):
+    """Задает лимиты через переменные окружения на время теста"""
+    def set_env(**values) -> None:
+        for name, value in values.items():
+            monkeypatch.setenv(name, str(value))
+        reset_admission()
+
+    yield set_env
+    reset_admission()
+
+
+def controller(**kwargs) -> AdmissionController:
+    return AdmissionController(AdmissionSettings(**kwargs))
+
+
+class TestAdmissionSettings:
+    """Тесты настроек"""
+
+    def test_from_env(self, monkeypatch):
+        """Лимиты читаются из переменных окружения"""
+        monkeypatch.setenv("MCP_MAX_SESSIONS", "10")
+        monkeypatch.setenv("MCP_MAX_INFLIGHT", "0")
+        monkeypatch.setenv("MCP_QUEUE_TIMEOUT", "2.5")
+
+        settings = AdmissionSettings.from_env()
+
+        assert settings.max_sessions == 10
+        assert settings.max_inflight == 0
+        assert settings.queue_timeout == 2.5
+        assert settings.max_session_inflight == AdmissionSettings.max_session_inflight
+
+    def test_negative(self, monkeypatch):
+        """Отрицательный лимит - ошибка конфигурации"""
+        monkeypatch.setenv("MCP_MAX_QUEUE", "-1")
+
+        with pytest.raises(ValueError, match="MCP_MAX_QUEUE"):
+            AdmissionSettings.from_env()
+
+
+class TestCalls:
+    """Тесты очереди вызовов"""
+
+    async def test_under_limit(self):
+        """Вызов в пределах лимитов допускается сразу"""
+        admission = controller(max_inflight=2)
+
+        await admission.acquire("a")
+        await admission.acquire("b")
+
+        assert admission.inflight == 2
+        assert admission.waiting == 0
+
+    async def test_global_limit_queues(self):
+        """Сверх общего лимита вызов ждет освобождения места"""
+        admission = controller(max_inflight=1)
+        await admission.acquire("a")
+
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await asyncio.sleep(0)
+        assert admission.waiting == 1
+        assert not waiter.done()
+
+        admission.release("a")
+        await waiter
+
+        assert admission.inflight == 1
+        assert admission.waiting == 0
+
+    async def test_session_limit_does_not_block_others(self):
+        """Сессия, исчерпавшая лимит, не задерживает другие сессии"""
+        admission = controller(max_inflight=10, max_session_inflight=1)
+        await admission.acquire("a")
+
+        blocked = asyncio.create_task(admission.acquire("a"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(admission.acquire("b"), 1)
+
+        assert not blocked.done()
+        admission.release("a")
+        await blocked
+        assert admission.inflight == 2
+
+    async def test_queue_full(self):
+        """При полной очереди вызов отклоняется сразу"""
+        admission = controller(max_inflight=1, max_queue=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(McpError) as error:
+            await admission.acquire("c")
+
+        assert error.value.error.code == SERVER_OVERLOADED
+        assert error.value.error.data == {"retry_after": 1}
+        waiter.cancel()
+
+    async def test_timeout(self):
+        """По истечении срока ожидания вызов отклоняется"""
+        admission = controller(max_inflight=1, queue_timeout=0.05)
+        await admission.acquire("a")
+
+        with pytest.raises(McpError, match="ждал в очереди") as error:
+            await admission.acquire("b")
+
+        assert error.value.error.code == SERVER_OVERLOADED
+        assert admission.waiting == 0
+        assert admission.inflight == 1
+
+    async def test_cancel_while_waiting(self):
+        """Отмененный в очереди вызов не занимает место"""
+        admission = controller(max_inflight=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        admission.release("a")
+
+        assert admission.waiting == 0
+        assert admission.inflight == 0
+
+
+class TestLimitToolCalls:
+    """Тесты подключения к FastMCP"""
+
+    @pytest.fixture
+    def server(self):
+        mcp = FastMCP("admission-test")
+        limit_tool_calls(mcp)
+        release = asyncio.Event()
+
+        @mcp.tool()
+        async def wait() -> str:
+            """Ждет разрешения завершиться"""
+            await release.wait()
+            return "готово"
+
+        mcp.release = release
+        return mcp
+
+    @staticmethod
+    async def call(server: FastMCP):
+        handler = server._mcp_server.request_handlers[CallToolRequest]
+        return await handler(CallToolRequest(
+            params=CallToolRequestParams(name="wait", arguments={})
+        ))
+
+    async def test_overload_is_mcp_error(self, server, admission_env):
+        """Перегрузка - ошибка JSON-RPC, а не результат с isError"""
+        admission_env(MCP_MAX_INFLIGHT=1, MCP_QUEUE_TIMEOUT=0.05)
+        first = asyncio.create_task(self.call(server))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(McpError) as error:
+            await self.call(server)
+
+        assert error.value.error.code == SERVER_OVERLOADED
+        server.release.set()
+        result = await first
+        assert result.root.content[0].text == "готово"
+        assert get_admission().inflight == 0
+
+
+class TestLimitSessions:
+    """Тесты лимита SSE сессий"""
+
+    @pytest.fixture
+    def app(self):
+        @limit_sessions("admission-test")
+        async def handle_sse(request: Request):
+            return Response(str(get_admission().sessions))
+
+        return Starlette(routes=[Route("/sse", endpoint=handle_sse)])
+
+    def test_session_admitted(self, app, admission_env):
+        """Сессия в пределах лимита обслуживается и освобождает место"""
+        admission_env(MCP_MAX_SESSIONS=1)
+
+        response = TestClient(app).get("/sse")
+
+        assert response.text == "1"
+        assert get_admission().sessions == 0
+
+    def test_session_rejected(self, app, admission_env):
+        """Сверх лимита - 503 с Retry-After до открытия SSE потока"""
+        admission_env(MCP_MAX_SESSIONS=1)
+        assert get_admission().open_session()
+
+        response = TestClient(app).get("/sse")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+        assert get_admission().sessions == 1
@@ -0,0 +1,354 @@
+"""
+Тесты двухуровневого кеша инструментов
+"""
+import asyncio
+import time
+
+import pytest
+
+from mcp_common.cache import (
+    CacheSettings,
+    LRUCache,
+    SQLiteCache,
+    TieredCache,
+    default_key,
+    exact_key,
+    mark_stale,
+)
+
+
+@pytest.fixture
+def settings(tmp_path):
+    """Кеш с файлом во временной папке"""
+    return CacheSettings(directory=str(tmp_path))
+
+
+class TestCacheSettings:
+    """Тесты настроек кеша"""
+
+    def test_from_env(self, monkeypatch):
+        """Настройки читаются из переменных окружения"""
+        monkeypatch.setenv("MCP_CACHE_ENABLED", "false")
+        monkeypatch.setenv("MCP_CACHE_MEMORY_ENTRIES", "10")
+        monkeypatch.setenv("MCP_CACHE_DIR", "/data/cache")
+
+        settings = CacheSettings.from_env()
+
+        assert settings.enabled is False
+        assert settings.memory_entries == 10
+        assert settings.directory == "/data/cache"
+
+
+class TestKeys:
+    """Тесты нормализации ключей"""
+
+    def test_default_key_normalizes_strings(self):
+        """Регистр и лишние пробелы не влияют на ключ"""
+        assert default_key({"city": "  Нижний   Новгород "}) == \
+            default_key({"city": "нижний новгород"})
+
+    def test_exact_key(self):
+        """exact_key оставляет аргументы как есть"""
+        assert exact_key({"url": "https://a.ru/Path"}) == {"url": "https://a.ru/Path"}
+
+
+class TestLRUCache:
+    """Тесты кеша в памяти"""
+
+    def test_evicts_least_recently_used(self):
+        """Сверх лимита записей вытесняется самая старая по обращению"""
+        cache = LRUCache(max_entries=2, max_bytes=1000)
+        expires = time.time() + 60
+        cache.set("a", 1, expires, 1)
+        cache.set("b", 2, expires, 1)
+        cache.get("a")
+        cache.set("c", 3, expires, 1)
+
+        assert cache.get("b") is None
+        assert cache.get("a")[0] == 1
+        assert cache.evictions == 1
+
+    def test_evicts_by_size(self):
+        """Сверх лимита размера вытесняются старые записи"""
+        cache = LRUCache(max_entries=100, max_bytes=10)
+        expires = time.time() + 60
+        cache.set("a", "x", expires, 6)
+        cache.set("b", "y", expires, 6)
+
+        assert cache.get("a") is None
+        assert cache.size == 6
+
+    def test_expired_entry(self):
+        """Истекшая запись не возвращается"""
+        cache = LRUCache(max_entries=10, max_bytes=1000)
+        cache.set("a", 1, time.time() - 1, 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestSQLiteCache:
+    """Тесты кеша на диске"""
+
+    @pytest.mark.asyncio
+    async def test_set_and_get(self, tmp_path):
+        """Значение сохраняется в файле"""
+        cache = SQLiteCache(str(tmp_path / "test.sqlite"), 1000)
+        await cache.set("a", '"value"', time.time() + 60, 7)
+
+        value, _ = await cache.get("a")
+
+        assert value == '"value"'
+
+    @pytest.mark.asyncio
+    async def test_expired(self, tmp_path):
+        """Истекшая запись удаляется"""
+        cache = SQLiteCache(str(tmp_path / "test.sqlite"), 1000)
+        await cache.set("a", '"value"', time.time() - 1, 7)
+
+        assert await cache.get("a") is None
+        assert await cache.stats() == (0, 0)
+
+    @pytest.mark.asyncio
+    async def test_evicts_by_size(self, tmp_path):
+        """Сверх лимита размера удаляются давно не читавшиеся записи"""
+        cache = SQLiteCache(str(tmp_path / "test.sqlite"), 100)
+        cache.EVICTION_INTERVAL = 1
+        expires = time.time() + 60
+        for i in range(5):
+            await cache.set(f"k{i}", '"x"', expires, 40)
+
+        assert await cache.stats() == (2, 80)
+        assert cache.evictions == 3
+        assert await cache.get("k0") is None
+        assert await cache.get("k4") is not None
+
+
+class TestTieredCache:
+    """Тесты двухуровневого кеша"""
+
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, settings):
+        """Значение с диска доступно новому экземпляру кеша"""
+        await TieredCache("test", settings).set("key", {"a": 1}, 60)
+
+        restarted = TieredCache("test", settings)
+        found, value = await restarted.get("key")
+
+        assert found and value == {"a": 1}
+        assert restarted.hits == {"memory": 0, "disk": 1}
+        # Запись поднята в память
+        assert (await restarted.get("key"))[1] == {"a": 1}
+        assert restarted.hits["memory"] == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_only(self, tmp_path):
+        """MCP_CACHE_DISK=false - только кеш в памяти"""
+        cache = TieredCache(
+            "test", CacheSettings(directory=str(tmp_path), disk_enabled=False)
+        )
+        await cache.set("key", "value", 60)
+
+        assert cache.disk is None
+        assert await cache.get("key") == (True, "value")
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_stats(self, settings):
+        """Статистика попаданий и размеров"""
+        cache = TieredCache("test", settings)
+        await cache.get("missing")
+        await cache.set("key", "value", 60)
+        await cache.get("key")
+
+        stats = await cache.stats()
+
+        assert stats["misses"] == 1
+        assert stats["hits"]["memory"] == 1
+        assert stats["hit_ratio"] == 0.5
+        assert stats["memory"]["entries"] == 1
+        assert stats["disk"]["entries"] == 1
+
+
+class TestCachedDecorator:
+    """Тесты декоратора кеширования инструментов"""
+
+    @pytest.mark.asyncio
+    async def test_caches_by_normalized_arguments(self, settings):
+        """Повторный вызов с тем же (нормализованным) аргументом берется из кеша"""
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=60)
+        async def get_weather(city: str, days: int = 1) -> str:
+            """Погода"""
+            calls.append(city)
+            return f"weather in {city}"
+
+        assert await get_weather("Москва") == "weather in Москва"
+        assert await get_weather("  москва ") == "weather in Москва"
+        assert await get_weather("Москва", days=1) == "weather in Москва"
+        await get_weather("Москва", days=3)
+
+        assert calls == ["Москва", "Москва"]
+        assert get_weather.__doc__ == "Погода"
+
+    @pytest.mark.asyncio
+    async def test_exceptions_not_cached(self, settings):
+        """Ошибки не кешируются"""
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=60)
+        async def flaky(value: str) -> str:
+            calls.append(value)
+            if len(calls) == 1:
+                raise RuntimeError("upstream down")
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await flaky("a")
+        assert await flaky("a") == "ok"
+        assert await flaky("a") == "ok"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_if(self, settings):
+        """cache_if не дает сохранить сообщение об ошибке"""
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=60, cache_if=lambda result: not result.startswith("❌"))
+        async def tool() -> str:
+            calls.append(1)
+            return "❌ Ошибка"
+
+        await tool()
+        await tool()
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, tmp_path):
+        """MCP_CACHE_ENABLED=false отключает кеш"""
+        cache = TieredCache(
+            "test", CacheSettings(enabled=False, directory=str(tmp_path))
+        )
+        calls = []
+
+        @cache.cached(ttl=60)
+        async def tool(value: str) -> str:
+            calls.append(value)
+            return value
+
+        await tool("a")
+        await tool("a")
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_from_env(self, settings, monkeypatch):
+        """TTL инструмента переопределяется переменной окружения"""
+        monkeypatch.setenv("MCP_CACHE_TTL_TOOL", "0")
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=60)
+        async def tool() -> str:
+            calls.append(1)
+            return "ok"
+
+        await tool()
+        await tool()
+
+        assert len(calls) == 2
+
+
+class TestStaleWhileRevalidate:
+    """Тесты режима stale-while-revalidate"""
+
+    @pytest.mark.asyncio
+    async def test_stale_served_and_refreshed(self, settings):
+        """Устаревший ответ отдается сразу с пометкой и обновляется в фоне"""
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=0.05, stale=60)
+        async def tool(city: str) -> str:
+            calls.append(city)
+            return f"weather #{len(calls)}"
+
+        assert await tool("Москва") == "weather #1"
+        await asyncio.sleep(0.1)
+
+        stale = await tool("Москва")
+        assert stale.startswith("weather #1\n\n⏳ Данные из кеша")
+        assert cache.stale_hits == 1
+
+        # Дожидаемся фонового обновления
+        await asyncio.gather(*cache._refreshes)
+        assert await tool("Москва") == "weather #2"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_after_max_staleness(self, settings):
+        """После окна устаревания ответ запрашивается заново"""
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=0.02, stale=0.02)
+        async def tool() -> str:
+            calls.append(1)
+            return "ok"
+
+        await tool()
+        await asyncio.sleep(0.1)
+
+        assert await tool() == "ok"
+        assert len(calls) == 2
+        assert cache.stale_hits == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale(self, settings):
+        """Ошибка фонового обновления не удаляет устаревший ответ"""
+        cache = TieredCache("test", settings)
+        calls = []
+
+        @cache.cached(ttl=0.05, stale=60)
+        async def tool() -> str:
+            calls.append(1)
+            if len(calls) > 1:
+                raise RuntimeError("upstream down")
+            return "ok"
+
+        await tool()
+        await asyncio.sleep(0.1)
+        await tool()
+        await asyncio.gather(*cache._refreshes, return_exceptions=True)
+
+        assert (await tool()).startswith("ok\n\n⏳")
+
+    @pytest.mark.asyncio
+    async def test_stale_disabled(self, tmp_path):
+        """MCP_CACHE_STALE=false - устаревшие ответы не отдаются"""
+        cache = TieredCache(
+            "test", CacheSettings(directory=str(tmp_path), stale_enabled=False)
+        )
+        calls = []
+
+        @cache.cached(ttl=0.05, stale=60)
+        async def tool() -> str:
+            calls.append(1)
+            return "ok"
+
+        await tool()
+        await asyncio.sleep(0.1)
+
+        assert await tool() == "ok"
+        assert len(calls) == 2
+
+    def test_mark_stale_dict(self):
+        """Словарь помечается полями stale и age_seconds"""
+        assert mark_stale({"a": 1}, 90.4) == {
+            "a": 1, "stale": True, "age_seconds": 90
+        }
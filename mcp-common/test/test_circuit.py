@@ -0,0 +1,225 @@
+"""
+Тесты предохранителей и адаптивных таймаутов upstream
+"""
+import asyncio
+from collections import OrderedDict
+
+import httpx
+import pytest
+
+from mcp_common import circuit
+from mcp_common.circuit import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerTransport,
+    CircuitOpenError,
+    CircuitSettings,
+    get_breaker,
+    guard_upstream,
+)
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    """Каждый тест начинает с закрытых предохранителей"""
+    monkeypatch.setattr(circuit, "_breakers", OrderedDict())
+    monkeypatch.setattr(circuit, "_settings", CircuitSettings(
+        failure_threshold=3, reset_timeout=0.05, min_samples=10
+    ))
+
+
+def client_for(handler) -> httpx.AsyncClient:
+    """Клиент с предохранителем поверх тестового обработчика"""
+    return httpx.AsyncClient(
+        transport=CircuitBreakerTransport(httpx.MockTransport(handler)),
+        base_url="https://api.example.com",
+    )
+
+
+class TestCircuitBreaker:
+    """Тесты состояний предохранителя"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Несколько ошибок подряд открывают предохранитель"""
+        breaker = CircuitBreaker("api.example.com", CircuitSettings(
+            failure_threshold=3
+        ))
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+
+    @pytest.mark.asyncio
+    async def test_half_open_single_probe(self):
+        """После паузы пропускается ровно один пробный запрос"""
+        breaker = CircuitBreaker("api.example.com", CircuitSettings(
+            failure_threshold=1, reset_timeout=0.01
+        ))
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+
+        assert breaker.allow() is True
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is False
+
+        breaker.record_success(0.1)
+
+        assert breaker.state == CLOSED
+        assert breaker.allow() is True
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens(self):
+        """Неудачная проба снова открывает предохранитель"""
+        breaker = CircuitBreaker("api.example.com", CircuitSettings(
+            failure_threshold=5, reset_timeout=0.01
+        ))
+        for _ in range(5):
+            breaker.record_failure()
+        await asyncio.sleep(0.02)
+        breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+
+    def test_adaptive_timeout_follows_p99(self):
+        """Таймаут - p99 * множитель в заданных пределах"""
+        breaker = CircuitBreaker("api.example.com", CircuitSettings(
+            min_samples=10, timeout_multiplier=3.0, min_timeout=0.5
+        ))
+
+        assert breaker.timeout(30.0) == 30.0
+
+        for _ in range(100):
+            breaker.record_success(0.2)
+        breaker.record_success(0.4)
+        for _ in range(9):
+            breaker.record_success(0.2)
+
+        assert breaker.percentile(0.99) == 0.2
+        assert breaker.timeout(30.0) == pytest.approx(0.6)
+        # Таймаут из запроса остается верхней границей
+        assert breaker.timeout(0.3) == 0.3
+
+    def test_min_timeout(self):
+        """Быстрый upstream не получает слишком короткий таймаут"""
+        breaker = CircuitBreaker("api.example.com", CircuitSettings(
+            min_samples=10, min_timeout=1.0
+        ))
+        for _ in range(10):
+            breaker.record_success(0.01)
+
+        assert breaker.timeout(None) == 1.0
+
+
+class TestCircuitBreakerTransport:
+    """Тесты транспорта с предохранителем"""
+
+    @pytest.mark.asyncio
+    async def test_fails_fast_when_open(self):
+        """Открытый предохранитель не отправляет запросы"""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(503)
+
+        async with client_for(handler) as client:
+            for _ in range(3):
+                await client.get("/")
+            with pytest.raises(CircuitOpenError):
+                await client.get("/")
+
+        assert len(requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_other_hosts_unaffected(self):
+        """Предохранитель открывается только для своего хоста"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.host == "api.example.com":
+                return httpx.Response(500)
+            return httpx.Response(200)
+
+        async with client_for(handler) as client:
+            for _ in range(3):
+                await client.get("/")
+            response = await client.get("https://other.example.com/")
+
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_recovers_after_reset(self):
+        """После паузы успешная проба закрывает предохранитель"""
+        healthy = False
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200 if healthy else 500)
+
+        async with client_for(handler) as client:
+            for _ in range(3):
+                await client.get("/")
+            healthy = True
+            await asyncio.sleep(0.06)
+            response = await client.get("/")
+
+        assert response.status_code == 200
+        assert circuit.get_breaker("api.example.com").state == CLOSED
+
+    @pytest.mark.asyncio
+    async def test_adaptive_timeout_cuts_slow_request(self):
+        """Запрос много дольше обычного p99 прерывается"""
+        delay = 0.0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(delay)
+            return httpx.Response(200)
+
+        circuit._settings.min_timeout = 0.05
+        async with client_for(handler) as client:
+            for _ in range(10):
+                await client.get("/")
+            delay = 1.0
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get("/", timeout=30.0)
+
+        assert circuit.get_breaker("api.example.com").failures == 1
+
+
+class TestGetBreaker:
+    """Тесты реестра предохранителей"""
+
+    def test_bounded(self, monkeypatch):
+        """Хранятся предохранители последних MAX_BREAKERS хостов"""
+        monkeypatch.setattr(circuit, "MAX_BREAKERS", 2)
+        first = get_breaker("a.example")
+        get_breaker("b.example")
+        assert get_breaker("a.example") is first
+
+        get_breaker("c.example")
+
+        assert list(circuit._breakers) == ["a.example", "c.example"]
+        assert get_breaker("a.example") is first
+
+
+class TestGuardUpstream:
+    """Тесты защиты вызовов без общего HTTP клиента"""
+
+    def test_opens_on_errors(self):
+        """Ошибки библиотеки открывают предохранитель"""
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                with guard_upstream("duckduckgo"):
+                    raise RuntimeError("ratelimit")
+
+        with pytest.raises(CircuitOpenError):
+            with guard_upstream("duckduckgo"):
+                pass
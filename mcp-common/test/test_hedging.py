@@ -0,0 +1,144 @@
+"""
+Тесты hedged-запросов к резервным провайдерам
+"""
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+from mcp_common import circuit
+from mcp_common.circuit import CircuitSettings
+from mcp_common.hedging import HedgeError, hedge_delay, hedged
+
+
+def provider(result, delay: float = 0.0, calls: list = None, name: str = ""):
+    """Попытка, отвечающая result через delay секунд"""
+    async def attempt():
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return attempt
+
+
+class TestHedged:
+    """Тесты hedged()"""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_no_extra_load(self):
+        """Быстрый первый провайдер - запасные не вызываются"""
+        calls = []
+
+        result = await hedged("test", [
+            provider("a", calls=calls, name="a"),
+            provider("b", calls=calls, name="b"),
+        ], delays=0.1)
+
+        assert result == "a"
+        assert calls == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_hedged(self):
+        """Медленный первый провайдер перекрывается вторым"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        result = await hedged("test", [
+            provider("slow", delay=1.0),
+            provider("fast", delay=0.01),
+        ], delays=0.02)
+
+        assert result == "fast"
+        assert loop.time() - started < 0.5
+
+    @pytest.mark.asyncio
+    async def test_error_starts_next_immediately(self):
+        """Ошибка провайдера запускает следующего без ожидания бюджета"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        result = await hedged("test", [
+            provider(RuntimeError("down")),
+            provider("b"),
+        ], delays=10.0)
+
+        assert result == "b"
+        assert loop.time() - started < 1.0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_still_wins(self):
+        """Запущенная первая попытка не отменяется и может ответить первой"""
+        result = await hedged("test", [
+            provider("a", delay=0.03),
+            provider("b", delay=1.0),
+        ], delays=0.01)
+
+        assert result == "a"
+
+    @pytest.mark.asyncio
+    async def test_invalid_answer_rejected(self):
+        """Неподходящий ответ считается ошибкой"""
+        result = await hedged(
+            "test",
+            [provider({"status": "fail"}), provider({"status": "success"})],
+            accept=lambda data: data["status"] == "success",
+        )
+
+        assert result == {"status": "success"}
+
+    @pytest.mark.asyncio
+    async def test_all_failed(self):
+        """Если все попытки неудачны - HedgeError со всеми ошибками"""
+        with pytest.raises(HedgeError) as error:
+            await hedged("test", [
+                provider(RuntimeError("a")),
+                provider(None),
+                provider(RuntimeError("c")),
+            ])
+
+        assert [str(e) for e in error.value.errors] == ["a", "c"]
+
+    @pytest.mark.asyncio
+    async def test_losers_cancelled(self):
+        """После ответа остальные попытки отменяются"""
+        finished = []
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            finished.append("slow")
+
+        await hedged("test", [slow, provider("fast")], delays=0.01)
+        await asyncio.sleep(0.3)
+
+        assert finished == []
+
+
+class TestHedgeDelay:
+    """Тесты бюджета задержки"""
+
+    @pytest.fixture(autouse=True)
+    def breakers(self, monkeypatch):
+        monkeypatch.setattr(circuit, "_breakers", OrderedDict())
+        monkeypatch.setattr(circuit, "_settings", CircuitSettings(
+            failure_threshold=1
+        ))
+
+    def test_default_without_samples(self):
+        """Без статистики используется значение по умолчанию"""
+        assert hedge_delay("api.example.com", default=0.7) == 0.7
+
+    def test_p95(self):
+        """Бюджет - p95 времени ответа хоста"""
+        breaker = circuit.get_breaker("api.example.com")
+        for i in range(100):
+            breaker.record_success((i + 1) / 100)
+
+        assert hedge_delay("api.example.com") == 0.95
+
+    def test_open_breaker(self):
+        """Недоступный провайдер не задерживает следующего"""
+        circuit.get_breaker("api.example.com").record_failure()
+
+        assert hedge_delay("api.example.com") == 0.0
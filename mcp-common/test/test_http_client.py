@@ -0,0 +1,167 @@
+"""
+Тесты общего пула HTTP соединений
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from mcp_common import http_client
+from mcp_common.http_client import (
+    HostLimitedTransport,
+    HttpClientSettings,
+    close_http_client,
+    create_http_client,
+    get_http_client,
+)
+
+
+class TestHttpClientSettings:
+    """Тесты настроек пула"""
+
+    def test_defaults(self, monkeypatch):
+        """Без переменных окружения используются значения по умолчанию"""
+        for name in ("MCP_HTTP_MAX_PER_HOST", "MCP_HTTP2", "MCP_HTTP_TIMEOUT"):
+            monkeypatch.delenv(name, raising=False)
+
+        settings = HttpClientSettings.from_env()
+
+        assert settings.max_connections_per_host == 20
+        assert settings.timeout == 30.0
+        assert settings.http2 is True
+
+    def test_from_env(self, monkeypatch):
+        """Настройки читаются из переменных окружения"""
+        monkeypatch.setenv("MCP_HTTP_MAX_PER_HOST", "4")
+        monkeypatch.setenv("MCP_HTTP_KEEPALIVE_EXPIRY", "5.5")
+        monkeypatch.setenv("MCP_HTTP2", "false")
+
+        settings = HttpClientSettings.from_env()
+
+        assert settings.max_connections_per_host == 4
+        assert settings.keepalive_expiry == 5.5
+        assert settings.http2 is False
+
+
+class TestSharedClient:
+    """Тесты общего клиента процесса"""
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused(self):
+        """Повторные вызовы возвращают один и тот же клиент"""
+        try:
+            assert get_http_client() is get_http_client()
+        finally:
+            await close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_close_resets_client(self):
+        """После закрытия создается новый клиент"""
+        first = get_http_client()
+        await close_http_client()
+
+        assert first.is_closed
+        second = get_http_client()
+        try:
+            assert second is not first
+        finally:
+            await close_http_client()
+
+    def test_client_recreated_for_new_loop(self):
+        """Клиент не переиспользуется между разными event loop"""
+        async def grab():
+            return get_http_client()
+
+        first = asyncio.run(grab())
+        second = asyncio.run(grab())
+
+        assert first is not second
+        http_client._client = None
+        http_client._client_loop = None
+
+    @pytest.mark.asyncio
+    async def test_cookies_not_stored(self):
+        """Cookie из ответов upstream не уходят в следующие запросы"""
+        sent = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request.headers.get("cookie"))
+            return httpx.Response(
+                200, headers={"set-cookie": "sid=secret; Path=/"}
+            )
+
+        client = create_http_client(transport=httpx.MockTransport(handler))
+        async with client:
+            await client.get("https://api.example.com/login")
+            await client.get("https://api.example.com/profile")
+
+        assert sent == [None, None]
+        assert not client.cookies
+
+
+class TestHostLimitedTransport:
+    """Тесты ограничения соединений на хост"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_per_host(self):
+        """К одному хосту одновременно идет не больше max_per_host запросов"""
+        active = {"a.example": 0, "b.example": 0}
+        peak = {"a.example": 0, "b.example": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            host = request.url.host
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+            return httpx.Response(200, text="ok")
+
+        client = create_http_client(
+            HttpClientSettings(max_connections_per_host=2),
+            transport=httpx.MockTransport(handler),
+        )
+        async with client:
+            await asyncio.gather(*[
+                client.get(f"https://{host}/")
+                for host in ("a.example", "b.example") * 5
+            ])
+
+        assert peak == {"a.example": 2, "b.example": 2}
+
+    @pytest.mark.asyncio
+    async def test_slot_released_on_error(self):
+        """Слот хоста освобождается, если транспорт упал"""
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.host)
+            if len(calls) == 1:
+                raise httpx.ConnectError("boom", request=request)
+            return httpx.Response(200, text="ok")
+
+        transport = HostLimitedTransport(httpx.MockTransport(handler), 1)
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://a.example/")
+            response = await asyncio.wait_for(
+                client.get("https://a.example/"), timeout=1
+            )
+
+        assert response.text == "ok"
+
+    @pytest.mark.asyncio
+    async def test_hosts_bounded(self):
+        """Хранятся семафоры последних max_hosts хостов"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, text="ok")
+
+        transport = HostLimitedTransport(
+            httpx.MockTransport(handler), 1, max_hosts=2
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            for host in ("a.example", "b.example", "a.example", "c.example"):
+                await client.get(f"https://{host}/")
+
+        assert list(transport._semaphores) == [
+            "https://a.example:", "https://c.example:"
+        ]
@@ -0,0 +1,218 @@
+"""
+Тесты Prometheus метрик
+"""
+import httpx
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from mcp_common import workers
+from mcp_common.metrics import (
+    UpstreamMetricsTransport,
+    _merge_worker_metrics,
+    instrument_tools,
+    metrics_endpoint,
+    record_cache_lookup,
+    track_sse_session,
+    track_upstream,
+    upstream_name,
+)
+
+
+def sample(name: str, labels: dict) -> float:
+    """Текущее значение выборки из глобального реестра"""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestUpstreamName:
+    """Тесты определения upstream по хосту"""
+
+    @pytest.mark.parametrize("host, expected", [
+        ("api.open-meteo.com", "open-meteo"),
+        ("geocoding-api.open-meteo.com", "open-meteo"),
+        ("ip-api.com", "ip-api"),
+        ("site.api.espn.com", "espn"),
+        ("de.wikipedia.org", "wikipedia"),
+        ("searchapi.api.cloud.yandex.net", "yandex"),
+        ("ar.api.cloud.ru", "cloud-ru"),
+        ("example.com", "other"),
+        ("notwikipedia.org", "other"),
+    ])
+    def test_known_hosts(self, host, expected):
+        """Известные хосты получают имя upstream, остальные - other"""
+        assert upstream_name(host) == expected
+
+
+class TestToolMetrics:
+    """Тесты метрик MCP инструментов"""
+
+    @pytest.mark.asyncio
+    async def test_calls_errors_and_duration(self):
+        """Учитываются вызовы, ошибки и время выполнения"""
+        mcp = FastMCP("metrics-test")
+        instrument_tools(mcp)
+
+        @mcp.tool()
+        async def ok_tool() -> str:
+            return "ok"
+
+        @mcp.tool()
+        async def failing_tool() -> str:
+            raise ValueError("boom")
+
+        labels = {"server": "metrics-test", "tool": "failing_tool"}
+        errors_before = sample(
+            "mcp_tool_errors_total", {**labels, "error": "ValueError"}
+        )
+
+        await mcp._tool_manager.call_tool("ok_tool", {})
+        with pytest.raises(ToolError):
+            await mcp._tool_manager.call_tool("failing_tool", {})
+
+        assert sample(
+            "mcp_tool_calls_total", {"server": "metrics-test", "tool": "ok_tool"}
+        ) >= 1
+        assert sample(
+            "mcp_tool_errors_total", {**labels, "error": "ValueError"}
+        ) == errors_before + 1
+        assert sample("mcp_tool_duration_seconds_count", labels) >= 1
+
+
+class TestUpstreamMetrics:
+    """Тесты метрик запросов к upstream"""
+
+    @pytest.mark.asyncio
+    async def test_transport_records_status(self):
+        """Транспорт учитывает статус ответа и время запроса"""
+        labels = {"upstream": "wikipedia", "status": "404"}
+        before = sample("mcp_upstream_requests_total", labels)
+
+        transport = UpstreamMetricsTransport(
+            httpx.MockTransport(lambda request: httpx.Response(404))
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get("https://en.wikipedia.org/api/rest_v1/page")
+
+        assert sample("mcp_upstream_requests_total", labels) == before + 1
+
+    @pytest.mark.asyncio
+    async def test_transport_records_errors(self):
+        """Сетевые ошибки учитываются со статусом error"""
+        labels = {"upstream": "ip-api", "status": "error"}
+        before = sample("mcp_upstream_requests_total", labels)
+
+        def handler(request):
+            raise httpx.ConnectError("boom", request=request)
+
+        transport = UpstreamMetricsTransport(httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get("http://ip-api.com/json/8.8.8.8")
+
+        assert sample("mcp_upstream_requests_total", labels) == before + 1
+
+    def test_track_upstream(self):
+        """Ручной замер upstream (не через httpx)"""
+        ok = {"upstream": "duckduckgo", "status": "ok"}
+        error = {"upstream": "duckduckgo", "status": "error"}
+        ok_before = sample("mcp_upstream_requests_total", ok)
+        error_before = sample("mcp_upstream_requests_total", error)
+
+        with track_upstream("duckduckgo"):
+            pass
+        with pytest.raises(RuntimeError):
+            with track_upstream("duckduckgo"):
+                raise RuntimeError("rate limit")
+
+        assert sample("mcp_upstream_requests_total", ok) == ok_before + 1
+        assert sample("mcp_upstream_requests_total", error) == error_before + 1
+
+
+class TestSessionAndCacheMetrics:
+    """Тесты метрик SSE сессий и кешей"""
+
+    def test_sse_sessions_gauge(self):
+        """Сессия учитывается, пока открыта"""
+        labels = {"server": "gauge-test"}
+
+        with track_sse_session("gauge-test"):
+            assert sample("mcp_sse_sessions_active", labels) == 1
+        assert sample("mcp_sse_sessions_active", labels) == 0
+
+    def test_cache_lookups(self):
+        """Попадания и промахи кеша считаются отдельно"""
+        record_cache_lookup("test-cache", True)
+        record_cache_lookup("test-cache", True)
+        record_cache_lookup("test-cache", False)
+
+        assert sample(
+            "mcp_cache_requests_total", {"cache": "test-cache", "result": "hit"}
+        ) == 2
+        assert sample(
+            "mcp_cache_requests_total", {"cache": "test-cache", "result": "miss"}
+        ) == 1
+
+
+class TestMetricsEndpoint:
+    """Тесты endpoint /metrics"""
+
+    @pytest.mark.asyncio
+    async def test_prometheus_format(self):
+        """/metrics отдает метрики в текстовом формате Prometheus"""
+        app = Starlette(routes=[Route("/metrics", endpoint=metrics_endpoint)])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "mcp_tool_calls_total" in response.text
+        assert "mcp_upstream_request_duration_seconds" in response.text
+
+    @pytest.mark.asyncio
+    async def test_collects_all_workers(self, monkeypatch):
+        """Воркер собирает метрики соседей и добавляет метку worker"""
+        monkeypatch.setattr(workers, "_worker_id", 0)
+        monkeypatch.setattr(workers, "_worker_count", 2)
+        peer_metrics = (
+            "# HELP mcp_sse_sessions_active Число открытых SSE сессий\n"
+            "# TYPE mcp_sse_sessions_active gauge\n"
+            'mcp_sse_sessions_active{server="weather"} 3.0\n'
+        )
+        monkeypatch.setitem(workers._peers, 1, httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, text=peer_metrics)
+            ),
+            base_url="http://mcp-worker",
+        ))
+
+        app = Starlette(routes=[Route("/metrics", endpoint=metrics_endpoint)])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get("/metrics")
+
+        assert 'mcp_sse_sessions_active{server="weather",worker="1"} 3.0' in response.text
+        assert 'worker="0"' in response.text
+
+    def test_merge_keeps_families_valid(self):
+        """Объединенные метрики снова разбираются парсером Prometheus"""
+        text = (
+            "# HELP requests_total Запросы\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{tool="a"} 1.0\n'
+        )
+
+        merged = _merge_worker_metrics({0: text, 1: text}).decode()
+        families = list(text_string_to_metric_families(merged))
+
+        assert len(families) == 1
+        workers_seen = {s.labels["worker"] for s in families[0].samples}
+        assert workers_seen == {"0", "1"}
@@ -0,0 +1,169 @@
+"""
+Тесты профилирования работающего сервера
+"""
+import threading
+import tracemalloc
+
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from mcp_common.profiling import StackSampler, profiling_routes
+
+
+TOKEN = "секрет".encode().hex()
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+
+
+def busy_loop(stop: threading.Event) -> None:
+    """Нагружает CPU до установки stop"""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy():
+    """Поток, занятый вычислениями на время теста"""
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("MCP_ADMIN_TOKEN", TOKEN)
+    yield TestClient(Starlette(routes=profiling_routes()))
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class TestStackSampler:
+    """Тесты семплера стеков"""
+
+    def test_busy_thread(self, busy):
+        """Стек занятого потока записывается от имени потока к вершине"""
+        sampler = StackSampler(0.001)
+
+        sampler.sample()
+
+        stack = next(stack for stack in sampler.stacks if stack.startswith("busy;"))
+        assert stack.split(";")[-1] == f"{__name__}:busy_loop"
+        assert sampler.samples == 1
+
+    def test_idle_threads(self):
+        """Ожидающие потоки учитываются только с idle=True"""
+        stop = threading.Event()
+        waiter = threading.Thread(target=stop.wait, name="waiter")
+        waiter.start()
+        try:
+            quiet, everything = StackSampler(0.001), StackSampler(0.001, idle=True)
+            quiet.sample()
+            everything.sample()
+        finally:
+            stop.set()
+            waiter.join()
+
+        assert not any(s.startswith("waiter;") for s in quiet.stacks)
+        assert any(s.startswith("waiter;") for s in everything.stacks)
+
+
+class TestAccess:
+    """Тесты доступа администратора"""
+
+    def test_disabled_without_token(self, monkeypatch):
+        """Без MCP_ADMIN_TOKEN профилирование выключено"""
+        monkeypatch.delenv("MCP_ADMIN_TOKEN", raising=False)
+        client = TestClient(Starlette(routes=profiling_routes()))
+
+        response = client.get("/debug/profile", headers=AUTH)
+
+        assert response.status_code == 403
+
+    def test_wrong_token(self, client):
+        """Неверный токен - 401"""
+        response = client.get(
+            "/debug/memory", headers={"Authorization": "Bearer wrong"}
+        )
+
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+
+class TestProfileEndpoint:
+    """Тесты профиля стеков"""
+
+    def test_collapsed_stacks(self, client, busy):
+        """Ответ - свернутые стеки с числом замеров"""
+        response = client.get(
+            "/debug/profile", params={"seconds": 0.2, "hz": 200}, headers=AUTH
+        )
+
+        assert response.status_code == 200
+        assert int(response.headers["x-profile-samples"]) > 0
+        lines = response.text.splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert any("test_profiling:busy_loop" in line for line in lines)
+
+    def test_bounds(self, client):
+        """Слишком долгий профиль отклоняется"""
+        response = client.get(
+            "/debug/profile", params={"seconds": 1000}, headers=AUTH
+        )
+
+        assert response.status_code == 400
+        assert "seconds" in response.text
+
+
+class TestMemoryEndpoint:
+    """Тесты снимков tracemalloc"""
+
+    def test_snapshot_and_diff(self, client):
+        """Рост памяти с базового снимка указывает на место выделения"""
+        assert client.post(
+            "/debug/memory", params={"action": "start"}, headers=AUTH
+        ).status_code == 200
+
+        retained = [bytearray(1024) for _ in range(200)]
+        diff = client.get("/debug/memory", params={"action": "diff"}, headers=AUTH)
+        snapshot = client.get("/debug/memory", headers=AUTH)
+        stop = client.post("/debug/memory", params={"action": "stop"}, headers=AUTH)
+
+        assert diff.status_code == 200
+        assert "test_profiling.py" in diff.text.splitlines()[1]
+        assert snapshot.text.startswith("🧠 Отслеживается")
+        assert stop.status_code == 200
+        assert not tracemalloc.is_tracing()
+        del retained
+
+    def test_collapsed(self, client):
+        """Снимок свернутыми стеками с весом в байтах"""
+        client.post(
+            "/debug/memory", params={"action": "start", "frames": 5}, headers=AUTH
+        )
+
+        response = client.get(
+            "/debug/memory", params={"format": "collapsed"}, headers=AUTH
+        )
+
+        stack, size = response.text.splitlines()[0].rsplit(" ", 1)
+        assert int(size) > 0
+        assert ".py:" in stack
+
+    def test_not_started(self, client):
+        """Снимок без запущенного tracemalloc - 409"""
+        response = client.get("/debug/memory", headers=AUTH)
+
+        assert response.status_code == 409
+
+    def test_start_requires_post(self, client):
+        """Изменение состояния - только методом POST"""
+        response = client.get(
+            "/debug/memory", params={"action": "start"}, headers=AUTH
+        )
+
+        assert response.status_code == 405
+        assert not tracemalloc.is_tracing()
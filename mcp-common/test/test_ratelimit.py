@@ -0,0 +1,156 @@
+"""
+Тесты ограничителя частоты запросов к upstream
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from mcp_common import ratelimit
+from mcp_common.ratelimit import (
+    RateLimiter,
+    RateLimitError,
+    RateLimitSettings,
+    RateLimitTransport,
+    parse_rate,
+)
+from mcp_common.sessions import current_session
+
+
+class TestSettings:
+    """Тесты настроек лимитов"""
+
+    def test_parse_rate(self):
+        """Частота задается в запросах за период"""
+        assert parse_rate("45/min") == 0.75
+        assert parse_rate("10/s") == 10
+        assert parse_rate("3600/h") == 1
+        assert parse_rate("2.5") == 2.5
+        with pytest.raises(ValueError):
+            parse_rate("10/week")
+
+    def test_from_env(self, monkeypatch):
+        """Лимит и размер бакета переопределяются, 0 снимает лимит"""
+        monkeypatch.setenv("MCP_RATELIMIT_IP_API", "90/min")
+        monkeypatch.setenv("MCP_RATELIMIT_IP_API_BURST", "10")
+        monkeypatch.setenv("MCP_RATELIMIT_WIKIPEDIA", "0")
+
+        settings = RateLimitSettings.from_env()
+
+        assert settings.limits["ip-api"] == (1.5, 10)
+        assert "wikipedia" not in settings.limits
+        assert "duckduckgo" in settings.limits
+
+
+class TestRateLimiter:
+    """Тесты бакета токенов"""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_rate(self):
+        """Бакет пропускает burst запросов сразу, дальше - с частотой rate"""
+        limiter = RateLimiter("test", rate=50, burst=3, max_wait=10)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        for _ in range(3):
+            await limiter.acquire()
+        assert loop.time() - started < 0.01
+
+        for _ in range(3):
+            await limiter.acquire()
+        # Три запроса сверх бакета при 50 запросах в секунду - ~60 мс
+        assert loop.time() - started >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_fair_between_sessions(self):
+        """Очередь обслуживает сессии по кругу"""
+        limiter = RateLimiter("test", rate=100, burst=1, max_wait=10)
+        await limiter.acquire()
+        order = []
+
+        async def request(session: str, number: int):
+            current_session.set(session)
+            await limiter.acquire()
+            order.append(f"{session}{number}")
+
+        greedy = [asyncio.create_task(request("a", i)) for i in range(4)]
+        await asyncio.sleep(0)
+        polite = asyncio.create_task(request("b", 0))
+        await asyncio.gather(*greedy, polite)
+
+        assert order.index("b0") == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_long_wait(self):
+        """Если ожидание превысило бы max_wait, запрос отклоняется сразу"""
+        limiter = RateLimiter("test", rate=1, burst=1, max_wait=0.5)
+        await limiter.acquire()
+
+        with pytest.raises(RateLimitError):
+            await limiter.acquire()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_skipped(self):
+        """Отмененный запрос не забирает токен"""
+        limiter = RateLimiter("test", rate=50, burst=1, max_wait=10)
+        await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire())
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        await asyncio.wait_for(waiting, 1)
+
+        assert limiter.waiting == 0
+
+    def test_penalize(self):
+        """429 опустошает бакет на время Retry-After"""
+        limiter = RateLimiter("test", rate=2, burst=5, max_wait=10)
+        limiter.penalize(3)
+
+        assert limiter.tokens == pytest.approx(-6, abs=0.01)
+
+
+class TestRateLimitTransport:
+    """Тесты транспорта с ограничителем"""
+
+    @pytest.fixture(autouse=True)
+    def limits(self, monkeypatch):
+        monkeypatch.setattr(ratelimit, "_limiters", {})
+        monkeypatch.setattr(ratelimit, "_settings", RateLimitSettings(
+            max_wait=0.5, limits={"ip-api": (1.0, 2)}
+        ))
+
+    @pytest.mark.asyncio
+    async def test_limits_only_known_providers(self):
+        """Ограничиваются только провайдеры с лимитом"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200)
+
+        async with httpx.AsyncClient(
+            transport=RateLimitTransport(httpx.MockTransport(handler))
+        ) as client:
+            for _ in range(5):
+                await client.get("https://example.com/")
+            await client.get("http://ip-api.com/json/")
+            await client.get("http://ip-api.com/json/")
+            with pytest.raises(RateLimitError):
+                await client.get("http://ip-api.com/json/")
+
+    @pytest.mark.asyncio
+    async def test_429_pauses_provider(self):
+        """После 429 запросы не уходят в upstream до конца Retry-After"""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(429, headers={"Retry-After": "60"})
+
+        async with httpx.AsyncClient(
+            transport=RateLimitTransport(httpx.MockTransport(handler))
+        ) as client:
+            await client.get("http://ip-api.com/json/")
+            with pytest.raises(RateLimitError):
+                await client.get("http://ip-api.com/json/")
+
+        assert len(requests) == 1
@@ -0,0 +1,151 @@
+"""
+Тесты формата результатов инструментов
+"""
+import json
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
+
+from mcp_common.cache import CacheSettings, TieredCache
+from mcp_common.results import (
+    ResultSettings,
+    dumps,
+    render,
+    reset_results,
+    structured,
+)
+
+
+DATA = {"city": "Москва", "temperature": 5}
+
+
+def format_weather(data: dict) -> str:
+    return f"🌡️ {data['city']}: {data['temperature']}°C"
+
+
+@pytest.fixture
+def result_format(monkeypatch):
+    """Устанавливает MCP_RESULT_FORMAT на время теста"""
+    def set_format(value: str) -> None:
+        monkeypatch.setenv("MCP_RESULT_FORMAT", value)
+        reset_results()
+
+    yield set_format
+    reset_results()
+
+
+class TestResultSettings:
+    """Тесты настроек формата"""
+
+    def test_default(self, monkeypatch):
+        """По умолчанию - текст, как раньше"""
+        monkeypatch.delenv("MCP_RESULT_FORMAT", raising=False)
+
+        assert ResultSettings.from_env().format == "text"
+
+    def test_invalid(self, monkeypatch):
+        """Неизвестный формат - ошибка конфигурации"""
+        monkeypatch.setenv("MCP_RESULT_FORMAT", "xml")
+
+        with pytest.raises(ValueError):
+            ResultSettings.from_env()
+
+
+class TestRender:
+    """Тесты преобразования данных в ответ"""
+
+    def test_text(self):
+        """text - только отформатированная строка"""
+        assert render(DATA, format_weather, "text") == "🌡️ Москва: 5°C"
+
+    def test_json(self):
+        """json - structuredContent и компактный JSON без форматирования"""
+        def formatter(data):
+            raise AssertionError("форматирование не должно выполняться")
+
+        result = render(DATA, formatter, "json")
+
+        assert isinstance(result, CallToolResult)
+        assert result.structuredContent == DATA
+        assert result.content[0].text == '{"city":"Москва","temperature":5}'
+
+    def test_both(self):
+        """both - structuredContent и текст с эмодзи"""
+        result = render(DATA, format_weather, "both")
+
+        assert result.structuredContent == DATA
+        assert result.content[0].text == "🌡️ Москва: 5°C"
+
+    def test_string_passthrough(self):
+        """Строки (сообщения, старые записи кеша) возвращаются как есть"""
+        assert render("❌ Ошибка", format_weather, "json") == "❌ Ошибка"
+
+    def test_stale_text(self):
+        """Устаревший ответ из кеша помечается в тексте"""
+        data = {**DATA, "stale": True, "age_seconds": 600}
+
+        text = render(data, format_weather, "text")
+
+        assert text.startswith("🌡️ Москва: 5°C")
+        assert "получены 10 мин назад" in text
+
+    def test_dumps_compact(self):
+        """JSON без пробелов и без экранирования кириллицы"""
+        assert dumps({"a": [1, 2], "b": "я"}) == '{"a":[1,2],"b":"я"}'
+
+
+class TestStructured:
+    """Тесты декоратора инструментов"""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        mcp = FastMCP("test")
+        cache = TieredCache("test", CacheSettings(directory=str(tmp_path)))
+        calls = []
+
+        @mcp.tool()
+        @structured(format_weather)
+        @cache.cached(ttl=60)
+        async def get_weather(city: str) -> dict:
+            """Погода в городе"""
+            calls.append(city)
+            return {"city": city, "temperature": 5}
+
+        mcp.calls = calls
+        return mcp
+
+    async def test_direct_call_text(self, server, result_format):
+        """Прямой вызов в режиме text возвращает строку"""
+        result_format("text")
+        tool = server._tool_manager.get_tool("get_weather")
+
+        assert await tool.fn(city="Москва") == "🌡️ Москва: 5°C"
+
+    async def test_tool_schema(self, server):
+        """Аргументы и описание сохраняются, outputSchema не объявляется"""
+        tools = await server.list_tools()
+
+        assert tools[0].description == "Погода в городе"
+        assert list(tools[0].inputSchema["properties"]) == ["city"]
+        assert tools[0].outputSchema is None
+
+    @pytest.mark.parametrize("mode", ["json", "both"])
+    async def test_call_tool_structured(self, server, result_format, mode):
+        """Через FastMCP ответ содержит structuredContent"""
+        result_format(mode)
+
+        result = await server.call_tool("get_weather", {"city": "Москва"})
+
+        assert result.structuredContent == {"city": "Москва", "temperature": 5}
+
+    async def test_cache_shared_between_formats(self, server, result_format):
+        """Кеш хранит данные: ответ в другом формате берется из кеша"""
+        result_format("text")
+        await server.call_tool("get_weather", {"city": "Москва"})
+        result_format("json")
+
+        result = await server.call_tool("get_weather", {"city": "Москва"})
+
+        assert json.loads(result.content[0].text)["city"] == "Москва"
+        assert server.calls == ["Москва"]
@@ -0,0 +1,181 @@
+"""
+Тесты профиля производительности
+"""
+import importlib.util
+import json
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import httpx
+import httpx._models
+import mcp.server.streamable_http
+import pytest
+
+from mcp_common import runtime
+from mcp_common.runtime import (
+    JsonCodec,
+    RuntimeSettings,
+    install,
+    reset_runtime,
+    uvicorn_options,
+)
+
+
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+DATA = {"город": "Москва", "температура": [5, -2.5, None], "ясно": True}
+
+
+@dataclass
+class Point:
+    latitude: float
+    longitude: float
+
+
+@pytest.fixture
+def runtime_env(monkeypatch):
+    """Задает MCP_RUNTIME на время теста, библиотеки восстанавливаются"""
+    monkeypatch.setattr(httpx._models, "jsonlib", httpx._models.jsonlib)
+    monkeypatch.setattr(
+        mcp.server.streamable_http, "json", mcp.server.streamable_http.json
+    )
+    monkeypatch.setattr(runtime, "_installed", False)
+
+    def set_mode(mode: str) -> None:
+        monkeypatch.setenv("MCP_RUNTIME", mode)
+        reset_runtime()
+
+    yield set_mode
+    reset_runtime()
+
+
+codecs = pytest.mark.parametrize("codec", [
+    JsonCodec(fast=False),
+    pytest.param(JsonCodec(fast=True), marks=pytest.mark.skipif(
+        not ORJSON_AVAILABLE, reason="orjson не установлен"
+    )),
+], ids=["json", "orjson"])
+
+
+class TestRuntimeSettings:
+    """Тесты настроек"""
+
+    def test_default(self, monkeypatch):
+        """По умолчанию - стандартный профиль"""
+        monkeypatch.delenv("MCP_RUNTIME", raising=False)
+
+        assert RuntimeSettings.from_env().mode == "standard"
+
+    def test_invalid(self, monkeypatch):
+        """Неизвестный профиль - ошибка конфигурации"""
+        monkeypatch.setenv("MCP_RUNTIME", "turbo")
+
+        with pytest.raises(ValueError, match="MCP_RUNTIME"):
+            RuntimeSettings.from_env()
+
+
+class TestJsonCodec:
+    """Тесты JSON кодека"""
+
+    @codecs
+    def test_round_trip(self, codec):
+        """Компактный JSON без экранирования кириллицы"""
+        text = codec.dumps(DATA)
+
+        assert text == json.dumps(DATA, ensure_ascii=False, separators=(",", ":"))
+        assert codec.loads(text) == DATA
+        assert codec.loads(text.encode()) == DATA
+
+    @codecs
+    def test_fallback_values(self, codec):
+        """Значения вне возможностей orjson обрабатывает стандартный json"""
+        assert math.isnan(codec.loads('{"value": NaN}')["value"])
+        assert codec.dumps({"big": 2 ** 70}) == '{"big":1180591620717411303424}'
+        assert codec.dumps({1: "a"}) == '{"1":"a"}'
+
+    @codecs
+    def test_errors(self, codec):
+        """Ошибки - те же, что у стандартного json"""
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads("{не json")
+        with pytest.raises(TypeError):
+            codec.dumps({"value": object()})
+        assert codec.dumps({"value": {1, 2}}, default=sorted) == '{"value":[1,2]}'
+
+    @pytest.mark.skipif(not ORJSON_AVAILABLE, reason="orjson не установлен")
+    def test_default_same_in_both_modes(self):
+        """Даты, dataclass и UUID сериализуются одинаково в обоих профилях"""
+        value = {
+            "time": datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc),
+            "date": date(2026, 10, 17),
+            "point": Point(55.75, 37.62),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        }
+        standard, fast = JsonCodec(fast=False), JsonCodec(fast=True)
+
+        assert fast.dumps(value, default=str) == standard.dumps(value, default=str)
+        assert json.loads(standard.dumps(value, default=str)) == {
+            "time": "2026-10-17 12:30:00+00:00",
+            "date": "2026-10-17",
+            "point": "Point(latitude=55.75, longitude=37.62)",
+            "id": "12345678-1234-5678-1234-567812345678",
+        }
+        for codec in (standard, fast):
+            with pytest.raises(TypeError):
+                codec.dumps({"time": value["time"]})
+
+    def test_fast_without_orjson(self, monkeypatch):
+        """Без orjson профиль fast использует стандартный json"""
+        monkeypatch.setattr(runtime, "_available", lambda module: False)
+
+        assert JsonCodec(fast=True).name == "json"
+
+
+class TestProfile:
+    """Тесты включения профиля"""
+
+    def test_standard(self, runtime_env):
+        """Стандартный профиль ничего не меняет"""
+        runtime_env("standard")
+        jsonlib = httpx._models.jsonlib
+
+        install()
+
+        assert uvicorn_options() == {}
+        assert runtime.get_codec().name == "json"
+        assert httpx._models.jsonlib is jsonlib
+
+    def test_fast_fallback_uvicorn(self, runtime_env, monkeypatch, capsys):
+        """Без uvloop и httptools uvicorn получает стандартные замены"""
+        monkeypatch.setattr(runtime, "_available", lambda module: False)
+        runtime_env("fast")
+
+        install()
+
+        assert uvicorn_options() == {"loop": "asyncio", "http": "h11"}
+        assert "mcp-common[fast]" in capsys.readouterr().out
+
+    def test_fast_without_httpx_jsonlib(self, runtime_env, monkeypatch, capsys):
+        """Без внутреннего jsonlib httpx профиль не падает, а предупреждает"""
+        monkeypatch.delattr(httpx._models, "jsonlib")
+        runtime_env("fast")
+
+        install()
+
+        assert not hasattr(httpx._models, "jsonlib")
+        assert "httpx._models.jsonlib" in capsys.readouterr().out
+        assert mcp.server.streamable_http.json.loads('{"id": 1}') == {"id": 1}
+
+    def test_fast_libraries(self, runtime_env):
+        """Профиль fast разбирает ответы httpx и запросы MCP кодеком"""
+        runtime_env("fast")
+
+        install()
+
+        response = httpx.Response(200, content=json.dumps(DATA).encode())
+        assert response.json() == DATA
+        assert mcp.server.streamable_http.json.loads('{"id": 1}') == {"id": 1}
+        with pytest.raises(mcp.server.streamable_http.json.JSONDecodeError):
+            mcp.server.streamable_http.json.loads("{")
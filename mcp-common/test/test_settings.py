@@ -0,0 +1,41 @@
+"""
+Тесты чтения настроек из переменных окружения
+"""
+import pytest
+
+from mcp_common.settings import env_bool, env_float, env_int
+
+
+class TestEnv:
+    """Тесты env_int, env_float и env_bool"""
+
+    def test_defaults(self, monkeypatch):
+        """Незаданная или пустая переменная - значение по умолчанию"""
+        monkeypatch.delenv("MCP_TEST_VALUE", raising=False)
+        assert env_int("MCP_TEST_VALUE", 3) == 3
+
+        monkeypatch.setenv("MCP_TEST_VALUE", "")
+        assert env_float("MCP_TEST_VALUE", 0.5) == 0.5
+        assert env_bool("MCP_TEST_VALUE", True) is True
+
+    def test_numbers(self, monkeypatch):
+        monkeypatch.setenv("MCP_TEST_VALUE", "42")
+
+        assert env_int("MCP_TEST_VALUE", 0) == 42
+        assert env_float("MCP_TEST_VALUE", 0.0) == 42.0
+
+    def test_invalid_number(self, monkeypatch):
+        """Некорректное число - ошибка конфигурации"""
+        monkeypatch.setenv("MCP_TEST_VALUE", "много")
+
+        with pytest.raises(ValueError):
+            env_int("MCP_TEST_VALUE", 0)
+
+    @pytest.mark.parametrize("value, expected", [
+        ("1", True), ("true", True), ("on", True),
+        ("0", False), ("False", False), (" no ", False), ("off", False),
+    ])
+    def test_bool(self, monkeypatch, value, expected):
+        monkeypatch.setenv("MCP_TEST_VALUE", value)
+
+        assert env_bool("MCP_TEST_VALUE", not expected) is expected
@@ -0,0 +1,241 @@
+"""
+Тесты симулятора upstream и перенаправления запросов на него
+"""
+import json
+
+import httpx
+import pytest
+
+from mcp_common import upstreams
+from mcp_common.http_client import create_http_client
+from mcp_common.simulator import (
+    HostProfile,
+    Recording,
+    UpstreamSimulator,
+    build_simulator,
+    create_app,
+)
+from mcp_common.upstreams import UpstreamSettings, rewrite_url
+
+
+def simulator_client(simulator: UpstreamSimulator) -> httpx.AsyncClient:
+    """Клиент, обращающийся к симулятору без сети"""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app(simulator)),
+        base_url="http://simulator",
+    )
+
+
+class TestSimulator:
+    """Тесты подбора записанных ответов"""
+
+    @pytest.mark.asyncio
+    async def test_default_recordings(self):
+        """Встроенные записи покрывают провайдеров серверов"""
+        async with simulator_client(build_simulator()) as client:
+            geo = await client.get(
+                "/geocoding-api.open-meteo.com/v1/search",
+                params={"name": "Москва"},
+            )
+            ip = await client.get("/ip-api.com/json/8.8.8.8")
+            espn = await client.get(
+                "/site.api.espn.com/apis/site/v2/sports/mma/ufc/scoreboard"
+            )
+            yandex = await client.post(
+                "/searchapi.api.cloud.yandex.net/v2/web/search", json={}
+            )
+
+        assert geo.json()["results"][0]["latitude"] == pytest.approx(55.75, 0.01)
+        assert ip.json()["status"] == "success"
+        assert espn.json()["events"]
+        assert yandex.json()["rawData"]
+
+    @pytest.mark.asyncio
+    async def test_query_selects_recording(self):
+        """Записи одного адреса различаются параметрами запроса"""
+        async with simulator_client(build_simulator()) as client:
+            search = await client.get(
+                "/ru.wikipedia.org/w/api.php",
+                params={"action": "query", "list": "search", "srsearch": "x"},
+            )
+            sections = await client.get(
+                "/en.wikipedia.org/w/api.php",
+                params={"action": "parse", "prop": "sections", "page": "x"},
+            )
+
+        assert "search" in search.json()["query"]
+        assert "sections" in sections.json()["parse"]
+
+    @pytest.mark.asyncio
+    async def test_forecast_locations(self):
+        """Прогноз для списка координат - список ответов по точкам"""
+        async with simulator_client(build_simulator()) as client:
+            single = await client.get(
+                "/api.open-meteo.com/v1/forecast",
+                params={"latitude": "55.8", "longitude": "37.6"},
+            )
+            pair = await client.get(
+                "/api.open-meteo.com/v1/forecast",
+                params={"latitude": "55.8,59.9", "longitude": "37.6,30.3"},
+            )
+            triple = await client.get(
+                "/api.open-meteo.com/v1/forecast",
+                params={
+                    "latitude": "55.8,59.9,43.6",
+                    "longitude": "37.6,30.3,39.7",
+                },
+            )
+
+        assert isinstance(single.json(), dict)
+        assert len(pair.json()) == 2
+        assert len(triple.json()) == 3
+
+    @pytest.mark.asyncio
+    async def test_hourly_forecast(self):
+        """Запрос почасового прогноза получает запись с блоком hourly"""
+        async with simulator_client(build_simulator()) as client:
+            response = await client.get(
+                "/api.open-meteo.com/v1/forecast",
+                params={
+                    "latitude": "55.8",
+                    "longitude": "37.6",
+                    "hourly": "temperature_2m,precipitation",
+                    "forecast_days": "16",
+                },
+            )
+
+        hourly = response.json()["hourly"]
+        assert len(hourly["time"]) == 16 * 24
+        assert len(hourly["temperature_2m"]) == len(hourly["time"])
+
+    @pytest.mark.asyncio
+    async def test_custom_recordings_first(self, tmp_path):
+        """Записи из --recordings проверяются раньше встроенных"""
+        path = tmp_path / "ip.jsonl"
+        path.write_text(json.dumps({
+            "host": "ip-api.com", "path": "/json/*",
+            "json": {"status": "fail", "message": "reserved range"},
+        }) + "\n")
+
+        async with simulator_client(build_simulator([path])) as client:
+            response = await client.get("/ip-api.com/json/10.0.0.1")
+
+        assert response.json()["status"] == "fail"
+
+    @pytest.mark.asyncio
+    async def test_unknown_request(self):
+        """Запрос без записи - 404 с описанием"""
+        simulator = UpstreamSimulator([])
+        async with simulator_client(simulator) as client:
+            response = await client.get("/example.com/missing")
+            stats = await client.get("/_simulator/stats")
+
+        assert response.status_code == 404
+        assert response.json()["host"] == "example.com"
+        assert stats.json()["hosts"] == {"example.com": {"404": 1}}
+
+    @pytest.mark.asyncio
+    async def test_error_rate(self):
+        """Доля ошибок задается для отдельных хостов"""
+        recording = Recording(host="*", path="*", body=b"ok")
+        simulator = UpstreamSimulator(
+            [recording],
+            hosts={"ip-api.com": HostProfile(error_rate=1.0, error_status=429)},
+            seed=1,
+        )
+        async with simulator_client(simulator) as client:
+            failed = await client.get("/ip-api.com/json/")
+            ok = await client.get("/ipapi.co/json/")
+
+        assert failed.status_code == 429
+        assert ok.text == "ok"
+
+    def test_latency_with_jitter(self):
+        """Задержка не меньше базовой, хвост - со средним jitter"""
+        import random
+
+        profile = HostProfile(latency=0.05, jitter=0.01)
+        rng = random.Random(1)
+        delays = [profile.delay(rng) for _ in range(2000)]
+
+        assert min(delays) >= 0.05
+        assert sum(delays) / len(delays) == pytest.approx(0.06, abs=0.002)
+
+
+class TestRedirect:
+    """Тесты перенаправления запросов на симулятор"""
+
+    @pytest.fixture(autouse=True)
+    def settings(self, monkeypatch):
+        monkeypatch.setattr(upstreams, "_settings", UpstreamSettings(
+            base_url="http://127.0.0.1:8900",
+            overrides={"ip-api": "http://127.0.0.1:8901"},
+        ))
+
+    def test_rewrite_url(self):
+        """Известные провайдеры перенаправляются, прочие адреса - нет"""
+        assert str(rewrite_url(
+            "https://api.open-meteo.com/v1/forecast?latitude=1"
+        )) == "http://127.0.0.1:8900/api.open-meteo.com/v1/forecast?latitude=1"
+        assert str(rewrite_url("http://ip-api.com/json/1.1.1.1")) == \
+            "http://127.0.0.1:8901/ip-api.com/json/1.1.1.1"
+        assert str(rewrite_url("https://example.com/page")) == \
+            "https://example.com/page"
+
+    def test_from_env(self, monkeypatch):
+        """Адреса читаются из переменных окружения"""
+        monkeypatch.setenv("MCP_UPSTREAM_BASE_URL", "http://sim:8900/")
+        monkeypatch.setenv("MCP_UPSTREAM_OPEN_METEO_URL", "http://meteo:8900")
+
+        settings = UpstreamSettings.from_env()
+
+        assert settings.base_url == "http://sim:8900"
+        assert settings.overrides == {"open-meteo": "http://meteo:8900"}
+
+    @pytest.mark.asyncio
+    async def test_shared_client_uses_simulator(self):
+        """Общий клиент обращается к симулятору по настоящему адресу"""
+        seen = []
+        app = create_app(build_simulator())
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(str(request.url))
+            assert request.headers["host"] == "127.0.0.1:8900"
+            transport = httpx.ASGITransport(app=app)
+            return await transport.handle_async_request(request)
+
+        transport = httpx.MockTransport(handler)
+        async with create_http_client(transport=transport) as client:
+            response = await client.get(
+                "https://api.open-meteo.com/v1/forecast",
+                params={"latitude": 55.75, "longitude": 37.62},
+            )
+
+        assert response.json()["daily"]["time"]
+        assert seen == [
+            "http://127.0.0.1:8900/api.open-meteo.com/v1/forecast"
+            "?latitude=55.75&longitude=37.62"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_record_responses(self, monkeypatch, tmp_path):
+        """Ответы настоящих провайдеров записываются в формате симулятора"""
+        monkeypatch.setattr(upstreams, "_settings", UpstreamSettings(
+            record_dir=str(tmp_path)
+        ))
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"status": "success"})
+
+        transport = httpx.MockTransport(handler)
+        async with create_http_client(transport=transport) as client:
+            await client.get("http://ip-api.com/json/1.1.1.1?lang=ru")
+            await client.get("https://example.com/")
+
+        lines = (tmp_path / "ip-api.com.jsonl").read_text().splitlines()
+        recording = Recording.from_dict(json.loads(lines[0]))
+        assert recording.matches(
+            "GET", "ip-api.com", "/json/1.1.1.1", {"lang": "ru"}
+        )
+        assert json.loads(recording.body) == {"status": "success"}
+        assert list(tmp_path.iterdir()) == [tmp_path / "ip-api.com.jsonl"]
@@ -0,0 +1,126 @@
+"""
+Тесты объединения одинаковых одновременных запросов
+"""
+import asyncio
+
+import pytest
+
+from mcp_common.cache import CacheSettings, TieredCache
+from mcp_common.singleflight import SingleFlight, single_flight
+
+
+class TestSingleFlight:
+    """Тесты группы запросов"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Одновременные вызовы с одним ключом выполняются один раз"""
+        group = SingleFlight("test")
+        calls = []
+
+        async def fetch(value: str) -> str:
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value.upper()
+
+        results = await asyncio.gather(*[
+            group.do("key", fetch, "a") for _ in range(10)
+        ])
+
+        assert results == ["A"] * 10
+        assert calls == ["a"]
+        assert len(group) == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_not_shared(self):
+        """Завершенный запрос не переиспользуется"""
+        group = SingleFlight("test")
+        calls = []
+
+        async def fetch() -> int:
+            calls.append(1)
+            return len(calls)
+
+        assert await group.do("key", fetch) == 1
+        assert await group.do("key", fetch) == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_shared(self):
+        """Исключение получают все ожидающие"""
+        group = SingleFlight("test")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            group.do("key", fetch), group.do("key", fetch),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Отмена первого вызова не прерывает запрос для остальных"""
+        group = SingleFlight("test")
+
+        async def fetch() -> str:
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        first = asyncio.create_task(group.do("key", fetch))
+        second = asyncio.create_task(group.do("key", fetch))
+        await asyncio.sleep(0.005)
+        first.cancel()
+
+        assert await second == "ok"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+class TestSingleFlightDecorator:
+    """Тесты декоратора"""
+
+    @pytest.mark.asyncio
+    async def test_method_key_ignores_self(self):
+        """Ключ строится по аргументам метода без self"""
+        calls = []
+
+        class Service:
+            @single_flight
+            async def get(self, name: str, limit: int = 10) -> str:
+                calls.append((name, limit))
+                await asyncio.sleep(0.01)
+                return name
+
+        service = Service()
+        await asyncio.gather(
+            service.get("a"), service.get("a", limit=10), service.get("b")
+        )
+
+        assert sorted(calls) == [("a", 10), ("b", 10)]
+
+
+class TestCachedCoalescing:
+    """Тесты объединения промахов кеша"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_call_tool_once(self, tmp_path):
+        """Одновременные промахи по одному ключу вызывают инструмент один раз"""
+        cache = TieredCache("test", CacheSettings(directory=str(tmp_path)))
+        calls = []
+
+        @cache.cached(ttl=60)
+        async def tool(city: str) -> str:
+            calls.append(city)
+            await asyncio.sleep(0.01)
+            return f"weather in {city}"
+
+        results = await asyncio.gather(*[tool("Москва") for _ in range(5)])
+
+        assert results == ["weather in Москва"] * 5
+        assert len(calls) == 1
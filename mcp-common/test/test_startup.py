@@ -0,0 +1,92 @@
+"""
+Тесты профиля холодного старта
+"""
+import json
+import sys
+
+import pytest
+
+from mcp_common import startup
+from mcp_common.startup import ImportProfiler, mark_ready, parse_args
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """Пакет с вложенным относительным импортом"""
+    root = tmp_path / "startup_pkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("from . import heavy\n")
+    (root / "heavy.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "startup_pkg"
+    for name in ("startup_pkg", "startup_pkg.heavy"):
+        sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def profiler():
+    profiler = ImportProfiler()
+    profiler.install()
+    yield profiler
+    profiler.uninstall()
+
+
+class TestImportProfiler:
+    """Тесты замера импортов"""
+
+    def test_nested_imports(self, profiler, package):
+        """Вложенные и относительные импорты учитываются по полному имени"""
+        __import__(package)
+        profiler.uninstall()
+
+        total, own = profiler.modules["startup_pkg"]
+        heavy_total, heavy_own = profiler.modules["startup_pkg.heavy"]
+        assert heavy_own >= 0.02
+        assert total >= heavy_total
+        assert own < heavy_own
+
+    def test_already_imported(self, profiler):
+        """Повторный импорт не записывается"""
+        import json  # noqa: F401
+
+        assert "json" not in profiler.modules
+
+    def test_report(self, profiler, package):
+        """Пакеты суммируются по собственному времени модулей"""
+        __import__(package)
+        profiler.uninstall()
+
+        report = profiler.report(top=5)
+
+        assert report["modules"] == 2
+        assert report["top_packages"]["startup_pkg"] >= 20
+        assert list(report["top_modules"])[0] == "startup_pkg"
+        assert report["elapsed_ms"] >= report["imports_ms"]
+
+
+class TestMarkReady:
+    """Тесты отчета о готовности"""
+
+    def test_without_profile(self, monkeypatch, capsys):
+        """Обычный запуск сервера: отчета нет"""
+        monkeypatch.setattr(startup, "_profiler", None)
+
+        mark_ready()
+
+        assert capsys.readouterr().out == ""
+
+    def test_report_once(self, monkeypatch, capsys, tmp_path, profiler):
+        """Отчет печатается и сохраняется один раз"""
+        output = tmp_path / "startup.json"
+        monkeypatch.setattr(startup, "_profiler", profiler)
+        monkeypatch.setattr(
+            startup, "_options",
+            parse_args(["--json", str(output), "server.py"]),
+        )
+
+        mark_ready()
+        mark_ready()
+
+        out = capsys.readouterr().out
+        assert out.count("Готов к запросам") == 1
+        assert json.loads(output.read_text())["modules"] == 0
@@ -0,0 +1,132 @@
+"""
+Тесты streamable HTTP транспорта
+"""
+import pytest
+from mcp.server.fastmcp import FastMCP
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_common.metrics import instrument_tools
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+
+
+HEADERS = {"accept": "application/json, text/event-stream"}
+
+
+def rpc(method: str, params: dict = None) -> dict:
+    """Запрос JSON-RPC"""
+    request = {"jsonrpc": "2.0", "id": 1, "method": method}
+    if params is not None:
+        request["params"] = params
+    return request
+
+
+@pytest.fixture
+def server():
+    mcp = FastMCP("streamable-test")
+    instrument_tools(mcp)
+
+    @mcp.tool()
+    async def echo(text: str) -> str:
+        """Возвращает текст"""
+        return text
+
+    return mcp
+
+
+@pytest.fixture
+def transport(server):
+    return StreamableHttpTransport(server)
+
+
+@pytest.fixture
+def app(transport):
+    return Starlette(
+        routes=[Route("/mcp", endpoint=transport)],
+        lifespan=server_lifespan,
+    )
+
+
+class TestStreamableHttpTransport:
+    """Тесты вызовов через POST /mcp"""
+
+    def test_call_tool_without_session(self, app):
+        """Инструмент вызывается одним запросом, без initialize и сессии"""
+        with TestClient(app) as client:
+            response = client.post(
+                "/mcp",
+                json=rpc("tools/call", {"name": "echo", "arguments": {"text": "привет"}}),
+                headers=HEADERS,
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "mcp-session-id" not in response.headers
+        assert response.json()["result"]["content"][0]["text"] == "привет"
+
+    def test_shared_tool_registry(self, app):
+        """Транспорт отдает инструменты того же FastMCP"""
+        with TestClient(app) as client:
+            response = client.post("/mcp", json=rpc("tools/list"), headers=HEADERS)
+
+        tools = response.json()["result"]["tools"]
+        assert [tool["name"] for tool in tools] == ["echo"]
+
+    def test_initialize(self, app):
+        """initialize отвечает без идентификатора сессии"""
+        with TestClient(app) as client:
+            response = client.post("/mcp", json=rpc("initialize", {
+                "protocolVersion": "2025-06-18",
+                "capabilities": {},
+                "clientInfo": {"name": "test", "version": "1.0"},
+            }), headers=HEADERS)
+
+        assert response.status_code == 200
+        assert response.json()["result"]["serverInfo"]["name"] == "streamable-test"
+        assert "mcp-session-id" not in response.headers
+
+    def test_not_running(self, app, transport):
+        """Без lifespan транспорт отвечает 503"""
+        client = TestClient(app)
+
+        response = client.post("/mcp", json=rpc("tools/list"), headers=HEADERS)
+
+        assert response.status_code == 503
+        assert not transport.running
+
+    def test_restart(self, app, transport):
+        """После остановки транспорт запускается заново"""
+        for _ in range(2):
+            with TestClient(app) as client:
+                assert transport.running
+                response = client.post("/mcp", json=rpc("tools/list"), headers=HEADERS)
+                assert response.status_code == 200
+
+        assert not transport.running
+
+    def test_metrics(self, app):
+        """Запросы учитываются в метриках"""
+        labels = {"server": "streamable-test", "method": "POST"}
+        before = REGISTRY.get_sample_value("mcp_streamable_requests_total", labels) or 0.0
+
+        with TestClient(app) as client:
+            client.post("/mcp", json=rpc("tools/list"), headers=HEADERS)
+
+        after = REGISTRY.get_sample_value("mcp_streamable_requests_total", labels)
+        assert after == before + 1
+
+
+class TestRun:
+    """Тесты запуска менеджера запросов"""
+
+    async def test_nested_run(self, transport):
+        """Повторный запуск (шлюз и сервер) не создает второй менеджер"""
+        async with transport.run():
+            manager = transport._manager
+            async with transport.run():
+                assert transport._manager is manager
+            assert transport._manager is manager
+
+        assert not transport.running
@@ -0,0 +1,166 @@
+"""
+Тесты трассировки вызовов инструментов
+"""
+import importlib.util
+import json
+
+import httpx
+import pytest
+from mcp.server.fastmcp import FastMCP
+
+from mcp_common import tracing
+from mcp_common.cache import CacheSettings, TieredCache
+from mcp_common.metrics import instrument_tools
+from mcp_common.tracing import (
+    TracingSettings,
+    TracingTransport,
+    get_tracer,
+    reset_tracing,
+    span,
+    traced,
+)
+
+
+SDK_AVAILABLE = importlib.util.find_spec("opentelemetry.sdk") is not None
+
+
+@pytest.fixture
+def tracing_env(monkeypatch):
+    """Задает настройки трассировки через переменные окружения"""
+    def set_env(**values) -> None:
+        for name, value in values.items():
+            monkeypatch.setenv(name, str(value))
+        reset_tracing()
+
+    yield set_env
+    reset_tracing()
+
+
+def read_spans(path) -> dict:
+    """Спаны из файла трассировки: имя -> спан"""
+    tracing._provider.force_flush()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return {item["name"]: item for item in map(json.loads, lines)}
+
+
+class TestTracingSettings:
+    """Тесты настроек"""
+
+    def test_from_env(self, monkeypatch):
+        """Режим, файл и доля трасс читаются из переменных окружения"""
+        monkeypatch.setenv("MCP_TRACING", "File")
+        monkeypatch.setenv("MCP_TRACING_FILE", "/tmp/traces-{pid}.jsonl")
+        monkeypatch.setenv("MCP_TRACING_SAMPLE", "0.25")
+
+        settings = TracingSettings.from_env()
+
+        assert settings.mode == "file"
+        assert settings.file == "/tmp/traces-{pid}.jsonl"
+        assert settings.sample == 0.25
+
+    @pytest.mark.parametrize("name, value", [
+        ("MCP_TRACING", "jaeger"),
+        ("MCP_TRACING_SAMPLE", "2"),
+    ])
+    def test_invalid(self, monkeypatch, name, value):
+        """Неизвестный режим и доля вне 0..1 - ошибка конфигурации"""
+        monkeypatch.setenv(name, value)
+
+        with pytest.raises(ValueError, match=name):
+            TracingSettings.from_env()
+
+
+class TestDisabled:
+    """Тесты выключенной трассировки"""
+
+    async def test_noop(self, tracing_env):
+        """Без MCP_TRACING спаны не создаются, код работает как обычно"""
+        tracing_env(MCP_TRACING="off")
+
+        @traced("sync")
+        def double(value: int) -> int:
+            return value * 2
+
+        @traced("async")
+        async def triple(value: int) -> int:
+            return value * 3
+
+        with span("phase", city="Москва") as current:
+            current.set_attribute("result", "hit")
+
+        assert get_tracer() is None
+        assert double(2) == 4
+        assert await triple(2) == 6
+        assert double.__name__ == "double"
+
+    @pytest.mark.skipif(SDK_AVAILABLE, reason="OpenTelemetry SDK установлен")
+    def test_sdk_missing(self, tracing_env, capsys):
+        """Без OpenTelemetry SDK трассировка отключается с предупреждением"""
+        tracing_env(MCP_TRACING="otlp")
+
+        with span("phase"):
+            pass
+
+        assert get_tracer() is None
+        assert "mcp-common[tracing]" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(not SDK_AVAILABLE, reason="нужен OpenTelemetry SDK")
+class TestFileExport:
+    """Тесты записи трасс в файл"""
+
+    @pytest.fixture
+    def traces(self, tmp_path, tracing_env):
+        path = tmp_path / "traces.jsonl"
+        tracing_env(MCP_TRACING="file", MCP_TRACING_FILE=path)
+        return path
+
+    async def test_tool_call_tree(self, traces, tmp_path):
+        """Кеш и фазы инструмента - дочерние спаны вызова"""
+        mcp = FastMCP("tracing-test")
+        instrument_tools(mcp)
+        cache = TieredCache(
+            "tracing", CacheSettings(directory=str(tmp_path))
+        )
+
+        @mcp.tool()
+        @cache.cached(ttl=60)
+        async def forecast(city: str) -> str:
+            """Прогноз"""
+            with span("weather.geocode", city=city):
+                return f"☀️ {city}"
+
+        await mcp.call_tool("forecast", {"city": "Москва"})
+        spans = read_spans(traces)
+
+        root = spans["tools/call forecast"]
+        lookup = spans["cache tracing.forecast"]
+        phase = spans["weather.geocode"]
+        assert root["kind"] == "SpanKind.SERVER"
+        assert root["attributes"]["gen_ai.tool.name"] == "forecast"
+        assert lookup["attributes"]["mcp.cache.result"] == "miss"
+        assert lookup["parent_id"] == root["context"]["span_id"]
+        assert phase["parent_id"] == root["context"]["span_id"]
+        assert phase["attributes"]["city"] == "Москва"
+
+    async def test_upstream_request(self, traces):
+        """Запрос к upstream: спан CLIENT и traceparent в заголовках"""
+        seen = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.update(request.headers)
+            return httpx.Response(503)
+
+        client = httpx.AsyncClient(
+            transport=TracingTransport(httpx.MockTransport(handler))
+        )
+        async with client:
+            await client.get("https://api.example.com/v1?key=secret")
+        spans = read_spans(traces)
+
+        request = spans["GET api.example.com"]
+        assert request["kind"] == "SpanKind.CLIENT"
+        assert request["attributes"]["url.full"] == "https://api.example.com/v1"
+        assert request["attributes"]["http.response.status_code"] == 503
+        assert request["status"]["status_code"] == "ERROR"
+        assert request["context"]["trace_id"][2:] in seen["traceparent"]
@@ -0,0 +1,153 @@
+"""
+Тесты многопроцессного режима и привязки сессий к воркерам
+"""
+import httpx
+import pytest
+from starlette.responses import Response
+
+from mcp_common import workers
+from mcp_common.workers import (
+    FORWARDED_HEADER,
+    SessionAffinity,
+    WorkerSseServerTransport,
+    get_worker_count,
+)
+
+
+@pytest.fixture
+def worker_id(monkeypatch):
+    """Текущий процесс считается воркером 0"""
+    monkeypatch.setattr(workers, "_worker_id", 0)
+    monkeypatch.setattr(workers, "_socket_dir", "/tmp/mcp-workers-test")
+    return 0
+
+
+async def local_app(scope, receive, send):
+    """Обработчик сообщений текущего воркера"""
+    await Response("local", status_code=202)(scope, receive, send)
+
+
+class TestWorkerCount:
+    """Тесты числа воркеров"""
+
+    def test_default_single_worker(self, monkeypatch):
+        """По умолчанию сервер работает в одном процессе"""
+        monkeypatch.delenv("MCP_WORKERS", raising=False)
+
+        assert get_worker_count() == 1
+
+    def test_from_env(self, monkeypatch):
+        """Число воркеров читается из MCP_WORKERS"""
+        monkeypatch.setenv("MCP_WORKERS", "4")
+
+        assert get_worker_count() == 4
+
+    def test_auto(self, monkeypatch):
+        """auto - по воркеру на ядро"""
+        monkeypatch.setenv("MCP_WORKERS", "auto")
+
+        assert get_worker_count() >= 1
+
+    def test_invalid(self, monkeypatch):
+        """Ноль воркеров - ошибка конфигурации"""
+        monkeypatch.setenv("MCP_WORKERS", "0")
+
+        with pytest.raises(ValueError):
+            get_worker_count()
+
+
+class TestWorkerEndpoint:
+    """Тесты адреса для сообщений"""
+
+    def test_single_process_endpoint_unchanged(self):
+        """В однопроцессном режиме адрес не меняется"""
+        sse = WorkerSseServerTransport("/messages/")
+
+        assert sse._endpoint == "/messages/"
+
+    def test_endpoint_contains_worker(self, worker_id):
+        """Воркер добавляет свой номер в адрес для сообщений"""
+        sse = WorkerSseServerTransport("/messages/")
+
+        assert sse._endpoint == "/messages/w0/"
+
+
+class TestSessionAffinity:
+    """Тесты пересылки сообщений воркеру-владельцу сессии"""
+
+    async def post(self, app, path: str, headers=None) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.post(
+                path, content=b'{"jsonrpc": "2.0"}', headers=headers
+            )
+
+    @pytest.mark.asyncio
+    async def test_single_process_passthrough(self):
+        """Без воркеров сообщение обрабатывается локально"""
+        response = await self.post(
+            SessionAffinity(local_app), "/messages/w1/?session_id=abc"
+        )
+
+        assert response.text == "local"
+
+    @pytest.mark.asyncio
+    async def test_own_session_handled_locally(self, worker_id):
+        """Сообщение своей сессии обрабатывается локально"""
+        response = await self.post(
+            SessionAffinity(local_app), "/messages/w0/?session_id=abc"
+        )
+
+        assert response.text == "local"
+
+    @pytest.mark.asyncio
+    async def test_foreign_session_forwarded(self, worker_id, monkeypatch):
+        """Сообщение чужой сессии пересылается воркеру-владельцу"""
+        forwarded = []
+
+        async def peer(request: httpx.Request) -> httpx.Response:
+            forwarded.append(request)
+            return httpx.Response(202, text="Accepted")
+
+        app = SessionAffinity(local_app)
+        monkeypatch.setitem(workers._peers, 1, httpx.AsyncClient(
+            transport=httpx.MockTransport(peer), base_url="http://mcp-worker"
+        ))
+
+        response = await self.post(app, "/messages/w1/?session_id=abc")
+
+        assert response.status_code == 202
+        assert response.text == "Accepted"
+        request = forwarded[0]
+        assert request.url.path == "/messages/w1/"
+        assert request.url.params["session_id"] == "abc"
+        assert request.content == b'{"jsonrpc": "2.0"}'
+        assert request.headers[FORWARDED_HEADER.decode()] == "1"
+
+    @pytest.mark.asyncio
+    async def test_forwarded_message_not_forwarded_again(self, worker_id):
+        """Пересланное сообщение не пересылается повторно"""
+        response = await self.post(
+            SessionAffinity(local_app),
+            "/messages/w1/?session_id=abc",
+            headers={FORWARDED_HEADER.decode(): "1"},
+        )
+
+        assert response.text == "local"
+
+    @pytest.mark.asyncio
+    async def test_dead_owner(self, worker_id, monkeypatch):
+        """Если воркер-владелец недоступен, сессия считается потерянной"""
+        async def peer(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("no such socket", request=request)
+
+        app = SessionAffinity(local_app)
+        monkeypatch.setitem(workers._peers, 2, httpx.AsyncClient(
+            transport=httpx.MockTransport(peer), base_url="http://mcp-worker"
+        ))
+
+        response = await self.post(app, "/messages/w2/?session_id=abc")
+
+        assert response.status_code == 404
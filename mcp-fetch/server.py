@@ -1,20 +1,30 @@
 import re
+from typing import Any, Dict
 from urllib.parse import urlparse
 import httpx
-from bs4 import BeautifulSoup
 
-import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
-from mcp.server.sse import SseServerTransport
+
+from mcp_common.http_client import get_http_client
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import instrument_tools, metrics_endpoint, track_sse_session
+from mcp_common.profiling import profiling_routes
+from mcp_common.results import structured
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.tracing import traced
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
 
 # Создаем экземпляр MCP сервера с идентификатором "fetch"
 mcp = FastMCP("fetch")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
 
 
 def clean_text(text: str) -> str:
@@ -35,6 +45,7 @@ def clean_text(text: str) -> str:
     return '\n'.join(cleaned_lines)
 
 
+@traced("fetch.extract_text")
 def extract_text_content(html: str, base_url: str = "") -> str:
     """
     Извлекает текстовое содержимое из HTML, убирая все теги
@@ -46,6 +57,9 @@ def extract_text_content(html: str, base_url: str = "") -> str:
     Returns:
         Очищенный текст без HTML тегов
     """
+    # bs4 импортируется при первом разборе страницы: ускоряет холодный старт
+    from bs4 import BeautifulSoup
+
     try:
         soup = BeautifulSoup(html, 'html.parser')
         
@@ -88,16 +102,17 @@ def extract_text_content(html: str, base_url: str = "") -> str:
         return f"Ошибка при извлечении текста: {str(e)}"
 
 
-async def fetch_page_content(url: str, timeout: int = 30) -> str:
+async def fetch_page_data(url: str, timeout: int = 30) -> Dict[str, Any]:
     """
-    Получает содержимое веб-страницы и извлекает текст
+    Получает веб-страницу и извлекает текст
     
     Args:
         url: URL страницы для получения
         timeout: Таймаут запроса в секундах
         
     Returns:
-        Текстовое содержимое страницы
+        Словарь с метаданными ответа и текстом страницы (text). Для не
+        HTML контента html=False, а text - начало содержимого
     """
     try:
         # Валидация URL
@@ -128,46 +143,40 @@ async def fetch_page_content(url: str, timeout: int = 30) -> str:
             'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
             'Accept-Encoding': 'gzip, deflate',
             'DNT': '1',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
         
-        async with httpx.AsyncClient(
-            timeout=timeout,
+        # Keep-alive обеспечивает общий пул соединений процесса
+        client = get_http_client()
+        response = await client.get(
+            url,
             headers=headers,
+            timeout=timeout,
             follow_redirects=True
-        ) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            
-            # Проверяем, что получили HTML контент
-            content_type = response.headers.get('content-type', '').lower()
-            if ('text/html' not in content_type and 
-                    'application/xhtml' not in content_type):
-                content_preview = response.text[:2000]
-                if len(response.text) > 2000:
-                    content_preview += '...'
-                return (
-                    f"Внимание: Получен не HTML контент "
-                    f"(content-type: {content_type})\n\n"
-                    f"Содержимое:\n{content_preview}"
-                )
-            
-            # Извлекаем текстовое содержимое
-            text_content = extract_text_content(response.text, url)
-            
-            # Добавляем информацию о странице
-            page_info = (
-                f"URL: {url}\n"
-                f"Статус: {response.status_code}\n"
-                f"Размер: {len(response.text)} символов\n"
-                f"Кодировка: {response.encoding or 'auto'}\n"
-                f"Последнее изменение: "
-                f"{response.headers.get('last-modified', 'не указано')}\n"
-            )
-            page_info += "=" * 50 + "\n\n"
-            
-            return page_info + text_content
+        )
+        response.raise_for_status()
+        
+        data = {
+            "url": url,
+            "status": response.status_code,
+            "content_type": response.headers.get('content-type', ''),
+            "html": True,
+            "size": len(response.text),
+            "encoding": response.encoding,
+            "last_modified": response.headers.get('last-modified'),
+        }
+        
+        # Проверяем, что получили HTML контент
+        content_type = data["content_type"].lower()
+        if ('text/html' not in content_type and 
+                'application/xhtml' not in content_type):
+            content_preview = response.text[:2000]
+            if len(response.text) > 2000:
+                content_preview += '...'
+            return {**data, "html": False, "text": content_preview}
+        
+        # Извлекаем текстовое содержимое
+        return {**data, "text": extract_text_content(response.text, url)}
             
     except httpx.TimeoutException:
         raise McpError(
@@ -192,8 +201,52 @@ async def fetch_page_content(url: str, timeout: int = 30) -> str:
         )
 
 
+def format_page(data: Dict[str, Any]) -> str:
+    """
+    Форматирует страницу: сведения об ответе и текст
+    
+    Args:
+        data: Результат fetch_page_data
+        
+    Returns:
+        Текст страницы с заголовком из метаданных ответа
+    """
+    if not data["html"]:
+        return (
+            f"Внимание: Получен не HTML контент "
+            f"(content-type: {data['content_type'].lower()})\n\n"
+            f"Содержимое:\n{data['text']}"
+        )
+    
+    # Добавляем информацию о странице
+    page_info = (
+        f"URL: {data['url']}\n"
+        f"Статус: {data['status']}\n"
+        f"Размер: {data['size']} символов\n"
+        f"Кодировка: {data['encoding'] or 'auto'}\n"
+        f"Последнее изменение: "
+        f"{data['last_modified'] or 'не указано'}\n"
+    )
+    return page_info + "=" * 50 + "\n\n" + data["text"]
+
+
+async def fetch_page_content(url: str, timeout: int = 30) -> str:
+    """
+    Получает содержимое веб-страницы и извлекает текст
+    
+    Args:
+        url: URL страницы для получения
+        timeout: Таймаут запроса в секундах
+        
+    Returns:
+        Текстовое содержимое страницы
+    """
+    return format_page(await fetch_page_data(url, timeout))
+
+
 @mcp.tool()
-async def fetch_page(url: str, timeout: int = 30) -> str:
+@structured(format_page)
+async def fetch_page(url: str, timeout: int = 30) -> Dict[str, Any]:
     """
     Получает содержимое веб-страницы и возвращает только текст без HTML/CSS/JS
     
@@ -203,6 +256,7 @@ async def fetch_page(url: str, timeout: int = 30) -> str:
     
     Returns:
         Текстовое содержимое страницы без HTML разметки
+        (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     
     if not url:
@@ -212,8 +266,7 @@ async def fetch_page(url: str, timeout: int = 30) -> str:
         return "Ошибка: Таймаут должен быть от 1 до 120 секунд"
     
     try:
-        content = await fetch_page_content(url, timeout)
-        return content
+        return await fetch_page_data(url, timeout)
     except McpError:
         raise
     except Exception as e:
@@ -221,22 +274,29 @@ async def fetch_page(url: str, timeout: int = 30) -> str:
 
 
 # Настройка SSE транспорта
-sse = SseServerTransport("/messages/")
+sse = WorkerSseServerTransport("/messages/")
+
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
 
 
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений"""
     _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
-        )
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 # Создаем Starlette приложение
@@ -244,16 +304,21 @@ app = Starlette(
     debug=True,
     routes=[
         Route("/sse", endpoint=handle_sse),
-        Mount("/messages/", app=sse.handle_post_message),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ],
+    lifespan=server_lifespan,
 )
 
 if __name__ == "__main__":
     print("🌐 Запуск MCP Fetch сервера...")
     print("📡 SSE endpoint: http://localhost:8002/sse")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8002/mcp")
     print("🔧 Tools: fetch_page")
     
-    uvicorn.run(
+    run_server(
         app,
         host="0.0.0.0",
         port=8002,
@@ -121,8 +121,8 @@ class TestFetchPageContent:
         }
         mock_response.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 return_value=mock_response
             )
             
@@ -145,8 +145,8 @@ class TestFetchPageContent:
             response=mock_response
         )
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 side_effect=http_error
             )
             
@@ -158,8 +158,8 @@ class TestFetchPageContent:
     @pytest.mark.asyncio
     async def test_timeout_error(self):
         """Тест таймаута"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 side_effect=httpx.TimeoutException("Timeout")
             )
             
@@ -178,8 +178,8 @@ class TestFetchPageContent:
         mock_response.headers = {'content-type': 'application/json'}
         mock_response.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 return_value=mock_response
             )
             
@@ -228,8 +228,8 @@ class TestFetchPageTool:
         }
         mock_response.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 return_value=mock_response
             )
             
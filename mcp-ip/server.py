@@ -1,19 +1,35 @@
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
+
 import httpx
 
-import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
-from mcp.server.sse import SseServerTransport
+
+from mcp_common.http_client import get_http_client
+from mcp_common.cache import TieredCache
+from mcp_common.hedging import HedgeError, hedge_delay, hedged
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import instrument_tools, metrics_endpoint, track_sse_session
+from mcp_common.profiling import profiling_routes
+from mcp_common.results import structured
+from mcp_common.singleflight import single_flight
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
 
 # Создаем экземпляр MCP сервера с идентификатором "ip-query"
 mcp = FastMCP("ip-query")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
+
+# Кеш ответов инструментов (память + SQLite)
+cache = TieredCache("ip")
 
 
 async def get_user_real_ip() -> str:
@@ -32,25 +48,38 @@ async def get_user_real_ip() -> str:
             "https://ipv4.icanhazip.com"
         ]
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            for service in services:
+        client = get_http_client()
+
+        def attempt(service: str):
+            async def fetch() -> str:
                 try:
-                    response = await client.get(service)
+                    response = await client.get(service, timeout=10.0)
                     response.raise_for_status()
-                    
+
                     if "ipify" in service:
                         return response.json()["ip"]
                     elif "httpbin" in service:
                         return response.json()["origin"]
                     elif "icanhazip" in service:
                         return response.text.strip()
-                        
+
                 except Exception as e:
                     print(f"Ошибка получения IP через {service}: {e}")
-                    continue
-        
-        # Если все сервисы недоступны, возвращаем пустую строку
-        return ""
+                return ""
+            return fetch
+
+        # Следующий сервис запускается параллельно, если текущий не ответил
+        # за обычное для него время (p95), или сразу после ошибки
+        try:
+            return await hedged(
+                "real-ip",
+                [attempt(service) for service in services],
+                delays=[hedge_delay(httpx.URL(s).host) for s in services[:-1]],
+                accept=bool,
+            )
+        except HedgeError:
+            # Если все сервисы недоступны, возвращаем пустую строку
+            return ""
         
     except Exception as e:
         print(f"Ошибка получения реального IP: {e}")
@@ -86,14 +115,16 @@ async def query_ip_info_services(ip_address: str) -> Dict:
         }
     ]
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        for service in services:
+    client = get_http_client()
+
+    def attempt(service: Dict):
+        async def fetch() -> Optional[Dict]:
             try:
-                response = await client.get(service["url"])
+                response = await client.get(service["url"], timeout=15.0)
                 response.raise_for_status()
-                
+
                 data = response.json()
-                
+
                 # Проверяем успешность ответа
                 if service["parser"] == "ip_api_com":
                     if data.get("status") == "success":
@@ -104,18 +135,28 @@ async def query_ip_info_services(ip_address: str) -> Dict:
                 elif service["parser"] == "ipwhois_app":
                     if data.get("success"):
                         return parse_ipwhois_app_response(data)
-                
+
             except Exception as e:
                 print(f"Ошибка запроса через {service['name']}: {e}")
-                continue
-    
-    # Если все API недоступны
-    raise McpError(
-        ErrorData(
-            code=INTERNAL_ERROR,
-            message="Все IP API сервисы недоступны"
+            return None
+        return fetch
+
+    # Медленный провайдер перекрывается следующим по списку, а не держит
+    # вызов до своего таймаута
+    try:
+        return await hedged(
+            "ip-info",
+            [attempt(service) for service in services],
+            delays=[hedge_delay(httpx.URL(s["url"]).host) for s in services[:-1]],
+        )
+    except HedgeError:
+        # Если все API недоступны
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message="Все IP API сервисы недоступны"
+            )
         )
-    )
 
 
 def parse_ip_api_com_response(data: Dict) -> Dict:
@@ -187,6 +228,7 @@ def parse_ipwhois_app_response(data: Dict) -> Dict:
     }
 
 
+@single_flight
 async def get_ip_info(ip_address: str) -> Dict:
     """
     Получает информацию об IP-адресе
@@ -298,8 +340,50 @@ def format_ip_info(ip_info: Dict) -> str:
     return formatted
 
 
+def format_ip_info_detailed(ip_info: Dict) -> str:
+    """
+    Форматирует информацию об IP с дополнительными деталями
+    
+    Args:
+        ip_info: Словарь с информацией об IP
+        
+    Returns:
+        Отформатированная строка с детальной информацией об IP
+    """
+    parts = [format_ip_info(ip_info)]
+    
+    # Дополнительная информация для детального запроса
+    parts.append("\n\n🔍 Детальная информация:")
+    parts.append(f"\n├─ 🌐 IP-адрес: {ip_info.get('ip', 'Не определен')}")
+    parts.append(f"\n├─ 📡 Источник: {ip_info.get('source', 'Неизвестен')}")
+    
+    if ip_info.get("country_code"):
+        parts.append(f"\n├─ 🏳️ Код страны: {ip_info['country_code']}")
+    
+    if ip_info.get("region_code"):
+        parts.append(f"\n├─ 🏛️ Код региона: {ip_info['region_code']}")
+    
+    # Статус IP-адреса
+    statuses = []
+    if ip_info.get("mobile"):
+        statuses.append("мобильный")
+    if ip_info.get("proxy"):
+        statuses.append("прокси")
+    if ip_info.get("hosting"):
+        statuses.append("хостинг")
+    
+    if statuses:
+        parts.append(f"\n└─ 🏷️ Тип соединения: {', '.join(statuses)}")
+    else:
+        parts.append("\n└─ 🏷️ Тип соединения: обычный")
+    
+    return "".join(parts)
+
+
 @mcp.tool()
-async def ip_address_query(ip: str = "") -> str:
+@structured(format_ip_info)
+@cache.cached(ttl=86400, stale=604800)
+async def ip_address_query(ip: str = "") -> Dict:
     """
     Получает основную информацию о местоположении IP-адреса
     
@@ -308,11 +392,10 @@ async def ip_address_query(ip: str = "") -> str:
             определяется IP пользователя.
         
     Returns:
-        Отформатированная строка с информацией об IP-адресе
+        Информация об IP-адресе (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     try:
-        ip_info = await get_ip_info(ip)
-        return format_ip_info(ip_info)
+        return await get_ip_info(ip)
         
     except McpError:
         raise
@@ -326,7 +409,9 @@ async def ip_address_query(ip: str = "") -> str:
 
 
 @mcp.tool()
-async def ip_address_query_detailed(ip: str = "") -> str:
+@structured(format_ip_info_detailed)
+@cache.cached(ttl=86400, stale=604800)
+async def ip_address_query_detailed(ip: str = "") -> Dict:
     """
     Получает детальную информацию о местоположении IP-адреса 
     с дополнительными данными
@@ -336,40 +421,10 @@ async def ip_address_query_detailed(ip: str = "") -> str:
             определяется IP пользователя.
         
     Returns:
-        Отформатированная строка с детальной информацией об IP-адресе
+        Детальная информация об IP-адресе (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     try:
-        ip_info = await get_ip_info(ip)
-        
-        # Добавляем дополнительные детали к форматированию
-        formatted = format_ip_info(ip_info)
-        
-        # Дополнительная информация для детального запроса
-        formatted += "\n\n🔍 Детальная информация:"
-        formatted += f"\n├─ 🌐 IP-адрес: {ip_info.get('ip', 'Не определен')}"
-        formatted += f"\n├─ 📡 Источник: {ip_info.get('source', 'Неизвестен')}"
-        
-        if ip_info.get("country_code"):
-            formatted += f"\n├─ 🏳️ Код страны: {ip_info['country_code']}"
-        
-        if ip_info.get("region_code"):
-            formatted += f"\n├─ 🏛️ Код региона: {ip_info['region_code']}"
-        
-        # Статус IP-адреса
-        statuses = []
-        if ip_info.get("mobile"):
-            statuses.append("мобильный")
-        if ip_info.get("proxy"):
-            statuses.append("прокси")
-        if ip_info.get("hosting"):
-            statuses.append("хостинг")
-        
-        if statuses:
-            formatted += f"\n└─ 🏷️ Тип соединения: {', '.join(statuses)}"
-        else:
-            formatted += "\n└─ 🏷️ Тип соединения: обычный"
-        
-        return formatted
+        return await get_ip_info(ip)
         
     except McpError:
         raise
@@ -382,22 +437,29 @@ async def ip_address_query_detailed(ip: str = "") -> str:
         )
 
 # Настройка SSE транспорта
-sse = SseServerTransport("/messages/")
+sse = WorkerSseServerTransport("/messages/")
 
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
 
+
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений"""
     _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
-        )
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 # Создание Starlette приложения
@@ -405,8 +467,12 @@ app = Starlette(
     debug=True,
     routes=[
         Route("/sse", endpoint=handle_sse),
-        Mount("/messages/", app=sse.handle_post_message),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ],
+    lifespan=server_lifespan,
 )
 
 if __name__ == "__main__":
@@ -417,6 +483,7 @@ if __name__ == "__main__":
     print("   • ipwhois.app")
     print("🚀 Сервер будет доступен на http://localhost:8003")
     print("📡 SSE endpoint: http://localhost:8003/sse")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8003/mcp")
     print("📧 Messages endpoint: http://localhost:8003/messages/")
     
-    uvicorn.run(app, host="0.0.0.0", port=8003) 
\ No newline at end of file
+    run_server(app, host="0.0.0.0", port=8003) 
\ No newline at end of file
@@ -0,0 +1,7 @@
+"""
+Общие настройки тестов
+"""
+import os
+
+# Кеш инструментов отключен: каждый тест работает со своими моками upstream
+os.environ.setdefault("MCP_CACHE_ENABLED", "false")
@@ -36,8 +36,8 @@ class TestGetUserRealIP:
         mock_response.json.return_value = {"ip": "8.8.8.8"}
         mock_response.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_user_real_ip()
             assert result == "8.8.8.8"
@@ -53,8 +53,8 @@ class TestGetUserRealIP:
         mock_response_success.json.return_value = {"origin": "1.1.1.1"}
         mock_response_success.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = [
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.side_effect = [
                 mock_response_fail, mock_response_success
             ]
             
@@ -67,8 +67,8 @@ class TestGetUserRealIP:
         mock_response = AsyncMock()
         mock_response.raise_for_status.side_effect = httpx.HTTPError("Service unavailable")
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_user_real_ip()
             assert result == ""
@@ -97,8 +97,8 @@ class TestQueryIPInfoServices:
         }
         mock_response.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.return_value = mock_response
             
             result = await query_ip_info_services("8.8.8.8")
             
@@ -128,8 +128,8 @@ class TestQueryIPInfoServices:
         }
         mock_response_success.raise_for_status.return_value = None
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = [
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.side_effect = [
                 mock_response_fail, mock_response_success
             ]
             
@@ -145,8 +145,8 @@ class TestQueryIPInfoServices:
         mock_response = AsyncMock()
         mock_response.raise_for_status.side_effect = httpx.HTTPError("Service unavailable")
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.return_value = mock_response
             
             with pytest.raises(McpError) as exc_info:
                 await query_ip_info_services("8.8.8.8")
@@ -1,20 +1,88 @@
+import asyncio
 from datetime import datetime
-from typing import Dict, List
-import uvicorn
+from typing import Any, Dict, List
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import INTERNAL_ERROR, INVALID_PARAMS
-from mcp.server.sse import SseServerTransport
 
-# Импортируем новый пакет duckduckgo-search
-from duckduckgo_search import DDGS
+from mcp_common.cache import TieredCache
+from mcp_common.circuit import guard_upstream
+from mcp_common.ratelimit import acquire_upstream
+from mcp_common.profiling import profiling_routes
+from mcp_common.results import structured
+from mcp_common.upstreams import get_settings, rewrite_url
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import (
+    instrument_tools,
+    metrics_endpoint,
+    track_sse_session,
+    track_upstream,
+)
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
 
 # Создаем экземпляр MCP сервера с идентификатором "search"
 mcp = FastMCP("search")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
+
+# Кеш ответов инструментов (память + SQLite)
+cache = TieredCache("search")
+
+
+def has_results(result: Dict[str, Any]) -> bool:
+    """Пустую выдачу не кешируем: ошибки DuckDuckGo дают пустой список"""
+    return bool(result["results"])
+
+# Общий экземпляр DDGS: HTTP сессия и соединения переиспользуются
+# между вызовами инструментов вместо нового клиента на каждый поиск
+_ddgs = None
+
+
+def simulated_ddgs(base: type) -> type:
+    """
+    DDGS, отправляющий запросы на симулятор upstream
+    (MCP_UPSTREAM_BASE_URL, см. mcp_common.simulator)
+
+    Args:
+        base: Класс duckduckgo_search.DDGS
+    """
+    class SimulatedDDGS(base):
+        def _get_url(self, method, url, *args, **kwargs):
+            return super()._get_url(
+                method, str(rewrite_url(url)), *args, **kwargs
+            )
+
+        def _sleep(self, sleeptime: float = 0.75) -> None:
+            # Пауза между запросами бережет квоту настоящего DuckDuckGo,
+            # симулятору она не нужна
+            pass
+
+    return SimulatedDDGS
+
+
+def get_ddgs():
+    """
+    Возвращает общий экземпляр DDGS процесса
+
+    duckduckgo_search импортируется при первом поиске: ускоряет холодный
+    старт сервера.
+    """
+    global _ddgs
+    if _ddgs is None:
+        from duckduckgo_search import DDGS
+
+        simulated = any(
+            get_settings().target(host)
+            for host in ("duckduckgo.com", "www.bing.com")
+        )
+        _ddgs = (simulated_ddgs(DDGS) if simulated else DDGS)(timeout=20)
+    return _ddgs
 
 
 async def search_duckduckgo_improved(
@@ -38,92 +106,104 @@ async def search_duckduckgo_improved(
         Список результатов поиска
     """
     try:
-        # Создаем экземпляр DDGS с таймаутом
-        ddgs = DDGS(timeout=20)
+        # Используем общий экземпляр DDGS с таймаутом
+        ddgs = get_ddgs()
         results = []
         
-        if search_type == "web":
-            # Веб-поиск
-            search_results = ddgs.text(
-                keywords=query,
-                region=region,
-                safesearch="moderate",
-                timelimit=time_limit,
-                max_results=max_results
-            )
+        # Квота DuckDuckGo общая для всех сессий процесса
+        await acquire_upstream("duckduckgo")
+
+        # Предохранитель: при недоступном DuckDuckGo ошибка возвращается
+        # сразу, а не после таймаута DDGS. DDGS синхронный (до 20 с на
+        # запрос), поэтому запрос идет в потоке и не блокирует event loop
+        # шлюза, общий для всех серверов
+        with guard_upstream("duckduckgo"), track_upstream("duckduckgo"):
+            if search_type == "web":
+                # Веб-поиск
+                search_results = await asyncio.to_thread(
+                    ddgs.text,
+                    keywords=query,
+                    region=region,
+                    safesearch="moderate",
+                    timelimit=time_limit,
+                    max_results=max_results
+                )
             
-            for item in search_results:
-                results.append({
-                    'title': item.get('title', 'Без названия'),
-                    'url': item.get('href', ''),
-                    'snippet': item.get('body', 'Описание отсутствует'),
-                    'type': 'web'
-                })
+                for item in search_results:
+                    results.append({
+                        'title': item.get('title', 'Без названия'),
+                        'url': item.get('href', ''),
+                        'snippet': item.get('body', 'Описание отсутствует'),
+                        'type': 'web'
+                    })
                 
-        elif search_type == "news":
-            # Поиск новостей
-            search_results = ddgs.news(
-                keywords=query,
-                region=region,
-                safesearch="moderate",
-                timelimit=time_limit,
-                max_results=max_results
-            )
+            elif search_type == "news":
+                # Поиск новостей
+                search_results = await asyncio.to_thread(
+                    ddgs.news,
+                    keywords=query,
+                    region=region,
+                    safesearch="moderate",
+                    timelimit=time_limit,
+                    max_results=max_results
+                )
             
-            for item in search_results:
-                results.append({
-                    'title': item.get('title', 'Без названия'),
-                    'url': item.get('url', ''),
-                    'snippet': item.get('body', 'Описание отсутствует'),
-                    'date': item.get('date', ''),
-                    'source': item.get('source', ''),
-                    'type': 'news'
-                })
+                for item in search_results:
+                    results.append({
+                        'title': item.get('title', 'Без названия'),
+                        'url': item.get('url', ''),
+                        'snippet': item.get('body', 'Описание отсутствует'),
+                        'date': item.get('date', ''),
+                        'source': item.get('source', ''),
+                        'type': 'news'
+                    })
                 
-        elif search_type == "images":
-            # Поиск изображений
-            search_results = ddgs.images(
-                keywords=query,
-                region=region,
-                safesearch="moderate",
-                timelimit=time_limit,
-                max_results=max_results
-            )
+            elif search_type == "images":
+                # Поиск изображений
+                search_results = await asyncio.to_thread(
+                    ddgs.images,
+                    keywords=query,
+                    region=region,
+                    safesearch="moderate",
+                    timelimit=time_limit,
+                    max_results=max_results
+                )
             
-            for item in search_results:
-                results.append({
-                    'title': item.get('title', 'Без названия'),
-                    'url': item.get('url', ''),
-                    'image_url': item.get('image', ''),
-                    'thumbnail': item.get('thumbnail', ''),
-                    'width': item.get('width', ''),
-                    'height': item.get('height', ''),
-                    'snippet': item.get('title', ''),
-                    'type': 'image'
-                })
+                for item in search_results:
+                    results.append({
+                        'title': item.get('title', 'Без названия'),
+                        'url': item.get('url', ''),
+                        'image_url': item.get('image', ''),
+                        'thumbnail': item.get('thumbnail', ''),
+                        'width': item.get('width', ''),
+                        'height': item.get('height', ''),
+                        'snippet': item.get('title', ''),
+                        'type': 'image'
+                    })
                 
-        elif search_type == "videos":
-            # Поиск видео
-            search_results = ddgs.videos(
-                keywords=query,
-                region=region,
-                safesearch="moderate",
-                timelimit=time_limit,
-                max_results=max_results
-            )
+            elif search_type == "videos":
+                # Поиск видео
+                search_results = await asyncio.to_thread(
+                    ddgs.videos,
+                    keywords=query,
+                    region=region,
+                    safesearch="moderate",
+                    timelimit=time_limit,
+                    max_results=max_results
+                )
             
-            for item in search_results:
-                results.append({
-                    'title': item.get('title', 'Без названия'),
-                    'url': item.get('content', ''),
-                    'description': item.get('description', 
-                                              'Описание отсутствует'),
-                    'duration': item.get('duration', ''),
-                    'published': item.get('published', ''),
-                    'publisher': item.get('publisher', ''),
-                    'embed_url': item.get('embed_url', ''),
-                    'type': 'video'
-                })
+                for item in search_results:
+                    results.append({
+                        'title': item.get('title', 'Без названия'),
+                        'url': item.get('content', ''),
+                        'description': item.get('description', 
+                                                  'Описание отсутствует'),
+                        'duration': item.get('duration', ''),
+                        'published': item.get('published', ''),
+                        'publisher': item.get('publisher', ''),
+                        'embed_url': item.get('embed_url', ''),
+                        'type': 'video'
+                    })
         
         return results
         
@@ -168,53 +248,85 @@ def format_search_results_improved(results: List[Dict], query: str, search_type:
     icon = type_icons.get(search_type, '🔍')
     type_name = type_names.get(search_type, 'Поиск')
     
-    formatted = f"""{icon} {type_name} по запросу "{query}"
+    parts = [f"""{icon} {type_name} по запросу "{query}"
 
 📊 Найдено результатов: {len(results)}
 🕒 Время поиска: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 🔧 Используется: duckduckgo-search v8.0+
 
-"""
+"""]
+    separator = "─" * 50 + "\n"
     
     for i, result in enumerate(results, 1):
         title = result.get('title', 'Без названия')[:150]
         url = result.get('url', '')
         snippet = result.get('snippet', 'Описание отсутствует')[:300]
         
-        formatted += f"""
+        parts.append(f"""
 📑 {i}. {title}
 🔗 {url}
 📝 {snippet}
-"""
+""")
         
         # Дополнительная информация в зависимости от типа
         if search_type == 'news':
             if result.get('date'):
-                formatted += f"📅 Дата: {result['date']}\n"
+                parts.append(f"📅 Дата: {result['date']}\n")
             if result.get('source'):
-                formatted += f"🏢 Источник: {result['source']}\n"
+                parts.append(f"🏢 Источник: {result['source']}\n")
         
         elif search_type in ['image', 'images']:
             if result.get('image_url'):
-                formatted += f"🖼️ Изображение: {result['image_url']}\n"
+                parts.append(f"🖼️ Изображение: {result['image_url']}\n")
             if result.get('width') and result.get('height'):
-                formatted += f"📐 Размер: {result['width']}x{result['height']}\n"
+                parts.append(f"📐 Размер: {result['width']}x{result['height']}\n")
         
         elif search_type in ['video', 'videos']:
             if result.get('duration'):
-                formatted += f"⏱️ Длительность: {result['duration']}\n"
+                parts.append(f"⏱️ Длительность: {result['duration']}\n")
             if result.get('publisher'):
-                formatted += f"🏢 Канал: {result['publisher']}\n"
+                parts.append(f"🏢 Канал: {result['publisher']}\n")
             if result.get('published'):
-                formatted += f"📅 Опубликовано: {result['published']}\n"
+                parts.append(f"📅 Опубликовано: {result['published']}\n")
         
-        formatted += "─" * 50 + "\n"
+        parts.append(separator)
     
-    return formatted
+    return "".join(parts)
+
+
+def format_search_data(data: Dict[str, Any]) -> str:
+    """Текст для результата инструмента поиска (см. search_data)"""
+    return format_search_results_improved(
+        data["results"], data["query"], data["search_type"]
+    )
+
+
+def search_data(
+    results: List[Dict], query: str, search_type: str
+) -> Dict[str, Any]:
+    """
+    Результат инструмента поиска в структурированном виде
+    
+    Args:
+        results: Список результатов поиска
+        query: Поисковый запрос
+        search_type: Тип поиска
+        
+    Returns:
+        Словарь с запросом, типом поиска и результатами
+    """
+    return {
+        "query": query,
+        "search_type": search_type,
+        "count": len(results),
+        "results": results,
+    }
 
 
 @mcp.tool()
-async def search_web(query: str, max_results: int = 15, region: str = "ru-ru", time_limit: str = None) -> str:
+@structured(format_search_data)
+@cache.cached(ttl=900, cache_if=has_results)
+async def search_web(query: str, max_results: int = 15, region: str = "ru-ru", time_limit: str = None) -> Dict[str, Any]:
     """
     🌐 Улучшенный поиск веб-страниц в интернете через DuckDuckGo
     
@@ -228,7 +340,7 @@ async def search_web(query: str, max_results: int = 15, region: str = "ru-ru", t
         time_limit: Ограничение по времени (d=день, w=неделя, m=месяц, y=год)
     
     Returns:
-        Отформатированные результаты поиска
+        Результаты поиска (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     if not query.strip():
         raise McpError(INVALID_PARAMS, "Запрос не может быть пустым")
@@ -245,7 +357,7 @@ async def search_web(query: str, max_results: int = 15, region: str = "ru-ru", t
             time_limit=time_limit
         )
         
-        return format_search_results_improved(results, query, "web")
+        return search_data(results, query, "web")
         
     except Exception as e:
         error_msg = f"Ошибка при поиске веб-страниц: {str(e)}"
@@ -254,7 +366,9 @@ async def search_web(query: str, max_results: int = 15, region: str = "ru-ru", t
 
 
 @mcp.tool()
-async def search_news(query: str, max_results: int = 15, region: str = "ru-ru", time_limit: str = "w") -> str:
+@structured(format_search_data)
+@cache.cached(ttl=300, cache_if=has_results)
+async def search_news(query: str, max_results: int = 15, region: str = "ru-ru", time_limit: str = "w") -> Dict[str, Any]:
     """
     📰 Улучшенный поиск новостей через DuckDuckGo
     
@@ -285,7 +399,7 @@ async def search_news(query: str, max_results: int = 15, region: str = "ru-ru",
             time_limit=time_limit
         )
         
-        return format_search_results_improved(results, query, "news")
+        return search_data(results, query, "news")
         
     except Exception as e:
         error_msg = f"Ошибка при поиске новостей: {str(e)}"
@@ -294,7 +408,9 @@ async def search_news(query: str, max_results: int = 15, region: str = "ru-ru",
 
 
 @mcp.tool()
-async def search_images(query: str, max_results: int = 15, region: str = "ru-ru") -> str:
+@structured(format_search_data)
+@cache.cached(ttl=3600, cache_if=has_results)
+async def search_images(query: str, max_results: int = 15, region: str = "ru-ru") -> Dict[str, Any]:
     """
     🖼️ Улучшенный поиск изображений через DuckDuckGo
     
@@ -323,7 +439,7 @@ async def search_images(query: str, max_results: int = 15, region: str = "ru-ru"
             region=region
         )
         
-        return format_search_results_improved(results, query, "images")
+        return search_data(results, query, "images")
         
     except Exception as e:
         error_msg = f"Ошибка при поиске изображений: {str(e)}"
@@ -332,7 +448,9 @@ async def search_images(query: str, max_results: int = 15, region: str = "ru-ru"
 
 
 @mcp.tool()
-async def search_videos(query: str, max_results: int = 15, region: str = "ru-ru", time_limit: str = None) -> str:
+@structured(format_search_data)
+@cache.cached(ttl=900, cache_if=has_results)
+async def search_videos(query: str, max_results: int = 15, region: str = "ru-ru", time_limit: str = None) -> Dict[str, Any]:
     """
     🎥 Улучшенный поиск видео через DuckDuckGo
     
@@ -363,7 +481,7 @@ async def search_videos(query: str, max_results: int = 15, region: str = "ru-ru"
             time_limit=time_limit
         )
         
-        return format_search_results_improved(results, query, "videos")
+        return search_data(results, query, "videos")
         
     except Exception as e:
         error_msg = f"Ошибка при поиске видео: {str(e)}"
@@ -372,22 +490,29 @@ async def search_videos(query: str, max_results: int = 15, region: str = "ru-ru"
 
 
 # Настройка SSE транспорта
-sse = SseServerTransport("/messages/")
+sse = WorkerSseServerTransport("/messages/")
+
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
 
 
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений"""
     _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
-        )
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 # Создание Starlette приложения
@@ -395,14 +520,19 @@ app = Starlette(
     debug=True,
     routes=[
         Route("/sse", endpoint=handle_sse),
-        Mount("/messages/", app=sse.handle_post_message),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ],
+    lifespan=server_lifespan,
 )
 
 if __name__ == "__main__":
     print("🔍 Запуск MCP сервера поиска с DuckDuckGo API...")
     print("📡 Сервер будет доступен по адресу: http://localhost:8002")
     print("🔗 SSE endpoint: http://localhost:8002/sse")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8002/mcp")
     print("📧 Messages endpoint: http://localhost:8002/messages/")
     print("🛠️ Доступные инструменты:")
     print("   - search_web(query, max_results) - поиск веб-страниц")
@@ -411,4 +541,4 @@ if __name__ == "__main__":
     print("🌍 Поиск через DuckDuckGo API (без API ключей)")
     print("🆓 Поддерживаются любые языки и запросы!")
     
-    uvicorn.run(app, host="0.0.0.0", port=8002) 
\ No newline at end of file
+    run_server(app, host="0.0.0.0", port=8002) 
\ No newline at end of file
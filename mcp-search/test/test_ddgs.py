@@ -0,0 +1,45 @@
+"""
+Тесты вызовов DDGS из асинхронных инструментов
+"""
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+# Добавляем родительскую директорию в path для импорта server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import search_duckduckgo_improved
+
+
+class SlowDDGS:
+    """Синхронный DDGS с медленным ответом"""
+
+    def text(self, **kwargs):
+        time.sleep(0.3)
+        return [{"title": "Python", "href": "https://python.org", "body": "..."}]
+
+
+@pytest.mark.asyncio
+async def test_search_does_not_block_event_loop():
+    """Пока DDGS ждет ответа, другие корутины шлюза продолжают работать"""
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    try:
+        with patch("server.get_ddgs", return_value=SlowDDGS()):
+            results = await search_duckduckgo_improved("python", "web")
+    finally:
+        task.cancel()
+
+    assert results[0]["url"] == "https://python.org"
+    # При блокирующем вызове ticker не успел бы сработать за 0.3 с
+    assert len(ticks) >= 10
@@ -1,16 +1,27 @@
-from typing import Dict
+from typing import Dict, List
 import httpx
-from bs4 import BeautifulSoup
 
-import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INVALID_PARAMS
-from mcp.server.sse import SseServerTransport
+
+from mcp_common.http_client import get_http_client
+from mcp_common.cache import TieredCache
+from mcp_common.hedging import HedgeError, hedge_delay, hedged
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import instrument_tools, metrics_endpoint, track_sse_session
+from mcp_common.profiling import profiling_routes
+from mcp_common.results import structured
+from mcp_common.runtime import loads
+from mcp_common.singleflight import single_flight
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.tracing import span
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
 
 # Импортируем UFC API
 try:
@@ -20,6 +31,16 @@ except ImportError:
 
 # Создаем экземпляр MCP сервера
 mcp = FastMCP("ufc")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
+
+# Кеш ответов инструментов (память + SQLite)
+cache = TieredCache("ufc")
+
+
+def is_success(result) -> bool:
+    """Сообщения об ошибках (❌ ...) не кешируем"""
+    return not (isinstance(result, str) and result.startswith("❌"))
 
 # Конфигурация API
 UFC_BASE_URL = "https://www.ufc.com"
@@ -30,74 +51,109 @@ class UFCDataService:
     """Сервис для получения данных о UFC из реальных источников"""
     
     def __init__(self):
-        self.session = None
         self.espn_base_url = "https://site.api.espn.com/apis/site/v2/sports/mma/ufc"
         self.ufc_stats_url = "http://ufcstats.com/statistics/events/completed"
+        self.headers = {
+            "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                           "AppleWebKit/537.36")
+        }
     
     async def get_session(self) -> httpx.AsyncClient:
-        """Получение HTTP сессии"""
-        if self.session is None:
-            self.session = httpx.AsyncClient(
-                timeout=30.0,
-                headers={
-                    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                                   "AppleWebKit/537.36")
-                }
-            )
-        return self.session
+        """Получение HTTP сессии (общий пул соединений процесса)"""
+        return get_http_client()
     
     async def make_request(self, url: str, params: Dict = None) -> str:
         """Универсальный метод для HTTP запросов"""
         session = await self.get_session()
         try:
-            response = await session.get(url, params=params)
+            response = await session.get(
+                url, params=params, headers=self.headers, timeout=30.0
+            )
             response.raise_for_status()
             return response.text
         except Exception as e:
             raise Exception(f"Ошибка запроса к {url}: {str(e)}")
 
+    @single_flight
     async def get_espn_schedule(self) -> Dict:
         """Получение расписания из ESPN API"""
         try:
             url = f"{self.espn_base_url}/scoreboard"
             response = await self.make_request(url)
-            import json
-            data = json.loads(response)
+            data = loads(response)
             return data
         except Exception as e:
             return {"error": f"Ошибка получения расписания: {str(e)}"}
 
+    @single_flight
     async def get_espn_news(self) -> Dict:
         """Получение новостей из ESPN API"""
         try:
             url = f"{self.espn_base_url}/news"
             response = await self.make_request(url)
-            import json
-            data = json.loads(response)
+            data = loads(response)
             return data
         except Exception as e:
             return {"error": f"Ошибка получения новостей: {str(e)}"}
 
+    async def get_schedule(self) -> Dict:
+        """
+        Расписание турниров: ESPN API с резервом UFC Stats
+
+        Если ESPN не ответил за обычное для него время (p95), параллельно
+        запускается парсинг UFC Stats, и берется первый успешный ответ.
+
+        Returns:
+            Данные источника с полем source ("espn" или "ufcstats")
+            или {"error": ...}
+        """
+        async def from_espn() -> Dict:
+            data = await self.get_espn_schedule()
+            if data.get("error"):
+                raise Exception(data["error"])
+            return {**data, "source": "espn"}
+
+        async def from_ufcstats() -> Dict:
+            data = await self.scrape_ufc_events()
+            if data.get("error"):
+                raise Exception(data["error"])
+            return {**data, "source": "ufcstats"}
+
+        try:
+            return await hedged(
+                "ufc-schedule",
+                [from_espn, from_ufcstats],
+                delays=hedge_delay(httpx.URL(self.espn_base_url).host),
+            )
+        except HedgeError as e:
+            # Показываем ошибку основного источника
+            error = e.errors[0] if e.errors else e
+            return {"error": str(error)}
+
     async def scrape_ufc_events(self) -> Dict:
         """Парсинг событий с UFC Stats"""
+        # bs4 импортируется при первом разборе страницы: ускоряет холодный старт
+        from bs4 import BeautifulSoup
+
         try:
             response = await self.make_request(self.ufc_stats_url)
-            soup = BeautifulSoup(response, 'html.parser')
-            
-            events = []
-            event_rows = soup.find_all('tr', class_='b-statistics__table-row')
-            
-            for row in event_rows[:10]:  # Берем последние 10 событий
-                cells = row.find_all('td')
-                if len(cells) >= 2:
-                    event_link = cells[0].find('a')
-                    if event_link:
-                        event_name = event_link.get_text(strip=True)
-                        event_date = cells[1].get_text(strip=True)
-                        events.append({
-                            "name": event_name,
-                            "date": event_date
-                        })
+            with span("ufc.parse_events"):
+                soup = BeautifulSoup(response, 'html.parser')
+
+                events = []
+                event_rows = soup.find_all('tr', class_='b-statistics__table-row')
+
+                for row in event_rows[:10]:  # Берем последние 10 событий
+                    cells = row.find_all('td')
+                    if len(cells) >= 2:
+                        event_link = cells[0].find('a')
+                        if event_link:
+                            event_name = event_link.get_text(strip=True)
+                            event_date = cells[1].get_text(strip=True)
+                            events.append({
+                                "name": event_name,
+                                "date": event_date
+                            })
             
             return {"events": events}
         except Exception as e:
@@ -356,8 +412,339 @@ def format_rankings() -> str:
 📊 Рейтинги обновляются еженедельно после каждого турнира"""
 
 
+# Действующие чемпионы (обновляется вручную)
+CHAMPIONS = {
+    "updated": "декабрь 2024",
+    "men": [
+        {"division": "Тяжелый вес", "champion": "Jon Jones",
+         "record": "27-1-1", "interim": "Tom Aspinall"},
+        {"division": "Полутяжелый вес", "champion": "Alex Pereira",
+         "record": "12-2-0"},
+        {"division": "Средний вес", "champion": "Dricus du Plessis",
+         "record": "22-2-0"},
+        {"division": "Полусредний вес", "champion": "Belal Muhammad",
+         "record": "24-3-0"},
+        {"division": "Легкий вес", "champion": "Islam Makhachev",
+         "record": "26-1-0"},
+        {"division": "Полулегкий вес", "champion": "Ilia Topuria",
+         "record": "16-0-0"},
+        {"division": "Легчайший вес", "champion": "Merab Dvalishvili",
+         "record": "18-4-0"},
+        {"division": "Наилегчайший вес", "champion": "Alexandre Pantoja",
+         "record": "28-5-0"},
+    ],
+    "women": [
+        {"division": "Легчайший вес", "champion": "Julianna Peña",
+         "record": "12-5-0"},
+        {"division": "Наилегчайший вес", "champion": "Valentina Shevchenko",
+         "record": "24-4-0"},
+        {"division": "Минимальный вес", "champion": "Zhang Weili",
+         "record": "25-3-0"},
+    ],
+}
+
+# Главные претенденты по дивизионам
+CONTENDERS = [
+    {"division": "Тяжелый вес",
+     "fighters": ["Curtis Blaydes", "Ciryl Gane", "Alexander Volkov"]},
+    {"division": "Полутяжелый вес",
+     "fighters": ["Magomed Ankalaev", "Jamahal Hill", "Jiri Prochazka"]},
+    {"division": "Средний вес",
+     "fighters": ["Sean Strickland", "Robert Whittaker", "Khamzat Chimaev"]},
+    {"division": "Полусредний вес",
+     "fighters": ["Shavkat Rakhmonov", "Ian Machado Garry", "Kamaru Usman"]},
+    {"division": "Легкий вес",
+     "fighters": ["Arman Tsarukyan", "Charles Oliveira", "Justin Gaethje"]},
+    {"division": "Полулегкий вес",
+     "fighters": ["Max Holloway", "Alexander Volkanovski", "Brian Ortega"]},
+    {"division": "Легчайший вес",
+     "fighters": ["Umar Nurmagomedov", "Cory Sandhagen", "Petr Yan"]},
+]
+
+# Известные запланированные титульные бои
+SCHEDULED_TITLE_FIGHTS = [
+    {
+        "event": "UFC 311",
+        "date": "18 января 2025",
+        "fights": [
+            {"fighters": ["Islam Makhachev", "Arman Tsarukyan"],
+             "division": "Легкий вес"},
+            {"fighters": ["Merab Dvalishvili", "Umar Nurmagomedov"],
+             "division": "Легчайший вес"},
+        ],
+    },
+]
+
+PLANNED_TITLE_FIGHTS = [
+    {"fighters": ["Jon Jones", "Tom Aspinall"],
+     "division": "Объединение титулов тяжелого веса"},
+    {"fighters": ["Alex Pereira", "Magomed Ankalaev"],
+     "division": "Полутяжелый вес"},
+    {"fighters": ["Dricus du Plessis", "Sean Strickland"],
+     "division": "Средний вес реванш"},
+    {"fighters": ["Zhang Weili", "Tatiana Suarez"],
+     "division": "Минимальный вес"},
+]
+
+
+def _branch(index: int, total: int, first: str = "├─") -> str:
+    """Символ ветки дерева для элемента списка"""
+    if index == total - 1:
+        return "└─"
+    return first if index == 0 else "├─"
+
+
+def _count(value) -> int:
+    """Число побед/поражений ("N/A" и другие нечисловые значения - 0)"""
+    return int(value) if str(value).isdigit() else 0
+
+
+def format_champions(champions: Dict) -> List[str]:
+    """Части текста со списком чемпионов по дивизионам"""
+    parts = []
+    for title, key in (("🥊 МУЖСКИЕ ДИВИЗИОНЫ:", "men"),
+                       ("🥊 ЖЕНСКИЕ ДИВИЗИОНЫ:", "women")):
+        parts.append(f"{title}\n")
+        divisions = champions[key]
+        for i, division in enumerate(divisions):
+            parts.append(
+                f"{_branch(i, len(divisions))} {division['division']}: "
+                f"{division['champion']} ({division['record']})\n"
+            )
+            if division.get("interim"):
+                parts.append(f"   └─ Временный: {division['interim']}\n")
+        parts.append("\n")
+    return parts
+
+
+def format_upcoming_events(data: Dict) -> str:
+    """Форматирует ближайшие турниры (результат get_upcoming_fights)"""
+    events = data["events"]
+    if data["source"] == "ufcstats":
+        parts = ["🥊 БЛИЖАЙШИЕ БОИ UFC (из UFC Stats):\n\n"]
+        for event in events:
+            parts.append(f"📅 {event['name']}\n")
+            parts.append(f"🗓️ Дата: {event['date']}\n\n")
+        parts.append("💡 Для получения подробной информации посетите UFC.com")
+        return "".join(parts)
+
+    parts = ["🥊 БЛИЖАЙШИЕ БОИ UFC:\n\n"]
+    for event in events:
+        parts.append(f"📅 {event['name']}\n")
+        parts.append(f"🗓️ {event['date']}\n")
+        if event.get("venue") is not None:
+            parts.append(f"🏟️ {event['venue']}\n")
+        if event.get("main_fight"):
+            fighter1, fighter2 = event["main_fight"]
+            parts.append(f"🥊 Главный бой: {fighter1} vs {fighter2}\n")
+        parts.append("\n")
+    parts.append("💡 Информация обновляется в реальном времени с ESPN API")
+    return "".join(parts)
+
+
+def format_rankings_data(data: Dict) -> str:
+    """Форматирует рейтинги (результат get_ufc_rankings)"""
+    if data.get("news"):
+        parts = ["🏆 АКТУАЛЬНЫЕ НОВОСТИ О РЕЙТИНГАХ UFC:\n\n"]
+        for info in data["news"]:
+            parts.append(f"📰 {info['title']}\n")
+            parts.append(f"📝 {info['description']}\n\n")
+        parts.append("💡 Для полных рейтингов посетите UFC.com/rankings")
+        return "".join(parts)
+
+    champions = data["champions"]
+    parts = [
+        "🏆 ОФИЦИАЛЬНЫЕ РЕЙТИНГИ UFC:\n\n",
+        f"👑 АКТУАЛЬНЫЕ ЧЕМПИОНЫ (по состоянию на {champions['updated']}):\n\n",
+    ]
+    parts.extend(format_champions(champions))
+    parts.append("🏆 ТОП ПРЕТЕНДЕНТЫ:\n")
+    contenders = data["contenders"]
+    for i, division in enumerate(contenders):
+        parts.append(
+            f"{_branch(i, len(contenders), first='┌─')} "
+            f"{division['division']}: {', '.join(division['fighters'])}\n"
+        )
+    parts.append("\n💡 Рейтинги обновляются еженедельно после каждого турнира")
+    parts.append("\n🔗 Полная информация: UFC.com/rankings")
+    return "".join(parts)
+
+
+def format_fight_results(data: Dict) -> str:
+    """Форматирует результаты турнира или боев бойца (search_fight_results)"""
+    if "event" in data:
+        event = data["event"]
+        parts = [
+            f"🥊 РЕЗУЛЬТАТЫ ТУРНИРА: {event['name']}\n\n",
+            f"📅 Дата: {event.get('date', 'Дата уточняется')}\n",
+            f"🏟️ Место: {event.get('location', 'Место уточняется')}\n\n",
+        ]
+        fights = event.get("fights", [])
+        if fights:
+            parts.append("🏆 РЕЗУЛЬТАТЫ БОЕВ:\n")
+            for fight in fights[:5]:  # Показываем до 5 боев
+                parts.append(
+                    f"├─ {fight.get('fighter1', 'TBD')} vs "
+                    f"{fight.get('fighter2', 'TBD')}\n"
+                )
+                if fight.get('result'):
+                    parts.append(f"   └─ Результат: {fight['result']}\n")
+        else:
+            parts.append("📝 Детальные результаты боев уточняются\n")
+        parts.append(f"\n💡 {event.get('note', 'Полная информация на UFC.com')}")
+        return "".join(parts)
+
+    fighter = data["fighter"]
+    parts = [
+        f"🥊 СТАТИСТИКА БОЕВ: {fighter['name']}\n\n",
+        "📊 ОБЩАЯ СТАТИСТИКА:\n",
+        f"├─ Побед: {fighter.get('wins', 'N/A')}\n",
+        f"├─ Поражений: {fighter.get('losses', 'N/A')}\n",
+        f"└─ Ничьих: {fighter.get('draws', 'N/A')}\n\n",
+    ]
+    if fighter.get('weight_class'):
+        parts.append(f"⚖️  Весовая категория: {fighter['weight_class']}\n")
+    if fighter.get('nationality'):
+        parts.append(f"🌍 Национальность: {fighter['nationality']}\n")
+    parts.append(
+        f"\n💡 {fighter.get('note', 'Для подробной статистики посетите UFC.com')}"
+    )
+    return "".join(parts)
+
+
+def format_title_fights(data: Dict) -> str:
+    """Форматирует чемпионские бои (результат get_title_fights)"""
+    parts = ["🏆 ЧЕМПИОНСКИЕ БОИ UFC:\n\n"]
+
+    if data["news"]:
+        parts.append("📰 АКТУАЛЬНЫЕ НОВОСТИ О ТИТУЛЬНЫХ БОЯХ:\n\n")
+        for news in data["news"]:
+            parts.append(f"🗞️ {news['title']}\n")
+            parts.append(f"📝 {news['description']}\n\n")
+
+    if data["upcoming"]:
+        parts.append("🗓️ БЛИЖАЙШИЕ ТИТУЛЬНЫЕ БОИ (из ESPN):\n\n")
+        for fight in data["upcoming"]:
+            parts.append(f"📅 {fight['event']}\n")
+            parts.append(f"🗓️ {fight['date']}\n")
+            parts.append(f"🏟️ {fight['venue']}\n")
+            if len(fight['fighters']) >= 2:
+                parts.append(
+                    f"🥊 {fight['fighters'][0]} vs {fight['fighters'][1]}\n"
+                )
+            parts.append("\n")
+
+    champions = data["champions"]
+    parts.append(f"👑 ТЕКУЩИЕ ЧЕМПИОНЫ ({champions['updated']}):\n\n")
+    parts.extend(format_champions(champions))
+
+    parts.append("📅 ЗАПЛАНИРОВАННЫЕ ТИТУЛЬНЫЕ БОИ:\n\n")
+    for event in data["scheduled"]:
+        parts.append(f"🗓️ {event['event']} - {event['date']}:\n")
+        fights = event["fights"]
+        for i, fight in enumerate(fights):
+            parts.append(
+                f"{_branch(i, len(fights))} 🏆 "
+                f"{' vs '.join(fight['fighters'])} ({fight['division']})\n"
+            )
+        parts.append("\n")
+
+    parts.append("📅 Планируемые на 2025:\n")
+    planned = data["planned"]
+    for i, fight in enumerate(planned):
+        parts.append(
+            f"{_branch(i, len(planned))} "
+            f"{' vs '.join(fight['fighters'])} ({fight['division']})\n"
+        )
+    parts.append("\n")
+
+    parts.append("🏟️ Чемпионские бои всегда проходят на 5 раундов по 5 минут\n")
+    parts.append("💡 Информация обновляется из ESPN API + официальные анонсы UFC")
+    return "".join(parts)
+
+
+def _format_fighter_record(fighter: Dict) -> List[str]:
+    """Части текста со статистикой бойца для сравнения"""
+    parts = [f"👤 {fighter['name']}:\n"]
+    if fighter.get("error"):
+        parts.append(f"└─ ❌ {fighter['error']}\n\n")
+        return parts
+    parts.append(f"├─ Побед: {fighter.get('wins', 'N/A')}\n")
+    parts.append(f"├─ Поражений: {fighter.get('losses', 'N/A')}\n")
+    parts.append(f"├─ Ничьих: {fighter.get('draws', 'N/A')}\n")
+    parts.append(f"├─ Весовая категория: {fighter.get('weight_class', 'N/A')}\n")
+    parts.append(f"└─ Национальность: {fighter.get('nationality', 'N/A')}\n\n")
+    return parts
+
+
+def format_fight_stats(data: Dict) -> str:
+    """Форматирует статистику бойца или сравнение (get_fight_stats)"""
+    if "fighters" in data:
+        fighter1, fighter2 = data["fighters"]
+        parts = [
+            "📊 СРАВНЕНИЕ БОЙЦОВ:\n\n",
+            f"🥊 {fighter1['name']} vs {fighter2['name']}\n\n",
+        ]
+        parts.extend(_format_fighter_record(fighter1))
+        parts.extend(_format_fighter_record(fighter2))
+
+        comparison = data["comparison"]
+        if comparison:
+            wins1, wins2 = comparison["wins"]
+            parts.append("🔍 АНАЛИЗ:\n")
+            if wins1 > wins2:
+                parts.append(
+                    f"├─ Больше побед у {fighter1['name']} ({wins1} vs {wins2})\n"
+                )
+            elif wins2 > wins1:
+                parts.append(
+                    f"├─ Больше побед у {fighter2['name']} ({wins2} vs {wins1})\n"
+                )
+            else:
+                parts.append(f"├─ Равное количество побед ({wins1})\n")
+
+            class1, class2 = comparison["weight_classes"]
+            if class1 and class2:
+                if comparison["same_weight_class"]:
+                    parts.append(f"└─ Оба в одной весовой категории: {class1}\n")
+                else:
+                    parts.append(
+                        f"└─ Разные весовые категории: {class1} vs {class2}\n"
+                    )
+
+        parts.append("\n💡 Для детального анализа посетите UFC.com")
+        return "".join(parts)
+
+    fighter = data["fighter"]
+    parts = [
+        f"📊 СТАТИСТИКА БОЙЦА: {fighter['name']}\n\n",
+        "🏆 ОСНОВНЫЕ ПОКАЗАТЕЛИ:\n",
+        f"├─ Побед: {fighter.get('wins', 'N/A')}\n",
+        f"├─ Поражений: {fighter.get('losses', 'N/A')}\n",
+        f"└─ Ничьих: {fighter.get('draws', 'N/A')}\n\n",
+    ]
+    if fighter.get('nickname'):
+        parts.append(f"🏷️  Прозвище: {fighter['nickname']}\n")
+    if fighter.get('weight_class'):
+        parts.append(f"⚖️  Весовая категория: {fighter['weight_class']}\n")
+    if fighter.get('nationality'):
+        parts.append(f"🌍 Национальность: {fighter['nationality']}\n")
+
+    if data["total_fights"] > 0:
+        parts.append("\n📈 ЭФФЕКТИВНОСТЬ:\n")
+        parts.append(f"├─ Всего боев: {data['total_fights']}\n")
+        parts.append(f"└─ Процент побед: {data['win_rate']:.1f}%\n")
+
+    parts.append(
+        f"\n💡 {fighter.get('note', 'Для подробной статистики посетите UFC.com')}"
+    )
+    return "".join(parts)
+
+
 @mcp.tool()
-async def search_fighter(fighter_name: str) -> str:
+@structured(format_fighter_info)
+@cache.cached(ttl=3600, cache_if=is_success)
+async def search_fighter(fighter_name: str) -> Dict:
     """
     Поиск информации о бойце UFC
     
@@ -365,7 +752,7 @@ async def search_fighter(fighter_name: str) -> str:
         fighter_name: Имя бойца для поиска
         
     Returns:
-        Детальная информация о бойце
+        Детальная информация о бойце (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     if not fighter_name or len(fighter_name.strip()) < 2:
         raise McpError(
@@ -394,7 +781,7 @@ async def search_fighter(fighter_name: str) -> str:
 ├─ Israel Adesanya, Kamaru Usman
 └─ Amanda Nunes, Valentina Shevchenko"""
         
-        return format_fighter_info(fighter_data)
+        return fighter_data
         
     except McpError:
         raise
@@ -410,23 +797,21 @@ async def search_fighter(fighter_name: str) -> str:
 
 
 @mcp.tool()
-async def get_upcoming_fights() -> str:
+@structured(format_upcoming_events)
+@cache.cached(ttl=900, stale=3600, cache_if=is_success)
+async def get_upcoming_fights() -> Dict:
     """
     Получает информацию о ближайших боях UFC
     
     Returns:
-        Список ближайших турниров и боев
+        Список ближайших турниров и боев (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     try:
-        # Получаем реальные данные из ESPN API
-        schedule_data = await ufc_service.get_espn_schedule()
+        # ESPN API, а если он медлит или недоступен - UFC Stats
+        schedule_data = await ufc_service.get_schedule()
         
         if schedule_data.get("error"):
-            # Если ESPN API недоступен, пробуем UFC Stats
-            events_data = await ufc_service.scrape_ufc_events()
-            
-            if events_data.get("error"):
-                return f"""❌ Ошибка получения расписания боев
+            return f"""❌ Ошибка получения расписания боев
 
 🔧 Попробуйте:
 ├─ Проверить подключение к интернету  
@@ -434,53 +819,53 @@ async def get_upcoming_fights() -> str:
 └─ Посетить официальный сайт UFC.com
 
 📝 Ошибка: {schedule_data.get('error', 'Неизвестная ошибка')}"""
-            
-            # Форматируем данные с UFC Stats
-            events = events_data.get("events", [])
+
+        if schedule_data["source"] == "ufcstats":
+            events = schedule_data.get("events", [])
             if not events:
                 return "🔍 Информация о ближайших боях временно недоступна"
             
-            result = "🥊 БЛИЖАЙШИЕ БОИ UFC (из UFC Stats):\n\n"
-            for event in events[:5]:  # Показываем первые 5 событий
-                result += f"📅 {event.get('name', 'UFC Event')}\n"
-                result += f"🗓️ Дата: {event.get('date', 'Дата уточняется')}\n\n"
-            
-            result += "💡 Для получения подробной информации посетите UFC.com"
-            return result
+            return {
+                "source": "ufcstats",
+                "events": [
+                    {
+                        "name": event.get("name", "UFC Event"),
+                        "date": event.get("date", "Дата уточняется"),
+                    }
+                    for event in events[:5]  # Первые 5 событий
+                ],
+            }
         
         # Обрабатываем данные ESPN API
         events = schedule_data.get("events", [])
         if not events:
             return "🔍 Ближайшие бои не найдены в расписании"
         
-        result = "🥊 БЛИЖАЙШИЕ БОИ UFC:\n\n"
-        
-        for event in events[:3]:  # Показываем первые 3 события
-            event_name = event.get("name", "UFC Event")
-            event_date = event.get("date", "Дата уточняется")
-            
-            result += f"📅 {event_name}\n"
-            result += f"🗓️ {event_date}\n"
+        upcoming = []
+        for event in events[:3]:  # Первые 3 события
+            info = {
+                "name": event.get("name", "UFC Event"),
+                "date": event.get("date", "Дата уточняется"),
+                "venue": None,
+                "main_fight": None,
+            }
             
-            # Получаем информацию о месте проведения
+            # Место проведения и главный бой
             competitions = event.get("competitions", [])
             if competitions:
                 venue = competitions[0].get("venue", {})
-                venue_name = venue.get("fullName", "Место уточняется")
-                result += f"🏟️ {venue_name}\n"
-            
-            # Получаем информацию о боях
-            if competitions:
+                info["venue"] = venue.get("fullName", "Место уточняется")
+                
                 competitors = competitions[0].get("competitors", [])
                 if len(competitors) >= 2:
-                    fighter1 = competitors[0].get("athlete", {}).get("displayName", "TBD")
-                    fighter2 = competitors[1].get("athlete", {}).get("displayName", "TBD") 
-                    result += f"🥊 Главный бой: {fighter1} vs {fighter2}\n"
+                    info["main_fight"] = [
+                        competitor.get("athlete", {}).get("displayName", "TBD")
+                        for competitor in competitors[:2]
+                    ]
             
-            result += "\n"
+            upcoming.append(info)
         
-        result += "💡 Информация обновляется в реальном времени с ESPN API"
-        return result
+        return {"source": "espn", "events": upcoming}
         
     except Exception as e:
         return f"""❌ Ошибка получения расписания боев
@@ -494,12 +879,15 @@ async def get_upcoming_fights() -> str:
 
 
 @mcp.tool()
-async def get_ufc_rankings() -> str:
+@structured(format_rankings_data)
+@cache.cached(ttl=3600, cache_if=is_success)
+async def get_ufc_rankings() -> Dict:
     """
     Получает текущие официальные рейтинги UFC
     
     Returns:
         Актуальные рейтинги по всем весовым категориям
+        (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     try:
         # Пробуем получить новости и рейтинги из ESPN
@@ -519,46 +907,14 @@ async def get_ufc_rankings() -> str:
                     })
             
             if ranking_info:
-                result = "🏆 АКТУАЛЬНЫЕ НОВОСТИ О РЕЙТИНГАХ UFC:\n\n"
-                for info in ranking_info:
-                    result += f"📰 {info['title']}\n"
-                    result += f"📝 {info['description']}\n\n"
-                
-                result += "💡 Для полных рейтингов посетите UFC.com/rankings"
-                return result
+                return {"source": "espn", "news": ranking_info}
         
         # Fallback к текущим известным чемпионам (обновляется вручную)
-        return """🏆 ОФИЦИАЛЬНЫЕ РЕЙТИНГИ UFC:
-
-👑 АКТУАЛЬНЫЕ ЧЕМПИОНЫ (по состоянию на декабрь 2024):
-
-🥊 МУЖСКИЕ ДИВИЗИОНЫ:
-├─ Тяжелый вес: Jon Jones (27-1-1)
-   └─ Временный: Tom Aspinall  
-├─ Полутяжелый вес: Alex Pereira (12-2-0)
-├─ Средний вес: Dricus du Plessis (22-2-0)
-├─ Полусредний вес: Belal Muhammad (24-3-0)
-├─ Легкий вес: Islam Makhachev (26-1-0)
-├─ Полулегкий вес: Ilia Topuria (16-0-0)
-├─ Легчайший вес: Merab Dvalishvili (18-4-0)
-└─ Наилегчайший вес: Alexandre Pantoja (28-5-0)
-
-🥊 ЖЕНСКИЕ ДИВИЗИОНЫ:
-├─ Легчайший вес: Julianna Peña (12-5-0)
-├─ Наилегчайший вес: Valentina Shevchenko (24-4-0)
-└─ Минимальный вес: Zhang Weili (25-3-0)
-
-🏆 ТОП ПРЕТЕНДЕНТЫ:
-┌─ Тяжелый вес: Curtis Blaydes, Ciryl Gane, Alexander Volkov
-├─ Полутяжелый вес: Magomed Ankalaev, Jamahal Hill, Jiri Prochazka  
-├─ Средний вес: Sean Strickland, Robert Whittaker, Khamzat Chimaev
-├─ Полусредний вес: Shavkat Rakhmonov, Ian Machado Garry, Kamaru Usman
-├─ Легкий вес: Arman Tsarukyan, Charles Oliveira, Justin Gaethje
-├─ Полулегкий вес: Max Holloway, Alexander Volkanovski, Brian Ortega
-└─ Легчайший вес: Umar Nurmagomedov, Cory Sandhagen, Petr Yan
-
-💡 Рейтинги обновляются еженедельно после каждого турнира
-🔗 Полная информация: UFC.com/rankings"""
+        return {
+            "source": "static",
+            "champions": CHAMPIONS,
+            "contenders": CONTENDERS,
+        }
         
     except Exception as e:
         return f"""❌ Ошибка получения рейтингов
@@ -572,7 +928,9 @@ async def get_ufc_rankings() -> str:
 
 
 @mcp.tool()
-async def search_fight_results(event_name: str = "", fighter_name: str = "") -> str:
+@structured(format_fight_results)
+@cache.cached(ttl=3600, cache_if=is_success)
+async def search_fight_results(event_name: str = "", fighter_name: str = "") -> Dict:
     """
     Поиск результатов боев
     
@@ -581,7 +939,7 @@ async def search_fight_results(event_name: str = "", fighter_name: str = "") ->
         fighter_name: Имя бойца для поиска его последних боев
         
     Returns:
-        Результаты боев
+        Результаты боев (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     if not event_name and not fighter_name:
         raise McpError(
@@ -606,22 +964,7 @@ async def search_fight_results(event_name: str = "", fighter_name: str = "") ->
 
 📝 Ошибка: {event_data.get('error')}"""
             
-            result = f"🥊 РЕЗУЛЬТАТЫ ТУРНИРА: {event_data.get('name', event_name)}\n\n"
-            result += f"📅 Дата: {event_data.get('date', 'Дата уточняется')}\n"
-            result += f"🏟️ Место: {event_data.get('location', 'Место уточняется')}\n\n"
-            
-            fights = event_data.get("fights", [])
-            if fights:
-                result += "🏆 РЕЗУЛЬТАТЫ БОЕВ:\n"
-                for fight in fights[:5]:  # Показываем до 5 боев
-                    result += f"├─ {fight.get('fighter1', 'TBD')} vs {fight.get('fighter2', 'TBD')}\n"
-                    if fight.get('result'):
-                        result += f"   └─ Результат: {fight['result']}\n"
-            else:
-                result += "📝 Детальные результаты боев уточняются\n"
-            
-            result += f"\n💡 {event_data.get('note', 'Полная информация на UFC.com')}"
-            return result
+            return {"event": {"name": event_name, **event_data}}
         
         else:
             # Поиск боев конкретного бойца
@@ -637,25 +980,7 @@ async def search_fight_results(event_name: str = "", fighter_name: str = "") ->
 
 📝 Ошибка: {fighter_data.get('error')}"""
             
-            result = f"🥊 СТАТИСТИКА БОЕВ: {fighter_data.get('name', fighter_name)}\n\n"
-            
-            wins = fighter_data.get('wins', 'N/A')
-            losses = fighter_data.get('losses', 'N/A') 
-            draws = fighter_data.get('draws', 'N/A')
-            
-            result += f"📊 ОБЩАЯ СТАТИСТИКА:\n"
-            result += f"├─ Побед: {wins}\n"
-            result += f"├─ Поражений: {losses}\n"
-            result += f"└─ Ничьих: {draws}\n\n"
-            
-            if fighter_data.get('weight_class'):
-                result += f"⚖️  Весовая категория: {fighter_data['weight_class']}\n"
-            
-            if fighter_data.get('nationality'):
-                result += f"🌍 Национальность: {fighter_data['nationality']}\n"
-            
-            result += f"\n💡 {fighter_data.get('note', 'Для подробной статистики посетите UFC.com')}"
-            return result
+            return {"fighter": {"name": fighter_name, **fighter_data}}
         
     except McpError:
         raise
@@ -671,20 +996,21 @@ async def search_fight_results(event_name: str = "", fighter_name: str = "") ->
 
 
 @mcp.tool()
-async def get_title_fights() -> str:
+@structured(format_title_fights)
+@cache.cached(ttl=3600, stale=21600, cache_if=is_success)
+async def get_title_fights() -> Dict:
     """
     Получает информацию о чемпионских боях
     
     Returns:
         Информация о текущих чемпионах и ближайших титульных боях
+        (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     try:
         # Получаем данные о расписании для поиска титульных боев
         schedule_data = await ufc_service.get_espn_schedule()
         news_data = await ufc_service.get_espn_news()
         
-        result = "🏆 ЧЕМПИОНСКИЕ БОИ UFC:\n\n"
-        
         # Проверяем новости ESPN на предмет информации о титульных боях
         title_fight_news = []
         if not news_data.get("error"):
@@ -698,13 +1024,6 @@ async def get_title_fights() -> str:
                         "description": article.get("description", "")[:150] + "..."
                     })
         
-        # Если есть актуальные новости о титульных боях
-        if title_fight_news:
-            result += "📰 АКТУАЛЬНЫЕ НОВОСТИ О ТИТУЛЬНЫХ БОЯХ:\n\n"
-            for news in title_fight_news[:3]:  # Показываем первые 3 новости
-                result += f"🗞️ {news['title']}\n"
-                result += f"📝 {news['description']}\n\n"
-        
         # Проверяем расписание на предмет титульных боев
         upcoming_title_fights = []
         if not schedule_data.get("error"):
@@ -734,52 +1053,14 @@ async def get_title_fights() -> str:
                         
                         upcoming_title_fights.append(fight_info)
         
-        # Показываем ближайшие титульные бои из расписания
-        if upcoming_title_fights:
-            result += "🗓️ БЛИЖАЙШИЕ ТИТУЛЬНЫЕ БОИ (из ESPN):\n\n"
-            for fight in upcoming_title_fights[:3]:
-                result += f"📅 {fight['event']}\n"
-                result += f"🗓️ {fight['date']}\n"
-                result += f"🏟️ {fight['venue']}\n"
-                if len(fight['fighters']) >= 2:
-                    result += f"🥊 {fight['fighters'][0]} vs {fight['fighters'][1]}\n"
-                result += "\n"
-        
-        # Fallback к актуальным статичным данным чемпионов
-        result += "👑 ТЕКУЩИЕ ЧЕМПИОНЫ (декабрь 2024):\n\n"
-        
-        result += "🥊 МУЖСКИЕ ДИВИЗИОНЫ:\n"
-        result += "├─ Тяжелый вес: Jon Jones (27-1-1)\n"
-        result += "   └─ Временный: Tom Aspinall\n"
-        result += "├─ Полутяжелый вес: Alex Pereira (12-2-0)\n"
-        result += "├─ Средний вес: Dricus du Plessis (22-2-0)\n"
-        result += "├─ Полусредний вес: Belal Muhammad (24-3-0)\n"
-        result += "├─ Легкий вес: Islam Makhachev (26-1-0)\n"
-        result += "├─ Полулегкий вес: Ilia Topuria (16-0-0)\n"
-        result += "├─ Легчайший вес: Merab Dvalishvili (18-4-0)\n"
-        result += "└─ Наилегчайший вес: Alexandre Pantoja (28-5-0)\n\n"
-        
-        result += "🥊 ЖЕНСКИЕ ДИВИЗИОНЫ:\n"
-        result += "├─ Легчайший вес: Julianna Peña (12-5-0)\n"
-        result += "├─ Наилегчайший вес: Valentina Shevchenko (24-4-0)\n"
-        result += "└─ Минимальный вес: Zhang Weili (25-3-0)\n\n"
-        
-        # Известные запланированные титульные бои
-        result += "📅 ЗАПЛАНИРОВАННЫЕ ТИТУЛЬНЫЕ БОИ:\n\n"
-        result += "🗓️ UFC 311 - 18 января 2025:\n"
-        result += "├─ 🏆 Islam Makhachev vs Arman Tsarukyan (Легкий вес)\n"
-        result += "└─ 🏆 Merab Dvalishvili vs Umar Nurmagomedov (Легчайший вес)\n\n"
-        
-        result += "📅 Планируемые на 2025:\n"
-        result += "├─ Jon Jones vs Tom Aspinall (Объединение титулов тяжелого веса)\n"
-        result += "├─ Alex Pereira vs Magomed Ankalaev (Полутяжелый вес)\n"
-        result += "├─ Dricus du Plessis vs Sean Strickland (Средний вес реванш)\n"
-        result += "└─ Zhang Weili vs Tatiana Suarez (Минимальный вес)\n\n"
-        
-        result += "🏟️ Чемпионские бои всегда проходят на 5 раундов по 5 минут\n"
-        result += "💡 Информация обновляется из ESPN API + официальные анонсы UFC"
-        
-        return result
+        return {
+            "news": title_fight_news[:3],  # Первые 3 новости
+            "upcoming": upcoming_title_fights[:3],
+            # Актуальные статичные данные чемпионов и анонсы UFC
+            "champions": CHAMPIONS,
+            "scheduled": SCHEDULED_TITLE_FIGHTS,
+            "planned": PLANNED_TITLE_FIGHTS,
+        }
         
     except Exception as e:
         return f"""❌ Ошибка получения информации о чемпионских боях
@@ -793,7 +1074,9 @@ async def get_title_fights() -> str:
 
 
 @mcp.tool()
-async def get_fight_stats(fighter1: str, fighter2: str = "") -> str:
+@structured(format_fight_stats)
+@cache.cached(ttl=3600, cache_if=is_success)
+async def get_fight_stats(fighter1: str, fighter2: str = "") -> Dict:
     """
     Получает статистику и сравнение бойцов
     
@@ -802,7 +1085,7 @@ async def get_fight_stats(fighter1: str, fighter2: str = "") -> str:
         fighter2: Имя второго бойца (опционально для сравнения)
         
     Returns:
-        Статистика боя или сравнение бойцов
+        Статистика боя или сравнение бойцов (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     if not fighter1:
         raise McpError(
@@ -815,10 +1098,12 @@ async def get_fight_stats(fighter1: str, fighter2: str = "") -> str:
     try:
         # Получаем данные первого бойца
         fighter1_data = await ufc_service.get_fighter_data(fighter1)
+        fighter1_data = {"name": fighter1, **fighter1_data}
         
         if fighter2:
             # Сравнение двух бойцов
             fighter2_data = await ufc_service.get_fighter_data(fighter2)
+            fighter2_data = {"name": fighter2, **fighter2_data}
             
             if fighter1_data.get("error") and fighter2_data.get("error"):
                 return f"""❌ Оба бойца не найдены
@@ -827,63 +1112,30 @@ async def get_fight_stats(fighter1: str, fighter2: str = "") -> str:
 ├─ "{fighter1}": {fighter1_data.get('error', 'Не найден')}
 └─ "{fighter2}": {fighter2_data.get('error', 'Не найден')}"""
             
-            result = f"📊 СРАВНЕНИЕ БОЙЦОВ:\n\n"
-            result += f"🥊 {fighter1_data.get('name', fighter1)} vs {fighter2_data.get('name', fighter2)}\n\n"
-            
-            # Статистика первого бойца
-            result += f"👤 {fighter1_data.get('name', fighter1)}:\n"
-            if not fighter1_data.get("error"):
-                result += f"├─ Побед: {fighter1_data.get('wins', 'N/A')}\n"
-                result += f"├─ Поражений: {fighter1_data.get('losses', 'N/A')}\n"
-                result += f"├─ Ничьих: {fighter1_data.get('draws', 'N/A')}\n"
-                result += f"├─ Весовая категория: {fighter1_data.get('weight_class', 'N/A')}\n"
-                result += f"└─ Национальность: {fighter1_data.get('nationality', 'N/A')}\n\n"
-            else:
-                result += f"└─ ❌ {fighter1_data['error']}\n\n"
-            
-            # Статистика второго бойца
-            result += f"👤 {fighter2_data.get('name', fighter2)}:\n"
-            if not fighter2_data.get("error"):
-                result += f"├─ Побед: {fighter2_data.get('wins', 'N/A')}\n"
-                result += f"├─ Поражений: {fighter2_data.get('losses', 'N/A')}\n"
-                result += f"├─ Ничьих: {fighter2_data.get('draws', 'N/A')}\n"
-                result += f"├─ Весовая категория: {fighter2_data.get('weight_class', 'N/A')}\n"
-                result += f"└─ Национальность: {fighter2_data.get('nationality', 'N/A')}\n\n"
-            else:
-                result += f"└─ ❌ {fighter2_data['error']}\n\n"
-            
             # Анализ сравнения
+            comparison = None
             if not fighter1_data.get("error") and not fighter2_data.get("error"):
-                try:
-                    wins1 = int(fighter1_data.get('wins', 0)) if str(fighter1_data.get('wins', 0)).isdigit() else 0
-                    wins2 = int(fighter2_data.get('wins', 0)) if str(fighter2_data.get('wins', 0)).isdigit() else 0
-                    
-                    result += "🔍 АНАЛИЗ:\n"
-                    if wins1 > wins2:
-                        result += f"├─ Больше побед у {fighter1_data.get('name', fighter1)} ({wins1} vs {wins2})\n"
-                    elif wins2 > wins1:
-                        result += f"├─ Больше побед у {fighter2_data.get('name', fighter2)} ({wins2} vs {wins1})\n"
-                    else:
-                        result += f"├─ Равное количество побед ({wins1})\n"
-                    
-                    # Сравнение весовых категорий
-                    class1 = fighter1_data.get('weight_class', '')
-                    class2 = fighter2_data.get('weight_class', '')
-                    if class1 and class2:
-                        if class1 == class2:
-                            result += f"└─ Оба в одной весовой категории: {class1}\n"
-                        else:
-                            result += f"└─ Разные весовые категории: {class1} vs {class2}\n"
-                except:
-                    result += "└─ Статистическое сравнение ограничено\n"
+                class1 = fighter1_data.get('weight_class', '')
+                class2 = fighter2_data.get('weight_class', '')
+                comparison = {
+                    "wins": [
+                        _count(fighter1_data.get('wins', 0)),
+                        _count(fighter2_data.get('wins', 0)),
+                    ],
+                    "weight_classes": [class1, class2],
+                    "same_weight_class": (
+                        class1 == class2 if class1 and class2 else None
+                    ),
+                }
             
-            result += "\n💡 Для детального анализа посетите UFC.com"
-            return result
+            return {
+                "fighters": [fighter1_data, fighter2_data],
+                "comparison": comparison,
+            }
         
-        else:
-            # Статистика одного бойца
-            if fighter1_data.get("error"):
-                return f"""❌ Боец "{fighter1}" не найден
+        # Статистика одного бойца
+        if fighter1_data.get("error"):
+            return f"""❌ Боец "{fighter1}" не найден
 
 🔍 Попробуйте:
 ├─ Проверить правильность написания имени
@@ -891,41 +1143,19 @@ async def get_fight_stats(fighter1: str, fighter2: str = "") -> str:
 └─ Убедиться, что боец выступает/выступал в UFC
 
 📝 Ошибка: {fighter1_data.get('error')}"""
-            
-            result = f"📊 СТАТИСТИКА БОЙЦА: {fighter1_data.get('name', fighter1)}\n\n"
-            
-            # Основная статистика
-            result += "🏆 ОСНОВНЫЕ ПОКАЗАТЕЛИ:\n"
-            result += f"├─ Побед: {fighter1_data.get('wins', 'N/A')}\n"
-            result += f"├─ Поражений: {fighter1_data.get('losses', 'N/A')}\n"
-            result += f"└─ Ничьих: {fighter1_data.get('draws', 'N/A')}\n\n"
-            
-            # Дополнительная информация
-            if fighter1_data.get('nickname'):
-                result += f"🏷️  Прозвище: {fighter1_data['nickname']}\n"
-            
-            if fighter1_data.get('weight_class'):
-                result += f"⚖️  Весовая категория: {fighter1_data['weight_class']}\n"
-            
-            if fighter1_data.get('nationality'):
-                result += f"🌍 Национальность: {fighter1_data['nationality']}\n"
-            
-            # Вычисляем процент побед
-            try:
-                wins = int(fighter1_data.get('wins', 0)) if str(fighter1_data.get('wins', 0)).isdigit() else 0
-                losses = int(fighter1_data.get('losses', 0)) if str(fighter1_data.get('losses', 0)).isdigit() else 0
-                total_fights = wins + losses
-                
-                if total_fights > 0:
-                    win_rate = (wins / total_fights) * 100
-                    result += f"\n📈 ЭФФЕКТИВНОСТЬ:\n"
-                    result += f"├─ Всего боев: {total_fights}\n"
-                    result += f"└─ Процент побед: {win_rate:.1f}%\n"
-            except:
-                pass
-            
-            result += f"\n💡 {fighter1_data.get('note', 'Для подробной статистики посетите UFC.com')}"
-            return result
+        
+        # Вычисляем процент побед
+        wins = _count(fighter1_data.get('wins', 0))
+        losses = _count(fighter1_data.get('losses', 0))
+        total_fights = wins + losses
+        
+        return {
+            "fighter": fighter1_data,
+            "total_fights": total_fights,
+            "win_rate": (
+                round(wins / total_fights * 100, 1) if total_fights else None
+            ),
+        }
         
     except McpError:
         raise
@@ -943,22 +1173,29 @@ async def get_fight_stats(fighter1: str, fighter2: str = "") -> str:
 ufc_service = UFCDataService()
 
 # Настройка SSE транспорта
-sse = SseServerTransport("/messages/")
+sse = WorkerSseServerTransport("/messages/")
+
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
 
 
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений"""
     _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
-        )
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 # Создание Starlette приложения
@@ -966,14 +1203,19 @@ app = Starlette(
     debug=True,
     routes=[
         Route("/sse", endpoint=handle_sse),
-        Mount("/messages/", app=sse.handle_post_message),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ],
+    lifespan=server_lifespan,
 )
 
 if __name__ == "__main__":
     print("🥊 Запуск MCP UFC Server...")
     print("🌐 Сервер будет доступен на http://localhost:8005")
     print("📡 SSE endpoint: http://localhost:8005/sse")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8005/mcp")
     print("📧 Messages endpoint: http://localhost:8005/messages/")
     print("🔧 Доступные инструменты:")
     print("   • search_fighter - поиск информации о бойце")
@@ -988,4 +1230,4 @@ if __name__ == "__main__":
     print("   search_fighter('Conor McGregor')")
     print("   get_fight_stats('Khabib', 'McGregor')")
     
-    uvicorn.run(app, host="0.0.0.0", port=8005)
+    run_server(app, host="0.0.0.0", port=8005)
@@ -100,10 +100,12 @@ class TestUFCService:
             # Если API недоступен, ожидаем fallback
             assert "недоступен" in str(e) or "не найден" in str(e)
     
-    def test_session_creation(self):
-        """Тест создания HTTP сессии"""
-        # Session может быть уже создан из предыдущих тестов
-        assert ufc_service.session is not None or ufc_service.session is None
+    @pytest.mark.asyncio
+    async def test_session_creation(self):
+        """Тест получения HTTP сессии из общего пула"""
+        session = await ufc_service.get_session()
+        assert session is not None
+        assert session is await ufc_service.get_session()
         
     @pytest.mark.asyncio
     async def test_make_request_invalid_url(self):
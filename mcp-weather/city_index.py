@@ -0,0 +1,317 @@
+"""
+Нечеткий поиск города по названию: псевдонимы, транслитерация, опечатки.
+
+Агенты присылают "Moskva", "Санкт Петербург", "NYC" или "Novosibrsk", а
+Geocoding API на такое отвечает пустым результатом или чужим городом.
+Индекс разрешает название до запроса к API:
+
+1. точное совпадение с известным названием или псевдонимом (встроенные
+   псевдонимы CITIES и названия справочника городов) - уверенность 1;
+2. поиск по триграммам: кандидаты с наибольшей долей общих триграмм,
+   затем расстояние Дамерау-Левенштейна (не больше MAX_EDITS правок) до
+   лучших из них. Уверенность - 1 - расстояние / длина названия,
+   одинаковые - по населению.
+
+Со справочником (gazetteer.py) точный поиск охватывает все его названия,
+а нечеткий - крупные города. Без справочника индекс знает только встроенные крупные
+города, поэтому исправление опечатки в нем не означает, что такого города
+нет: сервер сначала спрашивает API и берет исправление только при промахе.
+Со справочником исправление используется сразу.
+"""
+import os
+import sys
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from gazetteer import Gazetteer, Place, get_gazetteer, normalize
+
+
+# Минимальная уверенность нечеткого совпадения
+MIN_CONFIDENCE = 0.75
+# Больше правок - уже другое название, а не опечатка
+MAX_EDITS = 2
+# Короче - только точные совпадения: "Омск" и "Томск" отличаются на букву
+MIN_FUZZY_LENGTH = 5
+# Сколько кандидатов по триграммам сравнивать расстоянием редактирования
+CANDIDATES = 16
+
+# Крупные города с псевдонимами: работают и без справочника. Координаты и
+# население - по GeoNames
+CITIES: Tuple[Tuple[Place, Tuple[str, ...]], ...] = (
+    (Place("Moscow", 55.75222, 37.61556, "RU", 10381222),
+     ("Москва", "Moskva", "Moskau", "Мск", "msk")),
+    (Place("Saint Petersburg", 59.93863, 30.31413, "RU", 5351935),
+     ("Санкт-Петербург", "Петербург", "Питер", "СПб", "spb",
+      "St Petersburg", "St. Petersburg", "Sankt-Peterburg", "Leningrad",
+      "Ленинград")),
+    (Place("Novosibirsk", 55.0415, 82.9346, "RU", 1612833),
+     ("Новосибирск", "Новосиб")),
+    (Place("Yekaterinburg", 56.8519, 60.6122, "RU", 1349772),
+     ("Екатеринбург", "Ekaterinburg", "Екб", "ekb")),
+    (Place("Kazan", 55.78874, 49.12214, "RU", 1243500),
+     ("Казань", "Kazan'")),
+    (Place("Nizhny Novgorod", 56.32867, 44.00205, "RU", 1284164),
+     ("Нижний Новгород", "Нижний", "Nizhniy Novgorod")),
+    (Place("Samara", 53.20007, 50.15, "RU", 1134730), ("Самара",)),
+    (Place("Rostov-on-Don", 47.23135, 39.72328, "RU", 1137904),
+     ("Ростов-на-Дону", "Ростов", "Rostov")),
+    (Place("Krasnoyarsk", 56.01839, 92.86717, "RU", 1035528),
+     ("Красноярск",)),
+    (Place("Sochi", 43.59917, 39.72569, "RU", 343334), ("Сочи",)),
+    (Place("Vladivostok", 43.10562, 131.87353, "RU", 604901),
+     ("Владивосток",)),
+    (Place("Minsk", 53.9, 27.56667, "BY", 1742124), ("Минск",)),
+    (Place("Kyiv", 50.45466, 30.5238, "UA", 2797553),
+     ("Киев", "Київ", "Kiev")),
+    (Place("Almaty", 43.25, 76.91667, "KZ", 2000900),
+     ("Алматы", "Алма-Ата", "Alma-Ata")),
+    (Place("Tashkent", 41.26465, 69.21627, "UZ", 1978028), ("Ташкент",)),
+    (Place("Tbilisi", 41.69411, 44.83368, "GE", 1049498), ("Тбилиси",)),
+    (Place("Yerevan", 40.18111, 44.51361, "AM", 1093485), ("Ереван",)),
+    (Place("London", 51.50853, -0.12574, "GB", 8961989), ("Лондон",)),
+    (Place("Paris", 48.85341, 2.3488, "FR", 2138551), ("Париж",)),
+    (Place("Berlin", 52.52437, 13.41053, "DE", 3426354), ("Берлин",)),
+    (Place("Rome", 41.89193, 12.51133, "IT", 2318895), ("Рим", "Roma")),
+    (Place("Madrid", 40.4165, -3.70256, "ES", 3255944), ("Мадрид",)),
+    (Place("Istanbul", 41.01384, 28.94966, "TR", 14804116),
+     ("Стамбул", "Constantinople")),
+    (Place("Dubai", 25.07725, 55.30927, "AE", 3478300), ("Дубай",)),
+    (Place("Beijing", 39.9075, 116.39723, "CN", 18960744),
+     ("Пекин", "Peking")),
+    (Place("Tokyo", 35.6895, 139.69171, "JP", 9733276), ("Токио",)),
+    (Place("Hong Kong", 22.27832, 114.17469, "HK", 7491609),
+     ("Гонконг", "hk")),
+    (Place("New York City", 40.71427, -74.00597, "US", 8804190),
+     ("New York", "Нью-Йорк", "NYC", "ny")),
+    (Place("Los Angeles", 34.05223, -118.24368, "US", 3898747),
+     ("Лос-Анджелес", "LA")),
+    (Place("San Francisco", 37.77493, -122.41942, "US", 864816),
+     ("Сан-Франциско", "SF", "Frisco")),
+    (Place("Chicago", 41.85003, -87.65005, "US", 2746388), ("Чикаго",)),
+    (Place("Washington", 38.89511, -77.03637, "US", 689545),
+     ("Вашингтон", "Washington DC", "Washington D.C.", "DC")),
+    (Place("Mexico City", 19.42847, -99.12766, "MX", 12294193),
+     ("Мехико", "CDMX", "Ciudad de Mexico")),
+    (Place("Rio de Janeiro", -22.90278, -43.2075, "BR", 6747815),
+     ("Рио-де-Жанейро", "Рио", "Rio")),
+    (Place("Buenos Aires", -34.61315, -58.37723, "AR", 13076300),
+     ("Буэнос-Айрес",)),
+)
+
+
+@dataclass(frozen=True)
+class Match:
+    """Город, найденный по названию"""
+    place: Place
+    # 1.0 - точное совпадение с названием или псевдонимом
+    confidence: float
+
+    @property
+    def exact(self) -> bool:
+        return self.confidence == 1.0
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Расстояние Дамерау-Левенштейна (с перестановками соседних букв)
+
+    Args:
+        a: Первая строка
+        b: Вторая строка
+        limit: Наибольшее интересное расстояние: считается только полоса
+            матрицы шириной 2 * limit + 1, при превышении - limit + 1
+
+    Returns:
+        Число правок или limit + 1, если их больше limit
+    """
+    if a == b:
+        return 0
+    if limit is None:
+        limit = max(len(a), len(b))
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+    previous2: List[int] = []
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cb = b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1,
+                        previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+class CityIndex:
+    """Индекс названий городов для точного и нечеткого поиска"""
+
+    def __init__(
+        self,
+        places: Iterable[Tuple[Place, Iterable[str]]],
+        gazetteer: Optional[Gazetteer] = None,
+    ):
+        """
+        Args:
+            places: Города и их названия для нечеткого поиска
+            gazetteer: Справочник городов для точного поиска по всем
+                названиям. Индекс со справочником считается полным:
+                промах означает, что такого города в справочнике нет
+        """
+        self.gazetteer = gazetteer
+        # Ключ -> город с наибольшим населением среди одноименных
+        best: Dict[str, Place] = {}
+        for place, names in places:
+            for name in (place.name, *names):
+                key = normalize(name)
+                if key and (key not in best
+                            or best[key].population < place.population):
+                    best[key] = place
+        self._exact = best
+        self._keys = list(best)
+        self._places = [best[key] for key in self._keys]
+
+        postings: Dict[str, List[int]] = {}
+        for key_id, key in enumerate(self._keys):
+            for gram in set(_trigrams(key)):
+                postings.setdefault(gram, []).append(key_id)
+        self._postings = {
+            gram: array("I", ids) for gram, ids in postings.items()
+        }
+
+    @property
+    def complete(self) -> bool:
+        return self.gazetteer is not None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def resolve(self, name: str) -> Optional[Match]:
+        """
+        Лучший город для названия
+
+        Args:
+            name: Название, псевдоним или название с опечаткой
+
+        Returns:
+            Город с уверенностью не ниже MIN_CONFIDENCE или None
+        """
+        key = normalize(name)
+        if not key:
+            return None
+        place = self._exact.get(key)
+        if place is not None:
+            return Match(place, 1.0)
+        if self.gazetteer is not None:
+            places = self.gazetteer.exact(key, limit=1)
+            if places:
+                return Match(places[0], 1.0)
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+        return self._fuzzy(key)
+
+    def _fuzzy(self, key: str) -> Optional[Match]:
+        # Правка меняет не больше трех триграмм, поэтому у названия в
+        # пределах max_edits правок не меньше need общих триграмм с
+        # запросом и хотя бы одна - среди len(grams) - need + 1 самых
+        # редких: частые триграммы ("  м", " мо") не просматриваются
+        max_edits = min(MAX_EDITS, int(len(key) * (1 - MIN_CONFIDENCE)))
+        grams = sorted(
+            (self._postings.get(gram, ()) for gram in set(_trigrams(key))),
+            key=len,
+        )
+        need = max(1, len(grams) - 3 * max_edits)
+        shared: Counter = Counter()
+        for ids in grams[:len(grams) - need + 1]:
+            shared.update(ids)
+
+        # Лучшие кандидаты по числу общих редких триграмм. Разница длин
+        # ограничивает расстояние снизу: далекие по длине не сравниваются
+        scored = []
+        for key_id, count in shared.most_common(CANDIDATES * 4):
+            candidate = self._keys[key_id]
+            if abs(len(candidate) - len(key)) <= max_edits:
+                scored.append(key_id)
+
+        best: Optional[Match] = None
+        for key_id in scored[:CANDIDATES]:
+            candidate = self._keys[key_id]
+            length = max(len(key), len(candidate))
+            edits = distance(key, candidate, limit=min(
+                MAX_EDITS, int(length * (1 - MIN_CONFIDENCE))
+            ))
+            confidence = 1 - edits / length
+            place = self._places[key_id]
+            if confidence < MIN_CONFIDENCE:
+                continue
+            if best is None or (confidence, place.population) > (
+                best.confidence, best.place.population
+            ):
+                best = Match(place, round(confidence, 3))
+        return best
+
+
+def _gazetteer_places(
+    gazetteer: Gazetteer, min_population: int
+) -> Iterable[Tuple[Place, List[str]]]:
+    """Города справочника с населением от min_population и их названия"""
+    names: Dict[int, List[str]] = {}
+    for key, index in gazetteer.keys():
+        if gazetteer.population(index) >= min_population:
+            names.setdefault(index, []).append(key)
+    for index, keys in names.items():
+        yield gazetteer.place(index), keys
+
+
+_index: Optional[CityIndex] = None
+
+
+def get_city_index() -> Optional[CityIndex]:
+    """
+    Индекс городов процесса (строится при первом обращении)
+
+    Нечеткий поиск охватывает встроенные города и города справочника с
+    населением от MCP_WEATHER_FUZZY_POPULATION (по умолчанию 100 000);
+    точный - все названия справочника. MCP_WEATHER_CITY_INDEX=off
+    выключает индекс: координаты ищутся только через API.
+    """
+    global _index
+    if os.getenv("MCP_WEATHER_CITY_INDEX", "on") == "off":
+        return None
+    if _index is None:
+        started = time.perf_counter()
+        gazetteer = get_gazetteer()
+        places: List[Tuple[Place, Iterable[str]]] = list(CITIES)
+        if gazetteer is not None:
+            min_population = int(
+                os.getenv("MCP_WEATHER_FUZZY_POPULATION", "100000")
+            )
+            places.extend(_gazetteer_places(gazetteer, min_population))
+        _index = CityIndex(places, gazetteer)
+        if gazetteer is not None:
+            # stdout на транспорте stdio занят протоколом MCP
+            print(f"🔤 Индекс названий городов: {len(_index)} названий за "
+                  f"{time.perf_counter() - started:.2f} с", file=sys.stderr)
+    return _index
+
+
+def reset_city_index() -> None:
+    """Перестраивает индекс при следующем обращении"""
+    global _index
+    _index = None
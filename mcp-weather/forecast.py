@@ -0,0 +1,152 @@
+"""
+Кеш прогнозов по ячейкам сетки погодной модели.
+
+Open-Meteo считает прогноз на сетке модели (ICON и ECMWF - около 0.1°,
+~11 км) и пересчитывает его только с выходом нового прогона модели.
+Поэтому разные названия одного города ("Москва", "Moscow", "msk") и
+соседние точки получают один и тот же прогноз, и он не меняется до
+следующего обновления модели:
+
+- координаты округляются до ячейки сетки (MCP_WEATHER_GRID, градусы;
+  0 - не округлять), запрос к API идет с координатами ячейки;
+- прогноз запрашивается сразу на горизонт FORECAST_DAYS дней: погода на
+  сегодня и на неделю - срезы одного ответа;
+- запись живет до следующего обновления модели: границы интервала
+  MCP_WEATHER_MODEL_INTERVAL секунд (по умолчанию час) плюс задержка
+  публикации MCP_WEATHER_MODEL_DELAY секунд, а не фиксированный TTL.
+
+Блок current ответа - значение той же модели на текущие 15 минут, в кеше
+он может отставать до обновления модели; время блока выводится вместе с
+погодой.
+"""
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+# Горизонт одного запроса прогноза и максимум Open-Meteo
+FORECAST_DAYS = 7
+MAX_FORECAST_DAYS = 16
+
+
+@dataclass
+class ForecastSettings:
+    """Настройки кеша прогнозов"""
+    # Шаг сетки модели, градусы
+    grid: float = 0.1
+    # Интервал обновления модели и задержка публикации прогона, секунды
+    interval: float = 3600
+    delay: float = 0
+
+    @classmethod
+    def from_env(cls) -> "ForecastSettings":
+        """Собирает настройки из переменных окружения MCP_WEATHER_*"""
+        defaults = cls()
+        settings = cls(
+            grid=float(os.getenv("MCP_WEATHER_GRID") or defaults.grid),
+            interval=float(
+                os.getenv("MCP_WEATHER_MODEL_INTERVAL") or defaults.interval
+            ),
+            delay=float(os.getenv("MCP_WEATHER_MODEL_DELAY") or defaults.delay),
+        )
+        if settings.grid < 0 or settings.interval <= 0:
+            raise ValueError(
+                "MCP_WEATHER_GRID не может быть отрицательным, "
+                "MCP_WEATHER_MODEL_INTERVAL должен быть положительным"
+            )
+        return settings
+
+
+_settings: Optional[ForecastSettings] = None
+
+
+def get_settings() -> ForecastSettings:
+    """Настройки кеша прогнозов текущего процесса"""
+    global _settings
+    if _settings is None:
+        _settings = ForecastSettings.from_env()
+    return _settings
+
+
+def reset_settings() -> None:
+    """Перечитывает настройки из переменных окружения"""
+    global _settings
+    _settings = None
+
+
+def snap(latitude: float, longitude: float) -> Tuple[float, float]:
+    """
+    Центр ячейки сетки модели, в которую попадает точка
+
+    Args:
+        latitude: Широта
+        longitude: Долгота
+
+    Returns:
+        Координаты ячейки (или исходные при MCP_WEATHER_GRID=0)
+    """
+    grid = get_settings().grid
+    if not grid:
+        return latitude, longitude
+    # round(..., 6) убирает хвосты вида 55.800000000000004
+    return (
+        round(round(latitude / grid) * grid, 6),
+        round(round(longitude / grid) * grid, 6),
+    )
+
+
+def horizon(days: int) -> int:
+    """Горизонт запроса, из которого берется прогноз на days дней"""
+    return min(max(days, FORECAST_DAYS), MAX_FORECAST_DAYS)
+
+
+def cache_key(
+    latitude: float, longitude: float, days: int, kind: str = "forecast"
+) -> str:
+    """Ключ записи прогноза ячейки (kind - forecast или hourly) на days дней"""
+    return f"{kind}:{latitude:.6f}:{longitude:.6f}:{days}"
+
+
+def next_update(now: Optional[float] = None) -> float:
+    """
+    Время следующего обновления модели
+
+    Args:
+        now: Текущее время (unix)
+
+    Returns:
+        Ближайшая граница интервала обновления (с задержкой публикации)
+        позже now
+    """
+    settings = get_settings()
+    now = time.time() if now is None else now
+    runs = math.floor((now - settings.delay) / settings.interval) + 1
+    return runs * settings.interval + settings.delay
+
+
+def ttl(now: Optional[float] = None) -> float:
+    """Сколько секунд хранить прогноз, полученный сейчас"""
+    now = time.time() if now is None else now
+    return next_update(now) - now
+
+
+def trim(data: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """
+    Прогноз на первые days дней из ответа на больший горизонт
+
+    Args:
+        data: Ответ Open-Meteo (не изменяется)
+        days: Число дней
+
+    Returns:
+        Ответ со срезанным блоком daily
+    """
+    daily = data.get("daily")
+    if not daily or len(daily.get("time", ())) <= days:
+        return data
+    return {
+        **data,
+        "daily": {name: values[:days] for name, values in daily.items()},
+    }
@@ -0,0 +1,317 @@
+"""
+Локальный справочник городов для геокодирования без запроса к API.
+
+Справочник собирается из выгрузки GeoNames (cities15000.txt,
+cities500.txt или allCountries.txt - формат одинаковый) в компактный
+бинарный файл, который сервер открывает через mmap: файл не читается в
+память целиком, страницы подгружаются ОС по мере обращения и делятся
+между воркерами.
+
+    python gazetteer.py cities15000.txt data/gazetteer.bin --min-population 1000
+
+Формат файла (little-endian):
+
+- заголовок: MAGIC, число мест, число названий;
+- места: широта и долгота (float32), население, смещение и длина
+  названия, код страны;
+- названия: смещение и длина нормализованного названия, номер места.
+  Отсортированы по названию, одинаковые названия - по убыванию населения;
+- строки UTF-8.
+
+Каждое место доступно по всем своим названиям (name, asciiname и
+alternatenames на всех языках), поэтому "Москва", "Moscow" и "Moskau"
+находят одно место. Поиск точного названия и префикса - двоичный поиск
+по отсортированным названиям.
+"""
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+MAGIC = b"MCPGAZ1\0"
+HEADER = struct.Struct("<8sII")
+# Широта, долгота, население, смещение и длина названия, код страны
+PLACE = struct.Struct("<ffIIH2s")
+# Смещение и длина ключа, номер места
+NAME = struct.Struct("<IHI")
+
+# Справочник по умолчанию: собирается make gazetteer
+DEFAULT_PATH = Path(__file__).resolve().parent / "data" / "gazetteer.bin"
+
+# Сколько названий просматривать при поиске по короткому префиксу
+MAX_PREFIX_SCAN = 10000
+
+_SEPARATORS = re.compile(r"[\s\-‐‑–—'’`.,]+")
+
+
+def normalize(name: str) -> str:
+    """
+    Ключ поиска названия: регистр, ё, дефисы и пробелы не различаются
+
+    "Санкт-Петербург", "санкт петербург" и "САНКТ  ПЕТЕРБУРГ" дают один
+    ключ.
+    """
+    name = unicodedata.normalize("NFKC", name).casefold().replace("ё", "е")
+    return _SEPARATORS.sub(" ", name).strip()
+
+
+@dataclass(frozen=True)
+class Place:
+    """Населенный пункт справочника"""
+    name: str
+    latitude: float
+    longitude: float
+    country: str
+    population: int
+
+
+def build(source: str, output: str, min_population: int = 0) -> Tuple[int, int]:
+    """
+    Собирает справочник из выгрузки GeoNames
+
+    Args:
+        source: Файл выгрузки GeoNames (строка на место, поля через TAB)
+        output: Файл справочника
+        min_population: Минимальное население места
+
+    Returns:
+        Число мест и названий
+    """
+    places: List[Tuple[float, float, int, str, str]] = []
+    names: List[Tuple[str, int, int]] = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            # Только населенные пункты (feature class P)
+            if len(fields) < 15 or fields[6] != "P":
+                continue
+            population = int(fields[14] or 0)
+            if population < min_population:
+                continue
+            index = len(places)
+            places.append((
+                float(fields[4]), float(fields[5]), population,
+                fields[8][:2], fields[1],
+            ))
+            keys = {
+                normalize(name)
+                for name in (fields[1], fields[2], *fields[3].split(","))
+                if name and "://" not in name
+            }
+            keys.discard("")
+            names.extend((key, -population, index) for key in keys)
+
+    # Ключи сравниваются побайтно, как при поиске по файлу
+    names.sort(key=lambda item: (item[0].encode(), item[1], item[2]))
+
+    strings = bytearray()
+    offsets: Dict[str, Tuple[int, int]] = {}
+
+    def intern(value: str) -> Tuple[int, int]:
+        if value not in offsets:
+            data = value.encode()[:0xFFFF]
+            offsets[value] = (len(strings), len(data))
+            strings.extend(data)
+        return offsets[value]
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(places), len(names)))
+        for latitude, longitude, population, country, name in places:
+            f.write(PLACE.pack(
+                latitude, longitude, population, *intern(name),
+                country.encode("ascii", "replace").ljust(2)[:2],
+            ))
+        for key, _, index in names:
+            f.write(NAME.pack(*intern(key), index))
+        f.write(strings)
+    return len(places), len(names)
+
+
+class Gazetteer:
+    """Справочник городов, открытый через mmap"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Файл справочника (см. build)
+
+        Raises:
+            ValueError: Файл не является справочником
+        """
+        self.path = str(path)
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.places, self.names = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} не является справочником городов")
+        self._names_at = HEADER.size + self.places * PLACE.size
+        self._strings_at = self._names_at + self.names * NAME.size
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings_at + offset
+        return self._mm[start:start + length]
+
+    def _name(self, index: int) -> Tuple[bytes, int]:
+        """Ключ и номер места i-го названия"""
+        offset, length, place = NAME.unpack_from(
+            self._mm, self._names_at + index * NAME.size
+        )
+        return self._string(offset, length), place
+
+    def place(self, index: int) -> Place:
+        """Место по номеру"""
+        latitude, longitude, population, offset, length, country = \
+            PLACE.unpack_from(self._mm, HEADER.size + index * PLACE.size)
+        return Place(
+            name=self._string(offset, length).decode(),
+            # float32 хранит 7 значащих цифр, в выгрузке - 5 знаков
+            latitude=round(latitude, 5),
+            longitude=round(longitude, 5),
+            country=country.decode("ascii").strip(),
+            population=population,
+        )
+
+    def population(self, index: int) -> int:
+        """Население места по номеру"""
+        return PLACE.unpack_from(self._mm, HEADER.size + index * PLACE.size)[2]
+
+    def keys(self) -> Iterator[Tuple[str, int]]:
+        """Все нормализованные названия и номера их мест"""
+        for index in range(self.names):
+            key, place = self._name(index)
+            yield key.decode(), place
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Первое название, не меньшее key"""
+        low, high = 0, self.names
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _scan(self, key: bytes, prefix: bool) -> Iterator[int]:
+        """Номера мест названий, равных key (или начинающихся с него)"""
+        for index in range(self._lower_bound(key), self.names):
+            name, place = self._name(index)
+            if name == key or (prefix and name.startswith(key)):
+                yield place
+            else:
+                return
+
+    def exact(self, name: str, limit: int = 5) -> List[Place]:
+        """
+        Места с точно таким названием (на любом языке)
+
+        Args:
+            name: Название
+            limit: Сколько мест вернуть
+
+        Returns:
+            Места по убыванию населения
+        """
+        key = normalize(name).encode()
+        if not key:
+            return []
+        # Ключи места уникальны, одинаковые названия уже упорядочены по
+        # населению
+        places = islice(self._scan(key, prefix=False), limit)
+        return [self.place(index) for index in places]
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[Place]:
+        """
+        Места с названием, начинающимся с prefix
+
+        Для коротких префиксов просматривается не больше MAX_PREFIX_SCAN
+        названий.
+
+        Args:
+            prefix: Начало названия
+            limit: Сколько мест вернуть
+
+        Returns:
+            Места по убыванию населения
+        """
+        key = normalize(prefix).encode()
+        if not key:
+            return []
+        found = set(islice(self._scan(key, prefix=True), MAX_PREFIX_SCAN))
+        places = [self.place(index) for index in found]
+        places.sort(key=lambda place: -place.population)
+        return places[:limit]
+
+
+_gazetteer: Optional[Gazetteer] = None
+_loaded = False
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """
+    Справочник процесса или None, если он не собран
+
+    Путь задается MCP_WEATHER_GAZETTEER (по умолчанию data/gazetteer.bin
+    рядом с сервером), off - не использовать справочник.
+    """
+    global _gazetteer, _loaded
+    if _loaded:
+        return _gazetteer
+    _loaded = True
+
+    path = os.getenv("MCP_WEATHER_GAZETTEER")
+    if path == "off" or (not path and not DEFAULT_PATH.exists()):
+        return None
+    path = path or str(DEFAULT_PATH)
+    try:
+        _gazetteer = Gazetteer(path)
+    except (OSError, ValueError) as e:
+        # stdout на транспорте stdio занят протоколом MCP
+        print(f"⚠️ Справочник городов не загружен: {e}", file=sys.stderr)
+        return None
+    print(f"📚 Справочник городов: {_gazetteer.places} мест, "
+          f"{_gazetteer.names} названий ({path})", file=sys.stderr)
+    return _gazetteer
+
+
+def reset_gazetteer() -> None:
+    """Закрывает справочник и перечитывает путь из окружения"""
+    global _gazetteer, _loaded
+    if _gazetteer is not None:
+        _gazetteer.close()
+    _gazetteer = None
+    _loaded = False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Сборка справочника городов из выгрузки GeoNames"
+    )
+    parser.add_argument("source", help="cities15000.txt и т.п.")
+    parser.add_argument("output", nargs="?", default=str(DEFAULT_PATH),
+                        help="файл справочника")
+    parser.add_argument("--min-population", type=int, default=0,
+                        help="минимальное население места")
+    args = parser.parse_args()
+
+    places, names = build(args.source, args.output, args.min_population)
+    size = os.path.getsize(args.output) / 1024 / 1024
+    print(f"📚 Справочник: {places} мест, {names} названий -> "
+          f"{args.output} ({size:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
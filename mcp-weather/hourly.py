@@ -0,0 +1,263 @@
+"""
+Почасовой прогноз: разбор в массивы NumPy и агрегаты по периодам.
+
+Почасовой ответ Open-Meteo в 24 раза больше дневного (до 384 часов на
+16 дней), поэтому он не разбирается в словарь на каждый час: каждая
+переменная становится массивом (пропуски - NaN), а агрегаты считаются
+операциями над массивами:
+
+- по периодам (сутки или четверти суток) - reduceat по границам
+  периодов: минимум, максимум и среднее температуры, сумма осадков,
+  максимум вероятности осадков и ветра;
+- окна хорошей погоды - непрерывные серии светлых часов без осадков,
+  с комфортной температурой и слабым ветром.
+
+Модуль импортирует NumPy, поэтому сервер загружает его при первом вызове
+инструмента почасового прогноза.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+from mcp.shared.exceptions import McpError
+from mcp.types import ErrorData, INTERNAL_ERROR
+
+
+# Переменные почасового прогноза Open-Meteo
+HOURLY_VARIABLES = (
+    "temperature_2m",
+    "precipitation",
+    "precipitation_probability",
+    "wind_speed_10m",
+    "weather_code",
+    "is_day",
+)
+
+# Длина периода агрегации, часы
+PERIODS = {"day": 24, "part": 6}
+
+# Названия четвертей суток
+PARTS = ("ночь", "утро", "день", "вечер")
+
+
+@dataclass(frozen=True)
+class GoodWeather:
+    """Условия хорошей погоды для окон"""
+    min_temperature: float = 15
+    max_temperature: float = 28
+    # м/с
+    max_wind_speed: float = 8
+    max_precipitation_probability: float = 20
+    # WMO: 0-3 - ясно или облачно, без тумана и осадков
+    max_weather_code: int = 3
+    # Самое короткое окно, часы
+    min_hours: int = 2
+
+
+@dataclass
+class HourlyForecast:
+    """Почасовой прогноз: время и массивы переменных"""
+    time: np.ndarray
+    values: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def first_days(self, days: int) -> "HourlyForecast":
+        """Первые days суток прогноза (срезы без копирования)"""
+        end = np.searchsorted(
+            self.time, self.time[:1].astype("datetime64[D]") + days
+        )[0] if len(self) else 0
+        return HourlyForecast(
+            time=self.time[:end],
+            values={name: values[:end] for name, values in self.values.items()},
+        )
+
+
+def parse_hourly(data: Dict[str, Any]) -> HourlyForecast:
+    """
+    Разбирает блок hourly ответа Open-Meteo в массивы
+
+    Args:
+        data: Ответ API
+
+    Returns:
+        Почасовой прогноз (время - местное, datetime64 с точностью до
+        минуты; пропущенные значения - NaN)
+
+    Raises:
+        McpError: В ответе нет почасового прогноза
+    """
+    hourly = data.get("hourly")
+    if not hourly or "time" not in hourly:
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message="В ответе Open-Meteo нет почасового прогноза (hourly)"
+            )
+        )
+    return HourlyForecast(
+        time=np.array(hourly["time"], dtype="datetime64[m]"),
+        values={
+            name: np.array(hourly[name], dtype=np.float64)
+            for name in HOURLY_VARIABLES if name in hourly
+        },
+    )
+
+
+def _rounded(values: np.ndarray) -> List:
+    """Значения с точностью 0.1 (NaN -> None) для JSON"""
+    return [
+        None if np.isnan(value) else value
+        for value in np.round(values, 1).tolist()
+    ]
+
+
+def aggregate(forecast: HourlyForecast, period: str = "day") -> List[Dict]:
+    """
+    Агрегаты прогноза по периодам
+
+    Args:
+        forecast: Почасовой прогноз
+        period: day - по суткам, part - по четвертям суток
+
+    Returns:
+        Период (начало и название), температура (min, max, mean), сумма
+        осадков, наибольшие вероятность осадков и скорость ветра,
+        наихудший код погоды
+    """
+    if not len(forecast):
+        return []
+    hours = PERIODS[period]
+    hour_index = forecast.time.astype("datetime64[h]").astype(np.int64)
+    keys = hour_index // hours
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+    def reduce(name: str, ufunc: np.ufunc) -> np.ndarray:
+        values = forecast.values.get(name)
+        if values is None:
+            return np.full(len(starts), np.nan)
+        # fmin/fmax пропускают NaN, если в периоде есть другие значения
+        return ufunc.reduceat(values, starts)
+
+    temperature = forecast.values["temperature_2m"]
+    valid = ~np.isnan(temperature)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    sums = np.add.reduceat(np.where(valid, temperature, 0.0), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+
+    precipitation = forecast.values.get("precipitation")
+    if precipitation is None:
+        total = np.full(len(starts), np.nan)
+    else:
+        total = np.add.reduceat(np.nan_to_num(precipitation), starts)
+
+    period_starts = np.datetime_as_string(
+        forecast.time[starts], unit="D" if period == "day" else "m"
+    ).tolist()
+    labels = (
+        [""] * len(starts) if period == "day"
+        else [PARTS[(hour % 24) // hours] for hour in hour_index[starts].tolist()]
+    )
+    columns = {
+        "temperature_min": _rounded(reduce("temperature_2m", np.fmin)),
+        "temperature_max": _rounded(reduce("temperature_2m", np.fmax)),
+        "temperature_mean": _rounded(mean),
+        "precipitation": _rounded(total),
+        "precipitation_chance": _rounded(
+            reduce("precipitation_probability", np.fmax)
+        ),
+        "wind_speed_max": _rounded(reduce("wind_speed_10m", np.fmax)),
+        "weather_code": _rounded(reduce("weather_code", np.fmax)),
+    }
+    return [
+        {
+            "start": start,
+            "label": label,
+            "temperature": {
+                "min": columns["temperature_min"][i],
+                "max": columns["temperature_max"][i],
+                "mean": columns["temperature_mean"][i],
+            },
+            "precipitation": columns["precipitation"][i],
+            "precipitation_chance": columns["precipitation_chance"][i],
+            "wind_speed_max": columns["wind_speed_max"][i],
+            "weather_code": (
+                None if columns["weather_code"][i] is None
+                else int(columns["weather_code"][i])
+            ),
+        }
+        for i, (start, label) in enumerate(zip(period_starts, labels))
+    ]
+
+
+def good_weather_windows(
+    forecast: HourlyForecast,
+    criteria: GoodWeather = GoodWeather(),
+) -> List[Dict]:
+    """
+    Непрерывные окна хорошей погоды
+
+    Час хороший, если светло, осадков нет и их вероятность низкая,
+    температура в пределах criteria, ветер слабый, а код погоды не хуже
+    облачности. Сравнения с NaN ложны, поэтому час с пропуском не
+    считается хорошим.
+
+    Args:
+        forecast: Почасовой прогноз
+        criteria: Условия хорошей погоды
+
+    Returns:
+        Окна (начало, конец, число часов, средняя температура)
+    """
+    if not len(forecast):
+        return []
+    values = forecast.values
+    nan = np.full(len(forecast), np.nan)
+    temperature = values["temperature_2m"]
+    # Без is_day (старые записи) светлыми считаются все часы
+    is_day = values.get("is_day", np.ones(len(forecast)))
+    with np.errstate(invalid="ignore"):
+        good = (
+            (is_day == 1)
+            & (temperature >= criteria.min_temperature)
+            & (temperature <= criteria.max_temperature)
+            & (values.get("wind_speed_10m", nan) <= criteria.max_wind_speed)
+            & (values.get("precipitation", nan) == 0)
+            & (values.get("weather_code", nan) <= criteria.max_weather_code)
+        )
+        probability = values.get("precipitation_probability")
+        if probability is not None:
+            # Вероятность часто не рассчитана на дальние дни - не мешает
+            good &= ~(probability > criteria.max_precipitation_probability)
+
+    # Границы серий: +1 - начало окна, -1 - конец
+    edges = np.diff(np.r_[0, good.astype(np.int8), 0])
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    keep = lengths >= criteria.min_hours
+    starts, ends, lengths = starts[keep], ends[keep], lengths[keep]
+    if not len(starts):
+        return []
+
+    # Средние по окнам через накопленные суммы (в окнах NaN нет)
+    cumulative = np.r_[0.0, np.cumsum(np.nan_to_num(temperature))]
+    means = (cumulative[ends] - cumulative[starts]) / lengths
+    # Конец окна - начало последнего хорошего часа + час
+    window_ends = forecast.time[ends - 1] + np.timedelta64(1, "h")
+    return [
+        {
+            "start": start,
+            "end": end,
+            "hours": length,
+            "temperature_mean": mean,
+        }
+        for start, end, length, mean in zip(
+            np.datetime_as_string(forecast.time[starts], unit="m").tolist(),
+            np.datetime_as_string(window_ends, unit="m").tolist(),
+            lengths.tolist(),
+            _rounded(means),
+        )
+    ]
@@ -1,33 +1,79 @@
+import asyncio
 from datetime import datetime
-from typing import Dict, Optional, Tuple
-import httpx
+from typing import Any, Dict, List, Optional, Tuple
 
-import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import ErrorData, INTERNAL_ERROR, INVALID_PARAMS
-from mcp.server.sse import SseServerTransport
+
+from mcp_common.http_client import get_http_client
+from mcp_common.cache import TieredCache
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import (
+    instrument_tools,
+    metrics_endpoint,
+    record_cache_lookup,
+    track_sse_session,
+)
+from mcp_common.profiling import profiling_routes
+from mcp_common.results import structured
+from mcp_common.singleflight import single_flight
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.tracing import span
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
+
+import forecast
+from city_index import get_city_index
 
 # Создаем экземпляр MCP сервера с идентификатором "weather"
 mcp = FastMCP("weather")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
+
+# Кеш ответов инструментов (память + SQLite)
+cache = TieredCache("weather")
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Сколько городов можно сравнить одним вызовом get_weather_batch
+MAX_BATCH_CITIES = 50
 
 
+@single_flight
 async def get_city_coordinates(
     city_name: str
 ) -> Optional[Tuple[float, float]]:
     """
     Получает координаты города через Open-Meteo Geocoding API
     
+    Название сначала разрешается индексом городов (city_index.py):
+    псевдонимы, другие языки и опечатки. API запрашивается, если индекс
+    города не знает или не уверен в исправлении опечатки.
+    
     Args:
         city_name: Название города
         
     Returns:
         Tuple[latitude, longitude] или None если не найден
     """
+    match = None
+    index = get_city_index()
+    if index is not None:
+        match = index.resolve(city_name)
+        local = match is not None and (match.exact or index.complete)
+        record_cache_lookup("weather.cities", hit=local)
+        if local:
+            return match.place.latitude, match.place.longitude
+    # Исправление опечатки по неполному индексу - если API город не нашел
+    fallback = (
+        (match.place.latitude, match.place.longitude) if match else None
+    )
+
     try:
         geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
         params = {
@@ -37,42 +83,38 @@ async def get_city_coordinates(
             "format": "json"
         }
         
-        # Создаем новый HTTP клиент для каждого запроса
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(geocoding_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+        # Используем общий пул соединений процесса
+        client = get_http_client()
+        response = await client.get(
+            geocoding_url, params=params, timeout=30.0
+        )
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        if "results" not in data or not data["results"]:
+            return fallback
             
-            if "results" not in data or not data["results"]:
-                return None
-                
-            result = data["results"][0]
-            return result["latitude"], result["longitude"]
+        result = data["results"][0]
+        return result["latitude"], result["longitude"]
         
     except Exception as e:
         print(f"Ошибка координат для города {city_name}: {e}")
-        return None
+        return fallback
 
 
-async def get_weather_data(
-    latitude: float, 
-    longitude: float, 
-    days: int = 1
-) -> Dict:
+def forecast_params(latitude: str, longitude: str, days: int) -> Dict:
     """
-    Получает данные о погоде через Open-Meteo API
+    Параметры запроса прогноза Open-Meteo
     
     Args:
-        latitude: Широта
-        longitude: Долгота
+        latitude: Широта или широты через запятую
+        longitude: Долгота или долготы через запятую
         days: Количество дней прогноза
         
     Returns:
-        Словарь с данными о погоде
+        Query параметры запроса
     """
-    weather_url = "https://api.open-meteo.com/v1/forecast"
-    
     # Параметры для текущей погоды
     current_params = [
         "temperature_2m",
@@ -91,7 +133,7 @@ async def get_weather_data(
         "wind_speed_10m_max"
     ]
     
-    params = {
+    return {
         "latitude": latitude,
         "longitude": longitude,
         "current": ",".join(current_params),
@@ -99,13 +141,221 @@ async def get_weather_data(
         "timezone": "auto",
         "forecast_days": days
     }
+
+
+@single_flight
+async def fetch_forecast(
+    latitude: float,
+    longitude: float,
+    days: int
+) -> Dict:
+    """
+    Запрашивает прогноз у Open-Meteo API
     
-    # Создаем новый HTTP клиент для каждого запроса
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(weather_url, params=params)
-        response.raise_for_status()
+    Args:
+        latitude: Широта
+        longitude: Долгота
+        days: Количество дней прогноза
         
-        return response.json()
+    Returns:
+        Ответ API
+    """
+    params = forecast_params(latitude, longitude, days)
+    
+    # Используем общий пул соединений процесса
+    client = get_http_client()
+    response = await client.get(FORECAST_URL, params=params, timeout=30.0)
+    response.raise_for_status()
+    
+    return response.json()
+
+
+async def fetch_forecasts(
+    points: List[Tuple[float, float]],
+    days: int
+) -> List[Dict]:
+    """
+    Запрашивает прогнозы для нескольких точек одним запросом
+    
+    Open-Meteo принимает списки координат через запятую и возвращает
+    список ответов в том же порядке.
+    
+    Args:
+        points: Координаты (широта, долгота)
+        days: Количество дней прогноза
+        
+    Returns:
+        Ответы API по точкам
+    """
+    params = forecast_params(
+        ",".join(str(latitude) for latitude, _ in points),
+        ",".join(str(longitude) for _, longitude in points),
+        days,
+    )
+    client = get_http_client()
+    response = await client.get(FORECAST_URL, params=params, timeout=30.0)
+    response.raise_for_status()
+    
+    data = response.json()
+    # Для одной точки API возвращает объект, а не список
+    return data if isinstance(data, list) else [data]
+
+
+async def get_weather_data(
+    latitude: float, 
+    longitude: float, 
+    days: int = 1
+) -> Dict:
+    """
+    Получает данные о погоде через Open-Meteo API
+    
+    Прогноз кешируется по ячейке сетки модели до ее следующего обновления
+    (forecast.py) и запрашивается сразу на неделю: прогнозы на разное
+    число дней - срезы одной записи.
+    
+    Args:
+        latitude: Широта
+        longitude: Долгота
+        days: Количество дней прогноза
+        
+    Returns:
+        Словарь с данными о погоде
+    """
+    latitude, longitude = forecast.snap(latitude, longitude)
+    horizon = forecast.horizon(days)
+    if not cache.settings.enabled:
+        data = await fetch_forecast(latitude, longitude, horizon)
+        return forecast.trim(data, days)
+
+    key = forecast.cache_key(latitude, longitude, horizon)
+    entry = await cache.get_entry(key)
+    record_cache_lookup("weather.forecast", hit=entry is not None)
+    if entry is not None:
+        return forecast.trim(entry[0], days)
+
+    data = await fetch_forecast(latitude, longitude, horizon)
+    await cache.set(key, data, forecast.ttl())
+    return forecast.trim(data, days)
+
+
+async def get_weather_data_batch(
+    points: List[Tuple[float, float]],
+    days: int = 1
+) -> List[Dict]:
+    """
+    Получает данные о погоде для нескольких точек
+    
+    Ячейки из кеша прогнозов не запрашиваются, остальные запрашиваются
+    одним запросом к API и сохраняются в кеш.
+    
+    Args:
+        points: Координаты (широта, долгота)
+        days: Количество дней прогноза
+        
+    Returns:
+        Данные о погоде в порядке points
+    """
+    cells = [forecast.snap(latitude, longitude) for latitude, longitude in points]
+    horizon = forecast.horizon(days)
+    found: Dict[Tuple[float, float], Dict] = {}
+    if cache.settings.enabled:
+        for cell in dict.fromkeys(cells):
+            entry = await cache.get_entry(forecast.cache_key(*cell, horizon))
+            record_cache_lookup("weather.forecast", hit=entry is not None)
+            if entry is not None:
+                found[cell] = entry[0]
+
+    missing = [cell for cell in dict.fromkeys(cells) if cell not in found]
+    if missing:
+        fetched = await fetch_forecasts(missing, horizon)
+        if len(fetched) != len(missing):
+            raise McpError(
+                ErrorData(
+                    code=INTERNAL_ERROR,
+                    message=(
+                        f"Open-Meteo вернул прогнозы для {len(fetched)} "
+                        f"точек из {len(missing)}"
+                    )
+                )
+            )
+        ttl = forecast.ttl()
+        for cell, data in zip(missing, fetched):
+            found[cell] = data
+            if cache.settings.enabled:
+                await cache.set(forecast.cache_key(*cell, horizon), data, ttl)
+
+    return [forecast.trim(found[cell], days) for cell in cells]
+
+
+@single_flight
+async def fetch_hourly(
+    latitude: float,
+    longitude: float,
+    days: int
+) -> Dict:
+    """
+    Запрашивает почасовой прогноз у Open-Meteo API
+    
+    Args:
+        latitude: Широта
+        longitude: Долгота
+        days: Количество дней прогноза
+        
+    Returns:
+        Ответ API с блоком hourly
+    """
+    from hourly import HOURLY_VARIABLES
+    
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": ",".join(HOURLY_VARIABLES),
+        # Пороги хорошей погоды заданы в м/с
+        "wind_speed_unit": "ms",
+        "timezone": "auto",
+        "forecast_days": days
+    }
+    
+    client = get_http_client()
+    response = await client.get(FORECAST_URL, params=params, timeout=30.0)
+    response.raise_for_status()
+    
+    return response.json()
+
+
+async def get_hourly_data(
+    latitude: float,
+    longitude: float,
+    days: int
+) -> Dict:
+    """
+    Получает почасовой прогноз через Open-Meteo API
+    
+    Кешируется так же, как дневной прогноз: по ячейке сетки модели до ее
+    следующего обновления, на горизонт не меньше недели.
+    
+    Args:
+        latitude: Широта
+        longitude: Долгота
+        days: Количество дней прогноза
+        
+    Returns:
+        Ответ API с блоком hourly (часов может быть больше days суток)
+    """
+    latitude, longitude = forecast.snap(latitude, longitude)
+    horizon = forecast.horizon(days)
+    if not cache.settings.enabled:
+        return await fetch_hourly(latitude, longitude, horizon)
+
+    key = forecast.cache_key(latitude, longitude, horizon, kind="hourly")
+    entry = await cache.get_entry(key)
+    record_cache_lookup("weather.hourly", hit=entry is not None)
+    if entry is not None:
+        return entry[0]
+
+    data = await fetch_hourly(latitude, longitude, horizon)
+    await cache.set(key, data, forecast.ttl())
+    return data
 
 
 def weather_code_to_description(code: int) -> str:
@@ -164,7 +414,8 @@ async def get_real_weather_data(city_name: str, days: int = 1) -> Dict:
         Словарь с данными о погоде
     """
     # Получаем координаты города
-    coordinates = await get_city_coordinates(city_name)
+    with span("weather.geocode", city=city_name):
+        coordinates = await get_city_coordinates(city_name)
     if not coordinates:
         raise McpError(
             ErrorData(
@@ -176,8 +427,30 @@ async def get_real_weather_data(city_name: str, days: int = 1) -> Dict:
     latitude, longitude = coordinates
     
     # Получаем данные о погоде
-    weather_data = await get_weather_data(latitude, longitude, days)
+    with span("weather.forecast", days=days):
+        weather_data = await get_weather_data(latitude, longitude, days)
     
+    return parse_weather_data(city_name, latitude, longitude, weather_data)
+
+
+def parse_weather_data(
+    city_name: str,
+    latitude: float,
+    longitude: float,
+    weather_data: Dict
+) -> Dict:
+    """
+    Разбирает ответ Open-Meteo в данные о погоде города
+    
+    Args:
+        city_name: Название города
+        latitude: Широта города
+        longitude: Долгота города
+        weather_data: Ответ API
+        
+    Returns:
+        Словарь с данными о погоде
+    """
     # Парсим текущую погоду
     current = weather_data["current"]
     current_time = datetime.fromisoformat(
@@ -219,36 +492,137 @@ async def get_real_weather_data(city_name: str, days: int = 1) -> Dict:
     }
 
 
-@mcp.tool()
-async def get_today_weather(city: str) -> str:
+async def get_real_weather_batch(cities: List[str]) -> Dict:
     """
-    Получает актуальную погоду на сегодня для любого города мира.
-    Данные предоставляются Open-Meteo API.
+    Получает погоду на сегодня для нескольких городов
     
-    Args:
-        city: Название города (на любом языке)
+    Координаты разрешаются параллельно (большинство - индексом городов
+    без запросов к API), прогнозы всех городов - одним запросом.
     
-    Usage:
-        get_today_weather("Москва")
-        get_today_weather("Paris")
-        get_today_weather("New York")
-        get_today_weather("Токио")
+    Args:
+        cities: Названия городов
+        
+    Returns:
+        Словарь с погодой по городам и списком ненайденных городов
     """
-    try:
-        if not city or not city.strip():
-            raise McpError(
-                ErrorData(
-                    code=INVALID_PARAMS,
-                    message="Название города не может быть пустым"
-                )
+    with span("weather.geocode", cities=len(cities)):
+        coordinates = await asyncio.gather(
+            *(get_city_coordinates(city) for city in cities)
+        )
+    found = [
+        (city, point) for city, point in zip(cities, coordinates) if point
+    ]
+    not_found = [
+        city for city, point in zip(cities, coordinates) if not point
+    ]
+    if not found:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=f"Города не найдены: {', '.join(not_found)}"
             )
+        )
+    
+    with span("weather.forecast", days=1, locations=len(found)):
+        responses = await get_weather_data_batch(
+            [point for _, point in found], 1
+        )
+    
+    return {
+        "cities": [
+            parse_weather_data(city, latitude, longitude, weather_data)
+            for (city, (latitude, longitude)), weather_data
+            in zip(found, responses)
+        ],
+        "not_found": not_found,
+    }
+
+
+async def get_real_hourly_forecast(
+    city_name: str,
+    days: int,
+    period: str,
+    min_temperature: float,
+    max_temperature: float
+) -> Dict:
+    """
+    Получает почасовой прогноз города и считает агрегаты
+    
+    Args:
+        city_name: Название города
+        days: Количество дней прогноза
+        period: Период агрегации (day или part)
+        min_temperature: Нижняя граница температуры хорошей погоды
+        max_temperature: Верхняя граница температуры хорошей погоды
         
-        weather_data = await get_real_weather_data(city.strip(), 1)
-        current = weather_data["current_weather"]
-        today_forecast = weather_data["forecast"][0]
-        coords = weather_data["coordinates"]
-        
-        result = f"""🌤️ Погода сегодня в городе {weather_data['city']}
+    Returns:
+        Агрегаты по периодам и окна хорошей погоды
+    """
+    # NumPy загружается только при первом почасовом прогнозе
+    from hourly import GoodWeather, aggregate, good_weather_windows, parse_hourly
+    
+    with span("weather.geocode", city=city_name):
+        coordinates = await get_city_coordinates(city_name)
+    if not coordinates:
+        raise McpError(
+            ErrorData(
+                code=INVALID_PARAMS,
+                message=f"Город '{city_name}' не найден"
+            )
+        )
+    
+    latitude, longitude = coordinates
+    with span("weather.hourly", days=days):
+        data = await get_hourly_data(latitude, longitude, days)
+    
+    hourly = parse_hourly(data).first_days(days)
+    criteria = GoodWeather(
+        min_temperature=min_temperature,
+        max_temperature=max_temperature
+    )
+    return {
+        "city": city_name.title(),
+        "coordinates": {"latitude": latitude, "longitude": longitude},
+        "days": days,
+        "period": period,
+        "hours": len(hourly),
+        "periods": aggregate(hourly, period),
+        "good_weather": good_weather_windows(hourly, criteria),
+        "criteria": {
+            "min_temperature": criteria.min_temperature,
+            "max_temperature": criteria.max_temperature,
+            "max_wind_speed": criteria.max_wind_speed,
+            "min_hours": criteria.min_hours,
+        },
+    }
+
+
+WEEKDAYS_RU = {
+    'Monday': 'Понедельник',
+    'Tuesday': 'Вторник',
+    'Wednesday': 'Среда',
+    'Thursday': 'Четверг',
+    'Friday': 'Пятница',
+    'Saturday': 'Суббота',
+    'Sunday': 'Воскресенье'
+}
+
+
+def format_today_weather(weather_data: Dict[str, Any]) -> str:
+    """
+    Форматирует погоду на сегодня в текст
+
+    Args:
+        weather_data: Данные get_real_weather_data
+
+    Returns:
+        Текст с текущей погодой и прогнозом на сегодня
+    """
+    current = weather_data["current_weather"]
+    today_forecast = weather_data["forecast"][0]
+    coords = weather_data["coordinates"]
+
+    return f"""🌤️ Погода сегодня в городе {weather_data['city']}
 
 📍 Координаты: {coords['latitude']:.2f}, {coords['longitude']:.2f}
 🕒 Время: {weather_data['current_time']}
@@ -265,8 +639,194 @@ async def get_today_weather(city: str) -> str:
 🌧️ Вероятность осадков: {today_forecast['precipitation_chance']}%
 
 🔗 Данные предоставлены Open-Meteo API"""
+
+
+def format_weekly_forecast(weather_data: Dict[str, Any]) -> str:
+    """
+    Форматирует прогноз на неделю в текст
+
+    Args:
+        weather_data: Данные get_real_weather_data
+
+    Returns:
+        Текст с прогнозом по дням
+    """
+    coords = weather_data["coordinates"]
+    lat, lon = coords['latitude'], coords['longitude']
+    parts = [f"""📅 Прогноз погоды на неделю для города {weather_data['city']}
+
+📍 Координаты: {lat:.2f}, {lon:.2f}
+🕒 Обновлено: {weather_data['current_time']}
+
+📊 Недельный прогноз:
+"""]
+
+    for day in weather_data['forecast']:
+        weekday_ru = WEEKDAYS_RU.get(day['weekday'], day['weekday'])
+        parts.append(f"""
+📆 {day['date']} ({weekday_ru})
+   🌅 Макс: {day['day_temp']}°C | 🌙 Мин: {day['night_temp']}°C
+   ☁️ {day['condition']} | 💨 {day['wind_speed']} м/с
+   🌧️ Вероятность осадков: {day['precipitation_chance']}%""")
+
+    parts.append("\n\n🔗 Данные предоставлены Open-Meteo API")
+    return "".join(parts)
+
+
+def format_weather_batch(weather_data: Dict[str, Any]) -> str:
+    """
+    Форматирует погоду нескольких городов в таблицу
+
+    Args:
+        weather_data: Данные get_real_weather_batch
+
+    Returns:
+        Текст со строкой на город, самым теплым и самым холодным городом
+    """
+    cities = weather_data["cities"]
+    # Столбцы таблицы
+    names = [city["city"] for city in cities]
+    temperatures = [city["current_weather"]["temperature"] for city in cities]
+    conditions = [city["current_weather"]["condition"] for city in cities]
+    winds = [city["current_weather"]["wind_speed"] for city in cities]
+    highs = [city["forecast"][0]["day_temp"] for city in cities]
+    lows = [city["forecast"][0]["night_temp"] for city in cities]
+    chances = [city["forecast"][0]["precipitation_chance"] for city in cities]
+
+    width = max(map(len, names))
+    rows = [
+        f"🏙️ {name:<{width}}  🌡️ {temperature:>3}°C  "
+        f"🌅 {high:>3}° / 🌙 {low:>3}°  💨 {wind:>2} м/с  "
+        f"🌧️ {chance:>3}%  ☁️ {condition}"
+        for name, temperature, high, low, wind, chance, condition in zip(
+            names, temperatures, highs, lows, winds, chances, conditions
+        )
+    ]
+
+    parts = [f"🌍 Погода сегодня в {len(cities)} городах", "", *rows, ""]
+    if len(cities) > 1:
+        warmest = temperatures.index(max(temperatures))
+        coldest = temperatures.index(min(temperatures))
+        parts.append(f"🔥 Теплее всего: {names[warmest]} "
+                     f"({temperatures[warmest]}°C)")
+        parts.append(f"❄️ Холоднее всего: {names[coldest]} "
+                     f"({temperatures[coldest]}°C)")
+    if weather_data["not_found"]:
+        parts.append(f"❓ Не найдены: {', '.join(weather_data['not_found'])}")
+    parts.append("")
+    parts.append("🔗 Данные предоставлены Open-Meteo API")
+    return "\n".join(parts)
+
+
+def format_hourly_forecast(weather_data: Dict[str, Any]) -> str:
+    """
+    Форматирует агрегаты почасового прогноза в текст
+
+    Args:
+        weather_data: Данные get_real_hourly_forecast
+
+    Returns:
+        Текст со строкой на период и окнами хорошей погоды
+    """
+    coords = weather_data["coordinates"]
+    criteria = weather_data["criteria"]
+    parts = [
+        f"⏱️ Почасовой прогноз на {weather_data['days']} дн. для города "
+        f"{weather_data['city']}",
+        "",
+        f"📍 Координаты: {coords['latitude']:.2f}, {coords['longitude']:.2f}",
+        "",
+    ]
+
+    for row in weather_data["periods"]:
+        temperature = row["temperature"]
+        code = row["weather_code"]
+        condition = (
+            weather_code_to_description(code) if code is not None else "нет данных"
+        )
+        chance = row["precipitation_chance"]
+        title = f"{row['start']} {row['label']}".rstrip()
+        parts.append(
+            f"📆 {title}: 🌡️ {temperature['min']}…{temperature['max']}°C "
+            f"(ср. {temperature['mean']}°C) | 🌧️ {row['precipitation']} мм"
+            + (f", {chance:.0f}%" if chance is not None else "")
+            + f" | 💨 до {row['wind_speed_max']} м/с | ☁️ {condition}"
+        )
+
+    parts.append("")
+    parts.append(
+        f"☀️ Хорошая погода ({criteria['min_temperature']:g}…"
+        f"{criteria['max_temperature']:g}°C, без осадков, ветер до "
+        f"{criteria['max_wind_speed']:g} м/с):"
+    )
+    windows = weather_data["good_weather"]
+    if windows:
+        for window in windows:
+            parts.append(
+                f"   🕒 {window['start']} - {window['end']} "
+                f"({window['hours']} ч, ср. {window['temperature_mean']}°C)"
+            )
+    else:
+        parts.append("   нет подходящих окон")
+
+    parts.append("")
+    parts.append("🔗 Данные предоставлены Open-Meteo API")
+    return "\n".join(parts)
+
+
+def city_key(city: str) -> str:
+    """Название города без различий в регистре и лишних пробелах"""
+    return " ".join(city.split()).casefold()
+
+
+def unique_cities(cities: List[str]) -> List[str]:
+    """
+    Города без пустых названий и повторов
+    
+    Повторами считаются названия, совпадающие по city_key; остается
+    первое написание (без лишних пробелов).
+    """
+    unique: Dict[str, str] = {}
+    for city in cities:
+        if city and city.split():
+            unique.setdefault(city_key(city), " ".join(city.split()))
+    return list(unique.values())
+
+
+def batch_key(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Ключ кеша: регистр, лишние пробелы и повторы не различаются"""
+    return {
+        "cities": [city_key(city) for city in unique_cities(arguments["cities"])]
+    }
+
+
+@mcp.tool()
+@structured(format_today_weather)
+@cache.cached(ttl=600, stale=3600)
+async def get_today_weather(city: str) -> Dict[str, Any]:
+    """
+    Получает актуальную погоду на сегодня для любого города мира.
+    Данные предоставляются Open-Meteo API.
+    
+    Args:
+        city: Название города (на любом языке)
+    
+    Usage:
+        get_today_weather("Москва")
+        get_today_weather("Paris")
+        get_today_weather("New York")
+        get_today_weather("Токио")
+    """
+    try:
+        if not city or not city.strip():
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="Название города не может быть пустым"
+                )
+            )
         
-        return result
+        return await get_real_weather_data(city.strip(), 1)
         
     except Exception as e:
         if isinstance(e, McpError):
@@ -280,7 +840,9 @@ async def get_today_weather(city: str) -> str:
 
 
 @mcp.tool()
-async def get_weekly_forecast(city: str) -> str:
+@structured(format_weekly_forecast)
+@cache.cached(ttl=3600, stale=21600)
+async def get_weekly_forecast(city: str) -> Dict[str, Any]:
     """
     Получает актуальный прогноз погоды на неделю для любого города мира.
     Данные предоставляются Open-Meteo API.
@@ -303,39 +865,126 @@ async def get_weekly_forecast(city: str) -> str:
                 )
             )
         
-        weather_data = await get_real_weather_data(city.strip(), 7)
-        coords = weather_data["coordinates"]
+        return await get_real_weather_data(city.strip(), 7)
         
-        city_name = weather_data['city']
-        lat, lon = coords['latitude'], coords['longitude']
-        result = f"""📅 Прогноз погоды на неделю для города {city_name}
+    except Exception as e:
+        if isinstance(e, McpError):
+            raise
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Ошибка при получении прогноза погоды: {str(e)}"
+            )
+        ) from e
 
-📍 Координаты: {lat:.2f}, {lon:.2f}
-🕒 Обновлено: {weather_data['current_time']}
 
-📊 Недельный прогноз:
-"""
+@mcp.tool()
+@structured(format_weather_batch)
+@cache.cached(ttl=600, stale=3600, key=batch_key)
+async def get_weather_batch(cities: List[str]) -> Dict[str, Any]:
+    """
+    Получает погоду на сегодня сразу для нескольких городов - для
+    сравнения городов вместо нескольких вызовов get_today_weather.
+    Данные предоставляются Open-Meteo API.
+    
+    Args:
+        cities: Названия городов (на любом языке), до 50
+    
+    Usage:
+        get_weather_batch(["Москва", "Санкт-Петербург", "Сочи"])
+        get_weather_batch(["London", "Paris", "Berlin", "Madrid"])
+    """
+    try:
+        names = unique_cities(cities)
+        if not names:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="Список городов не может быть пустым"
+                )
+            )
+        if len(names) > MAX_BATCH_CITIES:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"Не больше {MAX_BATCH_CITIES} городов за вызов"
+                )
+            )
         
-        for day in weather_data['forecast']:
-            weekday_ru = {
-                'Monday': 'Понедельник',
-                'Tuesday': 'Вторник', 
-                'Wednesday': 'Среда',
-                'Thursday': 'Четверг',
-                'Friday': 'Пятница',
-                'Saturday': 'Суббота',
-                'Sunday': 'Воскресенье'
-            }.get(day['weekday'], day['weekday'])
-            
-            result += f"""
-📆 {day['date']} ({weekday_ru})
-   🌅 Макс: {day['day_temp']}°C | 🌙 Мин: {day['night_temp']}°C
-   ☁️ {day['condition']} | 💨 {day['wind_speed']} м/с
-   🌧️ Вероятность осадков: {day['precipitation_chance']}%"""
+        return await get_real_weather_batch(names)
         
-        result += "\n\n🔗 Данные предоставлены Open-Meteo API"
+    except Exception as e:
+        if isinstance(e, McpError):
+            raise
+        raise McpError(
+            ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Ошибка при получении данных о погоде: {str(e)}"
+            )
+        ) from e
+
+
+@mcp.tool()
+@structured(format_hourly_forecast)
+@cache.cached(ttl=600, stale=3600)
+async def get_hourly_forecast(
+    city: str,
+    days: int = 3,
+    period: str = "day",
+    min_temperature: float = 15,
+    max_temperature: float = 28
+) -> Dict[str, Any]:
+    """
+    Получает почасовой прогноз до 16 дней для любого города мира: сводку
+    по суткам или четвертям суток (температура, осадки, ветер) и окна
+    хорошей погоды для прогулок и мероприятий на улице.
+    Данные предоставляются Open-Meteo API.
+    
+    Args:
+        city: Название города (на любом языке)
+        days: Количество дней прогноза, от 1 до 16
+        period: day - сводка по суткам, part - по ночи, утру, дню и вечеру
+        min_temperature: Минимальная комфортная температура, °C
+        max_temperature: Максимальная комфортная температура, °C
+    
+    Usage:
+        get_hourly_forecast("Москва")
+        get_hourly_forecast("Barcelona", days=10)
+        get_hourly_forecast("Сочи", days=2, period="part", min_temperature=20)
+    """
+    try:
+        if not city or not city.strip():
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="Название города не может быть пустым"
+                )
+            )
+        if not 1 <= days <= forecast.MAX_FORECAST_DAYS:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message=f"Количество дней - от 1 до {forecast.MAX_FORECAST_DAYS}"
+                )
+            )
+        if period not in ("day", "part"):
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="Период - day (сутки) или part (четверти суток)"
+                )
+            )
+        if min_temperature > max_temperature:
+            raise McpError(
+                ErrorData(
+                    code=INVALID_PARAMS,
+                    message="min_temperature больше max_temperature"
+                )
+            )
         
-        return result
+        return await get_real_hourly_forecast(
+            city.strip(), days, period, min_temperature, max_temperature
+        )
         
     except Exception as e:
         if isinstance(e, McpError):
@@ -343,28 +992,35 @@ async def get_weekly_forecast(city: str) -> str:
         raise McpError(
             ErrorData(
                 code=INTERNAL_ERROR,
-                message=f"Ошибка при получении прогноза погоды: {str(e)}"
+                message=f"Ошибка при получении почасового прогноза: {str(e)}"
             )
         ) from e
 
 
 # Настройка SSE транспорта
-sse = SseServerTransport("/messages/")
+sse = WorkerSseServerTransport("/messages/")
+
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
 
 
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений"""
     _server = mcp._mcp_server
-    async with sse.connect_sse(
-        request.scope,
-        request.receive,
-        request._send,
-    ) as (reader, writer):
-        await _server.run(
-            reader, 
-            writer, 
-            _server.create_initialization_options()
-        )
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 # Создание Starlette приложения
@@ -372,14 +1028,19 @@ app = Starlette(
     debug=True,
     routes=[
         Route("/sse", endpoint=handle_sse),
-        Mount("/messages/", app=sse.handle_post_message),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ],
+    lifespan=server_lifespan,
 )
 
 if __name__ == "__main__":
     print("🌤️ Запуск MCP сервера погоды с Open-Meteo API...")
     print("📡 Сервер будет доступен по адресу: http://localhost:8001")
     print("🔗 SSE endpoint: http://localhost:8001/sse")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8001/mcp")
     print("📧 Messages endpoint: http://localhost:8001/messages/")
     print("🛠️ Доступные инструменты:")
     print("   - get_today_weather(city) - актуальная погода для любого города")
@@ -387,4 +1048,4 @@ if __name__ == "__main__":
     print("🌍 Данные предоставляются Open-Meteo API (без API ключа)")
     print("🆓 Поддерживаются города со всего мира!")
     
-    uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
+    run_server(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Общие настройки тестов
+"""
+import os
+
+# Кеш инструментов отключен: каждый тест работает со своими моками upstream
+os.environ.setdefault("MCP_CACHE_ENABLED", "false")
+
+# Координаты запрашиваются у замоканного API, даже если справочник городов
+# собран локально: встроенный индекс городов тоже выключен
+os.environ.setdefault("MCP_WEATHER_GAZETTEER", "off")
+os.environ.setdefault("MCP_WEATHER_CITY_INDEX", "off")
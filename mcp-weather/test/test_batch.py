@@ -0,0 +1,194 @@
+"""
+Тесты сравнения погоды в нескольких городах
+"""
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Добавляем родительскую папку в path для импорта server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INTERNAL_ERROR, INVALID_PARAMS
+
+import server
+from mcp_common.cache import CacheSettings, TieredCache
+from server import (
+    batch_key,
+    format_weather_batch,
+    get_real_weather_batch,
+    get_weather_batch,
+    get_weather_data_batch,
+)
+
+
+COORDINATES = {
+    "Москва": (55.75222, 37.61556),
+    "Сочи": (43.59917, 39.72569),
+    "Мурманск": (68.97917, 33.09251),
+}
+
+
+def location(latitude, longitude, temperature):
+    """Ответ Open-Meteo для одной точки"""
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": {
+            "time": "2026-10-17T12:00",
+            "temperature_2m": temperature,
+            "relative_humidity_2m": 70,
+            "weather_code": 3,
+            "wind_speed_10m": 4.0,
+            "surface_pressure": 1012.0,
+        },
+        "daily": {
+            "time": ["2026-10-17"],
+            "weather_code": [3],
+            "temperature_2m_max": [temperature + 2],
+            "temperature_2m_min": [temperature - 4],
+            "precipitation_probability_max": [None],
+            "wind_speed_10m_max": [6.0],
+        },
+    }
+
+
+def forecast_api(*locations):
+    """Мок HTTP клиента с ответом на запрос нескольких точек"""
+    response = Mock()
+    response.json.return_value = list(locations)
+    response.raise_for_status.return_value = None
+    client = Mock()
+    client.get = AsyncMock(return_value=response)
+    return client
+
+
+async def coordinates(city):
+    return COORDINATES.get(city)
+
+
+@pytest.fixture
+def weather_cache(tmp_path, monkeypatch):
+    """Включенный кеш сервера во временной папке"""
+    cache = TieredCache("weather", CacheSettings(directory=str(tmp_path)))
+    monkeypatch.setattr(server, "cache", cache)
+    return cache
+
+
+class TestWeatherDataBatch:
+    """Тесты запроса прогнозов нескольких точек"""
+
+    @pytest.mark.asyncio
+    async def test_single_request(self):
+        """Все точки - одним запросом со списками координат"""
+        client = forecast_api(location(55.8, 37.6, 5.0), location(43.6, 39.7, 17.0))
+
+        with patch("server.get_http_client", return_value=client):
+            result = await get_weather_data_batch(
+                [COORDINATES["Москва"], COORDINATES["Сочи"]]
+            )
+
+        client.get.assert_called_once()
+        params = client.get.call_args.kwargs["params"]
+        assert params["latitude"] == "55.8,43.6"
+        assert params["longitude"] == "37.6,39.7"
+        assert [data["current"]["temperature_2m"] for data in result] == [5.0, 17.0]
+
+    @pytest.mark.asyncio
+    async def test_missing_locations(self):
+        """Ответ с меньшим числом точек - понятная ошибка, а не KeyError"""
+        client = forecast_api(location(55.8, 37.6, 5.0))
+
+        with patch("server.get_http_client", return_value=client):
+            with pytest.raises(McpError) as exc_info:
+                await get_weather_data_batch(
+                    [COORDINATES["Москва"], COORDINATES["Сочи"]]
+                )
+
+        assert exc_info.value.error.code == INTERNAL_ERROR
+        assert "для 1 точек из 2" in exc_info.value.error.message
+
+    @pytest.mark.asyncio
+    async def test_cached_cells_skipped(self, weather_cache):
+        """Ячейки из кеша прогнозов не запрашиваются повторно"""
+        first = forecast_api(location(55.8, 37.6, 5.0))
+        second = forecast_api(location(43.6, 39.7, 17.0))
+
+        with patch("server.get_http_client", return_value=first):
+            await get_weather_data_batch([COORDINATES["Москва"]])
+        with patch("server.get_http_client", return_value=second):
+            result = await get_weather_data_batch(
+                [COORDINATES["Москва"], COORDINATES["Сочи"]]
+            )
+
+        assert second.get.call_args.kwargs["params"]["latitude"] == "43.6"
+        assert [data["current"]["temperature_2m"] for data in result] == [5.0, 17.0]
+
+
+class TestWeatherBatch:
+    """Тесты инструмента get_weather_batch"""
+
+    @pytest.mark.asyncio
+    async def test_compare_cities(self):
+        """Погода по городам, самый теплый и ненайденные города"""
+        client = forecast_api(
+            location(55.8, 37.6, 5.0),
+            location(43.6, 39.7, 17.0),
+            location(69.0, 33.1, -3.0),
+        )
+
+        with patch("server.get_city_coordinates", side_effect=coordinates), \
+             patch("server.get_http_client", return_value=client):
+            data = await get_real_weather_batch(
+                ["Москва", "Сочи", "Мурманск", "Атлантида"]
+            )
+
+        assert [city["city"] for city in data["cities"]] == [
+            "Москва", "Сочи", "Мурманск"
+        ]
+        assert data["not_found"] == ["Атлантида"]
+        assert data["cities"][1]["coordinates"] == {
+            "latitude": 43.59917, "longitude": 39.72569
+        }
+
+        text = format_weather_batch(data)
+        assert "🔥 Теплее всего: Сочи (17°C)" in text
+        assert "❄️ Холоднее всего: Мурманск (-3°C)" in text
+        assert "❓ Не найдены: Атлантида" in text
+
+    @pytest.mark.asyncio
+    async def test_nothing_found(self):
+        """Ни одного найденного города - ошибка параметров"""
+        with patch("server.get_city_coordinates", side_effect=coordinates):
+            with pytest.raises(McpError) as exc_info:
+                await get_real_weather_batch(["Атлантида"])
+
+        assert exc_info.value.error.code == INVALID_PARAMS
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cities", [[], ["  "], [
+        f"Город {i}" for i in range(server.MAX_BATCH_CITIES + 1)
+    ]])
+    async def test_invalid_cities(self, cities):
+        """Пустой или слишком длинный список отклоняется"""
+        with pytest.raises(McpError) as exc_info:
+            await get_weather_batch(cities)
+
+        assert exc_info.value.error.code == INVALID_PARAMS
+
+    @pytest.mark.asyncio
+    async def test_duplicates_ignore_case(self):
+        """Повторы с другим регистром и пробелами - один город"""
+        client = forecast_api(location(55.8, 37.6, 5.0))
+
+        with patch("server.get_city_coordinates", side_effect=coordinates) as geocode, \
+             patch("server.get_http_client", return_value=client):
+            text = await get_weather_batch(["Москва", "москва", " Москва  ", ""])
+
+        geocode.assert_awaited_once_with("Москва")
+        assert "в 1 городах" in text
+        assert batch_key({"cities": ["Москва", "МОСКВА ", "москва"]}) == {
+            "cities": ["москва"]
+        }
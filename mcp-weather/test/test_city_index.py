@@ -0,0 +1,142 @@
+"""
+Тесты индекса названий городов
+"""
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Добавляем родительскую папку в path для импорта server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from city_index import CITIES, CityIndex, distance, reset_city_index
+from gazetteer import Place
+from server import get_city_coordinates
+
+
+NOVOSIBIRSK = (55.0415, 82.9346)
+
+
+@pytest.fixture
+def index():
+    return CityIndex(CITIES)
+
+
+@pytest.fixture
+def city_index(monkeypatch):
+    """Индекс процесса из встроенных городов"""
+    monkeypatch.setenv("MCP_WEATHER_CITY_INDEX", "on")
+    reset_city_index()
+    yield
+    reset_city_index()
+
+
+def geocoding_client(results):
+    """Мок HTTP клиента с ответом Geocoding API"""
+    response = Mock()
+    response.json.return_value = {"results": results}
+    response.raise_for_status.return_value = None
+    client = Mock()
+    client.get = AsyncMock(return_value=response)
+    return client
+
+
+class TestDistance:
+    """Тесты расстояния редактирования"""
+
+    @pytest.mark.parametrize("a, b, expected", [
+        ("moskva", "moskva", 0),
+        ("moskwa", "moskva", 1),
+        ("ekaterinbrug", "ekaterinburg", 1),
+        ("novosibrsk", "novosibirsk", 1),
+        ("", "omsk", 4),
+        ("omsk", "tomsk", 1),
+    ])
+    def test_distance(self, a, b, expected):
+        assert distance(a, b) == expected
+
+    def test_limit(self):
+        """Больше limit правок - limit + 1"""
+        assert distance("london", "moscow", limit=2) == 3
+        assert distance("moskwa", "moskva", limit=2) == 1
+
+
+class TestCityIndex:
+    """Тесты поиска по индексу"""
+
+    @pytest.mark.parametrize("name, expected", [
+        ("Moskva", "Moscow"),
+        ("Санкт Петербург", "Saint Petersburg"),
+        ("питер", "Saint Petersburg"),
+        ("NYC", "New York City"),
+        ("Нью-Йорк", "New York City"),
+    ])
+    def test_aliases(self, index, name, expected):
+        """Псевдонимы и названия на других языках - точные совпадения"""
+        match = index.resolve(name)
+
+        assert match.place.name == expected
+        assert match.exact
+
+    @pytest.mark.parametrize("name, expected", [
+        ("Novosibrsk", "Novosibirsk"),
+        ("Ekaterinbrug", "Yekaterinburg"),
+        ("Moskwa", "Moscow"),
+        ("Санкт-Питербург", "Saint Petersburg"),
+    ])
+    def test_typos(self, index, name, expected):
+        """Опечатки исправляются с уверенностью меньше 1"""
+        match = index.resolve(name)
+
+        assert match.place.name == expected
+        assert 0.75 <= match.confidence < 1
+
+    def test_unknown(self, index):
+        """Незнакомые и короткие названия не угадываются"""
+        assert index.resolve("Томск") is None
+        assert index.resolve("Xyzzyville") is None
+        assert index.resolve("") is None
+
+    def test_population_ranking(self):
+        """Одноименные города - больший по населению"""
+        index = CityIndex([
+            (Place("Paris", 33.66094, -95.55551, "US", 24171), ()),
+            (Place("Paris", 48.85341, 2.3488, "FR", 2138551), ()),
+        ])
+
+        assert index.resolve("Pariss").place.country == "FR"
+
+
+class TestCoordinates:
+    """Тесты геокодирования через индекс"""
+
+    @pytest.mark.asyncio
+    async def test_alias_without_api(self, city_index):
+        """Псевдоним разрешается без запроса к API"""
+        with patch("server.get_http_client") as mock_client:
+            result = await get_city_coordinates("Новосиб")
+
+        assert result == NOVOSIBIRSK
+        mock_client.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_typo_prefers_api(self, city_index):
+        """Без справочника исправление опечатки уступает ответу API"""
+        client = geocoding_client([{"latitude": 1.0, "longitude": 2.0}])
+
+        with patch("server.get_http_client", return_value=client):
+            result = await get_city_coordinates("Novosibrsk")
+
+        assert result == (1.0, 2.0)
+
+    @pytest.mark.asyncio
+    async def test_typo_on_api_miss(self, city_index):
+        """Город не найден API - используется исправление опечатки"""
+        client = geocoding_client([])
+
+        with patch("server.get_http_client", return_value=client):
+            result = await get_city_coordinates("Novosibrsk")
+
+        assert result == NOVOSIBIRSK
+        client.get.assert_called_once()
@@ -0,0 +1,143 @@
+"""
+Тесты кеша прогнозов по ячейкам сетки модели
+"""
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Добавляем родительскую папку в path для импорта server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import forecast
+import server
+from mcp_common.cache import CacheSettings, TieredCache
+from server import get_weather_data
+
+
+WEEK = {
+    "latitude": 55.8,
+    "longitude": 37.6,
+    "current": {"time": "2026-10-17T12:00", "temperature_2m": 5.0},
+    "daily": {
+        "time": [f"2026-10-{day}" for day in range(17, 24)],
+        "temperature_2m_max": [7.0, 8.0, 6.5, 5.0, 4.0, 6.0, 9.0],
+    },
+}
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Задает переменные MCP_WEATHER_* на время теста"""
+    def configure(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(f"MCP_WEATHER_{name.upper()}", str(value))
+        forecast.reset_settings()
+
+    yield configure
+    forecast.reset_settings()
+
+
+@pytest.fixture
+def weather_cache(tmp_path, monkeypatch):
+    """Включенный кеш сервера во временной папке"""
+    cache = TieredCache("weather", CacheSettings(directory=str(tmp_path)))
+    monkeypatch.setattr(server, "cache", cache)
+    return cache
+
+
+@pytest.fixture
+def api():
+    """Мок Open-Meteo API с недельным прогнозом"""
+    response = Mock()
+    response.json.return_value = WEEK
+    response.raise_for_status.return_value = None
+    client = Mock()
+    client.get = AsyncMock(return_value=response)
+    with patch("server.get_http_client", return_value=client):
+        yield client
+
+
+class TestGrid:
+    """Тесты ячеек сетки"""
+
+    def test_snap(self, settings):
+        """Соседние точки попадают в одну ячейку"""
+        settings(grid=0.1)
+
+        assert forecast.snap(55.7558, 37.6176) == (55.8, 37.6)
+        assert forecast.snap(55.75222, 37.61556) == (55.8, 37.6)
+        assert forecast.snap(-33.86785, 151.20732) == (-33.9, 151.2)
+
+    def test_no_snap(self, settings):
+        """MCP_WEATHER_GRID=0 оставляет координаты как есть"""
+        settings(grid=0)
+
+        assert forecast.snap(55.7558, 37.6176) == (55.7558, 37.6176)
+
+    def test_horizon(self):
+        """Прогноз берется из запроса минимум на неделю"""
+        assert forecast.horizon(1) == forecast.horizon(7) == 7
+        assert forecast.horizon(10) == 10
+        assert forecast.horizon(30) == 16
+
+
+class TestExpiry:
+    """Тесты времени жизни по обновлениям модели"""
+
+    def test_next_update(self, settings):
+        """Запись живет до границы интервала обновления модели"""
+        settings(model_interval=3600, model_delay=0)
+
+        assert forecast.next_update(7200) == 10800
+        assert forecast.next_update(7201) == 10800
+        assert forecast.ttl(10000) == 800
+
+    def test_publication_delay(self, settings):
+        """Прогон публикуется с задержкой после начала интервала"""
+        settings(model_interval=6 * 3600, model_delay=4 * 3600)
+
+        # Прогон 00 UTC доступен в 04:00, следующий (06 UTC) - в 10:00
+        assert forecast.next_update(3 * 3600) == 4 * 3600
+        assert forecast.next_update(5 * 3600) == 10 * 3600
+
+    def test_trim(self):
+        """Срез не меняет закешированный ответ"""
+        today = forecast.trim(WEEK, 1)
+
+        assert today["daily"]["time"] == ["2026-10-17"]
+        assert today["current"] is WEEK["current"]
+        assert len(WEEK["daily"]["time"]) == 7
+
+
+class TestForecastCache:
+    """Тесты кеша в get_weather_data"""
+
+    @pytest.mark.asyncio
+    async def test_today_and_week_share_fetch(self, settings, weather_cache, api):
+        """Сегодня и неделя для соседних точек - один запрос к API"""
+        settings(grid=0.1)
+
+        today = await get_weather_data(55.7558, 37.6176, 1)
+        week = await get_weather_data(55.75222, 37.61556, 7)
+
+        api.get.assert_called_once()
+        params = api.get.call_args.kwargs["params"]
+        assert (params["latitude"], params["longitude"]) == (55.8, 37.6)
+        assert params["forecast_days"] == 7
+        assert len(today["daily"]["time"]) == 1
+        assert week == WEEK
+
+    @pytest.mark.asyncio
+    async def test_expires_with_model_update(self, settings, weather_cache, api):
+        """Запись истекает на следующем обновлении модели"""
+        settings(model_interval=3600)
+
+        with patch("time.time", return_value=7000.0):
+            await get_weather_data(55.7558, 37.6176, 1)
+            _, expires_at = weather_cache.memory.get(
+                forecast.cache_key(55.8, 37.6, 7)
+            )
+
+        assert expires_at == 7200
@@ -0,0 +1,186 @@
+"""
+Тесты локального справочника городов
+"""
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+# Добавляем родительскую папку в path для импорта server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gazetteer
+from city_index import get_city_index, reset_city_index
+from gazetteer import Gazetteer, build, normalize, reset_gazetteer
+from server import get_city_coordinates
+
+
+def geonames_row(
+    geonameid, name, alternates, latitude, longitude, country, population,
+    feature_class="P",
+):
+    """Строка выгрузки GeoNames (19 полей через TAB)"""
+    fields = [
+        str(geonameid), name, name, ",".join(alternates),
+        str(latitude), str(longitude), feature_class, "PPL", country,
+        "", "", "", "", "", str(population), "", "150", "Europe/Moscow",
+        "2024-01-01",
+    ]
+    return "\t".join(fields) + "\n"
+
+
+DUMP = "".join([
+    geonames_row(524901, "Moscow", ["Москва", "Moskau", "Moskva",
+                 "https://en.wikipedia.org/wiki/Moscow"],
+                 55.75222, 37.61556, "RU", 10381222),
+    geonames_row(4601471, "Moscow", ["Москоу"], 46.73239, -117.00017,
+                 "US", 25435),
+    geonames_row(498817, "Saint Petersburg", ["Санкт-Петербург", "Питер"],
+                 59.93863, 30.31413, "RU", 5351935),
+    geonames_row(1496747, "Novosibirsk", ["Новосибирск"],
+                 55.0415, 82.9346, "RU", 1612833),
+    geonames_row(1496153, "Omsk", ["Омск"], 54.99244, 73.36859, "RU", 1129281),
+    # Не населенный пункт
+    geonames_row(1, "Moscow Hill", ["Москва"], 0.0, 0.0, "RU", 99999999,
+                 feature_class="T"),
+])
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    source = tmp_path / "cities.txt"
+    source.write_text(DUMP, encoding="utf-8")
+    path = tmp_path / "gazetteer.bin"
+    build(str(source), str(path))
+    return path
+
+
+@pytest.fixture
+def index(index_path):
+    index = Gazetteer(str(index_path))
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def local_index(index_path, monkeypatch):
+    """Справочник процесса из тестовой выгрузки"""
+    monkeypatch.setenv("MCP_WEATHER_GAZETTEER", str(index_path))
+    monkeypatch.setenv("MCP_WEATHER_CITY_INDEX", "on")
+    reset_gazetteer()
+    reset_city_index()
+    yield gazetteer.get_gazetteer()
+    reset_gazetteer()
+    reset_city_index()
+
+
+class TestNormalize:
+    """Тесты ключей поиска"""
+
+    def test_spelling_variants(self):
+        """Регистр, ё, дефисы и пробелы не различаются"""
+        assert normalize("Санкт-Петербург") == normalize(" санкт  петербург ")
+        assert normalize("Орёл") == normalize("орел")
+
+
+class TestGazetteer:
+    """Тесты поиска по справочнику"""
+
+    def test_build(self, index):
+        """Только населенные пункты, URL среди названий пропускаются"""
+        assert index.places == 5
+        assert index.exact("https://en.wikipedia.org/wiki/Moscow") == []
+
+    def test_multilingual_exact(self, index):
+        """Место находится по названию на любом языке"""
+        for name in ("Москва", "moskau", "MOSKVA"):
+            place = index.exact(name, limit=1)[0]
+            assert (place.name, place.country) == ("Moscow", "RU")
+            assert (place.latitude, place.longitude) == (55.75222, 37.61556)
+
+        assert index.exact("санкт петербург")[0].name == "Saint Petersburg"
+        assert index.exact("Лондон") == []
+
+    def test_population_ranking(self, index):
+        """Одноименные места - по убыванию населения"""
+        places = index.exact("Moscow")
+
+        assert [place.country for place in places] == ["RU", "US"]
+        assert places[0].population == 10381222
+
+    def test_prefix(self, index):
+        """Префикс на любом языке, результаты по населению"""
+        places = index.prefix("мос")
+
+        assert [place.country for place in places] == ["RU", "US"]
+        assert [p.name for p in index.prefix("o")] == ["Omsk"]
+        assert index.prefix("Ново", limit=1)[0].name == "Novosibirsk"
+
+    def test_not_gazetteer(self, tmp_path):
+        """Чужой файл не открывается"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"\0" * 64)
+
+        with pytest.raises(ValueError):
+            Gazetteer(str(path))
+
+
+class TestCoordinates:
+    """Тесты геокодирования через справочник"""
+
+    @pytest.mark.asyncio
+    async def test_local_hit(self, local_index):
+        """Город из справочника разрешается без запроса к API"""
+        with patch("server.get_http_client") as mock_client:
+            result = await get_city_coordinates("Омск")
+
+        assert result == (54.99244, 73.36859)
+        mock_client.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_api_fallback(self, local_index):
+        """Промах справочника - запрос к Geocoding API"""
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            "results": [{"latitude": 52.2, "longitude": 0.11667}]
+        }
+        mock_response.raise_for_status.return_value = None
+
+        with patch("server.get_http_client") as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
+            result = await get_city_coordinates("Кембридж")
+
+        assert result == (52.2, 0.11667)
+        mock_client.return_value.get.assert_called_once()
+
+    def test_missing_index(self, tmp_path, monkeypatch, capsys):
+        """Недоступный справочник не мешает работе через API"""
+        monkeypatch.setenv("MCP_WEATHER_GAZETTEER", str(tmp_path / "none.bin"))
+        reset_gazetteer()
+
+        assert gazetteer.get_gazetteer() is None
+        output = capsys.readouterr()
+        assert "⚠️" in output.err
+        assert output.out == ""
+        reset_gazetteer()
+
+    def test_status_on_stderr(self, index_path, monkeypatch, capsys):
+        """Сообщения о справочнике не попадают в stdout (протокол stdio)"""
+        monkeypatch.setenv("MCP_WEATHER_GAZETTEER", str(index_path))
+        reset_gazetteer()
+
+        assert gazetteer.get_gazetteer() is not None
+        output = capsys.readouterr()
+        assert "📚" in output.err
+        assert output.out == ""
+        reset_gazetteer()
+
+    def test_city_index_status_on_stderr(self, local_index, capsys):
+        """Сообщение о сборке индекса названий - тоже в stderr"""
+        capsys.readouterr()
+
+        assert get_city_index() is not None
+        output = capsys.readouterr()
+        assert "🔤" in output.err
+        assert output.out == ""
@@ -0,0 +1,192 @@
+"""
+Тесты почасового прогноза
+"""
+import math
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import numpy as np
+import pytest
+
+# Добавляем родительскую папку в path для импорта server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.shared.exceptions import McpError
+from mcp.types import INTERNAL_ERROR, INVALID_PARAMS
+
+from hourly import GoodWeather, aggregate, good_weather_windows, parse_hourly
+from server import get_hourly_forecast, get_real_hourly_forecast
+
+
+def hours(days, start="2026-10-17"):
+    """Метки времени days суток с полуночи"""
+    return [
+        f"{day}T{hour:02d}:00"
+        for day in np.arange(
+            np.datetime64(start), np.datetime64(start) + days
+        ).astype(str).tolist()
+        for hour in range(24)
+    ]
+
+
+def hourly_response(days=2):
+    """Ответ Open-Meteo: ясные теплые дни с дождем вечером первого дня"""
+    time = hours(days)
+    temperature = [
+        10.0 + 10 * math.sin(math.pi * (i % 24 - 6) / 12) for i in range(len(time))
+    ]
+    precipitation = [0.0] * len(time)
+    precipitation[18:21] = [1.5, 2.0, 0.5]
+    return {
+        "latitude": 55.8,
+        "longitude": 37.6,
+        "hourly": {
+            "time": time,
+            "temperature_2m": temperature,
+            "precipitation": precipitation,
+            "precipitation_probability": [10] * len(time),
+            "wind_speed_10m": [3.0] * len(time),
+            "weather_code": [
+                61 if value else 1 for value in precipitation
+            ],
+            "is_day": [int(7 <= i % 24 < 19) for i in range(len(time))],
+        },
+    }
+
+
+class TestAggregate:
+    """Тесты агрегатов по периодам"""
+
+    def test_days(self):
+        """Сутки: экстремумы, среднее и сумма осадков"""
+        rows = aggregate(parse_hourly(hourly_response()), "day")
+
+        assert [row["start"] for row in rows] == ["2026-10-17", "2026-10-18"]
+        assert rows[0]["temperature"] == {"min": 0.0, "max": 20.0, "mean": 10.0}
+        assert rows[0]["precipitation"] == 4.0
+        assert rows[0]["weather_code"] == 61
+        assert rows[1]["precipitation"] == 0.0
+        assert rows[1]["weather_code"] == 1
+
+    def test_parts(self):
+        """Четверти суток с названиями"""
+        rows = aggregate(parse_hourly(hourly_response(1)), "part")
+
+        assert [row["label"] for row in rows] == ["ночь", "утро", "день", "вечер"]
+        assert rows[2]["start"] == "2026-10-17T12:00"
+        assert rows[3]["precipitation"] == 4.0
+
+    def test_missing_values(self):
+        """Пропуски не портят агрегаты, пустой период - None"""
+        data = hourly_response(2)
+        data["hourly"]["temperature_2m"][:24] = [None] * 23 + [5.0]
+        data["hourly"]["precipitation_probability"] = [None] * 48
+
+        rows = aggregate(parse_hourly(data), "day")
+
+        assert rows[0]["temperature"] == {"min": 5.0, "max": 5.0, "mean": 5.0}
+        assert rows[1]["precipitation_chance"] is None
+
+    def test_first_days(self):
+        """Срез по суткам от начала прогноза"""
+        forecast = parse_hourly(hourly_response(7)).first_days(3)
+
+        assert len(forecast) == 72
+        assert len(forecast.values["temperature_2m"]) == 72
+
+    def test_no_hourly_block(self):
+        """Ответ без блока hourly - понятная ошибка, а не KeyError"""
+        data = hourly_response()
+        del data["hourly"]
+
+        with pytest.raises(McpError) as exc_info:
+            parse_hourly(data)
+
+        assert exc_info.value.error.code == INTERNAL_ERROR
+
+
+class TestGoodWeather:
+    """Тесты окон хорошей погоды"""
+
+    def test_windows(self):
+        """Теплые светлые часы без дождя"""
+        windows = good_weather_windows(parse_hourly(hourly_response()))
+
+        # 15°C и выше - с 8 до 16 часов включительно
+        assert [(w["start"], w["end"], w["hours"]) for w in windows] == [
+            ("2026-10-17T08:00", "2026-10-17T17:00", 9),
+            ("2026-10-18T08:00", "2026-10-18T17:00", 9),
+        ]
+        assert windows[0]["temperature_mean"] > 15
+
+    def test_criteria(self):
+        """Ветер и дождь исключают часы, короткие окна отбрасываются"""
+        data = hourly_response(1)
+        data["hourly"]["wind_speed_10m"][12] = 12.0
+        data["hourly"]["precipitation"][9] = 0.2
+
+        windows = good_weather_windows(
+            parse_hourly(data), GoodWeather(min_hours=2)
+        )
+
+        assert [(w["start"], w["hours"]) for w in windows] == [
+            ("2026-10-17T10:00", 2),
+            ("2026-10-17T13:00", 4),
+        ]
+
+    def test_missing_hours_not_good(self):
+        """Час без данных не считается хорошим"""
+        data = hourly_response(1)
+        data["hourly"]["temperature_2m"][12] = None
+
+        windows = good_weather_windows(parse_hourly(data))
+
+        assert [w["hours"] for w in windows] == [4, 4]
+
+
+class TestHourlyForecastTool:
+    """Тесты инструмента get_hourly_forecast"""
+
+    @pytest.mark.asyncio
+    async def test_forecast(self):
+        """Прогноз с агрегатами по суткам и текстом"""
+        response = Mock()
+        response.json.return_value = hourly_response(7)
+        response.raise_for_status.return_value = None
+        client = Mock()
+        client.get = AsyncMock(return_value=response)
+
+        with patch("server.get_city_coordinates",
+                   AsyncMock(return_value=(55.75222, 37.61556))), \
+             patch("server.get_http_client", return_value=client):
+            data = await get_real_hourly_forecast("москва", 2, "day", 15, 28)
+            text = await get_hourly_forecast("москва", days=2)
+
+        params = client.get.call_args.kwargs["params"]
+        assert params["forecast_days"] == 7
+        assert params["wind_speed_unit"] == "ms"
+        assert "is_day" in params["hourly"]
+
+        assert data["city"] == "Москва"
+        assert data["hours"] == 48
+        assert len(data["periods"]) == 2
+        assert len(data["good_weather"]) == 2
+
+        assert "⏱️ Почасовой прогноз на 2 дн. для города Москва" in text
+        assert "🕒 2026-10-17T08:00 - 2026-10-17T17:00" in text
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("arguments", [
+        {"city": ""},
+        {"city": "Москва", "days": 0},
+        {"city": "Москва", "days": 17},
+        {"city": "Москва", "period": "week"},
+        {"city": "Москва", "min_temperature": 30, "max_temperature": 20},
+    ])
+    async def test_invalid_arguments(self, arguments):
+        """Неверные параметры отклоняются"""
+        with pytest.raises(McpError) as exc_info:
+            await get_hourly_forecast(**arguments)
+
+        assert exc_info.value.error.code == INVALID_PARAMS
@@ -6,7 +6,7 @@ Pytest тесты для MCP сервера погоды с Open-Meteo API ин
 import pytest
 import sys
 import os
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 
 # Добавляем родительскую папку в path для импорта server.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -72,12 +72,12 @@ class TestCityCoordinates:
     @pytest.mark.asyncio
     async def test_get_city_coordinates_success(self):
         """Тест успешного получения координат"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = MOCK_GEOCODING_RESPONSE
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_city_coordinates("Moscow")
             
@@ -87,12 +87,12 @@ class TestCityCoordinates:
     @pytest.mark.asyncio
     async def test_get_city_coordinates_not_found(self):
         """Тест когда город не найден"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = {"results": []}
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_city_coordinates("UnknownCity")
             
@@ -101,8 +101,8 @@ class TestCityCoordinates:
     @pytest.mark.asyncio
     async def test_get_city_coordinates_http_error(self):
         """Тест обработки HTTP ошибки"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = httpx.HTTPStatusError(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.side_effect = httpx.HTTPStatusError(
                 "404 Not Found", 
                 request=Mock(), 
                 response=Mock()
@@ -119,12 +119,12 @@ class TestWeatherData:
     @pytest.mark.asyncio
     async def test_get_weather_data_success(self):
         """Тест успешного получения данных о погоде"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = MOCK_WEATHER_RESPONSE
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             result = await get_weather_data(55.7558, 37.6176, 3)
             
@@ -133,8 +133,8 @@ class TestWeatherData:
     @pytest.mark.asyncio
     async def test_get_weather_data_http_error(self):
         """Тест обработки HTTP ошибки при получении погоды"""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = httpx.HTTPStatusError(
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+            mock_client.return_value.get.side_effect = httpx.HTTPStatusError(
                 "500 Internal Server Error",
                 request=Mock(),
                 response=Mock()
@@ -303,7 +303,7 @@ class TestIntegration:
     @pytest.mark.asyncio
     async def test_full_weather_flow(self):
         """Тест полного потока получения погоды"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             # Настраиваем моки для двух вызовов: геокодирование и погода
             mock_responses = [
                 Mock(json=lambda: MOCK_GEOCODING_RESPONSE),
@@ -313,7 +313,7 @@ class TestIntegration:
             for mock_response in mock_responses:
                 mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.side_effect = mock_responses
+            mock_client.return_value.get.side_effect = mock_responses
             
             result = await get_today_weather("Moscow")
             
@@ -344,12 +344,12 @@ class TestEdgeCases:
     @pytest.mark.asyncio
     async def test_unicode_city_names(self):
         """Тест с unicode названиями городов"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
             mock_response = Mock()
             mock_response.json.return_value = MOCK_GEOCODING_RESPONSE
             mock_response.raise_for_status.return_value = None
             
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
+            mock_client.return_value.get.return_value = mock_response
             
             # Тестируем различные unicode символы
             unicode_cities = ["Москва", "北京", "العربية", "München"]
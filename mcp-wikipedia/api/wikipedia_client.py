@@ -3,6 +3,11 @@ import httpx
 import re
 from urllib.parse import quote
 
+from mcp_common.hedging import HedgeError, hedge_delay, hedged
+from mcp_common.http_client import get_http_client
+from mcp_common.singleflight import single_flight
+from mcp_common.tracing import span, traced
+
 
 class WikipediaSearcher:
     """Класс для работы с Wikipedia API"""
@@ -12,6 +17,7 @@ class WikipediaSearcher:
         self.search_url = "https://ru.wikipedia.org/w/api.php"
         self.timeout = 10
         
+    @single_flight
     async def search_articles(self, query: str, limit: int = 10, language: str = "ru") -> List[Dict]:
         """
         Поиск статей в Wikipedia
@@ -36,33 +42,34 @@ class WikipediaSearcher:
             'utf8': 1
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(search_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'query' in data and 'search' in data['query']:
-                    results = []
-                    for item in data['query']['search']:
-                        # Очищаем snippet от HTML тегов
-                        snippet = re.sub(r'<[^>]+>', '', item.get('snippet', ''))
-                        
-                        results.append({
-                            'title': item.get('title', ''),
-                            'snippet': snippet,
-                            'url': f"https://{language}.wikipedia.org/wiki/{quote(item.get('title', ''))}",
-                            'size': item.get('size', 0),
-                            'timestamp': item.get('timestamp', ''),
-                            'language': language
-                        })
-                    return results
-                return []
-                
-            except Exception as e:
-                print(f"Ошибка поиска в Wikipedia: {e}")
-                return []
-    
+        client = get_http_client()
+        try:
+            response = await client.get(search_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            
+            if 'query' in data and 'search' in data['query']:
+                results = []
+                for item in data['query']['search']:
+                    # Очищаем snippet от HTML тегов
+                    snippet = re.sub(r'<[^>]+>', '', item.get('snippet', ''))
+                    
+                    results.append({
+                        'title': item.get('title', ''),
+                        'snippet': snippet,
+                        'url': f"https://{language}.wikipedia.org/wiki/{quote(item.get('title', ''))}",
+                        'size': item.get('size', 0),
+                        'timestamp': item.get('timestamp', ''),
+                        'language': language
+                    })
+                return results
+            return []
+            
+        except Exception as e:
+            print(f"Ошибка поиска в Wikipedia: {e}")
+            return []
+
+    @single_flight
     async def get_article_summary(self, title: str, language: str = "ru") -> Optional[Dict]:
         """
         Получить краткое содержание статьи
@@ -76,26 +83,27 @@ class WikipediaSearcher:
         """
         summary_url = f"https://{language}.wikipedia.org/api/rest_v1/page/summary/{quote(title)}"
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(summary_url)
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    'title': data.get('title', ''),
-                    'description': data.get('description', ''),
-                    'extract': data.get('extract', ''),
-                    'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
-                    'thumbnail': data.get('thumbnail', {}).get('source', '') if data.get('thumbnail') else '',
-                    'language': language,
-                    'page_id': data.get('pageid', 0)
-                }
-                
-            except Exception as e:
-                print(f"Ошибка получения статьи {title}: {e}")
-                return None
-    
+        client = get_http_client()
+        try:
+            response = await client.get(summary_url, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            
+            return {
+                'title': data.get('title', ''),
+                'description': data.get('description', ''),
+                'extract': data.get('extract', ''),
+                'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
+                'thumbnail': data.get('thumbnail', {}).get('source', '') if data.get('thumbnail') else '',
+                'language': language,
+                'page_id': data.get('pageid', 0)
+            }
+            
+        except Exception as e:
+            print(f"Ошибка получения статьи {title}: {e}")
+            return None
+
+    @single_flight
     async def get_article_content(self, title: str, language: str = "ru") -> Optional[Dict]:
         """
         Получить полное содержание статьи
@@ -118,25 +126,28 @@ class WikipediaSearcher:
             # Убираем section=0 для получения всех секций статьи
         }
         
-        async with httpx.AsyncClient(timeout=20) as client:
+        client = get_http_client()
+
+        async def via_parse() -> Optional[Dict]:
             try:
                 # Попробуем получить wikitext через parse API
-                response = await client.get(content_url, params=parse_params)
-                response.raise_for_status()
-                parse_data = response.json()
-                
+                with span("wikipedia.parse", title=title, language=language):
+                    response = await client.get(content_url, params=parse_params, timeout=20)
+                    response.raise_for_status()
+                    parse_data = response.json()
+            
                 if 'error' in parse_data:
-                    # Если parse не сработал, используем старый метод
-                    return await self._get_article_via_extracts(title, language, client)
-                
+                    # Если parse не сработал, остается метод через extracts
+                    return None
+            
                 wikitext = parse_data.get('parse', {}).get('wikitext', {}).get('*', '')
-                
+            
                 if not wikitext:
-                    return await self._get_article_via_extracts(title, language, client)
-                
+                    return None
+            
                 # Очищаем wikitext от разметки для получения обычного текста
                 clean_text = self._clean_wikitext(wikitext)
-                
+            
                 # Получаем дополнительную информацию через обычный API
                 info_params = {
                     'action': 'query',
@@ -146,14 +157,15 @@ class WikipediaSearcher:
                     'inprop': 'url',
                     'pithumbsize': 500
                 }
-                
-                info_response = await client.get(content_url, params=info_params)
-                info_response.raise_for_status()
-                info_data = info_response.json()
-                
+            
+                with span("wikipedia.info", title=title, language=language):
+                    info_response = await client.get(content_url, params=info_params, timeout=20)
+                    info_response.raise_for_status()
+                    info_data = info_response.json()
+            
                 pages = info_data.get('query', {}).get('pages', {})
                 page_info = next(iter(pages.values())) if pages else {}
-                
+            
                 return {
                     'title': title,
                     'content': clean_text,
@@ -162,12 +174,25 @@ class WikipediaSearcher:
                     'thumbnail': page_info.get('thumbnail', {}).get('source', '') if page_info.get('thumbnail') else '',
                     'language': language
                 }
-                
+            
             except Exception as e:
                 print(f"Ошибка получения содержания статьи {title}: {e}")
-                # Fallback к старому методу
-                return await self._get_article_via_extracts(title, language, client)
-    
+                return None
+
+        async def via_extracts() -> Optional[Dict]:
+            return await self._get_article_via_extracts(title, language, client)
+
+        # Резервный метод через extracts запускается сразу после неудачи
+        # parse или параллельно, если parse (два запроса подряд) медлит
+        try:
+            return await hedged(
+                "wikipedia-content",
+                [via_parse, via_extracts],
+                delays=2 * hedge_delay(f"{language}.wikipedia.org"),
+            )
+        except HedgeError:
+            return None
+
     async def _get_article_via_extracts(self, title: str, language: str, client: httpx.AsyncClient) -> Optional[Dict]:
         """Резервный метод получения статьи через extracts API"""
         content_url = f"https://{language}.wikipedia.org/w/api.php"
@@ -184,7 +209,7 @@ class WikipediaSearcher:
         }
         
         try:
-            response = await client.get(content_url, params=params)
+            response = await client.get(content_url, params=params, timeout=20)
             response.raise_for_status()
             data = response.json()
             
@@ -210,6 +235,7 @@ class WikipediaSearcher:
             print(f"Резервный метод получения статьи {title} не удался: {e}")
             return None
     
+    @traced("wikipedia.clean_wikitext")
     def _clean_wikitext(self, wikitext: str) -> str:
         """
         Очистка wikitext от разметки для получения читаемого текста
@@ -290,6 +316,7 @@ class WikipediaSearcher:
         
         return text
     
+    @single_flight
     async def get_article_sections(self, title: str, language: str = "ru") -> Optional[Dict]:
         """
         Получить разделы статьи
@@ -310,27 +337,28 @@ class WikipediaSearcher:
             'prop': 'sections'
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(content_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'error' in data:
-                    return None
-                    
-                sections = data.get('parse', {}).get('sections', [])
-                
-                return {
-                    'title': title,
-                    'sections': sections,
-                    'language': language
-                }
-                
-            except Exception as e:
-                print(f"Ошибка получения разделов статьи {title}: {e}")
+        client = get_http_client()
+        try:
+            response = await client.get(content_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            
+            if 'error' in data:
                 return None
-    
+                
+            sections = data.get('parse', {}).get('sections', [])
+            
+            return {
+                'title': title,
+                'sections': sections,
+                'language': language
+            }
+            
+        except Exception as e:
+            print(f"Ошибка получения разделов статьи {title}: {e}")
+            return None
+
+    @single_flight
     async def get_article_links(self, title: str, language: str = "ru") -> Optional[Dict]:
         """
         Получить ссылки из статьи
@@ -353,25 +381,25 @@ class WikipediaSearcher:
             'plnamespace': 0  # Только статьи
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(content_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                pages = data.get('query', {}).get('pages', {})
-                if not pages:
-                    return None
-                    
-                page_data = next(iter(pages.values()))
-                links = page_data.get('links', [])
-                
-                return {
-                    'title': title,
-                    'links': [link.get('title', '') for link in links],
-                    'language': language
-                }
+        client = get_http_client()
+        try:
+            response = await client.get(content_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            
+            pages = data.get('query', {}).get('pages', {})
+            if not pages:
+                return None
                 
-            except Exception as e:
-                print(f"Ошибка получения ссылок статьи {title}: {e}")
-                return None 
\ No newline at end of file
+            page_data = next(iter(pages.values()))
+            links = page_data.get('links', [])
+            
+            return {
+                'title': title,
+                'links': [link.get('title', '') for link in links],
+                'language': language
+            }
+            
+        except Exception as e:
+            print(f"Ошибка получения ссылок статьи {title}: {e}")
+            return None 
\ No newline at end of file
@@ -1,46 +1,77 @@
-import uvicorn
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
-from mcp.server.sse import SseServerTransport
+
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import instrument_tools, metrics_endpoint, track_sse_session
+from mcp_common.profiling import profiling_routes
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
 
 from tools.wikipedia_tools import register_tools
 
 
 # Создаем экземпляр MCP сервера с идентификатором "wikipedia"
 mcp = FastMCP("wikipedia")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
 
 # Регистрируем все MCP инструменты
 register_tools(mcp)
 
 
+# Настройка SSE транспорта
+sse = WorkerSseServerTransport("/messages/")
+
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
+
+
+@limit_sessions(mcp.name)
 async def handle_sse(request: Request):
     """Обработчик SSE соединений для MCP"""
-    sse = SseServerTransport("/messages")
-    return await sse.handle_sse(request, mcp.create_session())
+    _server = mcp._mcp_server
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader,
+                writer,
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
 
 
 def create_server() -> Starlette:
     """Создание Starlette приложения с MCP сервером"""
-    
+
     # Список маршрутов
     routes = [
-        Route("/sse", handle_sse),
-        Mount("/", mcp.create_app())
+        Route("/sse", endpoint=handle_sse),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
     ]
-    
+
     # Создаем приложение
-    app = Starlette(routes=routes)
-    
+    app = Starlette(routes=routes, lifespan=server_lifespan)
+
     return app
 
 
+# Создание Starlette приложения
+app = create_server()
+
+
 if __name__ == "__main__":
-    # Создаем приложение
-    app = create_server()
-    
     # Запускаем сервер
     print("🚀 Запуск MCP Wikipedia сервера на порту 8003...")
     print("📚 Доступные инструменты:")
@@ -51,10 +82,11 @@ if __name__ == "__main__":
     print("   - get_wikipedia_links: Ссылки из статьи")
     print("🌐 Поддерживаемые языки: ru, en, de, fr, es, it, pt, ja, zh")
     print("📡 SSE endpoint: http://localhost:8003/sse")
-    
-    uvicorn.run(
+    print("🔀 Streamable HTTP endpoint: http://localhost:8003/mcp")
+
+    run_server(
         app,
         host="0.0.0.0",
         port=8003,
         log_level="info"
-    ) 
\ No newline at end of file
+    )
@@ -0,0 +1,65 @@
+"""
+Тесты кеширования инструментов Wikipedia
+"""
+import os
+import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# Добавляем путь к серверу в sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp.server.fastmcp import FastMCP
+
+from mcp_common.cache import CacheSettings, TieredCache
+
+import tools.wikipedia_tools as wikipedia_tools
+
+
+@pytest.fixture
+def searcher(tmp_path, monkeypatch):
+    """Инструменты с включенным кешем и замоканным клиентом Wikipedia"""
+    monkeypatch.setattr(
+        wikipedia_tools, "cache",
+        TieredCache("wikipedia", CacheSettings(directory=str(tmp_path))),
+    )
+    client = AsyncMock()
+    with patch.object(wikipedia_tools, "WikipediaSearcher", return_value=client):
+        mcp = FastMCP("test")
+        wikipedia_tools.register_tools(mcp)
+    return mcp, client
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_not_found_article_not_cached(searcher):
+    """Ошибка API ("не найдена") не кешируется, следующий вызов идет в API"""
+    mcp, client = searcher
+    client.get_article_summary.side_effect = [
+        None,
+        {"title": "Python", "extract": "Язык программирования"},
+    ]
+
+    await mcp.call_tool("get_wikipedia_summary", {"title": "Python"})
+    await mcp.call_tool("get_wikipedia_summary", {"title": "Python"})
+    await mcp.call_tool("get_wikipedia_summary", {"title": "Python"})
+
+    # Третий вызов - из кеша
+    assert client.get_article_summary.await_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_empty_search_not_cached(searcher):
+    """Пустая выдача не кешируется"""
+    mcp, client = searcher
+    client.search_articles.side_effect = [
+        [],
+        [{"title": "Python", "snippet": "...", "url": "https://ru.wikipedia.org/wiki/Python"}],
+    ]
+
+    for _ in range(3):
+        await mcp.call_tool("search_wikipedia", {"query": "python"})
+
+    assert client.search_articles.await_count == 2
@@ -1,10 +1,15 @@
+from typing import Dict
+
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import INTERNAL_ERROR, INVALID_PARAMS
 
+from mcp_common.cache import TieredCache
+from mcp_common.results import structured
+
 from api.wikipedia_client import WikipediaSearcher
 from utils.formatters import (
-    format_search_results, 
+    format_search_data, 
     format_article_summary, 
     format_article_content,
     format_article_sections,
@@ -12,6 +17,28 @@ from utils.formatters import (
 )
 
 
+# Кеш ответов инструментов (память + SQLite)
+cache = TieredCache("wikipedia")
+
+
+def title_key(arguments: dict) -> dict:
+    """Заголовки статей различают регистр: нормализуем только пробелы"""
+    return {
+        name: " ".join(value.split()) if isinstance(value, str) else value
+        for name, value in arguments.items()
+    }
+
+
+def has_results(result) -> bool:
+    """Пустую выдачу не кешируем: ошибки Wikipedia API дают пустой список"""
+    return bool(result["results"])
+
+
+def is_found(result) -> bool:
+    """Сообщения "❌ Статья не найдена" не кешируем: ими же оборачиваются ошибки API"""
+    return isinstance(result, dict)
+
+
 def register_tools(mcp: FastMCP):
     """Регистрация всех MCP инструментов"""
     
@@ -19,11 +46,13 @@ def register_tools(mcp: FastMCP):
     wikipedia = WikipediaSearcher()
     
     @mcp.tool()
+    @structured(format_search_data)
+    @cache.cached(ttl=3600, cache_if=has_results)
     async def search_wikipedia(
         query: str, 
         limit: int = 10, 
         language: str = "ru"
-    ) -> str:
+    ) -> Dict:
         """
         Поиск статей в Wikipedia по ключевым словам
         
@@ -46,15 +75,22 @@ def register_tools(mcp: FastMCP):
         
         try:
             results = await wikipedia.search_articles(query, limit, language)
-            return format_search_results(results, query, language)
+            return {
+                "query": query,
+                "language": language,
+                "count": len(results),
+                "results": results,
+            }
         except Exception as e:
             raise McpError(INTERNAL_ERROR, f"Ошибка поиска: {str(e)}")
     
     @mcp.tool()
+    @structured(format_article_summary)
+    @cache.cached(ttl=21600, stale=86400, key=title_key, cache_if=is_found)
     async def get_wikipedia_summary(
         title: str, 
         language: str = "ru"
-    ) -> str:
+    ) -> Dict:
         """
         Получить краткое содержание статьи Wikipedia
         
@@ -76,15 +112,17 @@ def register_tools(mcp: FastMCP):
             if not article:
                 return f"❌ Статья '{title}' не найдена на {language} Wikipedia"
             
-            return format_article_summary(article)
+            return article
         except Exception as e:
             raise McpError(INTERNAL_ERROR, f"Ошибка получения статьи: {str(e)}")
     
     @mcp.tool()
+    @structured(format_article_content)
+    @cache.cached(ttl=21600, key=title_key, cache_if=is_found)
     async def get_wikipedia_content(
         title: str, 
         language: str = "ru"
-    ) -> str:
+    ) -> Dict:
         """
         Получить полное содержание статьи Wikipedia
         
@@ -106,15 +144,17 @@ def register_tools(mcp: FastMCP):
             if not article:
                 return f"❌ Статья '{title}' не найдена на {language} Wikipedia"
             
-            return format_article_content(article)
+            return article
         except Exception as e:
             raise McpError(INTERNAL_ERROR, f"Ошибка получения содержания: {str(e)}")
     
     @mcp.tool()
+    @structured(format_article_sections)
+    @cache.cached(ttl=21600, key=title_key, cache_if=is_found)
     async def get_wikipedia_sections(
         title: str, 
         language: str = "ru"
-    ) -> str:
+    ) -> Dict:
         """
         Получить список разделов статьи Wikipedia
         
@@ -136,15 +176,17 @@ def register_tools(mcp: FastMCP):
             if not sections_data:
                 return f"❌ Статья '{title}' не найдена на {language} Wikipedia"
             
-            return format_article_sections(sections_data)
+            return sections_data
         except Exception as e:
             raise McpError(INTERNAL_ERROR, f"Ошибка получения разделов: {str(e)}")
     
     @mcp.tool()
+    @structured(format_article_links)
+    @cache.cached(ttl=21600, key=title_key, cache_if=is_found)
     async def get_wikipedia_links(
         title: str, 
         language: str = "ru"
-    ) -> str:
+    ) -> Dict:
         """
         Получить список ссылок из статьи Wikipedia на другие статьи
         
@@ -166,6 +208,6 @@ def register_tools(mcp: FastMCP):
             if not links_data:
                 return f"❌ Статья '{title}' не найдена на {language} Wikipedia"
             
-            return format_article_links(links_data)
+            return links_data
         except Exception as e:
             raise McpError(INTERNAL_ERROR, f"Ошибка получения ссылок: {str(e)}") 
\ No newline at end of file
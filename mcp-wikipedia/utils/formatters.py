@@ -19,10 +19,10 @@ def format_search_results(results: List[Dict], query: str, language: str) -> str
             f"{language} Wikipedia"
         )
     
-    formatted = (
+    parts = [
         f"📚 Найдено {len(results)} статей по запросу '{query}' "
         f"(язык: {language}):\n\n"
-    )
+    ]
     
     for i, article in enumerate(results, 1):
         title = article.get('title', 'Без названия')
@@ -34,12 +34,21 @@ def format_search_results(results: List[Dict], query: str, language: str) -> str
         if len(snippet) > 200:
             snippet = snippet[:200] + "..."
         
-        formatted += f"{i}. **{title}**\n"
-        formatted += f"   📖 {snippet}\n"
-        formatted += f"   📏 Размер: {size} байт\n"
-        formatted += f"   🔗 {url}\n\n"
+        parts.append(
+            f"{i}. **{title}**\n"
+            f"   📖 {snippet}\n"
+            f"   📏 Размер: {size} байт\n"
+            f"   🔗 {url}\n\n"
+        )
     
-    return formatted.strip()
+    return "".join(parts).strip()
+
+
+def format_search_data(data: Dict) -> str:
+    """Форматирование результата search_wikipedia"""
+    return format_search_results(
+        data['results'], data['query'], data['language']
+    )
 
 
 def format_article_summary(article: Dict) -> str:
@@ -126,18 +135,19 @@ def format_article_sections(sections_data: Dict) -> str:
     if not sections:
         return f"📚 Статья '{title}' не имеет разделов"
     
-    formatted = f"📚 Разделы статьи '{title}' (язык: {language}):\n\n"
+    parts = [f"📚 Разделы статьи '{title}' (язык: {language}):\n\n"]
     
     for section in sections:
-        level = section.get('level', 1)
+        # API возвращает уровень строкой ("2")
+        level = int(section.get('level', 1))
         line = section.get('line', 'Без названия')
         number = section.get('number', '')
         
         # Создаем отступ в зависимости от уровня
         indent = "  " * (level - 1)
-        formatted += f"{indent}{'#' * level} {number} {line}\n"
+        parts.append(f"{indent}{'#' * level} {number} {line}\n")
     
-    return formatted.strip()
+    return "".join(parts).strip()
 
 
 def format_article_links(links_data: Dict) -> str:
@@ -157,12 +167,12 @@ def format_article_links(links_data: Dict) -> str:
     if not links:
         return f"📚 Статья '{title}' не содержит ссылок на другие статьи"
     
-    formatted = f"🔗 Ссылки из статьи '{title}' (язык: {language}):\n\n"
+    parts = [f"🔗 Ссылки из статьи '{title}' (язык: {language}):\n\n"]
     
     for i, link in enumerate(links[:20], 1):  # Ограничиваем 20 ссылками
-        formatted += f"{i}. {link}\n"
+        parts.append(f"{i}. {link}\n")
     
     if len(links) > 20:
-        formatted += f"\n... и еще {len(links) - 20} ссылок"
+        parts.append(f"\n... и еще {len(links) - 20} ссылок")
     
-    return formatted.strip() 
\ No newline at end of file
+    return "".join(parts).strip() 
\ No newline at end of file
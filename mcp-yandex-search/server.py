@@ -1,16 +1,34 @@
 import base64
 import os
-import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Dict, List
-import httpx
+from typing import Any, Dict, List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route, Mount
 
 from mcp.server.fastmcp import FastMCP
 from mcp.shared.exceptions import McpError
 from mcp.types import INTERNAL_ERROR, INVALID_PARAMS, ErrorData
 
+from mcp_common.http_client import create_http_client, get_http_client
+from mcp_common.cache import TieredCache
+from mcp_common.admission import limit_sessions, limit_tool_calls
+from mcp_common.metrics import instrument_tools, metrics_endpoint, track_sse_session
+from mcp_common.profiling import profiling_routes
+from mcp_common.results import structured
+from mcp_common.streamable import StreamableHttpTransport, server_lifespan
+from mcp_common.tracing import traced
+from mcp_common.workers import SessionAffinity, WorkerSseServerTransport, run_server
+
 # Создаем экземпляр MCP сервера с идентификатором "yandex-search"
 mcp = FastMCP("yandex-search")
+instrument_tools(mcp)
+limit_tool_calls(mcp)
+
+# Кеш ответов инструментов (память + SQLite)
+cache = TieredCache("yandex-search")
 
 
 class YandexSearchAPI:
@@ -67,30 +85,39 @@ class YandexSearchAPI:
         }
         
         try:
-            async with httpx.AsyncClient(
-                timeout=30.0, 
-                verify=self.verify_ssl
-            ) as client:
+            if self.verify_ssl:
+                # Используем общий пул соединений процесса
+                client = get_http_client()
                 response = await client.post(
                     self.base_url,
                     json=body,
-                    headers=headers
+                    headers=headers,
+                    timeout=30.0
                 )
-                
-                if not response.is_success:
-                    raise Exception(
-                        f"Yandex Search API error: "
-                        f"{response.status_code} - {response.text}"
+            else:
+                # Отдельный клиент без проверки SSL (только для разработки)
+                async with create_http_client(verify=False) as client:
+                    response = await client.post(
+                        self.base_url,
+                        json=body,
+                        headers=headers,
+                        timeout=30.0
                     )
+            
+            if not response.is_success:
+                raise Exception(
+                    f"Yandex Search API error: "
+                    f"{response.status_code} - {response.text}"
+                )
+            
+            result = response.json()
+            raw_data = result.get("rawData", "")
+            if not raw_data:
+                raise Exception("No rawData in response")
                 
-                result = response.json()
-                raw_data = result.get("rawData", "")
-                if not raw_data:
-                    raise Exception("No rawData in response")
-                    
-                # Декодируем base64
-                xml_data = base64.b64decode(raw_data).decode('utf-8')
-                return xml_data
+            # Декодируем base64
+            xml_data = base64.b64decode(raw_data).decode('utf-8')
+            return xml_data
                 
         except Exception as e:
             # Специальная обработка SSL ошибок
@@ -108,6 +135,7 @@ class YandexSearchParser:
     """Парсер для XML ответов Yandex Search API"""
     
     @staticmethod
+    @traced("yandex.parse")
     def parse_search_response(xml_data: str) -> List[Dict]:
         """
         Парсит XML ответ от Yandex Search API
@@ -118,6 +146,9 @@ class YandexSearchParser:
         Returns:
             Список словарей с результатами поиска
         """
+        # XML парсер импортируется при первом поиске: ускоряет холодный старт
+        import xml.etree.ElementTree as ET
+
         try:
             root = ET.fromstring(xml_data)
             results = []
@@ -194,24 +225,28 @@ def format_search_results(results: List[Dict], query: str) -> str:
     if not results:
         return f"🔍 Поиск по запросу '{query}' через Yandex не дал результатов"
     
-    formatted = f"""🔍 Yandex Search результаты для запроса "{query}"
+    parts = [f"""🔍 Yandex Search результаты для запроса "{query}"
 
 📊 Найдено результатов: {len(results)}
-"""
+"""]
     
     for i, result in enumerate(results, 1):
         title = result.get('title', 'Без названия')[:150]
         url = result.get('url', '')
-        extended_text = result.get('extended-text', '')        
-        formatted += f"""
+        extended_text = result.get('extended-text', '')
+        parts.append(f"""
 - {i}. {title}
 URL: {url}
 Описание: {extended_text}
-"""
-                
-        formatted += "\n"
+
+""")
     
-    return formatted
+    return "".join(parts)
+
+
+def format_search_data(data: Dict[str, Any]) -> str:
+    """Текст для результата search_web"""
+    return format_search_results(data["results"], data["query"])
 
 
 # Инициализируем API клиент
@@ -229,9 +264,11 @@ except ValueError as e:
 
 
 @mcp.tool()
+@structured(format_search_data)
+@cache.cached(ttl=900)
 async def search_web(
     query: str, page_size: int = 10, page_number: int = 0
-) -> str:
+) -> Dict[str, Any]:
     """
     🔍 Поиск в интернете через Yandex Search API
     
@@ -246,7 +283,8 @@ async def search_web(
         page_number: Номер страницы, начиная с 0 (по умолчанию 0)
     
     Returns:
-        Отформатированные результаты поиска с заголовками, URL и описанием
+        Результаты поиска с заголовками, URL и описанием
+        (текст или JSON, см. MCP_RESULT_FORMAT)
     """
     if not query.strip():
         raise McpError(
@@ -282,8 +320,12 @@ async def search_web(
         # Парсим XML ответ
         results = yandex_parser.parse_search_response(xml_response)
         
-        # Форматируем результаты
-        return format_search_results(results, query)
+        return {
+            "query": query,
+            "page_number": page_number,
+            "count": len(results),
+            "results": results,
+        }
         
     except Exception as e:
         error_msg = f"Ошибка при поиске через Yandex: {str(e)}"
@@ -291,11 +333,52 @@ async def search_web(
         raise McpError(error=ErrorData(code=INVALID_PARAMS, message=error_msg))
 
 
+# Настройка SSE транспорта
+sse = WorkerSseServerTransport("/messages/")
+
+# Streamable HTTP транспорт: вызовы инструментов без постоянной сессии
+streamable = StreamableHttpTransport(mcp)
+
+
+@limit_sessions(mcp.name)
+async def handle_sse(request: Request):
+    """Обработчик SSE соединений"""
+    _server = mcp._mcp_server
+    with track_sse_session(mcp.name):
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send,
+        ) as (reader, writer):
+            await _server.run(
+                reader, 
+                writer, 
+                _server.create_initialization_options()
+            )
+    # Соединение закрыто клиентом - отдаем пустой ответ Starlette
+    return Response()
+
+
+# Создание Starlette приложения
+app = Starlette(
+    debug=True,
+    routes=[
+        Route("/sse", endpoint=handle_sse),
+        Route("/mcp", endpoint=streamable),
+        Route("/metrics", endpoint=metrics_endpoint),
+        *profiling_routes(),
+        Mount("/messages/", app=SessionAffinity(sse.handle_post_message)),
+    ],
+    lifespan=server_lifespan,
+)
+
+
 # Настройка и запуск сервера
 if __name__ == "__main__":
     print("🔍 Запуск MCP сервера Yandex Search...")
     print("📡 Сервер будет доступен по адресу: http://localhost:8006")
     print("🔗 SSE endpoint: http://localhost:8006/sse")
+    print("🔀 Streamable HTTP endpoint: http://localhost:8006/mcp")
     print("📧 Messages endpoint: http://localhost:8006/messages/")
     print("🛠️ Доступные инструменты:")
     print(
@@ -306,13 +389,4 @@ if __name__ == "__main__":
     print("   - YANDEX_FOLDER_ID - ID папки в Yandex Cloud")
     print("🌍 Поиск через официальный Yandex Search API")
     
-    try:
-        # Используем встроенную поддержку SSE в FastMCP 2.0
-        # Порт можно указать через переменную окружения FASTMCP_SERVER_PORT
-        # или через CLI: fastmcp run server.py --transport sse --port 8006
-        mcp.settings.host = "0.0.0.0"
-        mcp.settings.port = 8006
-        mcp.run(transport="sse")
-    except ValueError as e:
-        print(f"❌ Ошибка конфигурации: {e}")
-        exit(1)
\ No newline at end of file
+    run_server(app, host="0.0.0.0", port=8006)
\ No newline at end of file
@@ -1,7 +1,7 @@
 import pytest
 import asyncio
+from contextlib import suppress
 from unittest.mock import patch, MagicMock
-from starlette.testclient import TestClient
 import os
 
 from server import app, mcp
@@ -13,25 +13,30 @@ class TestIntegration:
     def test_app_creation(self):
         """Тест создания Starlette приложения"""
         assert app is not None
-        assert len(app.routes) == 2  # SSE route и Messages mount
+        paths = [route.path for route in app.routes]
+        # SSE, Streamable HTTP, метрики, профилирование и Messages mount
+        assert paths == [
+            "/sse", "/mcp", "/metrics", "/debug/profile", "/debug/memory",
+            "/messages",
+        ]
 
     def test_mcp_server_creation(self):
         """Тест создания MCP сервера"""
         assert mcp is not None
-        assert mcp._server_name == "yandex-search"
+        assert mcp.name == "yandex-search"
 
     @pytest.mark.asyncio
     async def test_mcp_tools_registration(self):
         """Тест регистрации инструментов MCP"""
         # Получаем список доступных инструментов
-        tools = mcp._tools
+        tools = {tool.name: tool for tool in await mcp.list_tools()}
         
         # Проверяем, что search_web зарегистрирован
         assert "search_web" in tools
         
         # Проверяем описание инструмента
         search_tool = tools["search_web"]
-        assert search_tool is not None
+        assert search_tool.description
 
     def test_starlette_routes(self):
         """Тест настройки маршрутов Starlette"""
@@ -66,13 +71,12 @@ class TestIntegration:
     @pytest.mark.asyncio
     async def test_mcp_tool_parameters(self):
         """Тест параметров MCP инструментов"""
-        tools = mcp._tools
-        search_tool = tools.get("search_web")
+        tools = {tool.name: tool for tool in await mcp.list_tools()}
+        search_tool = tools["search_web"]
         
-        if search_tool:
-            # Проверяем, что инструмент имеет правильные параметры
-            # Это зависит от внутренней реализации FastMCP
-            assert callable(search_tool)
+        # Проверяем, что инструмент имеет правильные параметры
+        properties = search_tool.inputSchema["properties"]
+        assert {"query", "page_size", "page_number"} <= set(properties)
 
     def test_docker_port_configuration(self):
         """Тест конфигурации порта для Docker"""
@@ -80,7 +84,7 @@ class TestIntegration:
         # Сейчас просто проверяем, что порт задан в коде
         with open('server.py', 'r') as f:
             server_content = f.read()
-            assert '8003' in server_content
+            assert '8006' in server_content
 
     @pytest.mark.asyncio  
     async def test_error_handling_initialization(self):
@@ -95,11 +99,44 @@ class TestIntegration:
             # Проверяем, что API не инициализирован
             assert server.yandex_api is None or server.yandex_parser is None
 
-    def test_health_check_endpoints(self):
+    @pytest.mark.asyncio
+    async def test_health_check_endpoints(self):
         """Тест эндпоинтов для проверки здоровья"""
-        with TestClient(app) as client:
-            # Проверяем, что SSE эндпоинт доступен
-            # Примечание: это может потребовать специальной настройки для тестирования
-            response = client.get("/sse")
-            # SSE может возвращать разные коды в зависимости от настройки
-            assert response.status_code in [200, 405, 426]  # 426 для Upgrade Required 
\ No newline at end of file
+        # SSE поток не заканчивается сам: ждем только начала ответа
+        # (не дольше 5 секунд) и закрываем соединение
+        messages = []
+        started = asyncio.Event()
+        
+        async def receive():
+            await asyncio.Event().wait()
+        
+        async def send(message):
+            messages.append(message)
+            if message["type"] == "http.response.start":
+                started.set()
+        
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/sse",
+            "raw_path": b"/sse",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        task = asyncio.create_task(app(scope, receive, send))
+        try:
+            await asyncio.wait_for(started.wait(), timeout=5)
+        finally:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        
+        assert messages[0]["status"] == 200
+        headers = dict(messages[0]["headers"])
+        assert headers[b"content-type"].startswith(b"text/event-stream")
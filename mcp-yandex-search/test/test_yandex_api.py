@@ -50,8 +50,8 @@ class TestYandexSearchAPI:
                 'rawData': base64.b64encode(b'<xml>test</xml>').decode('utf-8')
             }
             
-            with patch('httpx.AsyncClient') as mock_client:
-                mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+                mock_client.return_value.post = AsyncMock(
                     return_value=mock_response
                 )
                 
@@ -73,8 +73,8 @@ class TestYandexSearchAPI:
             mock_response.status_code = 403
             mock_response.text = "Forbidden"
             
-            with patch('httpx.AsyncClient') as mock_client:
-                mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+                mock_client.return_value.post = AsyncMock(
                     return_value=mock_response
                 )
                 
@@ -95,14 +95,43 @@ class TestYandexSearchAPI:
             mock_response.is_success = True
             mock_response.json.return_value = {}
             
-            with patch('httpx.AsyncClient') as mock_client:
-                mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            with patch('server.get_http_client', return_value=AsyncMock()) as mock_client:
+                mock_client.return_value.post = AsyncMock(
                     return_value=mock_response
                 )
                 
                 with pytest.raises(Exception, match="No rawData in response"):
                     await api.search("test query")
 
+    @pytest.mark.asyncio
+    async def test_search_without_ssl_verification(self):
+        """Без проверки SSL клиент собирается через create_http_client"""
+        from mcp_common.http_client import create_http_client
+
+        def handler(request):
+            return httpx.Response(200, json={
+                'rawData': base64.b64encode(b'<xml>test</xml>').decode('utf-8')
+            })
+
+        def unverified_client(**kwargs):
+            return create_http_client(transport=httpx.MockTransport(handler))
+
+        with patch.dict(os.environ, {
+            'YANDEX_API_KEY': 'test-key',
+            'YANDEX_FOLDER_ID': 'test-folder',
+            'YANDEX_VERIFY_SSL': 'false'
+        }):
+            api = YandexSearchAPI()
+
+            with patch('server.get_http_client') as shared, \
+                 patch('server.create_http_client',
+                       side_effect=unverified_client) as factory:
+                result = await api.search("test query")
+
+        assert result == '<xml>test</xml>'
+        factory.assert_called_once_with(verify=False)
+        shared.assert_not_called()
+
 
 class TestYandexSearchParser:
     """Тесты для YandexSearchParser"""
@@ -0,0 +1,148 @@
+"""
+MCP Gateway - все MCP серверы коллекции в одном процессе.
+
+Каждый сервер (его Starlette приложение с SSE и streamable HTTP
+транспортами) монтируется под собственным префиксом пути, например:
+
+    /weather/sse            /weather/messages/      /weather/mcp
+    /wikipedia/sse          /wikipedia/messages/    /wikipedia/mcp
+
+Все серверы работают в одном event loop и делят общий пул HTTP
+соединений из mcp-common, поэтому вместо восьми интерпретаторов
+на узле запускается один.
+"""
+import importlib.util
+import os
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Mount
+
+from mcp_common.metrics import metrics_endpoint
+from mcp_common.profiling import profiling_routes
+from mcp_common.streamable import server_lifespan
+from mcp_common.workers import run_server
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+
+# Префикс пути -> папка сервера
+SERVERS: Dict[str, str] = {
+    "weather": "mcp-weather",
+    "search": "mcp-search",
+    "ip": "mcp-ip",
+    "ufc": "mcp-ufc",
+    "wikipedia": "mcp-wikipedia",
+    "yandex": "mcp-yandex-search",
+    "fetch": "mcp-fetch",
+    "artifact-registry": "mcp-artifact-registry",
+}
+
+
+def load_server(directory: str) -> ModuleType:
+    """
+    Импортирует server.py из папки сервера под уникальным именем модуля
+
+    Args:
+        directory: Папка сервера (например, "mcp-weather")
+
+    Returns:
+        Загруженный модуль сервера
+    """
+    server_dir = ROOT_DIR / directory
+    # Локальные пакеты сервера (api/, tools/ и т.п.) должны импортироваться
+    if str(server_dir) not in sys.path:
+        sys.path.append(str(server_dir))
+
+    module_name = f"{directory.replace('-', '_')}_server"
+    spec = importlib.util.spec_from_file_location(
+        module_name, server_dir / "server.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_enabled_servers() -> List[str]:
+    """
+    Возвращает префиксы серверов для запуска
+
+    Список задается переменной окружения MCP_GATEWAY_SERVERS
+    (через запятую), по умолчанию запускаются все серверы.
+    """
+    enabled = os.getenv("MCP_GATEWAY_SERVERS", "")
+    if not enabled.strip():
+        return list(SERVERS)
+
+    prefixes = [name.strip() for name in enabled.split(",") if name.strip()]
+    unknown = [name for name in prefixes if name not in SERVERS]
+    if unknown:
+        raise ValueError(
+            f"Неизвестные серверы в MCP_GATEWAY_SERVERS: {', '.join(unknown)}"
+        )
+    return prefixes
+
+
+def create_gateway(prefixes: List[str] = None) -> Starlette:
+    """
+    Создание Starlette приложения со всеми MCP серверами
+
+    Args:
+        prefixes: Префиксы серверов для монтирования (по умолчанию все)
+
+    Returns:
+        Starlette приложение шлюза
+    """
+    prefixes = prefixes if prefixes is not None else get_enabled_servers()
+    mounted: Dict[str, str] = {}
+    routes = []
+
+    for prefix in prefixes:
+        try:
+            module = load_server(SERVERS[prefix])
+        except Exception as e:
+            # Сервер без установленных зависимостей не должен ронять шлюз
+            print(f"⚠️ Сервер {prefix} не загружен: {e}")
+            continue
+        routes.append(Mount(f"/{prefix}", app=module.app))
+        mounted[prefix] = module.mcp.name
+
+    async def index(request: Request):
+        """Список смонтированных серверов и их endpoint"""
+        return JSONResponse({
+            prefix: {
+                "name": name,
+                "sse": f"/{prefix}/sse",
+                "messages": f"/{prefix}/messages/",
+                "mcp": f"/{prefix}/mcp",
+            }
+            for prefix, name in mounted.items()
+        })
+
+    routes.insert(0, Route("/", endpoint=index))
+    # Метрики всех серверов шлюза: они работают в одном процессе
+    routes.insert(1, Route("/metrics", endpoint=metrics_endpoint))
+    # Профилирование процесса шлюза (всех серверов сразу)
+    routes[2:2] = profiling_routes()
+    # Lifespan смонтированных приложений не выполняется: streamable HTTP
+    # транспорты всех серверов запускает шлюз
+    return Starlette(routes=routes, lifespan=server_lifespan)
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("MCP_GATEWAY_PORT", "8000"))
+    app = create_gateway()
+
+    print("🧩 Запуск MCP Gateway...")
+    print(f"📡 Шлюз доступен по адресу: http://localhost:{port}")
+    for route in app.routes:
+        if isinstance(route, Mount):
+            print(f"   • {route.path}/sse, {route.path}/mcp")
+
+    run_server(app, host="0.0.0.0", port=port)
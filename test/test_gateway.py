@@ -0,0 +1,74 @@
+"""
+Тесты MCP Gateway
+"""
+import pytest
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from server import create_gateway, get_enabled_servers, SERVERS
+
+
+class TestEnabledServers:
+    """Тесты выбора серверов для запуска"""
+
+    def test_all_servers_by_default(self, monkeypatch):
+        """Без MCP_GATEWAY_SERVERS запускаются все серверы"""
+        monkeypatch.delenv("MCP_GATEWAY_SERVERS", raising=False)
+
+        assert get_enabled_servers() == list(SERVERS)
+
+    def test_servers_from_env(self, monkeypatch):
+        """Список серверов читается из переменной окружения"""
+        monkeypatch.setenv("MCP_GATEWAY_SERVERS", "weather, fetch")
+
+        assert get_enabled_servers() == ["weather", "fetch"]
+
+    def test_unknown_server(self, monkeypatch):
+        """Неизвестный сервер приводит к ошибке"""
+        monkeypatch.setenv("MCP_GATEWAY_SERVERS", "weather,unknown")
+
+        with pytest.raises(ValueError, match="unknown"):
+            get_enabled_servers()
+
+
+class TestGateway:
+    """Тесты приложения шлюза"""
+
+    def test_servers_mounted_under_prefix(self):
+        """Каждый сервер монтируется под своим префиксом"""
+        app = create_gateway(["weather", "fetch"])
+
+        mounts = [route.path for route in app.routes if isinstance(route, Mount)]
+        assert mounts == ["/weather", "/fetch"]
+
+    def test_index(self):
+        """Корневой маршрут перечисляет смонтированные серверы"""
+        app = create_gateway(["weather"])
+
+        with TestClient(app) as client:
+            response = client.get("/")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "weather": {
+                "name": "weather",
+                "sse": "/weather/sse",
+                "messages": "/weather/messages/",
+                "mcp": "/weather/mcp",
+            }
+        }
+
+    def test_streamable_http(self):
+        """Streamable HTTP транспорт смонтированного сервера запускает шлюз"""
+        app = create_gateway(["weather"])
+
+        with TestClient(app) as client:
+            response = client.post(
+                "/weather/mcp",
+                json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                headers={"accept": "application/json, text/event-stream"},
+            )
+
+        assert response.status_code == 200
+        tools = [tool["name"] for tool in response.json()["result"]["tools"]]
+        assert "get_today_weather" in tools
@@ -0,0 +1,83 @@
+"""
+Тесты сводки и сравнения результатов нагрузочного теста
+"""
+import pytest
+
+from benchmarks.load import SCENARIOS, Sample, compare, percentile, summarize
+from server import SERVERS
+
+
+def result(rps: float, p95: float, per_session_kb: float = 100.0) -> dict:
+    """Минимальный результат нагрузочного теста"""
+    block = {
+        "throughput_rps": rps,
+        "latency_ms": {"p50": 10.0, "p95": p95, "p99": p95 * 2},
+    }
+    return {
+        "total": block,
+        "servers": {"weather": block},
+        "memory": {"per_session_kb": per_session_kb},
+    }
+
+
+class TestSummary:
+    """Тесты сводки вызовов"""
+
+    def test_percentile(self):
+        """Перцентиль по ближайшему рангу"""
+        values = [i / 100 for i in range(1, 101)]
+
+        assert percentile(values, 0.5) == 0.5
+        assert percentile(values, 0.95) == 0.95
+        assert percentile(values, 0.99) == 0.99
+        assert percentile([], 0.5) == 0.0
+
+    def test_summarize(self):
+        """Вызовы группируются по серверам и инструментам"""
+        samples = [
+            Sample("weather", "get_today_weather", 0.1, True),
+            Sample("weather", "get_today_weather", 0.3, True),
+            Sample("weather", "get_weekly_forecast", 0.2, False),
+            Sample("ip", "ip_address_query", 0.05, True),
+        ]
+
+        summary = summarize(samples, duration=2.0)
+
+        assert summary["total"]["calls"] == 4
+        assert summary["total"]["throughput_rps"] == 2.0
+        weather = summary["servers"]["weather"]
+        assert weather["errors"] == 1
+        assert weather["tools"]["get_today_weather"]["latency_ms"]["max"] == 300.0
+
+    def test_scenarios_cover_gateway(self):
+        """Для каждого сервера шлюза есть смесь вызовов"""
+        assert set(SCENARIOS) == set(SERVERS)
+
+
+class TestCompare:
+    """Тесты сравнения с базовым результатом"""
+
+    def test_no_regressions(self):
+        """Изменения в пределах порога не считаются ухудшением"""
+        assert compare(result(100, 50), result(95, 54), threshold=0.1) == []
+
+    def test_latency_regression(self):
+        """Рост p95 больше порога - ухудшение"""
+        regressions = compare(result(100, 50), result(100, 60), threshold=0.1)
+
+        assert any("p95" in line for line in regressions)
+
+    def test_throughput_regression(self):
+        """Падение пропускной способности больше порога - ухудшение"""
+        regressions = compare(result(100, 50), result(80, 50), threshold=0.1)
+
+        assert "weather throughput_rps: 100 → 80 (+20% хуже)" in regressions
+
+    @pytest.mark.parametrize("kb, regressed", [(105.0, False), (150.0, True)])
+    def test_memory_regression(self, kb, regressed):
+        """Память на сессию сравнивается с тем же порогом"""
+        regressions = compare(
+            result(100, 50), result(100, 50, per_session_kb=kb), 0.1
+        )
+
+        assert bool(regressions) is regressed